@@ -0,0 +1,79 @@
+"""Count and time the SQL queries executed while handling a request
+
+QueryStats of the current request are kept in a context variable, so
+add_query_stats (a structlog processor) can attach them to every log line
+emitted while the request is handled, including django-structlog's
+request_finished.
+"""
+
+import contextlib
+import contextvars
+import time
+from dataclasses import dataclass
+
+SLOWEST_SQL_MAX_LENGTH = 500
+
+_query_stats = contextvars.ContextVar("query_stats", default=None)
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    duration: float = 0.0
+    slowest_duration: float = 0.0
+    slowest_sql: str = ""
+
+    @property
+    def duration_ms(self):
+        return round(self.duration * 1000, 3)
+
+    @property
+    def slowest_duration_ms(self):
+        return round(self.slowest_duration * 1000, 3)
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper, see connection.execute_wrapper()"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.duration += duration
+            if duration >= self.slowest_duration:
+                self.slowest_duration = duration
+                self.slowest_sql = sql[:SLOWEST_SQL_MAX_LENGTH]
+
+
+def current_query_stats():
+    """Return the QueryStats being tracked in the current context, if any"""
+    return _query_stats.get()
+
+
+@contextlib.contextmanager
+def track_queries():
+    """Track the queries executed by all database connections of this thread"""
+    # Imported here since this module is imported by settings
+    from django.db import connections
+
+    stats = QueryStats()
+    token = _query_stats.set(stats)
+    try:
+        with contextlib.ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+def add_query_stats(logger, method_name, event_dict):
+    """structlog processor adding the query stats of the current request"""
+    stats = _query_stats.get()
+    if stats is not None:
+        event_dict.setdefault("db_query_count", stats.count)
+        event_dict.setdefault("db_time_ms", stats.duration_ms)
+        if stats.slowest_sql:
+            event_dict.setdefault("db_slowest_sql", stats.slowest_sql)
+            event_dict.setdefault("db_slowest_time_ms", stats.slowest_duration_ms)
+    return event_dict
@@ -0,0 +1,108 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from thebook.benchmarks import runner
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / "benchmarks" / "baseline.json"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure wall time, queries and peak memory of the hot paths in a test "
+        "database, failing when they regress compared to the baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "benchmarks",
+            nargs="*",
+            help="Names of the benchmarks to run, defaults to all of them",
+        )
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[1000],
+            help="Numbers of transactions of the datasets (e.g. 1000 100000 1000000)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Number of timed runs of each benchmark, the best one is kept",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--baseline",
+            type=Path,
+            default=DEFAULT_BASELINE,
+            help="JSON file with the baseline measurements",
+        )
+        parser.add_argument(
+            "--update-baseline",
+            action="store_true",
+            help="Save the measurements as the new baseline instead of comparing",
+        )
+        parser.add_argument(
+            "--time-tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed wall time growth over the baseline (0.25 = 25%%)",
+        )
+        parser.add_argument(
+            "--memory-tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed peak memory growth over the baseline (0.25 = 25%%)",
+        )
+
+    def _write_measurement(self, key, measurement):
+        self.stdout.write(
+            f"{key}: {measurement.time * 1000:.1f} ms, "
+            f"{measurement.queries} queries, "
+            f"{measurement.peak_memory / 1024 / 1024:.2f} MiB"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            runner.get_benchmarks(options["benchmarks"])
+        except ValueError as err:
+            raise CommandError(err)
+
+        with runner.benchmark_database():
+            results = runner.run_benchmarks(
+                options["sizes"],
+                names=options["benchmarks"],
+                repeat=options["repeat"],
+                seed=options["seed"],
+                on_measurement=self._write_measurement,
+            )
+
+        baseline_path = options["baseline"]
+        baseline = {}
+        if baseline_path.exists():
+            baseline = runner.load_baseline(baseline_path)
+
+        if options["update_baseline"] or not baseline:
+            runner.save_baseline(baseline_path, {**baseline, **results})
+            self.stdout.write(
+                self.style.SUCCESS(f"Successfully saved baseline to {baseline_path}")
+            )
+            return
+
+        regressions = runner.find_regressions(
+            results,
+            baseline,
+            time_tolerance=options["time_tolerance"],
+            memory_tolerance=options["memory_tolerance"],
+        )
+        if regressions:
+            raise CommandError(
+                "Performance regressions:\n" + "\n".join(sorted(regressions))
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Successfully ran {len(results)} benchmarks")
+        )
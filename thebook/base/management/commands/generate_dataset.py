@@ -0,0 +1,77 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from thebook.benchmarks.dataset import TRANSACTIONS_PER_DAY
+from thebook.benchmarks.generator import generate
+from thebook.bookkeeping.models import Transaction
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a large synthetic dataset (bank accounts, transactions, members, "
+        "receivable fees, webhook payloads) and its statement files"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bank-accounts", type=int, default=5)
+        parser.add_argument(
+            "--years",
+            type=int,
+            default=5,
+            help="Years of transactions of each bank account",
+        )
+        parser.add_argument(
+            "--transactions-per-day",
+            type=int,
+            default=TRANSACTIONS_PER_DAY,
+            help="Transactions per day of each bank account",
+        )
+        parser.add_argument("--members", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--output-dir",
+            type=Path,
+            help="Directory to write OFX/CSV statements of the generated transactions",
+        )
+        parser.add_argument(
+            "--files-only",
+            action="store_true",
+            help="Only write the statement files, leaving the database untouched",
+        )
+
+    def handle(self, *args, **options):
+        if options["bank_accounts"] < 1 or options["years"] < 1:
+            raise CommandError("At least one bank account and one year are required")
+
+        if options["files_only"] and options["output_dir"] is None:
+            raise CommandError("--files-only requires --output-dir")
+
+        if not options["files_only"] and Transaction.objects.exists():
+            raise CommandError(
+                "Database already has transactions, generate the dataset in an "
+                "empty database (e.g. after running flush)"
+            )
+
+        generated = generate(
+            bank_accounts=options["bank_accounts"],
+            years=options["years"],
+            transactions_per_day=options["transactions_per_day"],
+            members=options["members"],
+            seed=options["seed"],
+            output_dir=options["output_dir"],
+            database=not options["files_only"],
+        )
+
+        for path in generated.files:
+            self.stdout.write(f"Written {path}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully generated {generated.transactions} transactions, "
+                f"{generated.documents} documents, {generated.members} members, "
+                f"{generated.receivable_fees} receivable fees, "
+                f"{generated.webhook_payloads} webhook payloads and "
+                f"{len(generated.files)} statement files"
+            )
+        )
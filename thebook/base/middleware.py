@@ -0,0 +1,68 @@
+import structlog
+from opentelemetry import trace
+
+from django.conf import settings
+
+from thebook.base.instrumentation import track_queries
+
+logger = structlog.get_logger(__name__)
+
+
+class QueryBudgetExceeded(Exception): ...
+
+
+def _query_budget(request):
+    resolver_match = getattr(request, "resolver_match", None)
+    if resolver_match is None:
+        return None
+    return settings.QUERY_BUDGETS.get(
+        resolver_match.view_name, settings.QUERY_BUDGET_DEFAULT
+    )
+
+
+class QueryInstrumentationMiddleware:
+    """Record the number and duration of the SQL queries of each request
+
+    Stats are added to the log lines of the request (see add_query_stats) and
+    to the current OpenTelemetry span. Requests executing more queries than
+    the budget of their URL name (settings.QUERY_BUDGETS) log a warning, or
+    raise QueryBudgetExceeded when settings.QUERY_BUDGET_RAISE is enabled
+    (e.g. in tests) so N+1 queries are caught before being deployed.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with track_queries() as stats:
+            response = self.get_response(request)
+
+        span = trace.get_current_span()
+        if span.is_recording():
+            span.set_attributes(
+                {
+                    "db.query_count": stats.count,
+                    "db.time_ms": stats.duration_ms,
+                    "db.slowest_sql": stats.slowest_sql,
+                    "db.slowest_time_ms": stats.slowest_duration_ms,
+                }
+            )
+
+        budget = _query_budget(request)
+        if budget is not None and stats.count > budget:
+            view_name = request.resolver_match.view_name
+            logger.warning(
+                "base.middleware.query_budget_exceeded",
+                view_name=view_name,
+                path=request.path,
+                db_query_count=stats.count,
+                db_query_budget=budget,
+                db_time_ms=stats.duration_ms,
+                db_slowest_sql=stats.slowest_sql,
+            )
+            if settings.QUERY_BUDGET_RAISE:
+                raise QueryBudgetExceeded(
+                    f"{view_name} executed {stats.count} queries (budget: {budget})"
+                )
+
+        return response
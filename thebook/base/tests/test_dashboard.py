@@ -86,3 +86,32 @@ def test_dashboard_context_has_number_of_active_memberships(db):
     context = _get_dashboard_context()
 
     assert context["active_memberships"] == 4
+
+
+@pytest.mark.freeze_time("2024-09-15")
+def test_dashboard_bank_accounts_summary_is_cached_until_transactions_change(
+    db, django_assert_num_queries
+):
+    bank_account = BankAccount.objects.create(name="Bank Account 1")
+    baker.make(
+        Transaction,
+        bank_account=bank_account,
+        date=datetime.date(2024, 9, 1),
+        amount=Decimal("12.53"),
+    )
+
+    assert _get_dashboard_context()["balance"] == Decimal("12.53")
+
+    # Bank account ids, data versions and active memberships count
+    with django_assert_num_queries(3):
+        context = _get_dashboard_context()
+    assert context["balance"] == Decimal("12.53")
+
+    baker.make(
+        Transaction,
+        bank_account=bank_account,
+        date=datetime.date(2024, 9, 2),
+        amount=Decimal("10"),
+    )
+
+    assert _get_dashboard_context()["balance"] == Decimal("22.53")
@@ -0,0 +1,129 @@
+from unittest import mock
+
+import pytest
+import structlog
+from model_bakery import baker
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from thebook.base.instrumentation import (
+    QueryStats,
+    add_query_stats,
+    current_query_stats,
+    track_queries,
+)
+from thebook.base.middleware import QueryBudgetExceeded
+
+
+@pytest.fixture
+def user():
+    return baker.make(get_user_model())
+
+
+def test_track_queries_counts_and_times_queries(db):
+    with track_queries() as stats:
+        assert current_query_stats() is stats
+        list(get_user_model().objects.all())
+        get_user_model().objects.count()
+
+    assert current_query_stats() is None
+    assert stats.count == 2
+    assert stats.duration > 0
+    assert stats.duration_ms >= stats.slowest_duration_ms
+    assert "SELECT" in stats.slowest_sql
+
+
+def test_add_query_stats_processor(db):
+    with track_queries():
+        get_user_model().objects.count()
+        event_dict = add_query_stats(None, "info", {"event": "request_finished"})
+
+    assert event_dict["event"] == "request_finished"
+    assert event_dict["db_query_count"] == 1
+    assert event_dict["db_time_ms"] >= 0
+    assert "COUNT" in event_dict["db_slowest_sql"]
+    assert event_dict["db_slowest_time_ms"] >= 0
+
+
+def test_add_query_stats_processor_outside_request():
+    assert add_query_stats(None, "info", {"event": "something"}) == {
+        "event": "something"
+    }
+
+
+def test_add_query_stats_processor_without_queries():
+    with track_queries():
+        event_dict = add_query_stats(None, "info", {"event": "something"})
+
+    assert event_dict == {"event": "something", "db_query_count": 0, "db_time_ms": 0}
+
+
+def test_slowest_sql_is_truncated():
+    stats = QueryStats()
+
+    stats(mock.Mock(), "SELECT " + "x" * 1000, None, False, {})
+
+    assert stats.count == 1
+    assert len(stats.slowest_sql) == 500
+
+
+def test_query_stats_are_added_to_the_current_span(db, client, user):
+    client.force_login(user)
+    span = mock.Mock()
+    span.is_recording.return_value = True
+
+    with mock.patch(
+        "thebook.base.middleware.trace.get_current_span", return_value=span
+    ):
+        client.get(reverse("base:dashboard"))
+
+    attributes = span.set_attributes.call_args.args[0]
+    assert attributes["db.query_count"] > 0
+    assert attributes["db.time_ms"] > 0
+    assert attributes["db.slowest_sql"]
+
+
+def test_exceeded_query_budget_raises_in_tests(db, client, user, settings):
+    settings.QUERY_BUDGETS = {"base:dashboard": 1}
+    client.force_login(user)
+
+    with pytest.raises(QueryBudgetExceeded):
+        client.get(reverse("base:dashboard"))
+
+
+def test_exceeded_query_budget_logs_warning(db, client, user, settings):
+    settings.QUERY_BUDGETS = {"base:dashboard": 1}
+    settings.QUERY_BUDGET_RAISE = False
+    client.force_login(user)
+
+    with structlog.testing.capture_logs() as logs:
+        response = client.get(reverse("base:dashboard"))
+
+    assert response.status_code == 200
+    warnings = [
+        log for log in logs if log["event"] == "base.middleware.query_budget_exceeded"
+    ]
+    assert len(warnings) == 1
+    assert warnings[0]["log_level"] == "warning"
+    assert warnings[0]["view_name"] == "base:dashboard"
+    assert warnings[0]["db_query_budget"] == 1
+    assert warnings[0]["db_query_count"] > 1
+
+
+def test_default_query_budget(db, client, user, settings):
+    settings.QUERY_BUDGETS = {}
+    settings.QUERY_BUDGET_DEFAULT = 1
+    client.force_login(user)
+
+    with pytest.raises(QueryBudgetExceeded):
+        client.get(reverse("base:dashboard"))
+
+
+def test_within_query_budget(db, client, user, settings):
+    settings.QUERY_BUDGETS = {"base:dashboard": 100}
+    client.force_login(user)
+
+    response = client.get(reverse("base:dashboard"))
+
+    assert response.status_code == 200
@@ -14,7 +14,7 @@ def _get_dashboard_context():
     overall_balance = Decimal("0")
 
     today = datetime.date.today()
-    bank_accounts_summary = BankAccount.objects.filter(active=True).summary(
+    bank_accounts_summary = BankAccount.objects.filter(active=True).cached_summary(
         year=today.year, month=today.month
     )
     for bank_account in bank_accounts_summary:
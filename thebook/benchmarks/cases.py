@@ -0,0 +1,134 @@
+import io
+
+from django.test import Client
+from django.urls import reverse
+
+from thebook.benchmarks.dataset import (
+    bradesco_ofx,
+    cora_credit_card_csv,
+    cora_ofx,
+    paypal_csv,
+    transaction_rows,
+)
+from thebook.benchmarks.runner import benchmark
+from thebook.bookkeeping.importers import import_transactions
+from thebook.bookkeeping.models import BankAccount, Transaction
+from thebook.bookkeeping.reference_data import reference_data
+from thebook.bookkeeping.views import (
+    _csv_bank_account_transactions,
+    _get_bank_account_transactions_context,
+)
+from thebook.integrations.cora.constants import CORA_BANK_ACCOUNT
+from thebook.utils.ofxparse import OfxParser
+
+# Imported rows don't collide with the references of the seeded transactions
+IMPORTED_REFERENCE_PREFIX = "I"
+
+
+def _consume(response):
+    for _ in response.streaming_content:
+        pass
+
+
+def _imported_rows(dataset):
+    return list(
+        transaction_rows(dataset.size, seed=1, prefix=IMPORTED_REFERENCE_PREFIX)
+    )
+
+
+@benchmark("bank_account_summary")
+def bank_account_summary(dataset):
+    return lambda: list(BankAccount.objects.summary(year=dataset.end_date.year))
+
+
+@benchmark("bank_account_with_summary")
+def bank_account_with_summary(dataset):
+    start_date, end_date = dataset.start_date, dataset.end_date
+    return lambda: list(BankAccount.objects.with_summary(start_date, end_date))
+
+
+@benchmark("bank_account_transactions_csv")
+def bank_account_transactions_csv(dataset):
+    def _run():
+        context = _get_bank_account_transactions_context(dataset.bank_account)
+        _consume(_csv_bank_account_transactions(context))
+
+    return _run
+
+
+def _cash_book_client(dataset):
+    client = Client()
+    client.force_login(dataset.user)
+    return client
+
+
+@benchmark("cash_book_report")
+def cash_book_report(dataset):
+    client = _cash_book_client(dataset)
+    params = {
+        "start_date": dataset.start_date.isoformat(),
+        "end_date": dataset.end_date.isoformat(),
+    }
+    return lambda: client.get(reverse("bookkeeping:report-cash-book"), params)
+
+
+@benchmark("cash_book_report_csv")
+def cash_book_report_csv(dataset):
+    client = _cash_book_client(dataset)
+    params = {
+        "start_date": dataset.start_date.isoformat(),
+        "end_date": dataset.end_date.isoformat(),
+        "format": "csv",
+    }
+    return lambda: _consume(client.get(reverse("bookkeeping:report-cash-book"), params))
+
+
+@benchmark("categorize")
+def categorize(dataset):
+    return lambda: Transaction.objects.filter(category__isnull=True).categorize()
+
+
+@benchmark("find_match_for")
+def find_match_for(dataset):
+    return lambda: Transaction.objects.find_match_for(dataset.receivable_fee)
+
+
+@benchmark("ofxparse")
+def ofxparse(dataset):
+    content = bradesco_ofx(_imported_rows(dataset))
+    return lambda: OfxParser.parse(io.BytesIO(content))
+
+
+def _import(content, file_type, bank_account, dataset):
+    def _run():
+        import_transactions(
+            io.BytesIO(content), file_type, bank_account, dataset.user, None, None
+        )
+
+    return _run
+
+
+@benchmark("import_paypal_csv")
+def import_paypal_csv(dataset):
+    content = paypal_csv(_imported_rows(dataset))
+    bank_account = reference_data.bank_account("PayPal")
+    return _import(content, "csv", bank_account, dataset)
+
+
+@benchmark("import_bradesco_ofx")
+def import_bradesco_ofx(dataset):
+    content = bradesco_ofx(_imported_rows(dataset))
+    return _import(content, "ofx", dataset.bank_account, dataset)
+
+
+@benchmark("import_cora_ofx")
+def import_cora_ofx(dataset):
+    content = cora_ofx(_imported_rows(dataset))
+    bank_account = reference_data.bank_account(CORA_BANK_ACCOUNT)
+    return _import(content, "ofx", bank_account, dataset)
+
+
+@benchmark("import_cora_credit_card_csv")
+def import_cora_credit_card_csv(dataset):
+    content = cora_credit_card_csv(_imported_rows(dataset))
+    return _import(content, "csv_cora_credit_card", dataset.bank_account, dataset)
@@ -0,0 +1,408 @@
+"""Deterministic synthetic transactions and statement files for the benchmarks"""
+
+import csv
+import datetime
+import io
+import itertools
+import random
+from dataclasses import dataclass
+from decimal import Decimal
+
+from taggit.models import Tag, TaggedItem
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+from thebook.bookkeeping.data_version import bump_data_version
+from thebook.bookkeeping.importers.constants import (
+    ACCOUNTANT,
+    BANK_ACCOUNT_TRANSFER,
+    BANK_FEES,
+    MEMBERSHIP_FEE,
+    TAXES,
+)
+from thebook.bookkeeping.importers.csv import get_categories
+from thebook.bookkeeping.models import CategoryMatchRule, DailyBalance, Transaction
+from thebook.bookkeeping.reference_data import reference_data
+from thebook.integrations.cora.constants import CORA_BANK_ACCOUNT
+
+START_DATE = datetime.date(2020, 1, 1)
+TRANSACTIONS_PER_DAY = 20
+MEMBERSHIP_FEE_AMOUNT = Decimal("85.00")
+
+PAYERS = [
+    "ANA SOUZA",
+    "BRUNO LIMA",
+    "CARLA PEREIRA",
+    "DANIEL COSTA",
+    "EDUARDA ALVES",
+    "FELIPE ROCHA",
+    "GABRIELA MARTINS",
+    "HENRIQUE SANTOS",
+]
+
+# (weight, description, lowest amount, highest amount)
+DESCRIPTIONS = [
+    (40, "PIX RECEBIDO - {payer}", Decimal("10"), Decimal("200")),
+    (20, "MENSALIDADE LHC - {payer}", MEMBERSHIP_FEE_AMOUNT, MEMBERSHIP_FEE_AMOUNT),
+    (10, "DOACAO RECEBIDA DE {payer}", Decimal("5"), Decimal("500")),
+    (10, "TARIFA BANCARIA - PIX", Decimal("-5"), Decimal("-0.5")),
+    (8, "PAGTO ELETRON COBRANCA ALUGUEL", Decimal("-2500"), Decimal("-1500")),
+    (6, "PAGTO ELETRON COBRANCA CONTABILIDADE", Decimal("-600"), Decimal("-400")),
+    (4, "DARF - IMPOSTOS FEDERAIS", Decimal("-300"), Decimal("-50")),
+    (2, "TRANSFERENCIA ENTRE CONTAS", Decimal("-1000"), Decimal("1000")),
+]
+
+CATEGORY_MATCH_RULES = [
+    (".*ALUGUEL.*", ACCOUNTANT),
+    (".*CONTABILIDADE.*", ACCOUNTANT),
+    (".*TARIFA BANCARIA.*", BANK_FEES),
+    (".*DARF.*", TAXES),
+    (".*TRANSFERENCIA ENTRE CONTAS.*", BANK_ACCOUNT_TRANSFER),
+]
+
+TAGS = ["evento", "infraestrutura", "associados"]
+TAGGED_EVERY = 10
+
+
+@dataclass
+class TransactionRow:
+    reference: str
+    date: datetime.date
+    description: str
+    amount: Decimal
+
+
+@dataclass
+class Dataset:
+    size: int
+    # Active user, that can log in
+    user: object
+    bank_account: object
+    receivable_fee: object
+    start_date: datetime.date
+    end_date: datetime.date
+
+
+def transaction_rows(
+    size,
+    seed=0,
+    prefix="T",
+    start_date=START_DATE,
+    transactions_per_day=TRANSACTIONS_PER_DAY,
+    payers=PAYERS,
+):
+    """Yield size transactions spread over size / transactions_per_day days"""
+    rng = random.Random(seed)
+    weights = [weight for weight, *_ in DESCRIPTIONS]
+    days = max(1, size // transactions_per_day)
+
+    for index in range(size):
+        _, description, lowest, highest = rng.choices(DESCRIPTIONS, weights)[0]
+        cents = rng.randint(int(lowest * 100), int(highest * 100))
+        yield TransactionRow(
+            reference=f"{prefix}{index:09d}",
+            date=start_date + datetime.timedelta(days=index * days // size),
+            description=description.format(payer=rng.choice(payers)),
+            amount=Decimal(cents) / 100,
+        )
+
+
+def create_category_match_rules(categories):
+    return CategoryMatchRule.objects.bulk_create(
+        CategoryMatchRule(pattern=pattern, category=categories[category])
+        for pattern, category in CATEGORY_MATCH_RULES
+    )
+
+
+def create_transactions(rows, bank_account, user, categories, on_batch=None):
+    """Write the rows with bulk_create in batches of IMPORT_BATCH_SIZE, tagging
+    one of each TAGGED_EVERY transactions, and return the number of rows written
+
+    on_batch is called with the created Transaction objects of each batch. The
+    daily balances aren't refreshed after each batch (see rebuild_balances).
+    """
+    tags = [Tag.objects.get_or_create(name=name)[0] for name in TAGS]
+    content_type = ContentType.objects.get_for_model(Transaction)
+
+    rows = iter(rows)
+    written = 0
+    while batch := list(itertools.islice(rows, settings.IMPORT_BATCH_SIZE)):
+        transactions = Transaction._base_manager.bulk_create(
+            Transaction(
+                reference=row.reference,
+                date=row.date,
+                description=row.description,
+                amount=row.amount,
+                bank_account=bank_account,
+                category=(
+                    categories[MEMBERSHIP_FEE]
+                    if row.description.startswith("MENSALIDADE")
+                    else None
+                ),
+                created_by=user,
+            )
+            for row in batch
+        )
+        TaggedItem.objects.bulk_create(
+            TaggedItem(
+                content_type=content_type,
+                object_id=transaction.id,
+                tag=tags[position // TAGGED_EVERY % len(tags)],
+            )
+            for position, transaction in enumerate(transactions, start=written)
+            if position % TAGGED_EVERY == 0
+        )
+        if on_batch is not None:
+            on_batch(transactions)
+        written += len(transactions)
+
+    return written
+
+
+def rebuild_balances():
+    """Rebuild the daily balances (and change the data version) of all bank
+    accounts once the transactions were written by create_transactions"""
+    daily_balances = DailyBalance.objects.rebuild()
+    bump_data_version(
+        {daily_balance.bank_account_id for daily_balance in daily_balances}
+    )
+
+
+@transaction.atomic
+def seed_database(size, seed=0):
+    """Create size transactions (and the rules and memberships to process them)
+    returning the Dataset used by the benchmarks"""
+    from thebook.members.models import (
+        FeeIntervals,
+        Member,
+        Membership,
+        ReceivableFee,
+    )
+
+    automation_user = reference_data.automation_user()
+    user = get_user_model().objects.create_user(
+        email="benchmark@lhc.net.br", first_name="Benchmark"
+    )
+    bank_account = reference_data.bank_account("Bradesco")
+    reference_data.bank_account(CORA_BANK_ACCOUNT)
+    categories = get_categories()
+
+    create_category_match_rules(categories)
+    create_transactions(
+        transaction_rows(size, seed), bank_account, automation_user, categories
+    )
+    rebuild_balances()
+
+    end_date = START_DATE + datetime.timedelta(
+        days=max(1, size // TRANSACTIONS_PER_DAY)
+    )
+
+    # Creates the ReceivableFeeTransactionMatchRule of the member name
+    member = Member.objects.create(name=PAYERS[0].title(), user=user)
+    membership = Membership.objects.create(
+        member=member,
+        start_date=START_DATE,
+        membership_fee_amount=MEMBERSHIP_FEE_AMOUNT,
+        payment_interval=FeeIntervals.MONTHLY,
+    )
+    receivable_fee = ReceivableFee.objects.create(
+        membership=membership,
+        start_date=START_DATE,
+        due_date=START_DATE,
+        amount=MEMBERSHIP_FEE_AMOUNT,
+    )
+
+    return Dataset(
+        size=size,
+        user=user,
+        bank_account=bank_account,
+        receivable_fee=receivable_fee,
+        start_date=START_DATE,
+        end_date=end_date,
+    )
+
+
+@dataclass(frozen=True)
+class StatementFormat:
+    """Statement file, accepted by import_transactions as file_type, built from
+    rows by the lines generator"""
+
+    file_type: str
+    suffix: str
+    encoding: str
+    lines: object
+
+    def encode(self, rows):
+        return "".join(self.lines(rows)).encode(self.encoding)
+
+    def write(self, path, rows):
+        """Write the statement to path a line at a time"""
+        with open(path, "w", encoding=self.encoding, newline="") as statement_file:
+            statement_file.writelines(self.lines(rows))
+
+
+def _ofx_amount(amount, decimal_separator="."):
+    return f"{amount:.2f}".replace(".", decimal_separator)
+
+
+def _bradesco_ofx_lines(rows):
+    yield (
+        "OFXHEADER:100\nDATA:OFXSGML\nVERSION:102\nSECURITY:NONE\n"
+        "ENCODING:USASCII\nCHARSET:1252\nCOMPRESSION:NONE\nOLDFILEUID:NONE\n"
+        "NEWFILEUID:NONE\n\n<OFX>\n<SIGNONMSGSRSV1>\n<SONRS>\n<STATUS>\n<CODE>0\n"
+        "<SEVERITY>INFO\n</STATUS>\n<DTSERVER>20240820120000\n<LANGUAGE>POR\n"
+        "</SONRS>\n</SIGNONMSGSRSV1>\n<BANKMSGSRSV1>\n<STMTTRNRS>\n<TRNUID>1001\n"
+        "<STATUS>\n<CODE>0\n<SEVERITY>INFO\n</STATUS>\n<STMTRS>\n<CURDEF>BRL\n"
+        "<BANKACCTFROM>\n<BANKID>0237\n<ACCTID>479984\n<ACCTTYPE>CHECKING\n"
+        "</BANKACCTFROM>\n<BANKTRANLIST>\n<DTSTART>20240820120000\n"
+        "<DTEND>20240820120000\n"
+    )
+    for row in rows:
+        yield (
+            f"<STMTTRN>\n<TRNTYPE>{'CREDIT' if row.amount >= 0 else 'DEBIT'}\n"
+            f"<DTPOSTED>{row.date:%Y%m%d}120000\n"
+            f"<TRNAMT>{_ofx_amount(row.amount, ',')}\n"
+            f"<FITID>{row.reference}\n<MEMO>{row.description}\n</STMTTRN>\n"
+        )
+    yield (
+        "</BANKTRANLIST>\n<LEDGERBAL>\n<BALAMT>0,00\n<DTASOF>00000000\n"
+        "</LEDGERBAL>\n</STMTRS>\n</STMTTRNRS>\n</BANKMSGSRSV1>\n</OFX>\n"
+    )
+
+
+def _cora_ofx_lines(rows):
+    yield (
+        "OFXHEADER:100\nDATA:OFXSGML\nVERSION:102\nSECURITY:NONE\n"
+        "ENCODING:UTF-8\nCOMPRESSION:NONE\nOLDFILEUID:NONE\nNEWFILEUID:NONE\n"
+        "<OFX>\n<SIGNONMSGSRSV1>\n<SONRS>\n<STATUS>\n<CODE>0</CODE>\n"
+        "<SEVERITY>INFO</SEVERITY>\n</STATUS>\n"
+        "<DTSERVER>20240820224250[0:GMT]</DTSERVER>\n<LANGUAGE>POR</LANGUAGE>\n"
+        "<FI>\n<ORG>Cora SCD SA</ORG>\n<FID>0403</FID>\n</FI>\n</SONRS>\n"
+        "</SIGNONMSGSRSV1>\n<BANKMSGSRSV1>\n<STMTTRNRS>\n<TRNUID>1</TRNUID>\n"
+        "<STATUS>\n<CODE>0</CODE>\n<SEVERITY>INFO</SEVERITY>\n</STATUS>\n"
+        "<STMTRS>\n<CURDEF>BRL</CURDEF>\n<BANKACCTFROM>\n<BANKID>0403</BANKID>\n"
+        "<BRANCHID>1</BRANCHID>\n<ACCTID>40656948</ACCTID>\n"
+        "<ACCTTYPE>CHECKING</ACCTTYPE>\n</BANKACCTFROM>\n<BANKTRANLIST>\n"
+        "<DTSTART>20240801000000[0:GMT]</DTSTART>\n"
+        "<DTEND>20240831000000[0:GMT]</DTEND>\n"
+    )
+    for row in rows:
+        yield (
+            f"<STMTTRN>\n<TRNTYPE>{'CREDIT' if row.amount >= 0 else 'DEBIT'}"
+            f"</TRNTYPE>\n<DTPOSTED>{row.date:%Y%m%d}000000[0:GMT]</DTPOSTED>\n"
+            f"<TRNAMT>{_ofx_amount(row.amount)}</TRNAMT>\n"
+            f"<FITID>{row.reference}</FITID>\n<MEMO>{row.description}</MEMO>\n"
+            "</STMTTRN>\n"
+        )
+    yield (
+        "</BANKTRANLIST>\n<LEDGERBAL>\n<BALAMT>0.00</BALAMT>\n"
+        "<DTASOF>20240831000000[0:GMT]</DTASOF>\n</LEDGERBAL>\n</STMTRS>\n"
+        "</STMTTRNRS>\n</BANKMSGSRSV1>\n</OFX>\n"
+    )
+
+
+def _csv_amount(amount):
+    return f"{amount:.2f}".replace(".", ",")
+
+
+def _csv_lines(records, **fmtparams):
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator="\n", **fmtparams)
+    for record in records:
+        writer.writerow(record)
+        yield output.getvalue()
+        output.seek(0)
+        output.truncate()
+
+
+def _paypal_csv_lines(rows):
+    header = [
+        "Data",
+        "Descrição",
+        "Nome",
+        "Moeda",
+        "Bruto ",
+        "Tarifa ",
+        "ID da transação",
+        "Nome do banco",
+    ]
+    records = (
+        [
+            f"{row.date:%d/%m/%Y}",
+            "Pagamento de doação",
+            row.description,
+            "BRL",
+            _csv_amount(abs(row.amount)),
+            _csv_amount(-(abs(row.amount) * Decimal("0.05")).quantize(Decimal("0.01"))),
+            row.reference,
+            "",
+        ]
+        for row in rows
+    )
+    return _csv_lines(itertools.chain([header], records), quoting=csv.QUOTE_ALL)
+
+
+def _cora_credit_card_csv_lines(rows):
+    header = [
+        "Data",
+        "Nome no Cartão",
+        "Final do Cartão",
+        "Categoria",
+        "Descrição",
+        "Moeda",
+        "Valor Moeda Local",
+        "Conversão Dólar na Data",
+        "Valor em Dólar",
+        "IOF",
+        "Valor",
+    ]
+    records = (
+        [
+            f"{row.date:%d/%m/%Y}",
+            "ACCOUNT HOLDER",
+            "8888",
+            "Lançamentos",
+            row.description,
+            "BRL",
+            _csv_amount(abs(row.amount)),
+            "",
+            "",
+            "0,00",
+            _csv_amount(abs(row.amount)),
+        ]
+        for row in rows
+    )
+    return _csv_lines(itertools.chain([header], records))
+
+
+STATEMENT_FORMATS = {
+    # Bradesco (SGML) OFX statement
+    "bradesco_ofx": StatementFormat("ofx", ".ofx", "cp1252", _bradesco_ofx_lines),
+    # Cora (XML like) OFX statement
+    "cora_ofx": StatementFormat("ofx", ".ofx", "utf-8", _cora_ofx_lines),
+    # PayPal activity CSV export with a donation of each row
+    "paypal_csv": StatementFormat("csv", ".csv", "utf-8-sig", _paypal_csv_lines),
+    # Cora credit card invoice CSV with a purchase of each row
+    "cora_credit_card_csv": StatementFormat(
+        "csv_cora_credit_card", ".csv", "utf-8", _cora_credit_card_csv_lines
+    ),
+}
+
+
+def bradesco_ofx(rows):
+    return STATEMENT_FORMATS["bradesco_ofx"].encode(rows)
+
+
+def cora_ofx(rows):
+    return STATEMENT_FORMATS["cora_ofx"].encode(rows)
+
+
+def paypal_csv(rows):
+    return STATEMENT_FORMATS["paypal_csv"].encode(rows)
+
+
+def cora_credit_card_csv(rows):
+    return STATEMENT_FORMATS["cora_credit_card_csv"].encode(rows)
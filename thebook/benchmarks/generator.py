@@ -0,0 +1,480 @@
+"""Generate a production-sized synthetic database, and statement files of the
+same transactions, to profile views and importers locally
+
+Everything is derived from the seed, so the same options always generate the
+same rows. Rows are generated lazily and written with bulk_create in batches
+of IMPORT_BATCH_SIZE, so memory doesn't grow with the number of transactions.
+bulk_create doesn't send signals: no e-mails are sent for the memberships and
+their match rules are created here instead of by Membership.save().
+"""
+
+import datetime
+import itertools
+import random
+from dataclasses import dataclass, field
+from decimal import Decimal
+from pathlib import Path
+
+import orjson
+import structlog
+from dateutil.relativedelta import relativedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.db import transaction
+from django.utils.text import slugify
+
+from thebook.benchmarks.dataset import (
+    PAYERS,
+    START_DATE,
+    STATEMENT_FORMATS,
+    TRANSACTIONS_PER_DAY,
+    create_category_match_rules,
+    create_transactions,
+    rebuild_balances,
+    transaction_rows,
+)
+from thebook.bookkeeping.importers.constants import BANK_FEES, MEMBERSHIP_FEE
+from thebook.bookkeeping.importers.csv import get_categories
+from thebook.bookkeeping.models import Document, Transaction
+from thebook.bookkeeping.reference_data import reference_data
+from thebook.integrations.cora.constants import (
+    CORA_BANK_ACCOUNT,
+    CORA_CREDIT_CARD_BANK_ACCOUNT,
+)
+from thebook.members.models import (
+    FeeIntervals,
+    FeePaymentStatus,
+    Member,
+    Membership,
+    PaymentMethod,
+    ReceivableFee,
+    ReceivableFeeTransactionMatchRule,
+)
+from thebook.webhooks.constants import ProcessingStatus
+from thebook.webhooks.models import OpenPixWebhookPayload, PaypalWebhookPayload
+from thebook.webhooks.openpix.services import calculate_openpix_fee
+
+logger = structlog.get_logger(__name__)
+
+# (name, statement format of its transactions) of the first bank accounts,
+# the following ones are named "Conta <number>" and have Bradesco statements
+BANK_ACCOUNTS = [
+    ("Bradesco", "bradesco_ofx"),
+    (CORA_BANK_ACCOUNT, "cora_ofx"),
+    (settings.PAYPAL_BANK_ACCOUNT, "paypal_csv"),
+    (CORA_CREDIT_CARD_BANK_ACCOUNT, "cora_credit_card_csv"),
+    # Transactions of OpenPix are only received by webhooks
+    (settings.OPENPIX_BANK_ACCOUNT, None),
+]
+
+FIRST_NAMES = [
+    "Ana",
+    "Bruno",
+    "Carla",
+    "Daniel",
+    "Eduarda",
+    "Felipe",
+    "Gabriela",
+    "Henrique",
+    "Isabela",
+    "João",
+    "Larissa",
+    "Marcelo",
+    "Natália",
+    "Otávio",
+    "Patrícia",
+    "Rafael",
+]
+LAST_NAMES = [
+    "Souza",
+    "Lima",
+    "Pereira",
+    "Costa",
+    "Alves",
+    "Rocha",
+    "Martins",
+    "Santos",
+    "Oliveira",
+    "Ferreira",
+    "Ribeiro",
+    "Carvalho",
+    "Gomes",
+    "Barbosa",
+    "Araújo",
+    "Mendes",
+]
+
+# (weight, value) of the membership options
+FEE_AMOUNTS = [(60, Decimal("85.00")), (25, Decimal("50.00")), (15, Decimal("120.00"))]
+PAYMENT_INTERVALS = [
+    (70, FeeIntervals.MONTHLY),
+    (10, FeeIntervals.QUARTERLY),
+    (5, FeeIntervals.BIANNUALLY),
+    (15, FeeIntervals.ANNUALLY),
+]
+PAYMENT_METHODS = [
+    (50, PaymentMethod.PAYPAL),
+    (30, PaymentMethod.PIX),
+    (20, PaymentMethod.PIX_RECURRING),
+]
+
+ACTIVE_MEMBERSHIPS_RATIO = 0.85
+PAID_RECEIVABLE_FEES_RATIO = 0.9
+PAYPAL_FEE_RATE = Decimal("0.0549")
+DOCUMENTED_EVERY = 20
+
+
+@dataclass
+class GeneratedDataset:
+    bank_accounts: int = 0
+    transactions: int = 0
+    documents: int = 0
+    members: int = 0
+    receivable_fees: int = 0
+    webhook_payloads: int = 0
+    files: list = field(default_factory=list)
+
+
+def _weighted_choice(rng, options):
+    return rng.choices(
+        [value for _, value in options], [weight for weight, _ in options]
+    )[0]
+
+
+def bank_account_specs(count):
+    """Return (name, statement format) of count bank accounts"""
+    return [
+        (
+            BANK_ACCOUNTS[index]
+            if index < len(BANK_ACCOUNTS)
+            else (f"Conta {index + 1}", "bradesco_ofx")
+        )
+        for index in range(count)
+    ]
+
+
+def member_names(count):
+    """Yield count member names, numbered once all combinations are used"""
+    combinations = len(FIRST_NAMES) * len(LAST_NAMES)
+    for index in range(count):
+        first_name = FIRST_NAMES[index % len(FIRST_NAMES)]
+        last_name = LAST_NAMES[index // len(FIRST_NAMES) % len(LAST_NAMES)]
+        name = f"{first_name} {last_name}"
+        if index >= combinations:
+            name = f"{name} {index // combinations + 1}"
+        yield name
+
+
+def _bank_account_rows(index, name, days, transactions_per_day, payers, seed):
+    return transaction_rows(
+        days * transactions_per_day,
+        seed=f"{seed}:{name}",
+        prefix=f"S{index:02d}-",
+        start_date=START_DATE,
+        transactions_per_day=transactions_per_day,
+        payers=payers,
+    )
+
+
+def write_statements(output_dir, bank_accounts, rows_of):
+    """Write a statement file of each year of transactions of the bank accounts
+    returning their paths"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    paths = []
+    for index, (name, statement_format) in enumerate(bank_accounts):
+        if statement_format is None:
+            continue
+
+        statement_format = STATEMENT_FORMATS[statement_format]
+        rows = rows_of(index, name)
+        for year, year_rows in itertools.groupby(rows, key=lambda row: row.date.year):
+            path = output_dir / f"{slugify(name)}-{year}{statement_format.suffix}"
+            statement_format.write(path, year_rows)
+            paths.append(path)
+            logger.info("benchmarks.generator.write_statements.written", path=str(path))
+    return paths
+
+
+def _create_documents(transactions):
+    return Document.objects.bulk_create(
+        Document(
+            transaction=transaction,
+            document_date=transaction.date,
+            document_file=f"{transaction.bank_account.slug}/{transaction.reference}.pdf",
+            notes=f"Comprovante {transaction.reference}",
+        )
+        for transaction in transactions[::DOCUMENTED_EVERY]
+    )
+
+
+def _create_members(names, rng, end_date):
+    """Create the members (and their users and memberships) of names returning
+    their memberships"""
+    users = get_user_model().objects.bulk_create(
+        (
+            get_user_model()(
+                email=f"associado{index:06d}@example.com",
+                first_name=name.split(" ", 1)[0],
+                last_name=name.split(" ", 1)[1],
+                password=UNUSABLE_PASSWORD_PREFIX,
+            )
+            for index, name in enumerate(names)
+        ),
+        batch_size=settings.IMPORT_BATCH_SIZE,
+    )
+    members = Member.objects.bulk_create(
+        (Member(name=name, user=user) for name, user in zip(names, users)),
+        batch_size=settings.IMPORT_BATCH_SIZE,
+    )
+
+    days = (end_date - START_DATE).days
+    memberships = []
+    for member in members:
+        start_date = START_DATE + datetime.timedelta(days=rng.randrange(days))
+        payment_interval = _weighted_choice(rng, PAYMENT_INTERVALS)
+        active = rng.random() < ACTIVE_MEMBERSHIPS_RATIO
+        memberships.append(
+            Membership(
+                member=member,
+                start_date=start_date,
+                end_date=(
+                    None
+                    if active
+                    else start_date
+                    + datetime.timedelta(
+                        days=rng.randrange((end_date - start_date).days) + 1
+                    )
+                ),
+                membership_fee_amount=_weighted_choice(rng, FEE_AMOUNTS)
+                * payment_interval,
+                payment_interval=payment_interval,
+                payment_method=_weighted_choice(rng, PAYMENT_METHODS),
+                active=active,
+            )
+        )
+    Membership.objects.bulk_create(memberships, batch_size=settings.IMPORT_BATCH_SIZE)
+    ReceivableFeeTransactionMatchRule.objects.bulk_create(
+        (
+            ReceivableFeeTransactionMatchRule(
+                membership=membership, pattern=f".*{membership.member.name.lower()}.*"
+            )
+            for membership in memberships
+        ),
+        batch_size=settings.IMPORT_BATCH_SIZE,
+    )
+    return memberships
+
+
+def _receivable_fee_periods(memberships, end_date):
+    """Yield (membership, start date, due date) of the receivable fees of the
+    memberships until they end (or until end_date)"""
+    for membership in memberships:
+        until = membership.end_date or end_date
+        start_date = membership.start_date.replace(day=1)
+        while start_date < until:
+            yield membership, start_date, start_date + relativedelta(day=31)
+            start_date += relativedelta(months=membership.payment_interval)
+
+
+def _paypal_webhook_payload(reference, paid_at, amount, fee):
+    create_time = f"{paid_at:%Y-%m-%d}T12:00:00Z"
+    payload = {
+        "id": f"WH-{reference}",
+        "event_version": "1.0",
+        "create_time": create_time,
+        "resource_type": "sale",
+        "event_type": "PAYMENT.SALE.COMPLETED",
+        "resource": {
+            "id": reference,
+            "state": "completed",
+            "amount": {"total": f"{amount:.2f}", "currency": "BRL"},
+            "transaction_fee": {"value": f"{-fee:.2f}", "currency": "BRL"},
+            "billing_agreement_id": f"I-{reference}",
+            "create_time": create_time,
+            "update_time": create_time,
+        },
+    }
+    return PaypalWebhookPayload(
+        paypal_transmission_time=create_time,
+        paypal_auth_version="v2",
+        paypal_cert_url="https://api.paypal.com/v1/notifications/certs/synthetic",
+        paypal_auth_algo="SHA256withRSA",
+        paypal_transmission_sig="synthetic",
+        paypal_transmission_id=reference,
+        correlation_id=reference,
+        payload=orjson.dumps(payload).decode(),
+        status=ProcessingStatus.PROCESSED,
+        webhook_id="synthetic",
+    )
+
+
+def _openpix_webhook_payload(reference, paid_at, amount, payer_name):
+    payload = {
+        "event": "OPENPIX:TRANSACTION_RECEIVED",
+        "pix": {
+            "charge": {
+                "value": int(amount * 100),
+                "paidAt": f"{paid_at:%Y-%m-%d}T12:00:00.000Z",
+                "comment": "Mensalidade LHC",
+                "payer": {"name": payer_name},
+                "transactionID": reference,
+            },
+        },
+    }
+    return OpenPixWebhookPayload(
+        thebook_token="synthetic",
+        payload=orjson.dumps(payload).decode(),
+        status=ProcessingStatus.PROCESSED,
+    )
+
+
+def _create_receivable_fees(generated, memberships, rng, end_date, bank_accounts, user):
+    """Create the receivable fees of the memberships, most of them paid by a
+    transaction received by the webhook of the payment method (when its bank
+    account was generated)"""
+    categories = get_categories()
+    bank_accounts_by_name = {
+        bank_account.name: bank_account for bank_account in bank_accounts
+    }
+    paypal = bank_accounts_by_name.get(settings.PAYPAL_BANK_ACCOUNT)
+    openpix = bank_accounts_by_name.get(settings.OPENPIX_BANK_ACCOUNT)
+
+    periods = _receivable_fee_periods(memberships, end_date)
+    while batch := list(itertools.islice(periods, settings.IMPORT_BATCH_SIZE)):
+        receivable_fees, transactions = [], []
+        paypal_payloads, openpix_payloads = [], []
+        for membership, start_date, due_date in batch:
+            receivable_fee = ReceivableFee(
+                membership=membership,
+                start_date=start_date,
+                due_date=due_date,
+                amount=membership.membership_fee_amount,
+                status=FeePaymentStatus.UNPAID,
+            )
+            receivable_fees.append(receivable_fee)
+            if rng.random() >= PAID_RECEIVABLE_FEES_RATIO:
+                continue
+
+            reference = f"F{membership.pk:06d}-{start_date:%Y%m}"
+            paid_at = start_date + datetime.timedelta(days=rng.randrange(28))
+            amount = membership.membership_fee_amount
+            payer_name = membership.member.name.upper()
+            if membership.payment_method == PaymentMethod.PAYPAL and paypal:
+                bank_account, source = paypal, "paypal-webhook"
+                fee = -(amount * PAYPAL_FEE_RATE).quantize(Decimal("0.01"))
+                paypal_payloads.append(
+                    _paypal_webhook_payload(reference, paid_at, amount, fee)
+                )
+            elif membership.payment_method != PaymentMethod.PAYPAL and openpix:
+                bank_account, source = openpix, "openpix-webhook"
+                fee = calculate_openpix_fee(
+                    float(amount), "OPENPIX:TRANSACTION_RECEIVED"
+                )
+                openpix_payloads.append(
+                    _openpix_webhook_payload(reference, paid_at, amount, payer_name)
+                )
+            else:
+                bank_account, source, fee = bank_accounts[0], "", None
+
+            receivable_fee.status = FeePaymentStatus.PAID
+            receivable_fee.transaction = Transaction(
+                reference=reference,
+                date=paid_at,
+                description=f"MENSALIDADE LHC - {payer_name}",
+                amount=amount,
+                bank_account=bank_account,
+                category=categories[MEMBERSHIP_FEE],
+                source=source,
+                created_by=user,
+            )
+            transactions.append(receivable_fee.transaction)
+            if fee:
+                transactions.append(
+                    Transaction(
+                        reference=f"{reference}-T",
+                        date=paid_at,
+                        description=f"Taxa - MENSALIDADE LHC - {payer_name}",
+                        amount=fee,
+                        bank_account=bank_account,
+                        category=categories[BANK_FEES],
+                        source=source,
+                        created_by=user,
+                    )
+                )
+
+        Transaction._base_manager.bulk_create(transactions)
+        ReceivableFee.objects.bulk_create(receivable_fees)
+        PaypalWebhookPayload.objects.bulk_create(paypal_payloads)
+        OpenPixWebhookPayload.objects.bulk_create(openpix_payloads)
+        generated.transactions += len(transactions)
+        generated.receivable_fees += len(receivable_fees)
+        generated.webhook_payloads += len(paypal_payloads) + len(openpix_payloads)
+
+
+def generate(
+    bank_accounts=5,
+    years=5,
+    transactions_per_day=TRANSACTIONS_PER_DAY,
+    members=200,
+    seed=0,
+    output_dir=None,
+    database=True,
+):
+    """Generate years of transactions (since START_DATE) of each bank account,
+    members with their memberships and receivable fees, and the webhook payloads
+    of the paid fees, writing a statement file of each year of transactions of
+    the bank accounts to output_dir (when given)
+
+    database=False only writes the statement files.
+    """
+    end_date = START_DATE + relativedelta(years=years)
+    days = (end_date - START_DATE).days
+    names = list(member_names(members))
+    payers = [name.upper() for name in names] or PAYERS
+    specs = bank_account_specs(bank_accounts)
+
+    def rows_of(index, name):
+        return _bank_account_rows(index, name, days, transactions_per_day, payers, seed)
+
+    generated = GeneratedDataset(bank_accounts=len(specs))
+    if database:
+        with transaction.atomic():
+            _generate_database(generated, specs, rows_of, names, seed, end_date)
+
+    if output_dir is not None:
+        generated.files = write_statements(output_dir, specs, rows_of)
+
+    return generated
+
+
+def _generate_database(generated, specs, rows_of, names, seed, end_date):
+    rng = random.Random(seed)
+    user = reference_data.automation_user()
+    categories = get_categories()
+    create_category_match_rules(categories)
+
+    def _on_batch(transactions):
+        generated.documents += len(_create_documents(transactions))
+
+    bank_accounts = []
+    for index, (name, _) in enumerate(specs):
+        bank_account = reference_data.bank_account(name)
+        bank_accounts.append(bank_account)
+        generated.transactions += create_transactions(
+            rows_of(index, name), bank_account, user, categories, on_batch=_on_batch
+        )
+        logger.info(
+            "benchmarks.generator.generate.bank_account",
+            bank_account=name,
+            transactions=generated.transactions,
+        )
+
+    memberships = _create_members(names, rng, end_date)
+    generated.members = len(memberships)
+
+    _create_receivable_fees(generated, memberships, rng, end_date, bank_accounts, user)
+    rebuild_balances()
@@ -0,0 +1,176 @@
+"""Measure the benchmarks and compare them with a baseline
+
+A benchmark is a function registered with @benchmark that receives the seeded
+Dataset and returns the callable to be measured. Each run is executed inside a
+transaction that is rolled back, so runs writing to the database (e.g.
+importers) don't change the dataset measured by the next ones.
+"""
+
+import contextlib
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+
+import orjson
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from thebook.base.instrumentation import track_queries
+from thebook.benchmarks.dataset import seed_database
+from thebook.bookkeeping.reference_data import reference_data
+
+# Wall time differences smaller than this (in seconds) are noise, not regressions
+MIN_TIME_REGRESSION = 0.01
+
+_benchmarks = {}
+
+
+@dataclass
+class Measurement:
+    time: float
+    queries: int
+    peak_memory: int
+
+
+def benchmark(name):
+    """Register a benchmark"""
+
+    def _register(setup):
+        _benchmarks[name] = setup
+        return setup
+
+    return _register
+
+
+def get_benchmarks(names=None):
+    # Imported here to register the benchmarks
+    from thebook.benchmarks import cases  # noqa: F401
+
+    if not names:
+        return dict(_benchmarks)
+
+    unknown = set(names) - set(_benchmarks)
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+    return {name: _benchmarks[name] for name in names}
+
+
+@contextlib.contextmanager
+def _rolled_back():
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def measure(run, repeat=3):
+    """Return the best wall time of repeat runs, their number of queries and
+    the peak memory allocated by an additional run (traced apart, since
+    tracemalloc slows everything down)"""
+    times = []
+    queries = 0
+    for _ in range(repeat):
+        cache.clear()
+        with _rolled_back(), track_queries() as stats:
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+        queries = stats.count
+
+    cache.clear()
+    with _rolled_back():
+        tracemalloc.start()
+        try:
+            run()
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return Measurement(time=min(times), queries=queries, peak_memory=peak_memory)
+
+
+def benchmark_key(name, size):
+    return f"{name}[{size}]"
+
+
+def run_benchmarks(sizes, names=None, repeat=3, seed=0, on_measurement=None):
+    """Seed a dataset of each size and measure the benchmarks against it
+    returning the measurements by benchmark_key"""
+    benchmarks = get_benchmarks(names)
+
+    results = {}
+    for size in sizes:
+        call_command("flush", interactive=False, verbosity=0)
+        reference_data.clear()
+        dataset = seed_database(size, seed)
+
+        for name, setup in benchmarks.items():
+            key = benchmark_key(name, size)
+            results[key] = measure(setup(dataset), repeat)
+            if on_measurement is not None:
+                on_measurement(key, results[key])
+
+    return results
+
+
+@contextlib.contextmanager
+def benchmark_database():
+    """Run the benchmarks in a test database created (and destroyed) for them"""
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False
+    )
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        reference_data.clear()
+
+
+def find_regressions(results, baseline, time_tolerance, memory_tolerance):
+    """Return a description of each measurement worse than the baseline
+
+    Wall time and peak memory may grow up to the given tolerances (e.g. 0.25
+    for 25%), while the number of queries may not grow at all.
+    """
+    regressions = []
+    for key, measurement in results.items():
+        expected = baseline.get(key)
+        if expected is None:
+            continue
+
+        if measurement.time > max(
+            expected.time * (1 + time_tolerance), expected.time + MIN_TIME_REGRESSION
+        ):
+            regressions.append(
+                f"{key}: {measurement.time:.4f}s (baseline {expected.time:.4f}s)"
+            )
+        if measurement.queries > expected.queries:
+            regressions.append(
+                f"{key}: {measurement.queries} queries "
+                f"(baseline {expected.queries} queries)"
+            )
+        if measurement.peak_memory > expected.peak_memory * (1 + memory_tolerance):
+            regressions.append(
+                f"{key}: {measurement.peak_memory} bytes "
+                f"(baseline {expected.peak_memory} bytes)"
+            )
+    return regressions
+
+
+def load_baseline(path):
+    data = orjson.loads(path.read_bytes())
+    return {key: Measurement(**value) for key, value in data.items()}
+
+
+def save_baseline(path, results):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(
+        orjson.dumps(
+            {key: asdict(measurement) for key, measurement in results.items()},
+            option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS,
+        )
+    )
@@ -0,0 +1,151 @@
+from io import StringIO
+
+import pytest
+from model_bakery import baker
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Sum
+
+from thebook.benchmarks.generator import generate, member_names
+from thebook.bookkeeping.bulk_import import detect_file_type
+from thebook.bookkeeping.importers import import_transactions
+from thebook.bookkeeping.models import BankAccount, DailyBalance, Document, Transaction
+from thebook.bookkeeping.reference_data import reference_data
+from thebook.members.models import FeePaymentStatus, Member, ReceivableFee
+from thebook.webhooks.models import OpenPixWebhookPayload, PaypalWebhookPayload
+
+
+def _generate(**kwargs):
+    options = {
+        "bank_accounts": 5,
+        "years": 1,
+        "transactions_per_day": 2,
+        "members": 20,
+    }
+    return generate(**{**options, **kwargs})
+
+
+def test_member_names_are_numbered_after_all_combinations():
+    names = list(member_names(16 * 16 + 1))
+
+    assert names[0] == "Ana Souza"
+    assert names[1] == "Bruno Souza"
+    assert names[16] == "Ana Lima"
+    assert names[-1] == "Ana Souza 2"
+    assert len(set(names)) == len(names)
+
+
+def test_generate_database(db):
+    generated = _generate()
+
+    assert BankAccount.objects.count() == generated.bank_accounts == 5
+    assert Transaction.objects.count() == generated.transactions
+    assert Document.objects.count() == generated.documents > 0
+    assert Member.objects.count() == generated.members == 20
+    assert ReceivableFee.objects.count() == generated.receivable_fees
+    assert (
+        PaypalWebhookPayload.objects.count() + OpenPixWebhookPayload.objects.count()
+        == generated.webhook_payloads
+        > 0
+    )
+
+
+def test_generate_pays_receivable_fees_with_transactions(db):
+    _generate()
+
+    paid_receivable_fees = ReceivableFee.objects.filter(status=FeePaymentStatus.PAID)
+    assert paid_receivable_fees.exists()
+    assert not paid_receivable_fees.filter(transaction__isnull=True).exists()
+    for receivable_fee in paid_receivable_fees.select_related("transaction"):
+        assert receivable_fee.transaction.amount == receivable_fee.amount
+
+
+def test_generate_rebuild_daily_balances(db):
+    _generate()
+
+    for bank_account in BankAccount.objects.all():
+        total = Transaction.objects.filter(bank_account=bank_account).aggregate(
+            total=Sum("amount")
+        )["total"]
+        last_daily_balance = (
+            DailyBalance.objects.filter(bank_account=bank_account)
+            .order_by("date")
+            .last()
+        )
+        assert last_daily_balance.closing_balance == total
+
+
+def test_generate_files_only(db, tmp_path):
+    generated = _generate(output_dir=tmp_path, database=False)
+
+    assert not Transaction.objects.exists()
+    assert sorted(path.name for path in generated.files) == [
+        "bradesco-2020.ofx",
+        "cora-2020.ofx",
+        "cora-cartao-de-credito-2020.csv",
+        "paypal-2020.csv",
+    ]
+    assert [detect_file_type(path) for path in generated.files] == [
+        "ofx",
+        "ofx",
+        "csv",
+        "csv_cora_credit_card",
+    ]
+
+
+def test_generate_is_deterministic(db, tmp_path):
+    first = _generate(output_dir=tmp_path / "first", database=False)
+    second = _generate(output_dir=tmp_path / "second", database=False)
+
+    assert [path.read_bytes() for path in first.files] == [
+        path.read_bytes() for path in second.files
+    ]
+
+
+def test_generated_statement_files_can_be_imported(db, tmp_path):
+    generated = _generate(output_dir=tmp_path, database=False)
+    bradesco_ofx = tmp_path / "bradesco-2020.ofx"
+
+    with open(bradesco_ofx, "rb") as transactions_file:
+        result = import_transactions(
+            transactions_file,
+            "ofx",
+            reference_data.bank_account("Bradesco"),
+            reference_data.automation_user(),
+            None,
+            None,
+        )
+
+    assert bradesco_ofx in generated.files
+    assert result.inserted == 366 * 2
+
+
+def test_generate_dataset_command(db, tmp_path):
+    out = StringIO()
+
+    call_command(
+        "generate_dataset",
+        "--bank-accounts=2",
+        "--years=1",
+        "--transactions-per-day=1",
+        "--members=3",
+        f"--output-dir={tmp_path}",
+        stdout=out,
+    )
+
+    assert "Successfully generated" in out.getvalue()
+    assert (tmp_path / "bradesco-2020.ofx").exists()
+    assert Transaction.objects.filter(bank_account__name="Bradesco").exists()
+
+
+def test_generate_dataset_command_require_empty_database(db):
+    baker.make(Transaction)
+
+    with pytest.raises(CommandError, match="already has transactions"):
+        call_command("generate_dataset", stdout=StringIO())
+
+
+def test_generate_dataset_command_files_only_require_output_dir(db):
+    with pytest.raises(CommandError, match="--files-only requires --output-dir"):
+        call_command("generate_dataset", "--files-only", stdout=StringIO())
@@ -0,0 +1,118 @@
+import contextlib
+from io import StringIO
+
+import pytest
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from thebook.benchmarks import runner
+from thebook.benchmarks.runner import Measurement
+
+
+def test_find_regressions_within_tolerance():
+    baseline = {"categorize[10]": Measurement(time=1.0, queries=10, peak_memory=1000)}
+    results = {"categorize[10]": Measurement(time=1.2, queries=10, peak_memory=1200)}
+
+    assert runner.find_regressions(results, baseline, 0.25, 0.25) == []
+
+
+def test_find_regressions_above_tolerance():
+    baseline = {"categorize[10]": Measurement(time=1.0, queries=10, peak_memory=1000)}
+    results = {"categorize[10]": Measurement(time=1.5, queries=11, peak_memory=1500)}
+
+    regressions = runner.find_regressions(results, baseline, 0.25, 0.25)
+
+    assert regressions == [
+        "categorize[10]: 1.5000s (baseline 1.0000s)",
+        "categorize[10]: 11 queries (baseline 10 queries)",
+        "categorize[10]: 1500 bytes (baseline 1000 bytes)",
+    ]
+
+
+def test_find_regressions_ignore_time_differences_smaller_than_noise():
+    baseline = {"categorize[10]": Measurement(time=0.001, queries=1, peak_memory=1)}
+    results = {"categorize[10]": Measurement(time=0.005, queries=1, peak_memory=1)}
+
+    assert runner.find_regressions(results, baseline, 0.25, 0.25) == []
+
+
+def test_find_regressions_ignore_measurements_without_baseline():
+    results = {"categorize[10]": Measurement(time=1.0, queries=10, peak_memory=1000)}
+
+    assert runner.find_regressions(results, {}, 0.25, 0.25) == []
+
+
+def test_save_and_load_baseline(tmp_path):
+    path = tmp_path / "benchmarks" / "baseline.json"
+    results = {"categorize[10]": Measurement(time=0.5, queries=3, peak_memory=2048)}
+
+    runner.save_baseline(path, results)
+
+    assert runner.load_baseline(path) == results
+
+
+def test_get_benchmarks_unknown_name():
+    with pytest.raises(ValueError, match="Unknown benchmarks: unknown"):
+        runner.get_benchmarks(["categorize", "unknown"])
+
+
+@pytest.mark.django_db(transaction=True)
+def test_run_benchmarks():
+    measured = []
+
+    results = runner.run_benchmarks(
+        [40],
+        names=["categorize", "import_bradesco_ofx"],
+        repeat=1,
+        on_measurement=lambda key, measurement: measured.append(key),
+    )
+
+    assert measured == ["categorize[40]", "import_bradesco_ofx[40]"]
+    assert set(results) == set(measured)
+    assert all(measurement.queries > 0 for measurement in results.values())
+    assert all(measurement.peak_memory > 0 for measurement in results.values())
+
+
+@pytest.fixture
+def run_benchmarks(monkeypatch):
+    results = {"categorize[40]": Measurement(time=0.5, queries=3, peak_memory=2048)}
+    monkeypatch.setattr(runner, "benchmark_database", contextlib.nullcontext)
+    monkeypatch.setattr(runner, "run_benchmarks", lambda *args, **kwargs: results)
+    return results
+
+
+def test_benchmark_command_save_baseline_when_missing(tmp_path, run_benchmarks):
+    baseline = tmp_path / "baseline.json"
+    out = StringIO()
+
+    call_command("benchmark", "categorize", baseline=baseline, stdout=out)
+
+    assert "Successfully saved baseline" in out.getvalue()
+    assert runner.load_baseline(baseline) == run_benchmarks
+
+
+def test_benchmark_command_fail_on_regression(tmp_path, run_benchmarks):
+    baseline = tmp_path / "baseline.json"
+    runner.save_baseline(
+        baseline,
+        {"categorize[40]": Measurement(time=0.5, queries=2, peak_memory=2048)},
+    )
+
+    with pytest.raises(CommandError, match="categorize\\[40\\]: 3 queries"):
+        call_command("benchmark", "categorize", baseline=baseline, stdout=StringIO())
+
+
+def test_benchmark_command_without_regressions(tmp_path, run_benchmarks):
+    baseline = tmp_path / "baseline.json"
+    runner.save_baseline(baseline, run_benchmarks)
+    out = StringIO()
+
+    call_command("benchmark", "categorize", baseline=baseline, stdout=out)
+
+    assert "Successfully ran 1 benchmarks" in out.getvalue()
+
+
+def test_benchmark_command_unknown_benchmark():
+    with pytest.raises(CommandError, match="Unknown benchmarks: unknown"):
+        call_command("benchmark", "unknown", stdout=StringIO())
@@ -5,6 +5,8 @@ from thebook.bookkeeping.models import (
     Category,
     CategoryMatchRule,
     Document,
+    ImportedFile,
+    ImportJob,
     Transaction,
 )
 
@@ -34,8 +36,7 @@ def make_bank_account_transfer(modeladmin, request, queryset):
 
 @admin.action(description="Automatically categorize transactions")
 def categorize_transactions(modeladmin, request, queryset):
-    for transaction in queryset:
-        transaction.categorize()
+    queryset.categorize()
 
 
 @admin.register(BankAccount)
@@ -69,6 +70,39 @@ class DocumentInline(admin.TabularInline):
     model = Document
 
 
+@admin.register(ImportedFile)
+class ImportedFileAdmin(admin.ModelAdmin):
+    list_display = [
+        "__str__",
+        "bank_account",
+        "start_date",
+        "end_date",
+        "inserted",
+        "updated",
+        "skipped",
+        "created_at",
+    ]
+    list_filter = [
+        "importer",
+        "bank_account",
+    ]
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = [
+        "__str__",
+        "status",
+        "processed",
+        "created_by",
+        "created_at",
+        "finished_at",
+    ]
+    list_filter = [
+        "status",
+    ]
+
+
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
     actions = [
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class BookkeepingConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "thebook.bookkeeping"
+
+    def ready(self):
+        from . import signals
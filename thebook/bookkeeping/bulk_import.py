@@ -0,0 +1,195 @@
+"""Import many transaction files at once
+
+OFX files are parsed by a pool of processes into plain OfxParser transactions,
+without touching the database. The calling process is the single writer: it
+runs the importer of each file type (see get_transactions_reader) over the
+parsed transactions, resolving reference data and skipping the ones already
+imported, and writes them in batches recording the files in the ImportedFile
+ledger exactly like uploaded files. CSV files are only decoded, so they are
+read by the writer as well.
+"""
+
+import csv
+import glob
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+import structlog
+
+import django
+
+from thebook.bookkeeping.import_pipeline import ImportResult, file_sha256
+from thebook.bookkeeping.importers import (
+    get_transactions_reader,
+    write_transactions,
+)
+from thebook.bookkeeping.models import ImportedFile
+from thebook.integrations.cora.importers.credit_card_invoice import (
+    CoraCreditCardInvoiceImporter,
+)
+from thebook.utils.ofxparse import OfxParser
+
+logger = structlog.get_logger(__name__)
+
+SUPPORTED_SUFFIXES = (".csv", ".ofx")
+
+
+@dataclass
+class FileImportSummary:
+    path: Path
+    file_type: str = ""
+    result: ImportResult | None = None
+    error: str = ""
+
+
+def expand_paths(patterns):
+    """Return the files of directories, glob patterns or paths without repeating
+    them, keeping the order they were given"""
+    paths = {}
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            matches = sorted(
+                match
+                for match in path.rglob("*")
+                if match.is_file() and match.suffix.lower() in SUPPORTED_SUFFIXES
+            )
+        elif glob.has_magic(pattern):
+            matches = sorted(
+                Path(match)
+                for match in glob.glob(pattern, recursive=True)
+                if Path(match).is_file()
+            )
+        else:
+            matches = [path]
+
+        for match in matches:
+            paths.setdefault(match.resolve(), match)
+    return list(paths.values())
+
+
+def detect_file_type(path):
+    """Return the file type of import_transactions of a file, or None"""
+    suffix = path.suffix.lower()
+    if suffix == ".ofx":
+        return "ofx"
+
+    if suffix == ".csv":
+        with open(path, encoding="utf-8-sig", errors="replace") as csv_file:
+            header = next(csv.reader(io.StringIO(csv_file.readline())), [])
+        if set(header) == CoraCreditCardInvoiceImporter._expected_field_names:
+            return "csv_cora_credit_card"
+        return "csv"
+
+    return None
+
+
+def _parse_ofx_file(path):
+    """Return the transactions of an OFX file parsed by OfxParser (run by the
+    workers, so it must not touch the database)"""
+    with open(path, "rb") as ofx_file:
+        return list(OfxParser.iterparse(ofx_file).first_statement())
+
+
+def _write_transactions(
+    path, file_type, bank_account, user, ofx_transactions, start_date, end_date
+):
+    read_transactions = get_transactions_reader(
+        file_type, bank_account, user, start_date, end_date
+    )
+    with open(path, "rb") as transactions_file:
+        return write_transactions(
+            transactions_file,
+            file_type,
+            bank_account,
+            user,
+            lambda: read_transactions(transactions_file, ofx_transactions),
+            partial=start_date is not None or end_date is not None,
+        )
+
+
+def _already_imported(path, file_type, bank_account):
+    with open(path, "rb") as transactions_file:
+        sha256 = file_sha256(transactions_file)
+    return ImportedFile.objects.already_imported(sha256, file_type, bank_account)
+
+
+def _executor(workers):
+    # Workers are spawned (instead of forked) so they don't share the database
+    # connections of this process
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=django.setup,
+    )
+
+
+def import_files(
+    paths, bank_account, user, workers=None, start_date=None, end_date=None
+):
+    """Import the transaction files of paths yielding a FileImportSummary of
+    each file as soon as it is written
+
+    OFX files are parsed by worker processes (all CPUs by default) or in this
+    process when workers is 0. Files already imported are not parsed again.
+    """
+    pending = []
+    for path in paths:
+        file_type = detect_file_type(path)
+        if file_type is None:
+            yield FileImportSummary(path, error="Unsupported file type")
+        elif _already_imported(path, file_type, bank_account):
+            yield FileImportSummary(
+                path, file_type, ImportResult(already_imported=True)
+            )
+        else:
+            pending.append((path, file_type))
+
+    def _write(path, file_type, get_ofx_transactions):
+        try:
+            result = _write_transactions(
+                path,
+                file_type,
+                bank_account,
+                user,
+                get_ofx_transactions(),
+                start_date,
+                end_date,
+            )
+        except Exception as err:
+            logger.exception(
+                "bookkeeping.bulk_import.import_files.failed", path=str(path)
+            )
+            return FileImportSummary(path, file_type, error=str(err) or repr(err))
+
+        logger.info(
+            "bookkeeping.bulk_import.import_files.imported",
+            path=str(path),
+            inserted=result.inserted,
+            updated=result.updated,
+            skipped=result.skipped,
+        )
+        return FileImportSummary(path, file_type, result)
+
+    ofx_paths = []
+    for path, file_type in pending:
+        if file_type == "ofx" and workers != 0:
+            ofx_paths.append(path)
+        else:
+            # the importer parses the file while it is written
+            yield _write(path, file_type, lambda: None)
+
+    if not ofx_paths:
+        return
+
+    workers = min(workers or os.cpu_count() or 1, len(ofx_paths))
+    with _executor(workers) as executor:
+        futures = {executor.submit(_parse_ofx_file, path): path for path in ofx_paths}
+        for future in as_completed(futures):
+            # parsed transactions are released as soon as they are written
+            path = futures.pop(future)
+            yield _write(path, "ofx", future.result)
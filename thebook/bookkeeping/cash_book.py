@@ -0,0 +1,112 @@
+"""Cash book of all transactions of a period with a running balance
+
+Transactions are ordered by (date, id), so transactions of the same day always
+get the same running balance, and are read in pages using that pair as keyset
+cursor instead of OFFSET. The opening balance of the period comes from the
+daily balances of the bank accounts instead of aggregating the whole history.
+"""
+
+import datetime
+import decimal
+from dataclasses import dataclass
+from functools import cached_property
+
+from django.db.models import Sum
+
+from thebook.bookkeeping.models import Transaction
+
+CASH_BOOK_PAGE_SIZE = 500
+
+
+@dataclass
+class CashBookPage:
+    opening_balance: decimal.Decimal
+    transactions: list
+    cursor: str | None = None
+    next_cursor: str | None = None
+
+    @property
+    def closing_balance(self):
+        if not self.transactions:
+            return self.opening_balance
+        return self.transactions[-1].balance
+
+
+def encode_cursor(date, pk):
+    return f"{date.isoformat()}_{pk}"
+
+
+def decode_cursor(cursor):
+    """Return the (date, id) pair of a cursor or None when it is invalid"""
+    try:
+        date, pk = cursor.split("_")
+        return datetime.date.fromisoformat(date), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+class CashBook:
+
+    def __init__(self, start_date, end_date):
+        self.start_date = start_date
+        self.end_date = end_date
+
+    @cached_property
+    def opening_balance(self):
+        return Transaction.objects.balance_before(self.start_date)
+
+    def _transactions(self):
+        return Transaction.objects.select_related(
+            "category", "bank_account"
+        ).within_period(start_date=self.start_date, end_date=self.end_date)
+
+    def _balance_at(self, date, pk):
+        """Running balance of the period up to the transaction (date, id)"""
+        period_balance = (
+            self._transactions()
+            .filter(date__lte=date)
+            .exclude(date=date, pk__gt=pk)
+            .order_by()
+            .aggregate(balance=Sum("amount", default=decimal.Decimal("0")))["balance"]
+        )
+        return self.opening_balance + period_balance
+
+    def _page(self, keyset, base_value, page_size):
+        transactions = self._transactions()
+        if keyset is not None:
+            transactions = transactions.after(*keyset)
+
+        transactions = list(
+            transactions.with_info_for_cash_book(base_value=base_value)[: page_size + 1]
+        )
+
+        next_cursor = None
+        if len(transactions) > page_size:
+            transactions = transactions[:page_size]
+            next_cursor = encode_cursor(transactions[-1].date, transactions[-1].pk)
+
+        return CashBookPage(
+            opening_balance=base_value,
+            transactions=transactions,
+            cursor=encode_cursor(*keyset) if keyset is not None else None,
+            next_cursor=next_cursor,
+        )
+
+    def page(self, cursor=None, page_size=None):
+        """Return the page of transactions after the cursor (the first if None)"""
+        page_size = page_size or CASH_BOOK_PAGE_SIZE
+        keyset = decode_cursor(cursor) if cursor else None
+        if keyset is None:
+            return self._page(None, self.opening_balance, page_size)
+        return self._page(keyset, self._balance_at(*keyset), page_size)
+
+    def __iter__(self):
+        """Iterate over all transactions of the period one page at a time"""
+        keyset, base_value = None, self.opening_balance
+        while True:
+            page = self._page(keyset, base_value, CASH_BOOK_PAGE_SIZE)
+            yield from page.transactions
+            if page.next_cursor is None:
+                return
+            keyset = decode_cursor(page.next_cursor)
+            base_value = page.closing_balance
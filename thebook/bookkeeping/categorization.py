@@ -0,0 +1,189 @@
+import operator
+import re
+from decimal import Decimal
+
+from taggit.models import Tag, TaggedItem
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+from thebook.bookkeeping.models import CategoryMatchRule, Transaction
+from thebook.bookkeeping.reference_data import reference_data
+
+COMPARISON_FUNCTIONS = {
+    "EQ": operator.eq,
+    "NEQ": operator.ne,
+    "LTE": operator.le,
+    "GTE": operator.ge,
+}
+
+# Patterns using backreferences can't be merged in a single expression because
+# their group numbers would change
+_BACKREFERENCE = re.compile(r"\\\d|\(\?P=")
+
+
+class CompiledCategoryMatchRule:
+    def __init__(self, rule):
+        self.rule = rule
+        self.category_id = rule.category_id
+        self.regex = re.compile(rule.pattern, re.IGNORECASE)
+        self.tags = rule.tags.split(",") if rule.tags else []
+
+        # Same semantics of CategoryMatchRule.apply_rule: value is only
+        # considered when it is set to a non-zero amount
+        self.value = rule.value
+        self.comparison = (
+            COMPARISON_FUNCTIONS.get(rule.comparison_function) if rule.value else None
+        )
+
+    def accepts_amount(self, amount):
+        if self.comparison is None:
+            return True
+        return self.comparison(amount, self.value)
+
+    def matches(self, description, amount):
+        return self.accepts_amount(amount) and bool(self.regex.match(description))
+
+
+class CategoryMatchRuleEngine:
+    """Categorize transactions applying all CategoryMatchRule at once
+
+    Patterns are compiled a single time and merged into one expression, so
+    descriptions that don't match any rule are discarded with a single regex
+    evaluation. The first matching rule (in the same order of the provided
+    rules) that also satisfies its value comparison is applied.
+    """
+
+    def __init__(self, rules=None):
+        if rules is None:
+            rules = CategoryMatchRule.objects.select_related("category").order_by("id")
+
+        self.rules = [CompiledCategoryMatchRule(rule) for rule in rules]
+        self._group_names = [f"_rule{index}" for index in range(len(self.rules))]
+        self._combined = self._compile_combined()
+        self._donation = None
+
+    def _compile_combined(self):
+        if not self.rules or any(
+            _BACKREFERENCE.search(rule.rule.pattern) for rule in self.rules
+        ):
+            return None
+
+        combined_pattern = "|".join(
+            f"(?P<{group_name}>{rule.rule.pattern})"
+            for group_name, rule in zip(self._group_names, self.rules)
+        )
+        try:
+            return re.compile(combined_pattern, re.IGNORECASE)
+        except re.error:
+            return None
+
+    def _first_candidate(self, description):
+        if self._combined is None:
+            return 0
+
+        match = self._combined.match(description)
+        if match is None:
+            return None
+
+        groups = match.groupdict()
+        for index, group_name in enumerate(self._group_names):
+            if groups[group_name] is not None:
+                return index
+        return 0
+
+    def match(self, description, amount):
+        """Return the first compiled rule matching description and amount"""
+        first_candidate = self._first_candidate(description)
+        if first_candidate is None:
+            return None
+
+        for rule in self.rules[first_candidate:]:
+            if rule.matches(description, amount):
+                return rule
+        return None
+
+    def _get_donation_category(self):
+        if self._donation is None:
+            self._donation = reference_data.category("Doação")
+        return self._donation
+
+    def categorize(self, transactions, batch_size=1000):
+        """Categorize all transactions of the queryset in a single pass
+
+        Categories are written with bulk_update and tags are inserted in
+        batches directly in taggit through model. Return the number of
+        categorized transactions.
+        """
+        categorized = 0
+        pending_transactions, pending_tags = [], []
+
+        queryset = (
+            transactions.select_related(None)
+            .prefetch_related(None)
+            .only("id", "description", "amount", "category")
+        )
+        for transaction_ in queryset.iterator(chunk_size=batch_size):
+            rule = self.match(transaction_.description, transaction_.amount)
+            if rule is not None:
+                transaction_.category_id = rule.category_id
+                pending_tags.extend((transaction_.id, tag) for tag in rule.tags)
+            elif Decimal("0") <= transaction_.amount <= settings.DONATION_THRESHOLD:
+                transaction_.category = self._get_donation_category()
+            else:
+                continue
+
+            pending_transactions.append(transaction_)
+            if len(pending_transactions) >= batch_size:
+                categorized += self._flush(pending_transactions, pending_tags)
+                pending_transactions, pending_tags = [], []
+
+        categorized += self._flush(pending_transactions, pending_tags)
+        return categorized
+
+    def _flush(self, pending_transactions, pending_tags):
+        if not pending_transactions:
+            return 0
+
+        with transaction.atomic():
+            Transaction.objects.bulk_update(pending_transactions, ["category"])
+            if pending_tags:
+                _bulk_add_tags(pending_tags)
+
+        return len(pending_transactions)
+
+
+def _get_tags(tag_names):
+    tags = {}
+    for tag_name in set(tag_names):
+        tag = Tag.objects.filter(name__iexact=tag_name).order_by("pk").first()
+        if tag is None:
+            tag = Tag.objects.create(name=tag_name)
+        tags[tag_name] = tag
+    return tags
+
+
+def _bulk_add_tags(transaction_tags):
+    """Add tags to transactions given a list of (transaction id, tag name)"""
+    content_type = ContentType.objects.get_for_model(Transaction)
+    tags = _get_tags(tag_name for _, tag_name in transaction_tags)
+
+    wanted = {
+        (transaction_id, tags[tag_name].id)
+        for transaction_id, tag_name in transaction_tags
+    }
+    existing = set(
+        TaggedItem.objects.filter(
+            content_type=content_type,
+            object_id__in={transaction_id for transaction_id, _ in wanted},
+            tag_id__in={tag_id for _, tag_id in wanted},
+        ).values_list("object_id", "tag_id")
+    )
+
+    TaggedItem.objects.bulk_create(
+        [
+            TaggedItem(content_type=content_type, object_id=object_id, tag_id=tag_id)
+            for object_id, tag_id in sorted(wanted - existing)
+        ]
+    )
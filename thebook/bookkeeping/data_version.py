@@ -0,0 +1,72 @@
+"""Per bank account data version counters used to build cache keys
+
+The version of a bank account changes every time one of its transactions is
+created, changed or deleted, so anything cached under a key containing the
+versions of the bank accounts it was computed from is never served stale and
+doesn't need a timeout. Transactions without a bank account share a version.
+
+Counters are kept in the database (DataVersion), so they are shared by all
+processes whatever cache backend is used. They are bumped only after the change
+and the daily balances depending on it are written, so a value cached under
+the new version is never computed from data written before the change.
+"""
+
+import hashlib
+
+from django.core.cache import cache
+
+from thebook.bookkeeping.models import DataVersion
+
+UNASSIGNED_SCOPE = "unassigned"
+
+
+def _scope(bank_account_id):
+    if bank_account_id is None:
+        return UNASSIGNED_SCOPE
+    return f"bank-account:{bank_account_id}"
+
+
+def get_data_versions(bank_account_ids):
+    """Return a dict of the current data version by bank account id"""
+    scopes = {
+        _scope(bank_account_id): bank_account_id for bank_account_id in bank_account_ids
+    }
+    versions = DataVersion.objects.versions(scopes)
+    return {scopes[scope]: version for scope, version in versions.items()}
+
+
+def data_version(bank_account_ids):
+    """Return a single version token for a set of bank accounts"""
+    versions = get_data_versions(set(bank_account_ids))
+    token = ",".join(
+        f"{bank_account_id}:{version}"
+        for bank_account_id, version in sorted(
+            versions.items(), key=lambda item: (item[0] is None, item[0] or 0)
+        )
+    )
+    return hashlib.sha1(token.encode()).hexdigest()
+
+
+def versioned_cache_key(prefix, *parts, bank_account_ids):
+    """Build a cache key from its parts and the data version of the bank accounts"""
+    key_parts = ":".join(str(part) for part in parts)
+    digest = hashlib.sha1(key_parts.encode()).hexdigest()
+    return f"{prefix}:{digest}:{data_version(bank_account_ids)}"
+
+
+def get_or_compute(prefix, *parts, bank_account_ids, compute):
+    """Return the cached value of the key or compute and cache it without timeout"""
+    cache_key = versioned_cache_key(prefix, *parts, bank_account_ids=bank_account_ids)
+
+    value = cache.get(cache_key)
+    if value is None:
+        value = compute()
+        cache.set(cache_key, value, timeout=None)
+    return value
+
+
+def bump_data_version(bank_account_ids):
+    """Change the data version of the bank accounts"""
+    DataVersion.objects.bump(
+        {_scope(bank_account_id) for bank_account_id in bank_account_ids}
+    )
@@ -0,0 +1,134 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import structlog
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from thebook.bookkeeping.importers import ImportTransactionsError, import_transactions
+from thebook.bookkeeping.models import ImportJob, ImportJobStatus
+
+logger = structlog.get_logger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMPORT_JOB_WORKERS,
+                thread_name_prefix="import-job",
+            )
+        return _executor
+
+
+def run_import_job(job_id):
+    """Import the file of a pending ImportJob updating its progress after each
+    batch. Return the job or None when it was already claimed by other worker,
+    or is left pending because another job of its bank account is running"""
+    job = ImportJob.objects.claim(job_id)
+    if job is None:
+        return None
+
+    logger.info("bookkeeping.import_jobs.run_import_job.start", id=job.id)
+
+    def _report_progress(result):
+        ImportJob.objects.filter(id=job.id).update(
+            processed=result.inserted + result.updated + result.skipped,
+            inserted=result.inserted,
+            updated=result.updated,
+            skipped=result.skipped,
+        )
+
+    try:
+        with job.transactions_file.open("rb") as transactions_file:
+            result = import_transactions(
+                transactions_file,
+                job.file_type,
+                job.bank_account,
+                job.created_by,
+                job.start_date,
+                job.end_date,
+                on_batch=_report_progress,
+            )
+    except ImportTransactionsError as err:
+        job.status = ImportJobStatus.FAILED
+        job.error = str(err)
+    except Exception:
+        logger.exception("bookkeeping.import_jobs.run_import_job.failed", id=job.id)
+        job.status = ImportJobStatus.FAILED
+        job.error = _("Something wrong happened during file import.")
+    else:
+        job.status = ImportJobStatus.SUCCEEDED
+        job.processed = result.inserted + result.updated + result.skipped
+        job.inserted = result.inserted
+        job.updated = result.updated
+        job.skipped = result.skipped
+        job.already_imported = result.already_imported
+
+    job.finished_at = timezone.now()
+    job.save()
+
+    logger.info(
+        "bookkeeping.import_jobs.run_import_job.finished",
+        id=job.id,
+        status=job.get_status_display(),
+    )
+    return job
+
+
+def _run_import_job_in_thread(job_id):
+    try:
+        job = run_import_job(job_id)
+        while job is not None:
+            # jobs of the bank account submitted while this one was running
+            # were left pending
+            next_job_id = (
+                ImportJob.objects.pending()
+                .filter(bank_account_id=job.bank_account_id)
+                .values_list("id", flat=True)
+                .first()
+            )
+            if next_job_id is None:
+                break
+            job = run_import_job(next_job_id)
+    finally:
+        # persistent connections (CONN_MAX_AGE) of finished threads are never reused
+        connection.close()
+
+
+def fail_stale_import_jobs():
+    """Mark jobs interrupted while running as failed, so their progress stops
+    being polled. Return the number of failed jobs"""
+    failed = ImportJob.objects.stale().update(
+        status=ImportJobStatus.FAILED,
+        error=_("The import was interrupted. Please upload the file again."),
+        finished_at=timezone.now(),
+    )
+    if failed:
+        logger.warning("bookkeeping.import_jobs.fail_stale_import_jobs", failed=failed)
+    return failed
+
+
+def submit_import_job(job):
+    """Run the job in a background thread once the current transaction commits
+
+    When IMPORT_JOB_WORKERS is 0 the job is run right away, in the caller
+    thread. A job submitted while another job of its bank account is running
+    is left pending and run by that job's worker once it finishes. Jobs left
+    pending (e.g. by a restart) are run by the process_import_jobs management
+    command, which also fails the running ones that timed out.
+    """
+    if not settings.IMPORT_JOB_WORKERS:
+        return run_import_job(job.id) or job
+
+    transaction.on_commit(
+        lambda: _get_executor().submit(_run_import_job_in_thread, job.id)
+    )
+    return job
@@ -0,0 +1,184 @@
+import bisect
+import hashlib
+import itertools
+from dataclasses import dataclass
+
+import structlog
+
+from django.conf import settings
+from django.db import transaction
+
+from thebook.bookkeeping.models import ImportedFile, Transaction
+
+logger = structlog.get_logger(__name__)
+
+DEFAULT_UPDATE_FIELDS = ("description", "amount")
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class ImportResult:
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    already_imported: bool = False
+
+
+class TransactionImportPipeline:
+    """Write a stream of Transaction objects in batches
+
+    Each batch is written with a single bulk_create inside its own
+    transaction.atomic() block, so memory is bounded by batch_size no matter
+    the size of the imported file. Transactions with a reference that already
+    exists have update_fields updated, or are skipped when update_fields is
+    empty. Repeated references inside a batch are written only once.
+    on_batch is called with the partial ImportResult after each batch.
+    """
+
+    def __init__(
+        self, batch_size=None, update_fields=DEFAULT_UPDATE_FIELDS, on_batch=None
+    ):
+        self.batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+        self.update_fields = list(update_fields or [])
+        self.on_batch = on_batch
+        self.result = ImportResult()
+
+    def iter_batches(self, transactions):
+        """Write transactions yielding the list of saved objects of each batch"""
+        for batch in itertools.batched(transactions, self.batch_size):
+            saved = self._write_batch(batch)
+            if self.on_batch is not None:
+                self.on_batch(self.result)
+            yield saved
+
+    def run(self, transactions):
+        for _ in self.iter_batches(transactions):
+            pass
+
+        logger.info(
+            "bookkeeping.import_pipeline.run.completed",
+            inserted=self.result.inserted,
+            updated=self.result.updated,
+            skipped=self.result.skipped,
+        )
+        return self.result
+
+    def _write_batch(self, batch):
+        unique_transactions = {}
+        for transaction_ in batch:
+            unique_transactions[str(transaction_.reference)] = transaction_
+        self.result.skipped += len(batch) - len(unique_transactions)
+
+        with transaction.atomic():
+            existing = Transaction.objects.existing_references(unique_transactions)
+
+            if self.update_fields:
+                saved = Transaction.objects.bulk_create(
+                    unique_transactions.values(),
+                    update_conflicts=True,
+                    update_fields=self.update_fields,
+                    unique_fields=["reference"],
+                )
+                self.result.updated += len(existing)
+            else:
+                saved = Transaction.objects.bulk_create(
+                    [
+                        transaction_
+                        for reference, transaction_ in unique_transactions.items()
+                        if reference not in existing
+                    ],
+                    ignore_conflicts=True,
+                )
+                self.result.skipped += len(existing)
+
+            self.result.inserted += len(unique_transactions) - len(existing)
+
+        return saved
+
+
+def file_sha256(file):
+    """Return the SHA-256 of the content of a file rewinding it afterwards"""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+class _CoveredDatesFilter:
+    """Drop transactions within ranges of already imported files while keeping
+    track of the date range of the whole file"""
+
+    def __init__(self, covered_ranges):
+        self.covered_ranges = covered_ranges
+        self.start_dates = [start_date for start_date, _ in covered_ranges]
+        self.start_date = self.end_date = None
+        self.skipped = 0
+
+    def is_covered(self, date):
+        index = bisect.bisect_right(self.start_dates, date) - 1
+        return index >= 0 and date < self.covered_ranges[index][1]
+
+    def __call__(self, transactions):
+        for transaction_ in transactions:
+            date = transaction_.date
+            self.start_date = min(date, self.start_date or date)
+            self.end_date = max(date, self.end_date or date)
+
+            if self.is_covered(date):
+                self.skipped += 1
+                continue
+            yield transaction_
+
+
+def import_file(
+    file,
+    importer,
+    bank_account,
+    get_transactions,
+    pipeline=None,
+    user=None,
+    partial=False,
+    skip_covered_dates=False,
+):
+    """Import the transactions of a file recording it in the ImportedFile ledger
+
+    Files with the same content of a file completely imported before by the
+    same importer to the same bank account are not parsed again. When
+    skip_covered_dates is set (for bank statements), transactions within the
+    date range of statements imported before are skipped, so only the part of
+    partially overlapping statements not seen yet is written.
+    get_transactions is only called when the file needs to be imported.
+    """
+    sha256 = file_sha256(file)
+    if ImportedFile.objects.already_imported(sha256, importer, bank_account):
+        logger.info(
+            "bookkeeping.import_pipeline.import_file.already_imported",
+            sha256=sha256,
+            importer=importer,
+        )
+        return ImportResult(already_imported=True)
+
+    covered_ranges = []
+    if skip_covered_dates:
+        covered_ranges = ImportedFile.objects.covered_ranges(importer, bank_account)
+    covered_dates_filter = _CoveredDatesFilter(covered_ranges)
+
+    pipeline = pipeline or TransactionImportPipeline()
+    result = pipeline.run(covered_dates_filter(get_transactions()))
+    result.skipped += covered_dates_filter.skipped
+
+    ImportedFile.objects.create(
+        sha256=sha256,
+        importer=importer,
+        bank_account=bank_account,
+        start_date=covered_dates_filter.start_date,
+        end_date=covered_dates_filter.end_date,
+        partial=partial,
+        inserted=result.inserted,
+        updated=result.updated,
+        skipped=result.skipped,
+        created_by=user,
+    )
+    return result
@@ -3,8 +3,13 @@ import logging
 from django.conf import settings
 from django.utils.translation import gettext as _
 
+from thebook.bookkeeping.import_pipeline import (
+    DEFAULT_UPDATE_FIELDS,
+    TransactionImportPipeline,
+    import_file,
+)
 from thebook.bookkeeping.importers.csv import CSVImporter
-from thebook.bookkeeping.models import BankAccount, Transaction
+from thebook.bookkeeping.reference_data import reference_data
 from thebook.integrations.bradesco.importers.ofx import OFXImporter
 from thebook.integrations.cora.constants import CORA_BANK_ACCOUNT
 from thebook.integrations.cora.importers.credit_card_invoice import (
@@ -25,10 +30,17 @@ class InvalidOFXFile(Exception):
         super().__init__(message or self.default_message)
 
 
-def import_transactions(
-    transactions_file, file_type, bank_account, user, start_date, end_date
+def get_transactions_reader(
+    file_type, bank_account, user, start_date=None, end_date=None
 ):
-    cora_bank_account, _ = BankAccount.objects.get_or_create(name=CORA_BANK_ACCOUNT)
+    """Return a function reading the Transaction objects of a file with the
+    importer of file_type (and bank_account, for OFX files)
+
+    The function also accepts the transactions of an OFX file already parsed
+    by OfxParser (e.g. in another process), which are used instead of parsing
+    the file again.
+    """
+    cora_bank_account = reference_data.bank_account(CORA_BANK_ACCOUNT)
 
     importer = None
     if file_type == "csv":
@@ -46,31 +58,87 @@ def import_transactions(
             _("Unable to find a suitable file importer for this file.")
         )
 
-    try:
+    def read_transactions(transactions_file, ofx_transactions=None):
         if file_type == "csv_cora_credit_card":
-            csv_importer = importer(transactions_file)
-            transactions = csv_importer.get_transactions(
+            return importer(transactions_file).get_transactions(
                 start_date, end_date, exclude_existing=True
             )
-            Transaction.objects.bulk_create(
-                transactions,
-                update_conflicts=True,
-                update_fields=["description", "amount"],
-                unique_fields=["reference"],
-            )
         elif file_type == "ofx" and bank_account == cora_bank_account:
-            ofx_importer = importer(transactions_file)
-            transactions = ofx_importer.get_transactions(
+            return importer(transactions_file, ofx_transactions).iter_transactions(
                 start_date, end_date, exclude_existing=True
             )
-            Transaction.objects.bulk_create(
-                transactions,
-                update_conflicts=True,
-                update_fields=["description", "amount"],
-                unique_fields=["reference"],
-            )
+        elif file_type == "ofx":
+            return importer(
+                transactions_file, bank_account, user, ofx_transactions
+            ).iter_transactions(start_date, end_date)
         else:
-            importer(transactions_file, bank_account, user).run(start_date, end_date)
+            return importer(transactions_file, bank_account, user).iter_transactions()
+
+    return read_transactions
+
+
+def write_transactions(
+    transactions_file,
+    file_type,
+    bank_account,
+    user,
+    get_transactions,
+    partial=False,
+    on_batch=None,
+):
+    """Write the transactions read from a file recording it in the
+    ImportedFile ledger"""
+    update_fields = None if file_type == "csv" else DEFAULT_UPDATE_FIELDS
+    return import_file(
+        transactions_file,
+        file_type,
+        bank_account,
+        get_transactions,
+        pipeline=TransactionImportPipeline(
+            update_fields=update_fields, on_batch=on_batch
+        ),
+        user=user,
+        partial=partial,
+        # Only OFX files are bank statements of a contiguous date range
+        skip_covered_dates=file_type == "ofx",
+    )
+
+
+def import_transactions(
+    transactions_file,
+    file_type,
+    bank_account,
+    user,
+    start_date,
+    end_date,
+    on_batch=None,
+):
+    read_transactions = get_transactions_reader(
+        file_type, bank_account, user, start_date, end_date
+    )
+
+    try:
+        result = write_transactions(
+            transactions_file,
+            file_type,
+            bank_account,
+            user,
+            lambda: read_transactions(transactions_file),
+            partial=start_date is not None or end_date is not None,
+            on_batch=on_batch,
+        )
     except Exception as err:
         logger.exception(err)
         raise ImportTransactionsError(_("Something wrong happened during file import."))
+
+    if result.already_imported:
+        logger.info("import_transactions: file already imported")
+        return result
+
+    logger.info(
+        "import_transactions: %s inserted, %s updated, %s skipped",
+        result.inserted,
+        result.updated,
+        result.skipped,
+    )
+    return result
@@ -6,6 +6,7 @@ import uuid
 
 from django.db import IntegrityError
 
+from thebook.bookkeeping.import_pipeline import TransactionImportPipeline
 from thebook.bookkeeping.importers.constants import (
     ACCOUNTANT,
     BANK_ACCOUNT_TRANSFER,
@@ -17,38 +18,25 @@ from thebook.bookkeeping.importers.constants import (
     RECURRING_DONATION,
     TAXES,
 )
-from thebook.bookkeeping.models import Category, Transaction
+from thebook.bookkeeping.models import Transaction
+from thebook.bookkeeping.reference_data import reference_data
 
 
 def get_categories():
-    accountant, _ = Category.objects.get_or_create(name=ACCOUNTANT)
-    bank_fees, _ = Category.objects.get_or_create(name=BANK_FEES)
-    bank_income, _ = Category.objects.get_or_create(name=BANK_INCOME)
-    bank_account_transfer, _ = Category.objects.get_or_create(
-        name=BANK_ACCOUNT_TRANSFER
+    return reference_data.categories(
+        ACCOUNTANT,
+        BANK_FEES,
+        BANK_INCOME,
+        BANK_ACCOUNT_TRANSFER,
+        DONATION,
+        MEMBERSHIP_FEE,
+        RECURRING,
+        RECURRING_DONATION,
+        TAXES,
     )
-    donation, _ = Category.objects.get_or_create(name=DONATION)
-    membership_fee, _ = Category.objects.get_or_create(name=MEMBERSHIP_FEE)
-    recurring, _ = Category.objects.get_or_create(name=RECURRING)
-    recurring_donation, _ = Category.objects.get_or_create(name=RECURRING_DONATION)
-    taxes, _ = Category.objects.get_or_create(name=TAXES)
-
-    return {
-        ACCOUNTANT: accountant,
-        BANK_FEES: bank_fees,
-        BANK_INCOME: bank_income,
-        BANK_ACCOUNT_TRANSFER: bank_account_transfer,
-        DONATION: donation,
-        MEMBERSHIP_FEE: membership_fee,
-        RECURRING: recurring,
-        RECURRING_DONATION: recurring_donation,
-        TAXES: taxes,
-    }
 
 
 class CSVImporter:
-    new_transactions = []
-
     def __init__(self, transactions_file, bank_account, user):
         self.categories = get_categories()
 
@@ -56,7 +44,7 @@ class CSVImporter:
         self.bank_account = bank_account
         self.user = user
 
-    def run(self, start_date=None, end_date=None, ignored_memos=None):
+    def iter_transactions(self):
         csv_content = self.transactions_file.read().decode()
 
         # PayPal export adds this character in the beginning of the exported file
@@ -85,59 +73,51 @@ class CSVImporter:
             if transaction_type == "Retirada geral - Conta bancária":
                 transaction_bank_name = paypal_transaction["Nome do banco"]
                 description = f"{transaction_type} - {transaction_bank_name}"
-                self.new_transactions.append(
-                    Transaction(
-                        reference=transaction_reference,
-                        date=transaction_date,
-                        description=description,
-                        amount=transaction_amount,
-                        bank_account=self.bank_account,
-                        category=self.categories[BANK_ACCOUNT_TRANSFER],
-                        source="paypal-csv-import",
-                        created_by=self.user,
-                    )
+                yield Transaction(
+                    reference=transaction_reference,
+                    date=transaction_date,
+                    description=description,
+                    amount=transaction_amount,
+                    bank_account=self.bank_account,
+                    category=self.categories[BANK_ACCOUNT_TRANSFER],
+                    source="paypal-csv-import",
+                    created_by=self.user,
                 )
             elif (
                 transaction_type == "Conversão de moeda em geral"
                 and transaction_currency == "BRL"
             ):
                 # Marcio is the only payment in USD
-                self.new_transactions.append(
-                    Transaction(
-                        reference=transaction_reference,
-                        date=transaction_date,
-                        description="Mensalidade LHC - USD50 - Marcio Paduan Donadio",
-                        amount=transaction_amount,
-                        bank_account=self.bank_account,
-                        category=self.categories[MEMBERSHIP_FEE],
-                        source="paypal-csv-import",
-                        created_by=self.user,
-                    )
+                yield Transaction(
+                    reference=transaction_reference,
+                    date=transaction_date,
+                    description="Mensalidade LHC - USD50 - Marcio Paduan Donadio",
+                    amount=transaction_amount,
+                    bank_account=self.bank_account,
+                    category=self.categories[MEMBERSHIP_FEE],
+                    source="paypal-csv-import",
+                    created_by=self.user,
                 )
             elif transaction_type == "Pagamento de doação":
-                self.new_transactions.append(
-                    Transaction(
-                        reference=transaction_reference,
-                        date=transaction_date,
-                        description=f"Doação Recebida de {transaction_name}",
-                        amount=transaction_amount,
-                        bank_account=self.bank_account,
-                        category=self.categories[DONATION],
-                        source="paypal-csv-import",
-                        created_by=self.user,
-                    )
+                yield Transaction(
+                    reference=transaction_reference,
+                    date=transaction_date,
+                    description=f"Doação Recebida de {transaction_name}",
+                    amount=transaction_amount,
+                    bank_account=self.bank_account,
+                    category=self.categories[DONATION],
+                    source="paypal-csv-import",
+                    created_by=self.user,
                 )
-                self.new_transactions.append(
-                    Transaction(
-                        reference=f"{transaction_reference}-T",
-                        date=transaction_date,
-                        description=f"Taxa Intermediação - Doação Recebida de {transaction_name}",
-                        amount=transaction_tax,
-                        bank_account=self.bank_account,
-                        category=self.categories[BANK_FEES],
-                        source="paypal-csv-import",
-                        created_by=self.user,
-                    )
+                yield Transaction(
+                    reference=f"{transaction_reference}-T",
+                    date=transaction_date,
+                    description=f"Taxa Intermediação - Doação Recebida de {transaction_name}",
+                    amount=transaction_tax,
+                    bank_account=self.bank_account,
+                    category=self.categories[BANK_FEES],
+                    source="paypal-csv-import",
+                    created_by=self.user,
                 )
             elif transaction_type == "Pagamento de assinaturas":
                 if transaction_currency == "USD":
@@ -155,60 +135,51 @@ class CSVImporter:
                     if transaction_amount in current_membership_fees
                     else self.categories[RECURRING_DONATION]
                 )
-                self.new_transactions.append(
-                    Transaction(
-                        reference=transaction_reference,
-                        date=transaction_date,
-                        description=f"{recurring_fee_type} - {transaction_name}",
-                        amount=transaction_amount,
-                        bank_account=self.bank_account,
-                        category=category,
-                        source="paypal-csv-import",
-                        created_by=self.user,
-                    )
+                yield Transaction(
+                    reference=transaction_reference,
+                    date=transaction_date,
+                    description=f"{recurring_fee_type} - {transaction_name}",
+                    amount=transaction_amount,
+                    bank_account=self.bank_account,
+                    category=category,
+                    source="paypal-csv-import",
+                    created_by=self.user,
                 )
-                self.new_transactions.append(
-                    Transaction(
-                        reference=f"{transaction_reference}-T",
-                        date=transaction_date,
-                        description=f"Taxa PayPal - {recurring_fee_type} - {transaction_name}",
-                        amount=transaction_tax,
-                        bank_account=self.bank_account,
-                        category=self.categories[BANK_FEES],
-                        source="paypal-csv-import",
-                        created_by=self.user,
-                    )
+                yield Transaction(
+                    reference=f"{transaction_reference}-T",
+                    date=transaction_date,
+                    description=f"Taxa PayPal - {recurring_fee_type} - {transaction_name}",
+                    amount=transaction_tax,
+                    bank_account=self.bank_account,
+                    category=self.categories[BANK_FEES],
+                    source="paypal-csv-import",
+                    created_by=self.user,
                 )
             else:
                 if transaction_currency == "USD":
                     # We don't process USD recurring here
                     continue
 
-                self.new_transactions.append(
-                    Transaction(
-                        reference=transaction_reference,
-                        date=transaction_date,
-                        description=f"{transaction_type} - {transaction_name}",
-                        amount=transaction_amount,
-                        bank_account=self.bank_account,
-                        source="paypal-csv-import",
-                        created_by=self.user,
-                    )
+                yield Transaction(
+                    reference=transaction_reference,
+                    date=transaction_date,
+                    description=f"{transaction_type} - {transaction_name}",
+                    amount=transaction_amount,
+                    bank_account=self.bank_account,
+                    source="paypal-csv-import",
+                    created_by=self.user,
                 )
-                self.new_transactions.append(
-                    Transaction(
-                        reference=f"{transaction_reference}-T",
-                        date=transaction_date,
-                        description=f"Taxa Intermediação - {transaction_type} - {transaction_name}",
-                        amount=transaction_tax,
-                        bank_account=self.bank_account,
-                        category=self.categories[BANK_FEES],
-                        source="paypal-csv-import",
-                        created_by=self.user,
-                    )
+                yield Transaction(
+                    reference=f"{transaction_reference}-T",
+                    date=transaction_date,
+                    description=f"Taxa Intermediação - {transaction_type} - {transaction_name}",
+                    amount=transaction_tax,
+                    bank_account=self.bank_account,
+                    category=self.categories[BANK_FEES],
+                    source="paypal-csv-import",
+                    created_by=self.user,
                 )
 
-        Transaction.objects.bulk_create(
-            self.new_transactions,
-            ignore_conflicts=True,
-        )
+    def run(self, start_date=None, end_date=None, ignored_memos=None, batch_size=None):
+        pipeline = TransactionImportPipeline(batch_size, update_fields=None)
+        return pipeline.run(self.iter_transactions())
@@ -0,0 +1,83 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from thebook.bookkeeping.bulk_import import expand_paths, import_files
+from thebook.bookkeeping.models import BankAccount
+from thebook.bookkeeping.reference_data import reference_data
+
+
+class Command(BaseCommand):
+    help = "Import OFX/CSV transaction files of directories or glob patterns"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths",
+            nargs="+",
+            help="Files, directories or glob patterns (e.g. 'statements/**/*.ofx')",
+        )
+        parser.add_argument(
+            "--bank-account",
+            required=True,
+            help="Slug of the bank account of the files",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help=(
+                "Number of processes parsing files, defaults to the number of "
+                "CPUs (0 parses them in this process)"
+            ),
+        )
+        parser.add_argument(
+            "--start-date",
+            type=datetime.date.fromisoformat,
+            help="Only import transactions since this day (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            "--end-date",
+            type=datetime.date.fromisoformat,
+            help="Only import transactions until this day (YYYY-MM-DD)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            bank_account = BankAccount.objects.get(slug=options["bank_account"])
+        except BankAccount.DoesNotExist:
+            raise CommandError(f"Bank account {options['bank_account']} not found")
+
+        paths = expand_paths(options["paths"])
+        if not paths:
+            raise CommandError("No files found")
+
+        imported = 0
+        for summary in import_files(
+            paths,
+            bank_account,
+            reference_data.automation_user(),
+            workers=options["workers"],
+            start_date=options["start_date"],
+            end_date=options["end_date"],
+        ):
+            if summary.error:
+                self.stdout.write(
+                    self.style.ERROR(f"{summary.path}: failed - {summary.error}")
+                )
+            elif summary.result.already_imported:
+                self.stdout.write(
+                    f"{summary.path} ({summary.file_type}): already imported"
+                )
+            else:
+                imported += 1
+                self.stdout.write(
+                    f"{summary.path} ({summary.file_type}): "
+                    f"{summary.result.inserted} inserted, "
+                    f"{summary.result.updated} updated, "
+                    f"{summary.result.skipped} skipped"
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully imported {imported} of {len(paths)} files"
+            )
+        )
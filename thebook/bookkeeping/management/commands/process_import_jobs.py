@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from thebook.bookkeeping.import_jobs import fail_stale_import_jobs, run_import_job
+from thebook.bookkeeping.models import ImportJob
+
+
+class Command(BaseCommand):
+    help = "Import the files of pending import jobs"
+
+    def handle(self, *args, **options):
+        failed = fail_stale_import_jobs()
+        if failed:
+            self.stdout.write(
+                self.style.WARNING(f"Failed {failed} interrupted import jobs")
+            )
+
+        job_ids = ImportJob.objects.pending().values_list("id", flat=True)
+
+        processed = 0
+        for job_id in list(job_ids):
+            if run_import_job(job_id) is not None:
+                processed += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Successfully processed {processed} import jobs")
+        )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from thebook.bookkeeping.models import DailyBalance
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily balances of all bank accounts from their transactions"
+
+    def handle(self, *args, **options):
+        daily_balances = DailyBalance.objects.rebuild()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully rebuilt {len(daily_balances)} daily balances"
+            )
+        )
@@ -1,16 +1,14 @@
 from django.core.management.base import BaseCommand, CommandError
 
-from thebook.bookkeeping.models import CategoryMatchRule, Transaction
+from thebook.bookkeeping.models import Transaction
 
 
 class Command(BaseCommand):
     help = "Automatically set a category for uncategorized transactions"
 
     def handle(self, *args, **options):
-        uncategorized_transactions = Transaction.objects.filter(category__isnull=True)
-        category_match_rules = CategoryMatchRule.objects.all()
+        categorized = Transaction.objects.filter(category__isnull=True).categorize()
 
-        for transaction in uncategorized_transactions:
-            transaction.categorize(rules=category_match_rules)
-
-        self.stdout.write(self.style.SUCCESS("Successfully categorized transactions"))
+        self.stdout.write(
+            self.style.SUCCESS(f"Successfully categorized {categorized} transactions")
+        )
@@ -1,61 +1,97 @@
 import datetime
 import decimal
+import itertools
 from dataclasses import dataclass
 
-from django.db import models
+from taggit.models import TaggedItem
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import models, transaction
 from django.db.models import (
+    Aggregate,
     Case,
+    CharField,
+    Count,
     DateField,
+    DecimalField,
     Exists,
     F,
     IntegerField,
     OuterRef,
     Q,
+    Subquery,
     Sum,
     Value,
     When,
     Window,
 )
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+# Maximum number of values sent in a single IN clause by the duplicates lookups
+DUPLICATES_LOOKUP_BATCH_SIZE = 500
+
+
+def _as_date(value):
+    """Transactions created from webhooks may carry a datetime in the date field"""
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    return value
+
+
+class _GroupConcat(Aggregate):
+    """Concatenate values with commas (GROUP_CONCAT in SQLite, STRING_AGG in PostgreSQL)"""
+
+    function = "GROUP_CONCAT"
+    template = "%(function)s(%(expressions)s, ',')"
+    output_field = CharField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection, function="STRING_AGG", **extra_context
+        )
+
+
+def _latest_closing_balance():
+    from thebook.bookkeeping.models import DailyBalance
+
+    return Coalesce(
+        Subquery(
+            DailyBalance.objects.filter(bank_account=OuterRef("pk"))
+            .order_by("-date")
+            .values("closing_balance")[:1]
+        ),
+        Value(decimal.Decimal("0")),
+        output_field=DecimalField(),
+    )
 
 
 class BankAccountQuerySet(models.QuerySet):
 
     def with_summary(self, start_date, end_date):
-        incomes_filters = {
-            "transaction__amount__gte": 0,
-            "transaction__date__gte": start_date,
-            "transaction__date__lt": end_date,
-        }
-        expenses_filters = {
-            "transaction__amount__lt": 0,
-            "transaction__date__gte": start_date,
-            "transaction__date__lt": end_date,
-        }
-        period_balance_filter = {
-            "transaction__date__gte": start_date,
-            "transaction__date__lt": end_date,
-        }
+        period_filter = Q(
+            daily_balance__date__gte=start_date,
+            daily_balance__date__lt=end_date,
+        )
 
         return self.annotate(
             incomes=Sum(
-                "transaction__amount",
-                filter=Q(**incomes_filters),
+                "daily_balance__deposits",
+                filter=period_filter,
                 default=decimal.Decimal("0"),
             ),
             expenses=Sum(
-                "transaction__amount",
-                filter=Q(**expenses_filters),
+                "daily_balance__withdraws",
+                filter=period_filter,
                 default=decimal.Decimal("0"),
             ),
             period_balance=Sum(
-                "transaction__amount",
-                filter=Q(**period_balance_filter),
-                default=decimal.Decimal("0"),
-            ),
-            overall_balance=Sum(
-                "transaction__amount",
+                F("daily_balance__deposits") + F("daily_balance__withdraws"),
+                filter=period_filter,
                 default=decimal.Decimal("0"),
             ),
+            overall_balance=_latest_closing_balance(),
             summary_start_date=Value(start_date, output_field=DateField()),
             summary_end_date=Value(end_date, output_field=DateField()),
         )
@@ -74,53 +110,523 @@ class BankAccountQuerySet(models.QuerySet):
         if not _valid_year_and_month(month, year):
             raise ValueError("Invalid 'month' and 'year' arguments")
 
-        withdraw_filters = {"transaction__amount__lt": 0}
-        deposit_filters = {
-            "transaction__amount__gte": 0,
-        }
-        balance_filter = {}
-
+        period_filter = Q()
         if year is not None:
-            withdraw_filters.update({"transaction__date__year": year})
-            deposit_filters.update({"transaction__date__year": year})
-            balance_filter.update({"transaction__date__year": year})
-
+            period_filter &= Q(daily_balance__date__year=year)
         if month is not None:
-            withdraw_filters.update({"transaction__date__month": month})
-            deposit_filters.update({"transaction__date__month": month})
-            balance_filter.update({"transaction__date__month": month})
+            period_filter &= Q(daily_balance__date__month=month)
 
         return self.annotate(
             deposits=Sum(
-                "transaction__amount",
-                filter=Q(**deposit_filters),
+                "daily_balance__deposits",
+                filter=period_filter,
                 default=decimal.Decimal("0"),
             ),
             withdraws=Sum(
-                "transaction__amount",
-                filter=Q(**withdraw_filters),
+                "daily_balance__withdraws",
+                filter=period_filter,
                 default=decimal.Decimal("0"),
             ),
             balance=Sum(
-                "transaction__amount",
-                filter=Q(**balance_filter),
-                default=decimal.Decimal("0"),
-            ),
-            overall_balance=Sum(
-                "transaction__amount",
+                F("daily_balance__deposits") + F("daily_balance__withdraws"),
+                filter=period_filter,
                 default=decimal.Decimal("0"),
             ),
+            overall_balance=_latest_closing_balance(),
             year=Value(year, output_field=IntegerField()),
             month=Value(month, output_field=IntegerField()),
         ).order_by("name")
 
+    def cached_summary(self, *, year=None, month=None):
+        """Return the summary() of the bank accounts as a list cached until they change"""
+        from thebook.bookkeeping.data_version import get_or_compute
+
+        bank_account_ids = sorted(self.values_list("id", flat=True))
+        return get_or_compute(
+            "bookkeeping:bank-accounts-summary",
+            year,
+            month,
+            *bank_account_ids,
+            bank_account_ids=bank_account_ids,
+            compute=lambda: list(self.summary(year=year, month=month)),
+        )
+
+
+class DailyBalanceQuerySet(models.QuerySet):
+
+    def refresh(self, keys):
+        """Recompute the daily balances of the given (bank account id, date) pairs
+
+        Totals of each day are recalculated from the transactions table and the
+        cumulative difference from the stored values is propagated, in a single
+        pass per bank account, to the closing balance of the following days.
+
+        The bank accounts rows are locked before the totals are read, so
+        concurrent writers of the same bank account refresh its daily balances
+        one at a time, each one seeing the transactions committed by the others.
+        """
+        from thebook.bookkeeping.models import BankAccount, Transaction
+
+        dates_by_bank_account = {}
+        for bank_account_id, date in keys:
+            if bank_account_id is None or date is None:
+                continue
+            dates_by_bank_account.setdefault(bank_account_id, set()).add(_as_date(date))
+
+        if not dates_by_bank_account:
+            return
+
+        keys_filter = Q()
+        for bank_account_id, dates in dates_by_bank_account.items():
+            keys_filter |= Q(bank_account_id=bank_account_id, date__in=dates)
+
+        with transaction.atomic():
+            # locked always in the same order to avoid deadlocks
+            list(
+                BankAccount.objects.select_for_update()
+                .filter(id__in=dates_by_bank_account)
+                .order_by("id")
+                .values_list("id", flat=True)
+            )
+
+            totals = {
+                (row["bank_account_id"], row["date"]): row
+                for row in Transaction.objects.filter(keys_filter)
+                .order_by()
+                .values("bank_account_id", "date")
+                .annotate(
+                    deposits=Sum(
+                        "amount",
+                        filter=Q(amount__gte=0),
+                        default=decimal.Decimal("0"),
+                    ),
+                    withdraws=Sum(
+                        "amount",
+                        filter=Q(amount__lt=0),
+                        default=decimal.Decimal("0"),
+                    ),
+                )
+            }
+
+            for bank_account_id, dates in dates_by_bank_account.items():
+                self._refresh_bank_account(bank_account_id, sorted(dates), totals)
+
+    def _refresh_bank_account(self, bank_account_id, dates, totals):
+        zero = decimal.Decimal("0")
+        daily_balances = {
+            daily_balance.date: daily_balance
+            for daily_balance in self.select_for_update().filter(
+                bank_account_id=bank_account_id, date__in=dates
+            )
+        }
+
+        # Closing balances are computed from the stored (not yet updated) ones
+        updated, created, cumulative_deltas = [], [], []
+        cumulative_delta = zero
+        for date in dates:
+            day_totals = totals.get((bank_account_id, date), {})
+            deposits = day_totals.get("deposits", zero)
+            withdraws = day_totals.get("withdraws", zero)
+
+            daily_balance = daily_balances.get(date)
+            if daily_balance is None:
+                cumulative_delta += deposits + withdraws
+                if deposits or withdraws:
+                    previous_closing_balance = (
+                        self.filter(bank_account_id=bank_account_id, date__lt=date)
+                        .order_by("-date")
+                        .values_list("closing_balance", flat=True)
+                        .first()
+                    ) or zero
+                    created.append(
+                        self.model(
+                            bank_account_id=bank_account_id,
+                            date=date,
+                            deposits=deposits,
+                            withdraws=withdraws,
+                            closing_balance=previous_closing_balance + cumulative_delta,
+                        )
+                    )
+            else:
+                cumulative_delta += (deposits + withdraws) - (
+                    daily_balance.deposits + daily_balance.withdraws
+                )
+                daily_balance.deposits = deposits
+                daily_balance.withdraws = withdraws
+                daily_balance.closing_balance += cumulative_delta
+                updated.append(daily_balance)
+            cumulative_deltas.append(cumulative_delta)
+
+        self.bulk_update(updated, ["deposits", "withdraws", "closing_balance"])
+        self.bulk_create(created)
+
+        # Each day between two refreshed ones changes by the cumulative delta
+        # of the refreshed days before it, so every row is updated at most once
+        for date, next_date, delta in zip(dates, [*dates[1:], None], cumulative_deltas):
+            if not delta:
+                continue
+            following_days = self.filter(bank_account_id=bank_account_id, date__gt=date)
+            if next_date is not None:
+                following_days = following_days.filter(date__lt=next_date)
+            following_days.update(closing_balance=F("closing_balance") + delta)
+
+    def closing_balance_before(self, date):
+        """Sum of the closing balances of all bank accounts before the given date"""
+        from thebook.bookkeeping.models import BankAccount
+
+        closing_balances = BankAccount.objects.annotate(
+            closing_balance=Subquery(
+                self.filter(bank_account=OuterRef("pk"), date__lt=date)
+                .order_by("-date")
+                .values("closing_balance")[:1]
+            )
+        ).values_list("closing_balance", flat=True)
+
+        return sum(
+            (balance for balance in closing_balances if balance is not None),
+            decimal.Decimal("0"),
+        )
+
+    def rebuild(self, bank_accounts=None):
+        """Drop and recreate the daily balances from the transactions table"""
+        from thebook.bookkeeping.models import Transaction
+
+        transactions = Transaction.objects.filter(bank_account__isnull=False)
+        daily_balances = self.all()
+        if bank_accounts is not None:
+            transactions = transactions.filter(bank_account__in=bank_accounts)
+            daily_balances = daily_balances.filter(bank_account__in=bank_accounts)
+
+        rows = (
+            transactions.order_by("bank_account_id", "date")
+            .values("bank_account_id", "date")
+            .annotate(
+                deposits=Sum(
+                    "amount",
+                    filter=Q(amount__gte=0),
+                    default=decimal.Decimal("0"),
+                ),
+                withdraws=Sum(
+                    "amount",
+                    filter=Q(amount__lt=0),
+                    default=decimal.Decimal("0"),
+                ),
+            )
+        )
+
+        new_daily_balances = []
+        closing_balance, current_bank_account_id = decimal.Decimal("0"), None
+        for row in rows:
+            if row["bank_account_id"] != current_bank_account_id:
+                closing_balance = decimal.Decimal("0")
+                current_bank_account_id = row["bank_account_id"]
+            closing_balance += row["deposits"] + row["withdraws"]
+            new_daily_balances.append(
+                self.model(
+                    bank_account_id=row["bank_account_id"],
+                    date=row["date"],
+                    deposits=row["deposits"],
+                    withdraws=row["withdraws"],
+                    closing_balance=closing_balance,
+                )
+            )
+
+        with transaction.atomic():
+            daily_balances.delete()
+            return self.bulk_create(new_daily_balances, batch_size=1000)
+
+
+class DataVersionQuerySet(models.QuerySet):
+
+    def versions(self, scopes):
+        """Return a dict of the version by scope (0 for scopes never bumped)"""
+        versions = dict(self.filter(scope__in=scopes).values_list("scope", "version"))
+        return {scope: versions.get(scope, 0) for scope in scopes}
+
+    def bump(self, scopes):
+        """Increment the version of the scopes, creating the missing ones"""
+        scopes = set(scopes)
+        if not scopes:
+            return
+
+        updated = self.filter(scope__in=scopes).update(version=F("version") + 1)
+        if updated < len(scopes):
+            # Rows created concurrently are incremented by the second update
+            # instead of having the bump lost by the ignored insert
+            self.bulk_create(
+                [self.model(scope=scope, version=0) for scope in sorted(scopes)],
+                ignore_conflicts=True,
+            )
+            self.filter(scope__in=scopes).update(version=F("version") + 1)
+
+
+class ImportedFileQuerySet(models.QuerySet):
+
+    def already_imported(self, sha256, importer, bank_account):
+        """Return True if a file with the same content was completely imported"""
+        return self.filter(
+            sha256=sha256, importer=importer, bank_account=bank_account, partial=False
+        ).exists()
+
+    def covered_ranges(self, importer, bank_account):
+        """Return the merged (start date, end date) ranges of imported files
+
+        The end date of each file is excluded because statements are usually
+        generated while transactions of their last day are still happening.
+        """
+        ranges = self.filter(
+            importer=importer,
+            bank_account=bank_account,
+            start_date__isnull=False,
+            end_date__gt=F("start_date"),
+        ).values_list("start_date", "end_date")
+
+        merged = []
+        for start_date, end_date in sorted(ranges):
+            if merged and start_date <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end_date))
+            else:
+                merged.append((start_date, end_date))
+        return merged
+
+
+class ImportJobQuerySet(models.QuerySet):
+
+    def claim(self, job_id):
+        """Mark a pending job as running returning it, or None if another worker
+        claimed it first or another job of its bank account is running
+
+        Jobs of a bank account run one at a time, as the date ranges of imported
+        files are only recorded once each import finishes. The bank account row
+        is locked, so concurrent claims see the job each other started.
+        """
+        from thebook.bookkeeping.models import BankAccount, ImportJobStatus
+
+        with transaction.atomic():
+            bank_account_id = (
+                self.filter(id=job_id).values_list("bank_account_id", flat=True).first()
+            )
+            list(
+                BankAccount.objects.select_for_update()
+                .filter(id=bank_account_id)
+                .values_list("id", flat=True)
+            )
+
+            running = (
+                self.filter(
+                    bank_account_id=bank_account_id, status=ImportJobStatus.RUNNING
+                )
+                .exclude(id__in=self.stale().values("id"))
+                .exists()
+            )
+            if running:
+                return None
+
+            claimed = self.filter(id=job_id, status=ImportJobStatus.PENDING).update(
+                status=ImportJobStatus.RUNNING, started_at=timezone.now()
+            )
+        if not claimed:
+            return None
+        return self.get(id=job_id)
+
+    def pending(self):
+        """Pending jobs, oldest first"""
+        from thebook.bookkeeping.models import ImportJobStatus
+
+        return self.filter(status=ImportJobStatus.PENDING).order_by("created_at")
+
+    def stale(self):
+        """Running jobs started more than IMPORT_JOB_TIMEOUT seconds ago, left
+        behind by workers that stopped before finishing them"""
+        from thebook.bookkeeping.models import ImportJobStatus
+
+        return self.filter(
+            status=ImportJobStatus.RUNNING,
+            started_at__lt=timezone.now()
+            - datetime.timedelta(seconds=settings.IMPORT_JOB_TIMEOUT),
+        )
+
+    def unfinished(self):
+        from thebook.bookkeeping.models import ImportJobStatus
+
+        return self.filter(
+            status__in=[ImportJobStatus.PENDING, ImportJobStatus.RUNNING]
+        )
+
+
+# Transaction fields the daily balances are computed from
+DAILY_BALANCE_FIELDS = {"amount", "bank_account", "bank_account_id", "date"}
+
 
 class TransactionQuerySet(models.QuerySet):
 
+    def bulk_create(self, objs, *args, **kwargs):
+        from thebook.bookkeeping.data_version import bump_data_version
+        from thebook.bookkeeping.models import DailyBalance
+
+        objs = list(objs)
+        keys = self._conflicting_daily_balance_keys(objs, **kwargs)
+        objs = super().bulk_create(objs, *args, **kwargs)
+        keys |= {(obj.bank_account_id, obj.date) for obj in objs}
+        DailyBalance.objects.refresh(keys)
+        bump_data_version({bank_account_id for bank_account_id, _ in keys})
+        return objs
+
+    def _conflicting_daily_balance_keys(
+        self,
+        objs,
+        update_conflicts=False,
+        update_fields=None,
+        unique_fields=None,
+        **kwargs
+    ):
+        """(bank account id, date) of the rows an upsert moves to another day or account"""
+        moved_fields = DAILY_BALANCE_FIELDS - {"amount"}
+        if not (
+            objs
+            and update_conflicts
+            and unique_fields
+            and moved_fields & set(update_fields or [])
+        ):
+            return set()
+
+        unique_fields = [
+            self.model._meta.get_field(name).attname for name in unique_fields
+        ]
+        conflicts = Q()
+        for obj in objs:
+            conflicts |= Q(**{name: getattr(obj, name) for name in unique_fields})
+
+        return set(
+            self.filter(conflicts)
+            .order_by()
+            .values_list("bank_account_id", "date")
+            .distinct()
+        )
+
+    def update(self, **kwargs):
+        """Update the transactions refreshing the daily balances they change and
+        the data version of the bank accounts they are in or moved to
+
+        bulk_update() and the admin actions write through this method as well.
+        """
+        from thebook.bookkeeping.data_version import bump_data_version
+        from thebook.bookkeeping.models import DailyBalance
+
+        with transaction.atomic():
+            keys = set(
+                self.order_by().values_list("bank_account_id", "date").distinct()
+            )
+            if not DAILY_BALANCE_FIELDS & set(kwargs):
+                updated = super().update(**kwargs)
+            else:
+                # the updated rows may not match the queryset filters anymore
+                ids = list(self.values_list("id", flat=True))
+                updated = super().update(**kwargs)
+                keys |= set(
+                    self.model._base_manager.filter(id__in=ids)
+                    .order_by()
+                    .values_list("bank_account_id", "date")
+                    .distinct()
+                )
+                DailyBalance.objects.refresh(keys)
+            bump_data_version({bank_account_id for bank_account_id, _ in keys})
+        return updated
+
+    def categorize(self, rules=None):
+        """Categorize all transactions in the queryset using CategoryMatchRuleEngine"""
+        from thebook.bookkeeping.categorization import CategoryMatchRuleEngine
+
+        return CategoryMatchRuleEngine(rules).categorize(self)
+
+    def with_document_flags(self):
+        """Annotate document existence and count, used by Transaction.has_documents"""
+        from thebook.bookkeeping.models import Document
+
+        documents = Document.objects.filter(transaction=OuterRef("pk"))
+        documents_count = (
+            documents.order_by()
+            .values("transaction")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+
+        return self.annotate(
+            documents_exist=Exists(documents),
+            documents_count=Coalesce(Subquery(documents_count), Value(0)),
+        )
+
+    def with_export_info(self):
+        """Annotate document existence and tag names so exports don't query per row"""
+        tag_names = (
+            TaggedItem.objects.filter(
+                content_type=ContentType.objects.get_for_model(self.model),
+                object_id=OuterRef("pk"),
+            )
+            .order_by()
+            .values("object_id")
+            .annotate(names=_GroupConcat("tag__name"))
+            .values("names")
+        )
+
+        return self.with_document_flags().annotate(
+            tag_names=Coalesce(Subquery(tag_names), Value("")),
+        )
+
+    def existing_references(self, references):
+        """Return the set of references already used by transactions in the queryset"""
+        references = sorted({str(reference) for reference in references if reference})
+
+        existing = set()
+        for batch in itertools.batched(references, DUPLICATES_LOOKUP_BATCH_SIZE):
+            existing.update(
+                self.filter(reference__in=batch).values_list("reference", flat=True)
+            )
+        return existing
+
+    def existing_natural_keys(self, keys):
+        """Return the subset of (date, description, amount, bank_account_id) keys
+        already present in the queryset, used by importers that don't provide a
+        reference for each transaction"""
+        keys = {
+            (_as_date(date), description, decimal.Decimal(amount), bank_account_id)
+            for date, description, amount, bank_account_id in keys
+        }
+
+        existing = set()
+        for bank_account_id, bank_account_keys in itertools.groupby(
+            sorted(keys, key=lambda key: (key[3], key[0])), key=lambda key: key[3]
+        ):
+            dates = sorted({key[0] for key in bank_account_keys})
+            for batch in itertools.batched(dates, DUPLICATES_LOOKUP_BATCH_SIZE):
+                existing.update(
+                    self.filter(bank_account_id=bank_account_id, date__in=batch)
+                    .order_by()
+                    .values_list("date", "description", "amount", "bank_account_id")
+                )
+        return keys & existing
+
     def within_period(self, start_date, end_date):
         """Filter transactions by period (including start and end dates)"""
         return self.filter(date__gte=start_date, date__lte=end_date)
 
+    def balance_before(self, date):
+        """Balance of all transactions before the given date
+
+        Transactions of bank accounts are read from the daily balances, only
+        the ones without a bank account are aggregated.
+        """
+        from thebook.bookkeeping.models import DailyBalance
+
+        unassigned = self.filter(bank_account__isnull=True, date__lt=date).aggregate(
+            balance=Sum("amount", default=decimal.Decimal("0"))
+        )["balance"]
+        return DailyBalance.objects.closing_balance_before(date) + unassigned
+
+    def after(self, date, pk):
+        """Filter transactions after the given (date, id) keyset cursor"""
+        return self.filter(Q(date__gt=date) | Q(date=date, pk__gt=pk))
+
     def find_match_for(self, receivable_fee):
         from thebook.members.models import ReceivableFee
 
@@ -148,7 +654,12 @@ class TransactionQuerySet(models.QuerySet):
         return transaction
 
     def with_info_for_cash_book(self, base_value=decimal.Decimal("0")):
-        return self.annotate(
+        """Annotate income, expense and the running balance ordered by (date, id)
+
+        The running balance only sums the transactions of this queryset, so
+        base_value must carry the balance of everything before them.
+        """
+        return self.order_by("date", "pk").annotate(
             income=Case(
                 When(amount__gte=decimal.Decimal("0"), then=F("amount")),
                 default=Value(None),
@@ -159,7 +670,7 @@ class TransactionQuerySet(models.QuerySet):
             ),
             balance=Window(
                 expression=Sum("amount"),
-                order_by="date",
+                order_by=[F("date").asc(), F("pk").asc()],
             )
             + base_value,
         )
@@ -0,0 +1,106 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:58
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Q, Sum
+
+
+def populate_daily_balances(apps, schema_editor):
+    DailyBalance = apps.get_model("bookkeeping", "DailyBalance")
+    Transaction = apps.get_model("bookkeeping", "Transaction")
+
+    rows = (
+        Transaction.objects.filter(bank_account__isnull=False)
+        .order_by("bank_account_id", "date")
+        .values("bank_account_id", "date")
+        .annotate(
+            deposits=Sum("amount", filter=Q(amount__gte=0), default=Decimal("0")),
+            withdraws=Sum("amount", filter=Q(amount__lt=0), default=Decimal("0")),
+        )
+    )
+
+    daily_balances = []
+    closing_balance, current_bank_account_id = Decimal("0"), None
+    for row in rows:
+        if row["bank_account_id"] != current_bank_account_id:
+            closing_balance = Decimal("0")
+            current_bank_account_id = row["bank_account_id"]
+        closing_balance += row["deposits"] + row["withdraws"]
+        daily_balances.append(
+            DailyBalance(
+                bank_account_id=row["bank_account_id"],
+                date=row["date"],
+                deposits=row["deposits"],
+                withdraws=row["withdraws"],
+                closing_balance=closing_balance,
+            )
+        )
+
+    DailyBalance.objects.bulk_create(daily_balances, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookkeeping", "0021_transaction_source"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyBalance",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "deposits",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0"), max_digits=14
+                    ),
+                ),
+                (
+                    "withdraws",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0"), max_digits=14
+                    ),
+                ),
+                (
+                    "closing_balance",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0"),
+                        help_text="Balance of the bank account at the end of the day",
+                        max_digits=14,
+                    ),
+                ),
+                (
+                    "bank_account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_balances",
+                        related_query_name="daily_balance",
+                        to="bookkeeping.bankaccount",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["bank_account", "date"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("bank_account", "date"),
+                        name="unique_daily_balance_per_bank_account",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_daily_balances, migrations.RunPython.noop),
+    ]
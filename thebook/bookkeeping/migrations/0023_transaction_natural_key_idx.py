@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookkeeping", "0022_dailybalance"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["date", "description", "amount", "bank_account"],
+                name="transaction_natural_key_idx",
+            ),
+        ),
+    ]
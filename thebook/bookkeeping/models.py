@@ -14,7 +14,14 @@ from django.urls import reverse
 from django.utils.text import slugify
 from django.utils.translation import gettext as _
 
-from thebook.bookkeeping.managers import BankAccountQuerySet, TransactionQuerySet
+from thebook.bookkeeping.managers import (
+    BankAccountQuerySet,
+    DailyBalanceQuerySet,
+    DataVersionQuerySet,
+    ImportedFileQuerySet,
+    ImportJobQuerySet,
+    TransactionQuerySet,
+)
 
 
 def document_upload_path(instance, filename):
@@ -28,6 +35,13 @@ def document_upload_path(instance, filename):
     return Path(instance.transaction.bank_account.slug, new_filename)
 
 
+def import_job_upload_path(instance, filename):
+    filepath = Path(filename)
+    extension = filepath.suffix
+    new_filename = "".join([uuid.uuid4().hex, extension])
+    return Path("import_jobs", new_filename)
+
+
 class BankAccount(models.Model):
     name = models.CharField(max_length=64, unique=True)
     slug = models.SlugField(max_length=64, unique=True)
@@ -66,28 +80,25 @@ class BankAccount(models.Model):
         if not _valid_year_and_month(month, year):
             raise ValueError("Invalid 'month' and 'year' arguments")
 
-        transactions = self.transactions.all()
+        daily_balances = self.daily_balances.all()
 
         overall_balance = (
-            transactions.aggregate(overall_balance=Sum("amount")).get("overall_balance")
+            daily_balances.order_by("-date")
+            .values_list("closing_balance", flat=True)
+            .first()
         ) or Decimal("0")
 
         if year is not None:
-            transactions = transactions.filter(date__year=year)
+            daily_balances = daily_balances.filter(date__year=year)
         if month is not None:
-            transactions = transactions.filter(date__month=month)
-
-        deposits = (
-            transactions.filter(amount__gte=Decimal("0"))
-            .aggregate(deposits=Sum("amount"))
-            .get("deposits")
-        ) or Decimal("0")
+            daily_balances = daily_balances.filter(date__month=month)
 
-        withdraws = (
-            transactions.filter(amount__lt=Decimal("0"))
-            .aggregate(withdraws=Sum("amount"))
-            .get("withdraws")
-        ) or Decimal("0")
+        period_totals = daily_balances.aggregate(
+            deposits=Sum("deposits", default=Decimal("0")),
+            withdraws=Sum("withdraws", default=Decimal("0")),
+        )
+        deposits = period_totals["deposits"]
+        withdraws = period_totals["withdraws"]
 
         self.withdraws = withdraws
         self.deposits = deposits
@@ -99,6 +110,64 @@ class BankAccount(models.Model):
         return self
 
 
+class DailyBalance(models.Model):
+    """Per bank account and per day rollup of transactions
+
+    Kept up to date when transactions are saved, deleted or bulk created, so
+    summaries don't need to aggregate the whole transactions history.
+    """
+
+    bank_account = models.ForeignKey(
+        "bookkeeping.BankAccount",
+        on_delete=models.CASCADE,
+        related_name="daily_balances",
+        related_query_name="daily_balance",
+    )
+    date = models.DateField()
+    deposits = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal("0")
+    )
+    withdraws = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal("0")
+    )
+    closing_balance = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal("0"),
+        help_text="Balance of the bank account at the end of the day",
+    )
+
+    objects = DailyBalanceQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["bank_account", "date"],
+                name="unique_daily_balance_per_bank_account",
+            ),
+        ]
+        ordering = ["bank_account", "date"]
+
+    def __str__(self):
+        return f"{self.bank_account_id} - {self.date} ({self.closing_balance:.2f})"
+
+
+class DataVersion(models.Model):
+    """Counter changed every time the data of a scope (e.g. a bank account) changes
+
+    Used in cache keys so cached values are invalidated as soon as any of the
+    data they were computed from changes, see thebook.bookkeeping.data_version.
+    """
+
+    scope = models.CharField(max_length=64, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    objects = DataVersionQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.scope} ({self.version})"
+
+
 class Category(models.Model):
     name = models.CharField(max_length=64, unique=True)
 
@@ -274,14 +343,32 @@ class Transaction(models.Model):
     class Meta:
         indexes = [
             models.Index("date", name="transaction_date_idx"),
+            models.Index(
+                fields=["date", "description", "amount", "bank_account"],
+                name="transaction_natural_key_idx",
+            ),
         ]
         ordering = ["date", "description"]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        new = super().from_db(db, field_names, values)
+        if not new.get_deferred_fields() & {"bank_account_id", "date"}:
+            new._original_daily_balance_key = (new.bank_account_id, new.date)
+        return new
+
     def __str__(self):
         return f"{self.description} ({self.amount:.2f})"
 
     @property
     def has_documents(self):
+        if hasattr(self, "documents_exist"):
+            # Annotated by TransactionQuerySet.with_document_flags()
+            return self.documents_exist
+
+        if "documents" in getattr(self, "_prefetched_objects_cache", {}):
+            return bool(self.documents.all())
+
         return self.documents.exists()
 
     def categorize(self, rules=None):
@@ -295,7 +382,117 @@ class Transaction(models.Model):
                 return
 
         if Decimal("0") <= self.amount <= settings.DONATION_THRESHOLD:
-            donation, _ = Category.objects.get_or_create(name="Doação")
-            self.category = donation
+            from thebook.bookkeeping.reference_data import reference_data
+
+            self.category = reference_data.category("Doação")
             self.save()
             return
+
+
+class ImportedFile(models.Model):
+    """Ledger of files imported as transactions, identified by their content"""
+
+    sha256 = models.CharField(max_length=64)
+    importer = models.CharField(max_length=32)
+    bank_account = models.ForeignKey(
+        "bookkeeping.BankAccount",
+        on_delete=models.CASCADE,
+        related_name="imported_files",
+        related_query_name="imported_file",
+    )
+    start_date = models.DateField(
+        null=True, blank=True, help_text="Date of the first imported transaction"
+    )
+    end_date = models.DateField(
+        null=True, blank=True, help_text="Date of the last imported transaction"
+    )
+    partial = models.BooleanField(
+        default=False,
+        help_text="Only transactions within a date range were imported",
+    )
+    inserted = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = ImportedFileQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["sha256", "importer", "bank_account"],
+                name="imported_file_sha256_idx",
+            ),
+        ]
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.importer} - {self.sha256[:12]}"
+
+
+class ImportJobStatus(models.IntegerChoices):
+    PENDING = 1, _("pending")
+    RUNNING = 2, _("running")
+    SUCCEEDED = 3, _("succeeded")
+    FAILED = 4, _("failed")
+
+
+class ImportJob(models.Model):
+    """Transactions file uploaded to be imported outside of the request cycle"""
+
+    bank_account = models.ForeignKey(
+        "bookkeeping.BankAccount",
+        on_delete=models.CASCADE,
+        related_name="import_jobs",
+        related_query_name="import_job",
+    )
+    transactions_file = models.FileField(upload_to=import_job_upload_path)
+    file_type = models.CharField(max_length=32)
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+
+    status = models.IntegerField(
+        choices=ImportJobStatus.choices,
+        default=ImportJobStatus.PENDING,
+    )
+    processed = models.PositiveIntegerField(default=0)
+    inserted = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    already_imported = models.BooleanField(default=False)
+    error = models.TextField(blank=True)
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.PROTECT,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ImportJobQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="import_job_status_idx"),
+        ]
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return (
+            f"{self.file_type} - {self.bank_account_id} ({self.get_status_display()})"
+        )
+
+    @property
+    def failed(self):
+        return self.status == ImportJobStatus.FAILED
+
+    @property
+    def finished(self):
+        return self.status in (ImportJobStatus.SUCCEEDED, ImportJobStatus.FAILED)
@@ -0,0 +1,86 @@
+"""Process-wide registry of well-known reference entities
+
+Bank accounts, categories and the automation user looked up by name on every
+import and webhook are resolved once and kept for REFERENCE_DATA_TTL seconds.
+Entities are only registered after the database transaction resolving them
+is committed, so a rolled back get_or_create is never cached, and saving or
+deleting any entity of the same model discards the cached entities of that
+model (see signals).
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+
+class ReferenceData:
+    REFERENCE_DATA_TTL = 10 * 60
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entities = {}
+
+    def clear(self, model=None):
+        """Discard the cached entities (only the ones of model, if given)"""
+        with self._lock:
+            if model is None:
+                self._entities = {}
+            else:
+                self._entities = {
+                    key: value
+                    for key, value in self._entities.items()
+                    if key[0] is not model
+                }
+
+    def _register(self, key, entity):
+        with self._lock:
+            self._entities[key] = (time.monotonic() + self.REFERENCE_DATA_TTL, entity)
+
+    def _get(self, model, name, resolve):
+        key = (model, name)
+        with self._lock:
+            cached = self._entities.get(key)
+        if cached is not None and time.monotonic() < cached[0]:
+            return cached[1]
+
+        entity = resolve()
+        transaction.on_commit(lambda: self._register(key, entity))
+        return entity
+
+    def bank_account(self, name):
+        from thebook.bookkeeping.models import BankAccount
+
+        return self._get(
+            BankAccount,
+            name,
+            lambda: BankAccount.objects.get_or_create(name=name)[0],
+        )
+
+    def category(self, name):
+        from thebook.bookkeeping.models import Category
+
+        return self._get(
+            Category,
+            name,
+            lambda: Category.objects.get_or_create(name=name)[0],
+        )
+
+    def categories(self, *names):
+        return {name: self.category(name) for name in names}
+
+    def bank_fee_category(self):
+        return self.category(settings.BANK_FEE_CATEGORY_NAME)
+
+    def automation_user(self):
+        User = get_user_model()
+        return self._get(
+            User,
+            None,
+            lambda: User.objects.get_or_create_automation_user(),
+        )
+
+
+reference_data = ReferenceData()
@@ -0,0 +1,169 @@
+"""Totals of transactions grouped by category or tag and month
+
+Each matrix is computed with a single grouped query and cached under the
+data version of the bank accounts it covers, so it is only recalculated
+after one of their transactions changes. Only category and tag ids are
+cached, their names are looked up on every call so renames show up at once.
+
+Tag matrices have no totals: a transaction with many tags is counted in the
+row of each one of them.
+"""
+
+import datetime
+import decimal
+from dataclasses import dataclass, field
+
+from taggit.models import Tag
+
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+
+from thebook.bookkeeping.data_version import get_or_compute
+from thebook.bookkeeping.models import BankAccount, Category, Transaction
+
+
+class ReportGroupBy:
+    CATEGORY = "category"
+    TAG = "tag"
+
+    lookups = {
+        CATEGORY: "category",
+        TAG: "tags",
+    }
+
+
+@dataclass
+class PeriodMatrixRow:
+    label: str | None
+    values: list
+    total: decimal.Decimal
+
+
+@dataclass
+class PeriodMatrix:
+    group_by: str
+    months: list
+    rows: list = field(default_factory=list)
+    totals: list | None = None
+    total: decimal.Decimal | None = None
+
+
+def months_of_period(start_date, end_date):
+    """Return the first day of each month of the period"""
+    months = []
+    month = start_date.replace(day=1)
+    while month <= end_date:
+        months.append(month)
+        month = (month + datetime.timedelta(days=31)).replace(day=1)
+    return months
+
+
+def _as_month(value):
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    return value.replace(day=1)
+
+
+def _compute_period_values(group_by, start_date, end_date, bank_accounts):
+    """Return the totals of each month by category or tag id"""
+    lookup = ReportGroupBy.lookups[group_by]
+
+    transactions = Transaction.objects.within_period(
+        start_date=start_date, end_date=end_date
+    )
+    if bank_accounts is not None:
+        transactions = transactions.filter(bank_account__in=bank_accounts)
+
+    grouped = (
+        transactions.order_by()
+        .annotate(month=TruncMonth("date"))
+        .values(lookup, "month")
+        .annotate(total=Sum("amount"))
+    )
+
+    months = months_of_period(start_date, end_date)
+    month_index = {month: index for index, month in enumerate(months)}
+    zero = decimal.Decimal("0")
+
+    values_by_id = {}
+    for row in grouped:
+        values = values_by_id.setdefault(row[lookup], [zero] * len(months))
+        values[month_index[_as_month(row["month"])]] += row["total"]
+
+    return values_by_id
+
+
+def _build_period_matrix(group_by, months, values_by_id):
+    label_model = Category if group_by == ReportGroupBy.CATEGORY else Tag
+    names = dict(
+        label_model.objects.filter(
+            id__in=[label_id for label_id in values_by_id if label_id is not None]
+        ).values_list("id", "name")
+    )
+    zero = decimal.Decimal("0")
+
+    values_by_label = {}
+    for label_id, values in values_by_id.items():
+        label = names.get(label_id)
+        if label in values_by_label:
+            # e.g. a deleted category, now listed with the uncategorized ones
+            values = [a + b for a, b in zip(values_by_label[label], values)]
+        values_by_label[label] = values
+
+    # Transactions without category or tag are listed last
+    labels = sorted(values_by_label, key=lambda label: (label is None, label or ""))
+    rows = [
+        PeriodMatrixRow(
+            label=label,
+            values=values_by_label[label],
+            total=sum(values_by_label[label], zero),
+        )
+        for label in labels
+    ]
+
+    if group_by == ReportGroupBy.TAG:
+        # A transaction with many tags is in many rows, so rows can't be summed
+        return PeriodMatrix(group_by=group_by, months=months, rows=rows)
+
+    totals = [sum(column, zero) for column in zip(*(row.values for row in rows))]
+    return PeriodMatrix(
+        group_by=group_by,
+        months=months,
+        rows=rows,
+        totals=totals or [zero] * len(months),
+        total=sum(totals, zero),
+    )
+
+
+def period_matrix(group_by, start_date, end_date, bank_accounts=None):
+    """Return the totals by category or tag (group_by) and month of the period
+
+    When bank_accounts is None transactions of all bank accounts, including
+    the ones without a bank account, are considered.
+    """
+    if group_by not in ReportGroupBy.lookups:
+        raise ValueError(f"Invalid 'group_by' argument: {group_by}")
+
+    if bank_accounts is None:
+        bank_account_ids = [*BankAccount.objects.values_list("id", flat=True), None]
+        accounts_key = "all"
+    else:
+        bank_account_ids = sorted(bank_account.id for bank_account in bank_accounts)
+        accounts_key = ",".join(
+            str(bank_account_id) for bank_account_id in bank_account_ids
+        )
+
+    values_by_id = get_or_compute(
+        "bookkeeping:period-matrix",
+        group_by,
+        start_date.isoformat(),
+        end_date.isoformat(),
+        accounts_key,
+        bank_account_ids=bank_account_ids,
+        compute=lambda: _compute_period_values(
+            group_by, start_date, end_date, bank_accounts
+        ),
+    )
+    return _build_period_matrix(
+        group_by, months_of_period(start_date, end_date), values_by_id
+    )
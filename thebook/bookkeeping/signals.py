@@ -0,0 +1,100 @@
+from taggit.models import Tag
+
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from thebook.bookkeeping.data_version import bump_data_version
+from thebook.bookkeeping.managers import DAILY_BALANCE_FIELDS
+from thebook.bookkeeping.models import (
+    BankAccount,
+    Category,
+    DailyBalance,
+    Transaction,
+)
+from thebook.bookkeeping.reference_data import reference_data
+
+
+@receiver(post_save, sender=Transaction)
+def refresh_daily_balance_on_save(
+    sender, instance, created, raw, update_fields, **kwargs
+):
+    if raw:
+        return
+
+    if update_fields is not None and not DAILY_BALANCE_FIELDS & set(update_fields):
+        return
+
+    keys = [(instance.bank_account_id, instance.date)]
+    original_key = getattr(instance, "_original_daily_balance_key", None)
+    if original_key is not None:
+        keys.append(original_key)
+
+    DailyBalance.objects.refresh(keys)
+
+
+@receiver(post_delete, sender=Transaction)
+def refresh_daily_balance_on_delete(sender, instance, **kwargs):
+    DailyBalance.objects.refresh([(instance.bank_account_id, instance.date)])
+
+
+# Registered after the daily balance receivers, so the version changes only
+# when everything computed from the transaction is written
+@receiver(post_save, sender=Transaction)
+def bump_data_version_on_save(sender, instance, raw, **kwargs):
+    if raw:
+        return
+
+    # The bank account the transaction is moved from changes as well
+    bank_account_ids = {instance.bank_account_id}
+    original_key = getattr(instance, "_original_daily_balance_key", None)
+    if original_key is not None:
+        bank_account_ids.add(original_key[0])
+    bump_data_version(bank_account_ids)
+
+    instance._original_daily_balance_key = (instance.bank_account_id, instance.date)
+
+
+@receiver(post_delete, sender=Transaction)
+def bump_data_version_on_delete(sender, instance, **kwargs):
+    bump_data_version({instance.bank_account_id})
+
+
+@receiver(m2m_changed, sender=Transaction.tags.through)
+def bump_data_version_on_tags_changed(sender, instance, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear") and isinstance(
+        instance, Transaction
+    ):
+        bump_data_version({instance.bank_account_id})
+
+
+@receiver(post_save, sender=BankAccount)
+def bump_data_version_on_bank_account_save(sender, instance, raw, **kwargs):
+    if raw:
+        return
+
+    bump_data_version({instance.id})
+
+
+@receiver(post_delete, sender=BankAccount)
+def bump_data_version_on_bank_account_delete(sender, instance, **kwargs):
+    # Transactions of the deleted bank account are left without a bank account
+    bump_data_version({instance.id, None})
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Tag)
+def bump_data_version_on_label_delete(sender, **kwargs):
+    # The transactions of the deleted category or tag are changed without
+    # sending signals and can't be known anymore, so all bank accounts change
+    bump_data_version({*BankAccount.objects.values_list("id", flat=True), None})
+
+
+@receiver(post_save, sender=BankAccount)
+@receiver(post_delete, sender=BankAccount)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def clear_reference_data(sender, **kwargs):
+    reference_data.clear(sender)
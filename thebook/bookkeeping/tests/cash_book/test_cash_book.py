@@ -0,0 +1,134 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from model_bakery import baker
+
+from thebook.bookkeeping.cash_book import CashBook, decode_cursor, encode_cursor
+from thebook.bookkeeping.models import BankAccount, DailyBalance, Transaction
+
+
+@pytest.fixture
+def bank_account():
+    return BankAccount.objects.create(name="Test Bank Account")
+
+
+@pytest.fixture
+def transactions(db, bank_account):
+    # fmt: off
+    return [
+        baker.make(Transaction, bank_account=bank_account, date=datetime.date(2026, 1, 31), amount=Decimal("258.45")),
+        baker.make(Transaction, bank_account=bank_account, date=datetime.date(2026, 2, 6), amount=Decimal("100")),
+        baker.make(Transaction, bank_account=bank_account, date=datetime.date(2026, 2, 6), amount=Decimal("-30")),
+        baker.make(Transaction, bank_account=bank_account, date=datetime.date(2026, 2, 6), amount=Decimal("5")),
+        baker.make(Transaction, bank_account=bank_account, date=datetime.date(2026, 2, 10), amount=Decimal("-50.42")),
+        baker.make(Transaction, bank_account=bank_account, date=datetime.date(2026, 3, 1), amount=Decimal("10")),
+    ]
+    # fmt: on
+
+
+@pytest.fixture
+def cash_book():
+    return CashBook(datetime.date(2026, 2, 1), datetime.date(2026, 2, 28))
+
+
+def test_opening_balance_from_daily_balances(transactions, cash_book):
+    assert cash_book.opening_balance == Decimal("258.45")
+
+
+def test_opening_balance_includes_transactions_without_bank_account(
+    transactions, cash_book
+):
+    baker.make(
+        Transaction,
+        bank_account=None,
+        date=datetime.date(2025, 12, 1),
+        amount=Decimal("-8.45"),
+    )
+
+    assert cash_book.opening_balance == Decimal("250")
+
+
+def test_opening_balance_does_not_aggregate_transactions_of_bank_accounts(
+    transactions, cash_book
+):
+    DailyBalance.objects.filter(date=datetime.date(2026, 1, 31)).update(
+        closing_balance=Decimal("1000")
+    )
+
+    assert cash_book.opening_balance == Decimal("1000")
+
+
+def test_running_balance_of_transactions_of_the_same_day_is_ordered_by_id(
+    transactions, cash_book
+):
+    page = cash_book.page()
+
+    assert [transaction.id for transaction in page.transactions] == [
+        transaction.id for transaction in transactions[1:5]
+    ]
+    assert [transaction.balance for transaction in page.transactions] == [
+        Decimal("358.45"),
+        Decimal("328.45"),
+        Decimal("333.45"),
+        Decimal("283.03"),
+    ]
+    assert page.cursor is None
+    assert page.next_cursor is None
+    assert page.closing_balance == Decimal("283.03")
+
+
+def test_keyset_pagination(transactions, cash_book):
+    first_page = cash_book.page(page_size=2)
+
+    assert [transaction.id for transaction in first_page.transactions] == [
+        transactions[1].id,
+        transactions[2].id,
+    ]
+    assert first_page.next_cursor == encode_cursor(
+        transactions[2].date, transactions[2].id
+    )
+
+    second_page = cash_book.page(cursor=first_page.next_cursor, page_size=2)
+
+    assert second_page.cursor == first_page.next_cursor
+    assert second_page.opening_balance == Decimal("328.45")
+    assert [transaction.id for transaction in second_page.transactions] == [
+        transactions[3].id,
+        transactions[4].id,
+    ]
+    assert [transaction.balance for transaction in second_page.transactions] == [
+        Decimal("333.45"),
+        Decimal("283.03"),
+    ]
+    assert second_page.next_cursor is None
+
+
+def test_invalid_cursor_returns_first_page(transactions, cash_book):
+    page = cash_book.page(cursor="invalid")
+
+    assert page.cursor is None
+    assert page.opening_balance == Decimal("258.45")
+    assert len(page.transactions) == 4
+
+
+def test_iterate_over_all_transactions_of_the_period(
+    transactions, cash_book, monkeypatch
+):
+    monkeypatch.setattr("thebook.bookkeeping.cash_book.CASH_BOOK_PAGE_SIZE", 3)
+
+    assert [(transaction.id, transaction.balance) for transaction in cash_book] == [
+        (transactions[1].id, Decimal("358.45")),
+        (transactions[2].id, Decimal("328.45")),
+        (transactions[3].id, Decimal("333.45")),
+        (transactions[4].id, Decimal("283.03")),
+    ]
+
+
+@pytest.mark.parametrize("cursor", ["", "2026-02-06", "2026-02-31_1", "2026-02-06_x"])
+def test_decode_invalid_cursor(cursor):
+    assert decode_cursor(cursor) is None
+
+
+def test_decode_cursor():
+    assert decode_cursor("2026-02-06_42") == (datetime.date(2026, 2, 6), 42)
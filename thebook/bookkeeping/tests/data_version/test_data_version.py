@@ -0,0 +1,226 @@
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+import pytest
+from model_bakery import baker
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+from thebook.bookkeeping.data_version import (
+    bump_data_version,
+    data_version,
+    get_data_versions,
+    get_or_compute,
+    versioned_cache_key,
+)
+from thebook.bookkeeping.models import BankAccount, DailyBalance, Transaction
+
+
+@pytest.fixture
+def bank_account(db):
+    return BankAccount.objects.create(name="Test Bank Account")
+
+
+@pytest.fixture
+def other_bank_account(db):
+    return BankAccount.objects.create(name="Other Bank Account")
+
+
+def test_data_version_is_stable_until_bumped(db):
+    version = data_version([1, 2, None])
+
+    assert data_version([2, None, 1]) == version
+
+
+def test_bump_changes_only_the_version_of_the_given_bank_accounts(db):
+    versions = get_data_versions([1, 2])
+
+    bump_data_version({1})
+
+    new_versions = get_data_versions([1, 2])
+    assert new_versions[1] == versions[1] + 1
+    assert new_versions[2] == versions[2]
+
+
+def test_bump_is_rolled_back_with_the_transaction(db):
+    version = data_version([1])
+
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            bump_data_version({1})
+            raise RuntimeError()
+
+    assert data_version([1]) == version
+
+
+def test_data_version_is_not_lost_when_cache_is_cleared(db):
+    bump_data_version({1})
+    version = data_version([1])
+
+    cache.clear()
+
+    assert data_version([1]) == version
+
+
+def test_versioned_cache_key_changes_with_parts_and_data_version(db):
+    key = versioned_cache_key("prefix", "a", 1, bank_account_ids=[1])
+
+    assert key.startswith("prefix:")
+    assert versioned_cache_key("prefix", "a", 1, bank_account_ids=[1]) == key
+    assert versioned_cache_key("prefix", "a", 2, bank_account_ids=[1]) != key
+
+    bump_data_version({1})
+
+    assert versioned_cache_key("prefix", "a", 1, bank_account_ids=[1]) != key
+
+
+def test_get_or_compute_caches_value_until_data_version_changes(db):
+    compute = mock.Mock(side_effect=[1, 2])
+
+    assert get_or_compute("prefix", "a", bank_account_ids=[1], compute=compute) == 1
+    assert get_or_compute("prefix", "a", bank_account_ids=[1], compute=compute) == 1
+
+    bump_data_version({1})
+
+    assert get_or_compute("prefix", "a", bank_account_ids=[1], compute=compute) == 2
+    assert compute.call_count == 2
+
+
+def test_transaction_save_bumps_data_version(bank_account, other_bank_account):
+    versions = get_data_versions([bank_account.id, other_bank_account.id])
+
+    baker.make(Transaction, bank_account=bank_account, amount=Decimal("10"))
+
+    new_versions = get_data_versions([bank_account.id, other_bank_account.id])
+    assert new_versions[bank_account.id] != versions[bank_account.id]
+    assert new_versions[other_bank_account.id] == versions[other_bank_account.id]
+
+
+def test_moving_transaction_bumps_data_version_of_both_bank_accounts(
+    bank_account, other_bank_account
+):
+    transaction = baker.make(Transaction, bank_account=bank_account)
+    transaction = Transaction.objects.get(id=transaction.id)
+    versions = get_data_versions([bank_account.id, other_bank_account.id])
+
+    transaction.bank_account = other_bank_account
+    transaction.save()
+
+    new_versions = get_data_versions([bank_account.id, other_bank_account.id])
+    assert new_versions[bank_account.id] != versions[bank_account.id]
+    assert new_versions[other_bank_account.id] != versions[other_bank_account.id]
+
+
+def test_value_read_while_transaction_is_saved_is_not_cached_under_new_version(
+    bank_account, mocker
+):
+    def closing_balance():
+        return get_or_compute(
+            "closing-balance",
+            bank_account_ids=[bank_account.id],
+            compute=lambda: DailyBalance.objects.filter(bank_account=bank_account)
+            .values_list("closing_balance", flat=True)
+            .last()
+            or Decimal("0"),
+        )
+
+    reads = []
+    refresh = DailyBalance.objects.refresh
+
+    def read_and_refresh(keys):
+        # transaction row is written, its daily balance is not yet
+        reads.append(closing_balance())
+        return refresh(keys)
+
+    mocker.patch.object(DailyBalance.objects, "refresh", side_effect=read_and_refresh)
+
+    baker.make(
+        Transaction,
+        bank_account=bank_account,
+        date=datetime.date(2026, 1, 1),
+        amount=Decimal("10"),
+    )
+
+    assert reads == [Decimal("0")]
+    assert closing_balance() == Decimal("10")
+
+
+def test_transaction_delete_bumps_data_version(bank_account):
+    transaction = baker.make(Transaction, bank_account=bank_account)
+    version = data_version([bank_account.id])
+
+    transaction.delete()
+
+    assert data_version([bank_account.id]) != version
+
+
+def test_transaction_tags_change_bumps_data_version(bank_account):
+    transaction = baker.make(Transaction, bank_account=bank_account)
+    version = data_version([bank_account.id])
+
+    transaction.tags.add("event")
+
+    assert data_version([bank_account.id]) != version
+
+
+def test_bulk_create_and_queryset_updates_bump_data_version(bank_account):
+    user = baker.make(get_user_model())
+    version = data_version([bank_account.id])
+
+    Transaction.objects.bulk_create(
+        [
+            baker.prepare(
+                Transaction,
+                bank_account=bank_account,
+                date=datetime.date(2026, 1, 1),
+                created_by=user,
+            )
+        ]
+    )
+
+    bulk_created_version = data_version([bank_account.id])
+    assert bulk_created_version != version
+
+    transactions = list(Transaction.objects.only("id", "description"))
+    transactions[0].description = "Updated"
+    Transaction.objects.bulk_update(transactions, ["description"])
+
+    bulk_updated_version = data_version([bank_account.id])
+    assert bulk_updated_version != bulk_created_version
+
+    Transaction.objects.filter(bank_account=bank_account).update(notes="Updated")
+
+    assert data_version([bank_account.id]) != bulk_updated_version
+
+
+def test_queryset_update_moving_transactions_bumps_data_version_of_both_bank_accounts(
+    bank_account, other_bank_account
+):
+    baker.make(Transaction, bank_account=bank_account)
+    versions = get_data_versions([bank_account.id, other_bank_account.id])
+
+    Transaction.objects.filter(bank_account=bank_account).update(
+        bank_account=other_bank_account
+    )
+
+    new_versions = get_data_versions([bank_account.id, other_bank_account.id])
+    assert new_versions[bank_account.id] != versions[bank_account.id]
+    assert new_versions[other_bank_account.id] != versions[other_bank_account.id]
+
+
+def test_bank_account_changes_bump_data_version(bank_account):
+    version = data_version([bank_account.id, None])
+
+    bank_account.name = "Renamed Bank Account"
+    bank_account.save()
+
+    renamed_version = data_version([bank_account.id, None])
+    assert renamed_version != version
+
+    bank_account_id = bank_account.id
+    bank_account.delete()
+
+    assert data_version([bank_account_id, None]) != renamed_version
@@ -0,0 +1,154 @@
+import shutil
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from model_bakery import baker
+
+from django.core.management import CommandError, call_command
+
+from thebook.bookkeeping import bulk_import
+from thebook.bookkeeping.bulk_import import detect_file_type, expand_paths
+from thebook.bookkeeping.models import BankAccount, ImportedFile, Transaction
+
+BRADESCO_DATA = (
+    Path(__file__).parents[3] / "integrations" / "bradesco" / "tests" / "importers"
+) / "data"
+CORA_DATA = (
+    Path(__file__).parents[3] / "integrations" / "cora" / "tests" / "importers"
+) / "data"
+
+PAYPAL_CSV = (
+    '"Data","Descrição","Nome","Moeda","Bruto ","Tarifa ",'
+    '"ID da transação","Nome do banco"\n'
+    '"01/05/2025","Pagamento de doação","Ana","BRL","10,00","-1,00","A1",""\n'
+)
+
+
+@pytest.fixture
+def bank_account(db):
+    return baker.make(BankAccount, name="Bradesco", slug="bradesco")
+
+
+@pytest.fixture
+def statements(tmp_path):
+    directory = tmp_path / "statements"
+    (directory / "2024").mkdir(parents=True)
+    shutil.copy(
+        BRADESCO_DATA / "ofx-one-transaction.ofx", directory / "2024" / "one.ofx"
+    )
+    shutil.copy(
+        BRADESCO_DATA / "ofx-multiple-transactions.ofx", directory / "multiple.ofx"
+    )
+    (directory / "notes.txt").write_text("not a statement")
+    return directory
+
+
+def test_expand_directories_and_glob_patterns(statements):
+    assert expand_paths([str(statements)]) == [
+        statements / "2024" / "one.ofx",
+        statements / "multiple.ofx",
+    ]
+    assert expand_paths(
+        [str(statements / "**" / "*.ofx"), str(statements / "multiple.ofx")]
+    ) == [
+        statements / "2024" / "one.ofx",
+        statements / "multiple.ofx",
+    ]
+
+
+def test_detect_file_type(tmp_path):
+    paypal_csv = tmp_path / "paypal.csv"
+    paypal_csv.write_text("﻿" + PAYPAL_CSV)
+
+    assert detect_file_type(BRADESCO_DATA / "ofx-one-transaction.ofx") == "ofx"
+    assert detect_file_type(paypal_csv) == "csv"
+    assert (
+        detect_file_type(CORA_DATA / "credit-card-invoice-one-transaction.csv")
+        == "csv_cora_credit_card"
+    )
+    assert detect_file_type(tmp_path / "notes.txt") is None
+
+
+# With workers, files are parsed by spawned processes, which don't need the
+# test database since only the writer (this process) uses it
+@pytest.mark.parametrize("workers", ["0", "2"])
+def test_import_transaction_files(bank_account, statements, workers):
+    stdout = StringIO()
+
+    call_command(
+        "import_transaction_files",
+        str(statements),
+        "--bank-account",
+        bank_account.slug,
+        "--workers",
+        workers,
+        stdout=stdout,
+    )
+
+    # Files are written in the order they are parsed and the transaction of
+    # one.ofx is in multiple.ofx as well, so only the total doesn't depend on
+    # which file is written first
+    output = stdout.getvalue()
+    assert "one.ofx (ofx): " in output
+    assert "multiple.ofx (ofx): " in output
+    assert "Successfully imported 2 of 2 files" in output
+    assert ImportedFile.objects.filter(bank_account=bank_account).count() == 2
+    assert Transaction.objects.filter(bank_account=bank_account).count() == 57
+
+
+def test_files_already_imported_are_not_parsed_again(bank_account, statements, mocker):
+    call_command(
+        "import_transaction_files",
+        str(statements / "2024"),
+        "--bank-account",
+        bank_account.slug,
+        "--workers",
+        "0",
+    )
+    get_transactions_reader = mocker.spy(bulk_import, "get_transactions_reader")
+    stdout = StringIO()
+
+    call_command(
+        "import_transaction_files",
+        str(statements / "2024"),
+        "--bank-account",
+        bank_account.slug,
+        "--workers",
+        "0",
+        stdout=stdout,
+    )
+
+    assert "one.ofx (ofx): already imported" in stdout.getvalue()
+    assert get_transactions_reader.call_count == 0
+    assert Transaction.objects.count() == 1
+
+
+def test_failed_files_are_summarized(bank_account, tmp_path):
+    (tmp_path / "invalid.ofx").write_text("invalid")
+    (tmp_path / "notes.txt").write_text("notes")
+    stdout = StringIO()
+
+    call_command(
+        "import_transaction_files",
+        str(tmp_path / "invalid.ofx"),
+        str(tmp_path / "notes.txt"),
+        "--bank-account",
+        bank_account.slug,
+        "--workers",
+        "0",
+        stdout=stdout,
+    )
+
+    output = stdout.getvalue()
+    assert "invalid.ofx: failed - " in output
+    assert "notes.txt: failed - Unsupported file type" in output
+    assert "Successfully imported 0 of 2 files" in output
+    assert not ImportedFile.objects.exists()
+
+
+def test_unknown_bank_account(db, statements):
+    with pytest.raises(CommandError):
+        call_command(
+            "import_transaction_files", str(statements), "--bank-account", "unknown"
+        )
@@ -0,0 +1,179 @@
+import datetime
+import decimal
+import io
+
+import pytest
+from model_bakery import baker
+
+from django.contrib.auth import get_user_model
+
+from thebook.bookkeeping.import_pipeline import ImportResult, file_sha256, import_file
+from thebook.bookkeeping.importers import import_transactions
+from thebook.bookkeeping.models import BankAccount, ImportedFile, Transaction
+
+
+@pytest.fixture
+def bank_account(db):
+    return baker.make(BankAccount)
+
+
+@pytest.fixture
+def user(db):
+    return baker.make(get_user_model())
+
+
+@pytest.fixture
+def transactions_factory(bank_account, user):
+    def _transactions(*days):
+        return [
+            Transaction(
+                reference=f"ref-{day}",
+                date=datetime.date(2026, 1, day),
+                description=f"Transaction {day}",
+                amount=decimal.Decimal("10"),
+                bank_account=bank_account,
+                created_by=user,
+            )
+            for day in days
+        ]
+
+    return _transactions
+
+
+def test_file_sha256_rewinds_file():
+    file = io.BytesIO(b"content")
+    file.read()
+
+    sha256 = file_sha256(file)
+
+    assert sha256 == (
+        "ed7002b439e9ac845f22357d822bac1444730fbdb6016d3ec9432297b9ec9f73"
+    )
+    assert file.read() == b"content"
+
+
+def test_import_file_records_imported_file(bank_account, user, transactions_factory):
+    file = io.BytesIO(b"statement")
+
+    result = import_file(
+        file, "ofx", bank_account, lambda: transactions_factory(3, 1, 2), user=user
+    )
+
+    assert result == ImportResult(inserted=3, updated=0, skipped=0)
+    imported_file = ImportedFile.objects.get()
+    assert imported_file.sha256 == file_sha256(file)
+    assert imported_file.importer == "ofx"
+    assert imported_file.bank_account == bank_account
+    assert imported_file.start_date == datetime.date(2026, 1, 1)
+    assert imported_file.end_date == datetime.date(2026, 1, 3)
+    assert imported_file.inserted == 3
+    assert imported_file.created_by == user
+
+
+def test_import_file_short_circuits_identical_content(
+    bank_account, mocker, transactions_factory
+):
+    import_file(
+        io.BytesIO(b"statement"), "ofx", bank_account, lambda: transactions_factory(1)
+    )
+    get_transactions = mocker.Mock()
+
+    result = import_file(
+        io.BytesIO(b"statement"), "ofx", bank_account, get_transactions
+    )
+
+    assert result == ImportResult(already_imported=True)
+    get_transactions.assert_not_called()
+    assert ImportedFile.objects.count() == 1
+
+
+def test_import_file_does_not_short_circuit_partial_imports(
+    bank_account, transactions_factory
+):
+    import_file(
+        io.BytesIO(b"statement"),
+        "ofx",
+        bank_account,
+        lambda: transactions_factory(1),
+        partial=True,
+    )
+
+    result = import_file(
+        io.BytesIO(b"statement"), "ofx", bank_account, lambda: transactions_factory(2)
+    )
+
+    assert result == ImportResult(inserted=1, updated=0, skipped=0)
+
+
+def test_import_file_skips_dates_covered_by_imported_statements(
+    bank_account, transactions_factory
+):
+    import_file(
+        io.BytesIO(b"first statement"),
+        "ofx",
+        bank_account,
+        lambda: transactions_factory(1, 5, 10),
+        skip_covered_dates=True,
+    )
+
+    result = import_file(
+        io.BytesIO(b"second statement"),
+        "ofx",
+        bank_account,
+        lambda: transactions_factory(4, 9, 10, 11, 15),
+        skip_covered_dates=True,
+    )
+
+    # The last day of the first statement is not considered covered
+    assert result == ImportResult(inserted=2, updated=1, skipped=2)
+    assert set(Transaction.objects.values_list("reference", flat=True)) == {
+        "ref-1",
+        "ref-5",
+        "ref-10",
+        "ref-11",
+        "ref-15",
+    }
+    second_statement = ImportedFile.objects.latest("id")
+    assert second_statement.start_date == datetime.date(2026, 1, 4)
+    assert second_statement.end_date == datetime.date(2026, 1, 15)
+
+
+def test_covered_ranges_are_merged(bank_account):
+    for start_day, end_day in ((10, 20), (1, 5), (15, 25), (25, 28), (27, 27)):
+        baker.make(
+            ImportedFile,
+            importer="ofx",
+            bank_account=bank_account,
+            start_date=datetime.date(2026, 1, start_day),
+            end_date=datetime.date(2026, 1, end_day),
+        )
+    baker.make(
+        ImportedFile,
+        importer="csv",
+        bank_account=bank_account,
+        start_date=datetime.date(2026, 1, 5),
+        end_date=datetime.date(2026, 1, 10),
+    )
+
+    assert ImportedFile.objects.covered_ranges("ofx", bank_account) == [
+        (datetime.date(2026, 1, 1), datetime.date(2026, 1, 5)),
+        (datetime.date(2026, 1, 10), datetime.date(2026, 1, 28)),
+    ]
+
+
+def test_import_transactions_short_circuits_identical_files(bank_account, user):
+    content = (
+        '"Data","Descrição","Nome","Moeda","Bruto ","Tarifa ",'
+        '"ID da transação","Nome do banco"\n'
+        '"01/05/2025","Pagamento de doação","Ana","BRL","10,00","-1,00","A1",""\n'
+    ).encode()
+
+    first_result = import_transactions(
+        io.BytesIO(content), "csv", bank_account, user, None, None
+    )
+    second_result = import_transactions(
+        io.BytesIO(content), "csv", bank_account, user, None, None
+    )
+
+    assert first_result == ImportResult(inserted=2, updated=0, skipped=0)
+    assert second_result == ImportResult(already_imported=True)
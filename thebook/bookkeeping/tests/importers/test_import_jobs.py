@@ -0,0 +1,207 @@
+import datetime
+from io import StringIO
+
+import pytest
+from model_bakery import baker
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils import timezone
+
+from thebook.bookkeeping import import_jobs
+from thebook.bookkeeping.import_jobs import run_import_job, submit_import_job
+from thebook.bookkeeping.models import (
+    BankAccount,
+    ImportJob,
+    ImportJobStatus,
+    Transaction,
+)
+
+PAYPAL_CSV_HEADER = (
+    '"Data","Descrição","Nome","Moeda","Bruto ","Tarifa ",'
+    '"ID da transação","Nome do banco"\n'
+)
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+@pytest.fixture
+def bank_account(db):
+    return baker.make(BankAccount)
+
+
+@pytest.fixture
+def user(db):
+    return baker.make(get_user_model())
+
+
+@pytest.fixture
+def import_job(bank_account, user):
+    def _import_job(*references, **kwargs):
+        content = PAYPAL_CSV_HEADER + "".join(
+            f'"01/05/2025","Pagamento de doação","Ana","BRL","10,00","-1,00","{reference}",""\n'
+            for reference in references
+        )
+        return ImportJob.objects.create(
+            bank_account=bank_account,
+            transactions_file=SimpleUploadedFile("paypal.csv", content.encode()),
+            file_type="csv",
+            created_by=user,
+            **kwargs,
+        )
+
+    return _import_job
+
+
+def test_run_import_job(import_job):
+    job = import_job("A1", "A2")
+
+    job = run_import_job(job.id)
+
+    assert job.status == ImportJobStatus.SUCCEEDED
+    assert job.processed == 4
+    assert job.inserted == 4
+    assert job.started_at is not None
+    assert job.finished_at is not None
+    assert Transaction.objects.count() == 4
+
+
+def test_run_import_job_reports_progress_after_each_batch(import_job, mocker, settings):
+    settings.IMPORT_BATCH_SIZE = 2
+    job = import_job("A1", "A2", "A3")
+    update = mocker.spy(import_jobs.ImportJob.objects, "filter")
+
+    run_import_job(job.id)
+
+    progress = [call for call in update.call_args_list if call.kwargs == {"id": job.id}]
+    assert len(progress) == 3
+
+
+def test_run_import_job_records_errors(bank_account, user):
+    job = ImportJob.objects.create(
+        bank_account=bank_account,
+        transactions_file=SimpleUploadedFile("invalid.ofx", b"invalid"),
+        file_type="unknown",
+        created_by=user,
+    )
+
+    job = run_import_job(job.id)
+
+    assert job.status == ImportJobStatus.FAILED
+    assert job.error == "Unable to find a suitable file importer for this file."
+    assert job.finished
+
+
+def test_run_import_job_records_already_imported_files(import_job):
+    run_import_job(import_job("A1").id)
+
+    job = run_import_job(import_job("A1").id)
+
+    assert job.status == ImportJobStatus.SUCCEEDED
+    assert job.already_imported
+
+
+def test_claimed_import_job_is_not_run_again(import_job, mocker):
+    job = import_job("A1", status=ImportJobStatus.RUNNING)
+    import_transactions = mocker.patch.object(import_jobs, "import_transactions")
+
+    assert run_import_job(job.id) is None
+    import_transactions.assert_not_called()
+
+
+def test_import_job_is_left_pending_while_other_job_of_the_bank_account_runs(
+    import_job, mocker
+):
+    import_job("A1", status=ImportJobStatus.RUNNING, started_at=timezone.now())
+    job = import_job("A2")
+    import_transactions = mocker.patch.object(import_jobs, "import_transactions")
+
+    assert run_import_job(job.id) is None
+    import_transactions.assert_not_called()
+    job.refresh_from_db()
+    assert job.status == ImportJobStatus.PENDING
+
+
+def test_import_jobs_of_other_bank_accounts_run_at_the_same_time(import_job, user):
+    import_job("A1", status=ImportJobStatus.RUNNING, started_at=timezone.now())
+    job = ImportJob.objects.create(
+        bank_account=baker.make(BankAccount),
+        transactions_file=SimpleUploadedFile("paypal.csv", PAYPAL_CSV_HEADER.encode()),
+        file_type="csv",
+        created_by=user,
+    )
+
+    job = run_import_job(job.id)
+
+    assert job.status == ImportJobStatus.SUCCEEDED
+
+
+def test_import_job_thread_runs_jobs_left_pending_for_the_bank_account(import_job):
+    job = import_job("A1")
+    pending_job = import_job("A2")
+
+    import_jobs._run_import_job_in_thread(job.id)
+
+    pending_job.refresh_from_db()
+    assert pending_job.status == ImportJobStatus.SUCCEEDED
+    assert Transaction.objects.count() == 4
+
+
+def test_submit_import_job_runs_in_background_after_commit(
+    import_job, mocker, settings, django_capture_on_commit_callbacks
+):
+    settings.IMPORT_JOB_WORKERS = 2
+    executor = mocker.patch.object(import_jobs, "_get_executor")
+    job = import_job("A1")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        submit_import_job(job)
+        executor.assert_not_called()
+
+    executor.return_value.submit.assert_called_once_with(
+        import_jobs._run_import_job_in_thread, job.id
+    )
+    job.refresh_from_db()
+    assert job.status == ImportJobStatus.PENDING
+
+
+def test_process_import_jobs_command(import_job):
+    pending_job = import_job("A1")
+    finished_job = import_job("A2", status=ImportJobStatus.SUCCEEDED)
+
+    call_command("process_import_jobs")
+
+    pending_job.refresh_from_db()
+    assert pending_job.status == ImportJobStatus.SUCCEEDED
+    assert set(Transaction.objects.values_list("reference", flat=True)) == {
+        "A1",
+        "A1-T",
+    }
+
+
+def test_process_import_jobs_command_fails_stale_running_jobs(import_job, settings):
+    settings.IMPORT_JOB_TIMEOUT = 60
+    now = timezone.now()
+    stale_job = import_job(
+        "A1",
+        status=ImportJobStatus.RUNNING,
+        started_at=now - datetime.timedelta(seconds=61),
+    )
+    running_job = import_job(
+        "A2",
+        status=ImportJobStatus.RUNNING,
+        started_at=now - datetime.timedelta(seconds=30),
+    )
+
+    call_command("process_import_jobs", stdout=StringIO())
+
+    stale_job.refresh_from_db()
+    assert stale_job.status == ImportJobStatus.FAILED
+    assert stale_job.error
+    assert stale_job.finished_at is not None
+    running_job.refresh_from_db()
+    assert running_job.status == ImportJobStatus.RUNNING
@@ -0,0 +1,143 @@
+import datetime
+import decimal
+import io
+
+import pytest
+from model_bakery import baker
+
+from django.contrib.auth import get_user_model
+
+from thebook.bookkeeping.import_pipeline import ImportResult, TransactionImportPipeline
+from thebook.bookkeeping.importers import import_transactions
+from thebook.bookkeeping.importers.csv import CSVImporter
+from thebook.bookkeeping.models import BankAccount, Transaction
+
+PAYPAL_CSV_HEADER = (
+    '"Data","Descrição","Nome","Moeda","Bruto ","Tarifa ",'
+    '"ID da transação","Nome do banco"\n'
+)
+
+
+@pytest.fixture
+def bank_account(db):
+    return baker.make(BankAccount)
+
+
+@pytest.fixture
+def user(db):
+    return baker.make(get_user_model())
+
+
+def _transaction(reference, bank_account, user, description="Transaction"):
+    return Transaction(
+        reference=reference,
+        date=datetime.date(2025, 5, 1),
+        description=description,
+        amount=decimal.Decimal("10"),
+        bank_account=bank_account,
+        created_by=user,
+    )
+
+
+def _paypal_csv(*rows):
+    content = PAYPAL_CSV_HEADER + "".join(
+        f'"01/05/2025","Pagamento de doação","{name}","BRL","10,00","-1,00","{reference}",""\n'
+        for reference, name in rows
+    )
+    return io.BytesIO(content.encode())
+
+
+def test_transactions_are_written_in_batches(bank_account, user, mocker):
+    bulk_create = mocker.spy(Transaction.objects, "bulk_create")
+    transactions = (
+        _transaction(f"ref-{index}", bank_account, user) for index in range(5)
+    )
+
+    result = TransactionImportPipeline(batch_size=2).run(transactions)
+
+    assert result == ImportResult(inserted=5, updated=0, skipped=0)
+    assert Transaction.objects.count() == 5
+    assert [len(call.args[0]) for call in bulk_create.call_args_list] == [2, 2, 1]
+
+
+def test_existing_transactions_are_updated(bank_account, user):
+    baker.make(Transaction, reference="ref-1", description="Old description")
+
+    result = TransactionImportPipeline().run(
+        [
+            _transaction("ref-1", bank_account, user, description="New description"),
+            _transaction("ref-2", bank_account, user),
+        ]
+    )
+
+    assert result == ImportResult(inserted=1, updated=1, skipped=0)
+    assert Transaction.objects.get(reference="ref-1").description == "New description"
+
+
+def test_existing_transactions_are_skipped_without_update_fields(bank_account, user):
+    baker.make(Transaction, reference="ref-1", description="Old description")
+
+    result = TransactionImportPipeline(update_fields=None).run(
+        [
+            _transaction("ref-1", bank_account, user, description="New description"),
+            _transaction("ref-2", bank_account, user),
+        ]
+    )
+
+    assert result == ImportResult(inserted=1, updated=0, skipped=1)
+    assert Transaction.objects.get(reference="ref-1").description == "Old description"
+
+
+def test_repeated_references_in_the_same_batch_are_written_once(bank_account, user):
+    result = TransactionImportPipeline().run(
+        [
+            _transaction("ref-1", bank_account, user, description="First"),
+            _transaction("ref-1", bank_account, user, description="Second"),
+        ]
+    )
+
+    assert result == ImportResult(inserted=1, updated=0, skipped=1)
+    assert Transaction.objects.get(reference="ref-1").description == "Second"
+
+
+def test_failed_batch_does_not_rollback_previous_batches(bank_account, user):
+    def transactions():
+        yield _transaction("ref-1", bank_account, user)
+        yield _transaction("ref-2", bank_account, user)
+        raise ValueError("Invalid row")
+
+    pipeline = TransactionImportPipeline(batch_size=1)
+    with pytest.raises(ValueError):
+        pipeline.run(transactions())
+
+    assert pipeline.result.inserted == 2
+    assert Transaction.objects.count() == 2
+
+
+def test_csv_importer_does_not_share_transactions_between_instances(bank_account, user):
+    first_result = CSVImporter(_paypal_csv(("A1", "Ana")), bank_account, user).run()
+    second_result = CSVImporter(_paypal_csv(("B1", "Bia")), bank_account, user).run()
+
+    assert first_result == ImportResult(inserted=2, updated=0, skipped=0)
+    assert second_result == ImportResult(inserted=2, updated=0, skipped=0)
+    assert set(Transaction.objects.values_list("reference", flat=True)) == {
+        "A1",
+        "A1-T",
+        "B1",
+        "B1-T",
+    }
+
+
+def test_import_transactions_returns_import_result(bank_account, user):
+    baker.make(Transaction, reference="A1")
+
+    result = import_transactions(
+        _paypal_csv(("A1", "Ana"), ("A2", "Bia")),
+        "csv",
+        bank_account,
+        user,
+        None,
+        None,
+    )
+
+    assert result == ImportResult(inserted=3, updated=0, skipped=1)
@@ -0,0 +1,147 @@
+from decimal import Decimal
+
+import pytest
+from model_bakery import baker
+
+from thebook.bookkeeping.categorization import CategoryMatchRuleEngine
+from thebook.bookkeeping.models import Category, CategoryMatchRule, Transaction
+
+
+@pytest.fixture
+def accountant():
+    return Category.objects.create(name="Contabilidade")
+
+
+@pytest.fixture
+def bank_fees():
+    return Category.objects.create(name="Tarifas Bancárias")
+
+
+def test_categorize_queryset_with_first_matching_rule(db, accountant, bank_fees):
+    CategoryMatchRule.objects.create(pattern="tarifa.*", category=bank_fees)
+    CategoryMatchRule.objects.create(pattern=".*contador.*", category=accountant)
+    CategoryMatchRule.objects.create(pattern="tarifa contador", category=accountant)
+    transaction_1 = baker.make(
+        Transaction, description="TARIFA BANCARIA", amount=Decimal("-10")
+    )
+    transaction_2 = baker.make(
+        Transaction, description="Pagamento Contador", amount=Decimal("-500")
+    )
+    transaction_3 = baker.make(
+        Transaction, description="Tarifa contador", amount=Decimal("-500")
+    )
+    transaction_4 = baker.make(
+        Transaction, description="Something else", amount=Decimal("-500")
+    )
+
+    categorized = Transaction.objects.all().categorize()
+
+    assert categorized == 3
+    transaction_1.refresh_from_db()
+    transaction_2.refresh_from_db()
+    transaction_3.refresh_from_db()
+    transaction_4.refresh_from_db()
+    assert transaction_1.category == bank_fees
+    assert transaction_2.category == accountant
+    assert transaction_3.category == bank_fees
+    assert transaction_4.category is None
+
+
+@pytest.mark.parametrize(
+    "comparison_function,amount,matched",
+    [
+        ("EQ", Decimal("85"), True),
+        ("EQ", Decimal("84.99"), False),
+        ("NEQ", Decimal("85"), False),
+        ("NEQ", Decimal("100"), True),
+        ("LTE", Decimal("85"), True),
+        ("LTE", Decimal("85.01"), False),
+        ("GTE", Decimal("85"), True),
+        ("GTE", Decimal("84.99"), False),
+    ],
+)
+def test_categorize_queryset_considering_value_comparison(
+    db, accountant, comparison_function, amount, matched
+):
+    CategoryMatchRule.objects.create(
+        pattern="payment",
+        category=accountant,
+        value=Decimal("85"),
+        comparison_function=comparison_function,
+    )
+    transaction = baker.make(Transaction, description="payment", amount=amount)
+
+    Transaction.objects.all().categorize()
+
+    transaction.refresh_from_db()
+    assert (transaction.category == accountant) is matched
+
+
+def test_rule_failing_value_comparison_fallbacks_to_next_matching_rule(
+    db, accountant, bank_fees
+):
+    CategoryMatchRule.objects.create(
+        pattern="payment.*",
+        category=accountant,
+        value=Decimal("85"),
+        comparison_function="EQ",
+    )
+    CategoryMatchRule.objects.create(pattern="payment", category=bank_fees)
+    transaction = baker.make(Transaction, description="payment", amount=Decimal("-100"))
+
+    Transaction.objects.all().categorize()
+
+    transaction.refresh_from_db()
+    assert transaction.category == bank_fees
+
+
+def test_categorize_queryset_add_rule_tags(db, bank_fees):
+    CategoryMatchRule.objects.create(
+        pattern="tarifa", category=bank_fees, tags="bank,fee"
+    )
+    transaction_1 = baker.make(Transaction, description="tarifa", amount=Decimal("-1"))
+    transaction_2 = baker.make(Transaction, description="tarifa", amount=Decimal("-2"))
+    transaction_2.tags.add("fee")
+
+    Transaction.objects.all().categorize()
+
+    assert sorted(transaction_1.tags.names()) == ["bank", "fee"]
+    assert sorted(transaction_2.tags.names()) == ["bank", "fee"]
+
+
+def test_categorize_queryset_set_donation_below_threshold(db, settings, accountant):
+    settings.DONATION_THRESHOLD = Decimal("50")
+    transaction_1 = baker.make(Transaction, description="pix", amount=Decimal("50"))
+    transaction_2 = baker.make(Transaction, description="pix", amount=Decimal("51"))
+
+    Transaction.objects.all().categorize()
+
+    transaction_1.refresh_from_db()
+    transaction_2.refresh_from_db()
+    assert transaction_1.category.name == "Doação"
+    assert transaction_2.category is None
+
+
+def test_categorize_only_transactions_in_queryset(db, accountant):
+    CategoryMatchRule.objects.create(pattern="payment", category=accountant)
+    transaction_1 = baker.make(
+        Transaction, description="payment", amount=Decimal("-100")
+    )
+    transaction_2 = baker.make(
+        Transaction, description="payment", amount=Decimal("-100")
+    )
+
+    Transaction.objects.filter(id=transaction_1.id).categorize()
+
+    transaction_1.refresh_from_db()
+    transaction_2.refresh_from_db()
+    assert transaction_1.category == accountant
+    assert transaction_2.category is None
+
+
+def test_engine_handles_patterns_with_backreferences(db, accountant):
+    CategoryMatchRule.objects.create(pattern=r"(\d)\1 payment", category=accountant)
+    engine = CategoryMatchRuleEngine()
+
+    assert engine.match("11 payment", Decimal("1")).category_id == accountant.id
+    assert engine.match("12 payment", Decimal("1")) is None
@@ -0,0 +1,66 @@
+import datetime
+import decimal
+import uuid
+
+from model_bakery import baker
+
+from thebook.bookkeeping.models import BankAccount, Transaction
+
+
+def test_existing_references(db, django_assert_num_queries):
+    baker.make(Transaction, reference="ref-1")
+    baker.make(Transaction, reference="ref-2")
+
+    with django_assert_num_queries(1):
+        existing = Transaction.objects.existing_references(
+            ["ref-1", "ref-3", "ref-2", None, "ref-1"]
+        )
+
+    assert existing == {"ref-1", "ref-2"}
+
+
+def test_existing_references_accepts_uuids(db):
+    reference = uuid.uuid4()
+    baker.make(Transaction, reference=str(reference))
+
+    assert Transaction.objects.existing_references([reference]) == {str(reference)}
+
+
+def test_existing_references_without_references(db, django_assert_num_queries):
+    with django_assert_num_queries(0):
+        assert Transaction.objects.existing_references([]) == set()
+
+
+def test_existing_natural_keys(db, django_assert_num_queries):
+    bank_account = baker.make(BankAccount)
+    other_bank_account = baker.make(BankAccount)
+    date = datetime.date(2025, 3, 10)
+
+    baker.make(
+        Transaction,
+        date=date,
+        description="Mercado",
+        amount=decimal.Decimal("-10.50"),
+        bank_account=bank_account,
+    )
+    baker.make(
+        Transaction,
+        date=date,
+        description="Padaria",
+        amount=decimal.Decimal("-5"),
+        bank_account=other_bank_account,
+    )
+
+    keys = [
+        (date, "Mercado", decimal.Decimal("-10.5"), bank_account.id),
+        (date, "Mercado", decimal.Decimal("-10.51"), bank_account.id),
+        (date, "Padaria", decimal.Decimal("-5"), bank_account.id),
+        (date, "Padaria", decimal.Decimal("-5.00"), other_bank_account.id),
+    ]
+    with django_assert_num_queries(2):
+        existing = Transaction.objects.existing_natural_keys(keys)
+
+    assert existing == {
+        (date, "Mercado", decimal.Decimal("-10.5"), bank_account.id),
+        (date, "Padaria", decimal.Decimal("-5"), other_bank_account.id),
+    }
@@ -0,0 +1,248 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from model_bakery import baker
+
+from thebook.bookkeeping.models import BankAccount, DailyBalance, Transaction
+
+
+@pytest.fixture
+def bank_account():
+    return BankAccount.objects.create(name="Test Bank Account")
+
+
+def _daily_balances(bank_account):
+    return list(
+        DailyBalance.objects.filter(bank_account=bank_account).values_list(
+            "date", "deposits", "withdraws", "closing_balance"
+        )
+    )
+
+
+def test_create_daily_balance_when_transaction_is_saved(db, bank_account):
+    # fmt: off
+    baker.make(Transaction, bank_account=bank_account, date=datetime.date(2024, 1, 10), amount=Decimal("100"))
+    baker.make(Transaction, bank_account=bank_account, date=datetime.date(2024, 1, 10), amount=Decimal("-30.5"))
+    baker.make(Transaction, bank_account=bank_account, date=datetime.date(2024, 1, 12), amount=Decimal("12.25"))
+    # fmt: on
+
+    assert _daily_balances(bank_account) == [
+        (datetime.date(2024, 1, 10), Decimal("100"), Decimal("-30.5"), Decimal("69.5")),
+        (datetime.date(2024, 1, 12), Decimal("12.25"), Decimal("0"), Decimal("81.75")),
+    ]
+
+
+def test_transaction_in_the_past_updates_closing_balance_of_following_days(
+    db, bank_account
+):
+    # fmt: off
+    baker.make(Transaction, bank_account=bank_account, date=datetime.date(2024, 1, 10), amount=Decimal("100"))
+    baker.make(Transaction, bank_account=bank_account, date=datetime.date(2024, 1, 12), amount=Decimal("-20"))
+    baker.make(Transaction, bank_account=bank_account, date=datetime.date(2024, 1, 5), amount=Decimal("50"))
+    # fmt: on
+
+    assert _daily_balances(bank_account) == [
+        (datetime.date(2024, 1, 5), Decimal("50"), Decimal("0"), Decimal("50")),
+        (datetime.date(2024, 1, 10), Decimal("100"), Decimal("0"), Decimal("150")),
+        (datetime.date(2024, 1, 12), Decimal("0"), Decimal("-20"), Decimal("130")),
+    ]
+
+
+def test_changing_transaction_amount_and_date_updates_daily_balances(db, bank_account):
+    # fmt: off
+    baker.make(Transaction, bank_account=bank_account, date=datetime.date(2024, 1, 10), amount=Decimal("100"))
+    transaction = baker.make(Transaction, bank_account=bank_account, date=datetime.date(2024, 1, 12), amount=Decimal("-20"))
+    # fmt: on
+
+    transaction = Transaction.objects.get(id=transaction.id)
+    transaction.date = datetime.date(2024, 1, 8)
+    transaction.amount = Decimal("-40")
+    transaction.save()
+
+    assert _daily_balances(bank_account) == [
+        (datetime.date(2024, 1, 8), Decimal("0"), Decimal("-40"), Decimal("-40")),
+        (datetime.date(2024, 1, 10), Decimal("100"), Decimal("0"), Decimal("60")),
+        (datetime.date(2024, 1, 12), Decimal("0"), Decimal("0"), Decimal("60")),
+    ]
+
+
+def test_deleting_transaction_updates_daily_balances(db, bank_account):
+    # fmt: off
+    transaction = baker.make(Transaction, bank_account=bank_account, date=datetime.date(2024, 1, 10), amount=Decimal("100"))
+    baker.make(Transaction, bank_account=bank_account, date=datetime.date(2024, 1, 12), amount=Decimal("-20"))
+    # fmt: on
+
+    transaction.delete()
+
+    assert _daily_balances(bank_account) == [
+        (datetime.date(2024, 1, 10), Decimal("0"), Decimal("0"), Decimal("0")),
+        (datetime.date(2024, 1, 12), Decimal("0"), Decimal("-20"), Decimal("-20")),
+    ]
+
+
+def test_queryset_update_updates_daily_balances(db, bank_account):
+    other_bank_account = BankAccount.objects.create(name="Other Bank Account")
+    # fmt: off
+    baker.make(Transaction, bank_account=bank_account, date=datetime.date(2024, 1, 10), amount=Decimal("100"))
+    baker.make(Transaction, bank_account=bank_account, date=datetime.date(2024, 1, 12), amount=Decimal("-20"))
+    # fmt: on
+
+    Transaction.objects.filter(date=datetime.date(2024, 1, 10)).update(
+        amount=Decimal("50")
+    )
+    Transaction.objects.filter(date=datetime.date(2024, 1, 12)).update(
+        bank_account=other_bank_account, date=datetime.date(2024, 1, 11)
+    )
+
+    assert _daily_balances(bank_account) == [
+        (datetime.date(2024, 1, 10), Decimal("50"), Decimal("0"), Decimal("50")),
+        (datetime.date(2024, 1, 12), Decimal("0"), Decimal("0"), Decimal("50")),
+    ]
+    assert _daily_balances(other_bank_account) == [
+        (datetime.date(2024, 1, 11), Decimal("0"), Decimal("-20"), Decimal("-20")),
+    ]
+
+
+def test_bulk_create_transactions_updates_daily_balances(db, bank_account):
+    user = baker.make("users.User")
+
+    Transaction.objects.bulk_create(
+        [
+            # fmt: off
+            Transaction(reference="1", bank_account=bank_account, date=datetime.date(2024, 1, 10), amount=Decimal("100"), created_by=user),
+            Transaction(reference="2", bank_account=bank_account, date=datetime.date(2024, 1, 10), amount=Decimal("-10"), created_by=user),
+            Transaction(reference="3", bank_account=bank_account, date=datetime.date(2024, 1, 11), amount=Decimal("5"), created_by=user),
+            # fmt: on
+        ]
+    )
+
+    assert _daily_balances(bank_account) == [
+        (datetime.date(2024, 1, 10), Decimal("100"), Decimal("-10"), Decimal("90")),
+        (datetime.date(2024, 1, 11), Decimal("5"), Decimal("0"), Decimal("95")),
+    ]
+
+
+def test_bulk_create_with_update_conflicts_updates_daily_balances(db, bank_account):
+    user = baker.make("users.User")
+    baker.make(
+        Transaction,
+        reference="1",
+        bank_account=bank_account,
+        date=datetime.date(2024, 1, 10),
+        amount=Decimal("100"),
+    )
+
+    Transaction.objects.bulk_create(
+        [
+            # fmt: off
+            Transaction(reference="1", bank_account=bank_account, date=datetime.date(2024, 1, 10), amount=Decimal("80"), created_by=user),
+            # fmt: on
+        ],
+        update_conflicts=True,
+        update_fields=["description", "amount"],
+        unique_fields=["reference"],
+    )
+
+    assert _daily_balances(bank_account) == [
+        (datetime.date(2024, 1, 10), Decimal("80"), Decimal("0"), Decimal("80")),
+    ]
+
+
+def test_rebuild_daily_balances(db, bank_account):
+    # fmt: off
+    baker.make(Transaction, bank_account=bank_account, date=datetime.date(2024, 1, 10), amount=Decimal("100"))
+    baker.make(Transaction, bank_account=bank_account, date=datetime.date(2024, 1, 12), amount=Decimal("-20"))
+    # fmt: on
+    DailyBalance.objects.all().delete()
+
+    DailyBalance.objects.rebuild()
+
+    assert _daily_balances(bank_account) == [
+        (datetime.date(2024, 1, 10), Decimal("100"), Decimal("0"), Decimal("100")),
+        (datetime.date(2024, 1, 12), Decimal("0"), Decimal("-20"), Decimal("80")),
+    ]
+
+
+def test_bulk_create_with_update_conflicts_moving_transaction_refreshes_old_day(
+    db, bank_account
+):
+    user = baker.make("users.User")
+    other_bank_account = BankAccount.objects.create(name="Other Bank Account")
+    baker.make(
+        Transaction,
+        reference="1",
+        bank_account=bank_account,
+        date=datetime.date(2024, 1, 10),
+        amount=Decimal("100"),
+    )
+
+    Transaction.objects.bulk_create(
+        [
+            # fmt: off
+            Transaction(reference="1", bank_account=other_bank_account, date=datetime.date(2024, 1, 12), amount=Decimal("100"), created_by=user),
+            # fmt: on
+        ],
+        update_conflicts=True,
+        update_fields=["bank_account", "date"],
+        unique_fields=["reference"],
+    )
+
+    assert _daily_balances(bank_account) == [
+        (datetime.date(2024, 1, 10), Decimal("0"), Decimal("0"), Decimal("0")),
+    ]
+    assert _daily_balances(other_bank_account) == [
+        (datetime.date(2024, 1, 12), Decimal("100"), Decimal("0"), Decimal("100")),
+    ]
+
+
+def test_refresh_applies_changes_of_several_days_to_following_days(db, bank_account):
+    # fmt: off
+    baker.make(Transaction, bank_account=bank_account, date=datetime.date(2024, 1, 10), amount=Decimal("100"))
+    baker.make(Transaction, bank_account=bank_account, date=datetime.date(2024, 1, 12), amount=Decimal("-20"))
+    baker.make(Transaction, bank_account=bank_account, date=datetime.date(2024, 1, 14), amount=Decimal("5"))
+    baker.make(Transaction, bank_account=bank_account, date=datetime.date(2024, 1, 16), amount=Decimal("1"))
+    # fmt: on
+    Transaction._base_manager.filter(date=datetime.date(2024, 1, 10)).update(
+        amount=Decimal("50")
+    )
+    Transaction._base_manager.filter(date=datetime.date(2024, 1, 14)).update(
+        date=datetime.date(2024, 1, 11)
+    )
+
+    DailyBalance.objects.refresh(
+        [
+            (bank_account.id, datetime.date(2024, 1, 10)),
+            (bank_account.id, datetime.date(2024, 1, 11)),
+            (bank_account.id, datetime.date(2024, 1, 14)),
+        ]
+    )
+
+    assert _daily_balances(bank_account) == [
+        (datetime.date(2024, 1, 10), Decimal("50"), Decimal("0"), Decimal("50")),
+        (datetime.date(2024, 1, 11), Decimal("5"), Decimal("0"), Decimal("55")),
+        (datetime.date(2024, 1, 12), Decimal("0"), Decimal("-20"), Decimal("35")),
+        (datetime.date(2024, 1, 14), Decimal("0"), Decimal("0"), Decimal("35")),
+        (datetime.date(2024, 1, 16), Decimal("1"), Decimal("0"), Decimal("36")),
+    ]
+
+
+def test_refresh_locks_bank_accounts_before_reading_totals(db, bank_account, mocker):
+    calls = []
+    select_for_update = BankAccount.objects.select_for_update
+    transactions_filter = Transaction.objects.filter
+
+    def _select_for_update(*args, **kwargs):
+        calls.append("lock")
+        return select_for_update(*args, **kwargs)
+
+    def _transactions_filter(*args, **kwargs):
+        calls.append("totals")
+        return transactions_filter(*args, **kwargs)
+
+    mocker.patch.object(BankAccount.objects, "select_for_update", _select_for_update)
+    mocker.patch.object(Transaction.objects, "filter", _transactions_filter)
+
+    DailyBalance.objects.refresh([(bank_account.id, datetime.date(2024, 1, 10))])
+
+    assert calls == ["lock", "totals"]
@@ -60,6 +60,33 @@ def test_transaction_with_linked_document(db):
     assert transaction.has_documents is True
 
 
+@pytest.mark.parametrize("num_documents", [0, 1, 3])
+def test_has_documents_uses_annotation_without_extra_queries(
+    db, django_assert_num_queries, num_documents
+):
+    transaction = baker.make(Transaction)
+    for _ in range(num_documents):
+        baker.make(Document, transaction=transaction)
+
+    transaction = Transaction.objects.with_document_flags().get(id=transaction.id)
+
+    with django_assert_num_queries(0):
+        assert transaction.has_documents is bool(num_documents)
+    assert transaction.documents_count == num_documents
+
+
+def test_has_documents_uses_prefetched_documents(db, django_assert_num_queries):
+    transaction = baker.make(Transaction)
+    baker.make(Document, transaction=transaction)
+
+    transaction = Transaction.objects.prefetch_related("documents").get(
+        id=transaction.id
+    )
+
+    with django_assert_num_queries(0):
+        assert transaction.has_documents is True
+
+
 def test_transaction_related_name_for_bank_account(db):
     bank_account = BankAccount.objects.create(name="Test Bank Account")
 
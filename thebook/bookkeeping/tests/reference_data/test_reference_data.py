@@ -0,0 +1,103 @@
+import pytest
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from thebook.bookkeeping.models import BankAccount, Category
+from thebook.bookkeeping.reference_data import ReferenceData, reference_data
+
+
+@pytest.fixture
+def registry():
+    return ReferenceData()
+
+
+def test_bank_account_is_created_when_missing(db, registry):
+    bank_account = registry.bank_account("PayPal")
+
+    assert BankAccount.objects.get(name="PayPal") == bank_account
+
+
+def test_entities_are_resolved_once_after_commit(
+    db, registry, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        bank_account = registry.bank_account("OpenPix")
+        category = registry.category("Tarifas Bancárias")
+        user = registry.automation_user()
+
+    with django_assert_num_queries(0):
+        assert registry.bank_account("OpenPix") == bank_account
+        assert registry.category("Tarifas Bancárias") == category
+        assert registry.bank_fee_category() == category
+        assert registry.automation_user() == user
+
+
+def test_rolled_back_entities_are_not_registered(
+    db, registry, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                registry.bank_account("OpenPix")
+                raise RuntimeError()
+
+    assert callbacks == []
+    assert not BankAccount.objects.filter(name="OpenPix").exists()
+
+
+def test_expired_entities_are_resolved_again(
+    db, registry, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    registry.REFERENCE_DATA_TTL = 0
+
+    with django_capture_on_commit_callbacks(execute=True):
+        registry.category("Doação")
+
+    with django_assert_num_queries(1):
+        registry.category("Doação")
+
+
+@pytest.mark.parametrize(
+    "get_entity",
+    [
+        lambda: reference_data.bank_account("PayPal"),
+        lambda: reference_data.category("Doação"),
+        lambda: reference_data.automation_user(),
+    ],
+)
+def test_saving_entity_clears_registered_entities_of_its_model(
+    db, get_entity, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        entity = get_entity()
+
+    entity.save()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        assert get_entity() is not entity
+
+
+def test_deleting_entity_clears_registered_entities_of_its_model(
+    db, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        category = reference_data.category("Doação")
+        bank_account = reference_data.bank_account("PayPal")
+
+    category.delete()
+
+    new_category = reference_data.category("Doação")
+    assert Category.objects.filter(id=new_category.id).exists()
+    assert reference_data.bank_account("PayPal") is bank_account
+
+
+def test_clear_by_model(db, registry, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        bank_account = registry.bank_account("PayPal")
+        user = registry.automation_user()
+
+    registry.clear(get_user_model())
+
+    assert registry.bank_account("PayPal") is bank_account
+    assert registry.automation_user() is not user
@@ -0,0 +1,195 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from model_bakery import baker
+from taggit.models import Tag
+
+from thebook.bookkeeping.models import BankAccount, Category, Transaction
+from thebook.bookkeeping.reports import (
+    ReportGroupBy,
+    _build_period_matrix,
+    months_of_period,
+    period_matrix,
+)
+
+
+@pytest.fixture
+def bank_account(db):
+    return BankAccount.objects.create(name="Test Bank Account")
+
+
+@pytest.fixture
+def other_bank_account(db):
+    return BankAccount.objects.create(name="Other Bank Account")
+
+
+@pytest.fixture
+def transactions(bank_account, other_bank_account):
+    fees = Category.objects.create(name="Fees")
+    rent = Category.objects.create(name="Rent")
+
+    # fmt: off
+    transactions = [
+        baker.make(Transaction, bank_account=bank_account, category=fees, date=datetime.date(2026, 1, 5), amount=Decimal("100")),
+        baker.make(Transaction, bank_account=bank_account, category=fees, date=datetime.date(2026, 1, 20), amount=Decimal("50")),
+        baker.make(Transaction, bank_account=bank_account, category=rent, date=datetime.date(2026, 1, 10), amount=Decimal("-80")),
+        baker.make(Transaction, bank_account=other_bank_account, category=fees, date=datetime.date(2026, 3, 1), amount=Decimal("25")),
+        baker.make(Transaction, bank_account=bank_account, category=None, date=datetime.date(2026, 3, 31), amount=Decimal("-5")),
+        baker.make(Transaction, bank_account=bank_account, category=fees, date=datetime.date(2026, 4, 1), amount=Decimal("1000")),
+    ]
+    # fmt: on
+    transactions[0].tags.add("member", "monthly")
+    transactions[3].tags.add("member")
+    return transactions
+
+
+def _rows(matrix):
+    return [(row.label, row.values, row.total) for row in matrix.rows]
+
+
+def test_months_of_period():
+    assert months_of_period(datetime.date(2025, 11, 15), datetime.date(2026, 2, 1)) == [
+        datetime.date(2025, 11, 1),
+        datetime.date(2025, 12, 1),
+        datetime.date(2026, 1, 1),
+        datetime.date(2026, 2, 1),
+    ]
+
+
+def test_category_by_month(transactions):
+    matrix = period_matrix(
+        ReportGroupBy.CATEGORY, datetime.date(2026, 1, 1), datetime.date(2026, 3, 31)
+    )
+
+    assert matrix.months == [
+        datetime.date(2026, 1, 1),
+        datetime.date(2026, 2, 1),
+        datetime.date(2026, 3, 1),
+    ]
+    assert _rows(matrix) == [
+        ("Fees", [Decimal("150"), Decimal("0"), Decimal("25")], Decimal("175")),
+        ("Rent", [Decimal("-80"), Decimal("0"), Decimal("0")], Decimal("-80")),
+        (None, [Decimal("0"), Decimal("0"), Decimal("-5")], Decimal("-5")),
+    ]
+    assert matrix.totals == [Decimal("70"), Decimal("0"), Decimal("20")]
+    assert matrix.total == Decimal("90")
+
+
+def test_tag_by_month(transactions):
+    matrix = period_matrix(
+        ReportGroupBy.TAG, datetime.date(2026, 1, 1), datetime.date(2026, 3, 31)
+    )
+
+    assert _rows(matrix) == [
+        ("member", [Decimal("100"), Decimal("0"), Decimal("25")], Decimal("125")),
+        ("monthly", [Decimal("100"), Decimal("0"), Decimal("0")], Decimal("100")),
+        (None, [Decimal("-30"), Decimal("0"), Decimal("-5")], Decimal("-35")),
+    ]
+    # transactions with many tags would be counted more than once
+    assert matrix.totals is None
+    assert matrix.total is None
+
+
+def test_filter_by_bank_accounts(transactions, other_bank_account):
+    matrix = period_matrix(
+        ReportGroupBy.CATEGORY,
+        datetime.date(2026, 1, 1),
+        datetime.date(2026, 3, 31),
+        bank_accounts=[other_bank_account],
+    )
+
+    assert _rows(matrix) == [
+        ("Fees", [Decimal("0"), Decimal("0"), Decimal("25")], Decimal("25")),
+    ]
+
+
+def test_empty_period(db):
+    matrix = period_matrix(
+        ReportGroupBy.CATEGORY, datetime.date(2026, 1, 1), datetime.date(2026, 2, 28)
+    )
+
+    assert matrix.rows == []
+    assert matrix.totals == [Decimal("0"), Decimal("0")]
+    assert matrix.total == Decimal("0")
+
+
+def test_invalid_group_by(db):
+    with pytest.raises(ValueError):
+        period_matrix("invalid", datetime.date(2026, 1, 1), datetime.date(2026, 1, 31))
+
+
+def test_matrix_is_cached_until_data_version_changes(
+    transactions,
+    bank_account,
+    django_assert_num_queries,
+):
+    start_date, end_date = datetime.date(2026, 1, 1), datetime.date(2026, 3, 31)
+    period_matrix(ReportGroupBy.CATEGORY, start_date, end_date)
+
+    # Only the bank accounts ids, their data versions and category names are queried
+    with django_assert_num_queries(3):
+        matrix = period_matrix(ReportGroupBy.CATEGORY, start_date, end_date)
+    assert matrix.total == Decimal("90")
+
+    baker.make(
+        Transaction,
+        bank_account=bank_account,
+        date=datetime.date(2026, 2, 1),
+        amount=Decimal("10"),
+    )
+
+    matrix = period_matrix(ReportGroupBy.CATEGORY, start_date, end_date)
+    assert matrix.total == Decimal("100")
+
+
+def test_cached_matrix_shows_renamed_categories(transactions):
+    start_date, end_date = datetime.date(2026, 1, 1), datetime.date(2026, 3, 31)
+    period_matrix(ReportGroupBy.CATEGORY, start_date, end_date)
+
+    Category.objects.filter(name="Rent").update(name="Hackerspace Rent")
+
+    matrix = period_matrix(ReportGroupBy.CATEGORY, start_date, end_date)
+    assert [row.label for row in matrix.rows] == ["Fees", "Hackerspace Rent", None]
+
+
+def test_cached_matrix_is_recomputed_when_category_is_deleted(bank_account):
+    fees = Category.objects.create(name="Fees")
+    # fmt: off
+    baker.make(Transaction, bank_account=bank_account, category=fees, date=datetime.date(2026, 1, 5), amount=Decimal("100"))
+    baker.make(Transaction, bank_account=bank_account, category=None, date=datetime.date(2026, 1, 10), amount=Decimal("-5"))
+    # fmt: on
+    start_date, end_date = datetime.date(2026, 1, 1), datetime.date(2026, 1, 31)
+    period_matrix(ReportGroupBy.CATEGORY, start_date, end_date)
+
+    fees.delete()
+
+    matrix = period_matrix(ReportGroupBy.CATEGORY, start_date, end_date)
+    assert _rows(matrix) == [(None, [Decimal("95")], Decimal("95"))]
+    assert matrix.total == Decimal("95")
+
+
+def test_cached_matrix_is_recomputed_when_tag_is_deleted(transactions):
+    start_date, end_date = datetime.date(2026, 1, 1), datetime.date(2026, 3, 31)
+    period_matrix(ReportGroupBy.TAG, start_date, end_date)
+
+    Tag.objects.get(name="monthly").delete()
+
+    matrix = period_matrix(ReportGroupBy.TAG, start_date, end_date)
+    assert _rows(matrix) == [
+        ("member", [Decimal("100"), Decimal("0"), Decimal("25")], Decimal("125")),
+        (None, [Decimal("-30"), Decimal("0"), Decimal("-5")], Decimal("-35")),
+    ]
+
+
+def test_values_of_deleted_labels_are_summed_with_unlabeled_ones(db):
+    months = [datetime.date(2026, 1, 1)]
+
+    matrix = _build_period_matrix(
+        ReportGroupBy.CATEGORY,
+        months,
+        {None: [Decimal("-5")], 999: [Decimal("100")]},
+    )
+
+    assert _rows(matrix) == [(None, [Decimal("95")], Decimal("95"))]
+    assert matrix.total == Decimal("95")
@@ -1,4 +1,5 @@
 import datetime
+from decimal import Decimal
 from http import HTTPStatus
 
 import pytest
@@ -249,3 +250,23 @@ def test_bank_account_has_summary_in_context(db, client, bank_account, user):
     assert hasattr(response.context["bank_account"], "overall_balance")
     assert hasattr(response.context["bank_account"], "summary_start_date")
     assert hasattr(response.context["bank_account"], "summary_end_date")
+
+
+def test_bank_account_summary_is_refreshed_when_transactions_change(db, client, user):
+    bank_account = baker.make(BankAccount, name="Bank Account")
+    client.force_login(user)
+    bank_account_url = reverse("bookkeeping:bank-account", args=(bank_account.slug,))
+    query_params = {"start_date": "2026-01-01", "end_date": "2026-01-31"}
+
+    response = client.get(bank_account_url, query_params=query_params)
+    assert response.context["bank_account"].incomes == Decimal("0")
+
+    baker.make(
+        Transaction,
+        bank_account=bank_account,
+        date=datetime.date(2026, 1, 10),
+        amount=Decimal("100"),
+    )
+
+    response = client.get(bank_account_url, query_params=query_params)
+    assert response.context["bank_account"].incomes == Decimal("100")
@@ -12,11 +12,18 @@ from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.urls import reverse
 from django.utils.functional import SimpleLazyObject
 
+from thebook.bookkeeping.import_pipeline import ImportResult
 from thebook.bookkeeping.importers import ImportTransactionsError
-from thebook.bookkeeping.models import BankAccount, Transaction
+from thebook.bookkeeping.models import BankAccount, ImportJob, Transaction
 from thebook.bookkeeping.views import _get_bank_account_transactions_context
 
 
+@pytest.fixture(autouse=True)
+def import_settings(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.IMPORT_JOB_WORKERS = 0
+
+
 @pytest.fixture
 def bank_account():
     return BankAccount.objects.create(name="Bank Account 1")
@@ -31,7 +38,8 @@ def test_unauthenticated_access_to_cb_import_transactions_not_allowed(
     db, client, mocker, bank_account
 ):
     import_transactions_mock = mocker.patch(
-        "thebook.bookkeeping.views.import_transactions"
+        "thebook.bookkeeping.import_jobs.import_transactions",
+        return_value=ImportResult(),
     )
 
     import_url = reverse(
@@ -55,7 +63,8 @@ def test_allowed_access_to_cb_import_transactions_authenticated(
     db, client, mocker, user, bank_account
 ):
     import_transactions_mock = mocker.patch(
-        "thebook.bookkeeping.views.import_transactions"
+        "thebook.bookkeeping.import_jobs.import_transactions",
+        return_value=ImportResult(),
     )
 
     client.force_login(user)
@@ -82,7 +91,8 @@ def test_allowed_access_to_cb_import_transactions_authenticated(
 
 def test_not_found_with_invalid_bank_account_slug(db, client, mocker, user):
     import_transactions_mock = mocker.patch(
-        "thebook.bookkeeping.views.import_transactions"
+        "thebook.bookkeeping.import_jobs.import_transactions",
+        return_value=ImportResult(),
     )
 
     client.force_login(user)
@@ -107,7 +117,8 @@ def test_import_transactions_csv_called_when_provided_valid_data(
     db, client, mocker, user, bank_account
 ):
     import_transactions_mock = mocker.patch(
-        "thebook.bookkeeping.views.import_transactions"
+        "thebook.bookkeeping.import_jobs.import_transactions",
+        return_value=ImportResult(),
     )
 
     client.force_login(user)
@@ -137,7 +148,7 @@ def test_import_transactions_add_error_message_when_failed(
 ):
     expected_error_message = "An error happened."
     import_transactions_mock = mocker.patch(
-        "thebook.bookkeeping.views.import_transactions",
+        "thebook.bookkeeping.import_jobs.import_transactions",
         side_effect=ImportTransactionsError(expected_error_message),
     )
 
@@ -163,3 +174,64 @@ def test_import_transactions_add_error_message_when_failed(
     messages = list(get_messages(response.wsgi_request))
     assert len(messages) == 1
     assert str(messages[0]) == expected_error_message
+
+
+def test_import_transactions_add_info_message_when_file_already_imported(
+    db, client, mocker, user, bank_account
+):
+    import_transactions_mock = mocker.patch(
+        "thebook.bookkeeping.import_jobs.import_transactions",
+        return_value=ImportResult(already_imported=True),
+    )
+
+    client.force_login(user)
+
+    import_url = reverse(
+        "bookkeeping:bank-account-import-transactions", args=(bank_account.slug,)
+    )
+    next_url = reverse(
+        "bookkeeping:bank-account-transactions", args=(bank_account.slug,)
+    )
+
+    response = client.post(
+        import_url,
+        {
+            "csv_file": io.StringIO(),
+            "file_type": "csv",
+            "next_url": next_url,
+        },
+    )
+
+    messages = list(get_messages(response.wsgi_request))
+    assert len(messages) == 1
+    assert str(messages[0]) == "This file was already imported."
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"csv_file": io.StringIO(), "file_type": "unknown"},
+        {"file_type": "ofx"},
+        {"csv_file": io.StringIO(), "file_type": "ofx"},
+    ],
+)
+def test_import_transactions_without_suitable_file_does_not_create_import_job(
+    db, client, user, bank_account, data
+):
+    client.force_login(user)
+
+    import_url = reverse(
+        "bookkeeping:bank-account-import-transactions", args=(bank_account.slug,)
+    )
+    next_url = reverse(
+        "bookkeeping:bank-account-transactions", args=(bank_account.slug,)
+    )
+
+    response = client.post(import_url, {**data, "next_url": next_url})
+
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.url == next_url
+    assert not ImportJob.objects.exists()
+    messages = list(get_messages(response.wsgi_request))
+    assert len(messages) == 1
+    assert str(messages[0]) == "Unable to find a suitable file importer for this file."
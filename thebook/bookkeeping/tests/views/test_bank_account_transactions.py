@@ -1,4 +1,6 @@
+import csv
 import datetime
+import io
 from http import HTTPStatus
 
 import pytest
@@ -357,5 +359,96 @@ def test_return_transactions_does_not_execute_excessive_amount_of_queries(
     )
     request = RequestFactory().get(bank_account_transactions_url)
 
-    with django_assert_num_queries(6) as captured:
+    with django_assert_num_queries(5) as captured:
         response = bank_account_transactions(request, bank_account_1.slug)
+
+
+def test_cb_transactions_csv_content(db, client, user, bank_account_1):
+    client.force_login(user)
+    category = baker.make(Category, name="Doação")
+    transaction_1 = baker.make(
+        Transaction,
+        reference="ref-1",
+        bank_account=bank_account_1,
+        date=datetime.date(2024, 3, 1),
+        description="Donation",
+        amount="10.00",
+        category=category,
+    )
+    transaction_1.tags.add("pix", "donation")
+    transaction_2 = baker.make(
+        Transaction,
+        reference="ref-2",
+        bank_account=bank_account_1,
+        date=datetime.date(2024, 3, 2),
+        description="Bank fee",
+        amount="-1.50",
+    )
+    baker.make(Document, transaction=transaction_2, _create_files=True)
+
+    bank_account_transactions_url = reverse(
+        "bookkeeping:bank-account-transactions", args=(bank_account_1.slug,)
+    )
+    response = client.get(
+        bank_account_transactions_url, query_params={"format": "csv", "year": "2024"}
+    )
+
+    rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+    assert rows[0] == [
+        "id",
+        "reference",
+        "date",
+        "description",
+        "amount",
+        "notes",
+        "category",
+        "has_documents",
+        "tags",
+    ]
+    assert rows[1][:8] == [
+        str(transaction_1.id),
+        "ref-1",
+        "2024-03-01",
+        "Donation",
+        "10.00",
+        "",
+        "Doação",
+        "False",
+    ]
+    assert sorted(rows[1][8].split(",")) == ["donation", "pix"]
+    assert rows[2] == [
+        str(transaction_2.id),
+        "ref-2",
+        "2024-03-02",
+        "Bank fee",
+        "-1.50",
+        "",
+        "",
+        "True",
+        "",
+    ]
+
+
+def test_cb_transactions_csv_does_not_query_per_row(
+    db, django_assert_num_queries, bank_account_1
+):
+    transactions = baker.make(
+        Transaction,
+        bank_account=bank_account_1,
+        category=baker.make(Category),
+        _quantity=20,
+    )
+    for transaction in transactions:
+        transaction.tags.add("tag")
+    baker.make(Document, transaction=transactions[0], _create_files=True)
+
+    bank_account_transactions_url = reverse(
+        "bookkeeping:bank-account-transactions", args=(bank_account_1.slug,)
+    )
+    request = RequestFactory().get(bank_account_transactions_url, {"format": "csv"})
+    response = bank_account_transactions(request, bank_account_1.slug)
+
+    with django_assert_num_queries(1):
+        content = b"".join(response.streaming_content)
+
+    assert len(content.decode().splitlines()) == 21
@@ -1,3 +1,4 @@
+import csv
 import datetime
 import decimal
 from http import HTTPStatus
@@ -145,3 +146,85 @@ def test_has_start_and_end_date_provided_as_argument(db, client, user):
 
     assert "end_date" in response.context
     assert response.context["end_date"] == datetime.date(2026, 3, 1)
+
+
+@pytest.mark.freeze_time("2026-02-03")
+def test_paginate_transactions_with_cursor(db, client, user, monkeypatch):
+    monkeypatch.setattr("thebook.bookkeeping.cash_book.CASH_BOOK_PAGE_SIZE", 2)
+    transaction_1 = baker.make(
+        Transaction, date=datetime.date(2026, 2, 6), amount=decimal.Decimal("100")
+    )
+    transaction_2 = baker.make(
+        Transaction, date=datetime.date(2026, 2, 6), amount=decimal.Decimal("-50")
+    )
+    transaction_3 = baker.make(
+        Transaction, date=datetime.date(2026, 2, 10), amount=decimal.Decimal("12.5")
+    )
+
+    client.force_login(user)
+
+    cash_book_report_url = reverse("bookkeeping:report-cash-book")
+
+    response = client.get(cash_book_report_url)
+
+    assert response.context["transactions"] == [transaction_1, transaction_2]
+    assert response.context["page"].next_cursor is not None
+
+    response = client.get(
+        cash_book_report_url,
+        query_params={"after": response.context["page"].next_cursor},
+    )
+
+    assert response.context["transactions"] == [transaction_3]
+    assert response.context["transactions"][0].balance == decimal.Decimal("62.5")
+    assert response.context["page"].opening_balance == decimal.Decimal("50")
+    assert response.context["opening_balance"] == decimal.Decimal("0")
+
+
+@pytest.mark.freeze_time("2026-02-03")
+def test_export_cash_book_as_csv(db, client, user):
+    baker.make(
+        Transaction,
+        date=datetime.date(2026, 1, 31),
+        amount=decimal.Decimal("258.45"),
+    )
+    transaction = baker.make(
+        Transaction,
+        date=datetime.date(2026, 2, 6),
+        description="Monthly fee",
+        amount=decimal.Decimal("100"),
+        category=None,
+        bank_account=None,
+    )
+
+    client.force_login(user)
+
+    cash_book_report_url = reverse("bookkeeping:report-cash-book")
+
+    response = client.get(cash_book_report_url, query_params={"format": "csv"})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response["Content-Type"] == "text/csv"
+    assert (
+        response["Content-Disposition"]
+        == 'attachment; filename="cash-book-2026-02-01-2026-02-28.csv"'
+    )
+    header, opening_balance, row = csv.reader(
+        b"".join(response.streaming_content).decode().splitlines()
+    )
+    assert header == [
+        "id",
+        "date",
+        "description",
+        "category",
+        "bank_account",
+        "income",
+        "expense",
+        "balance",
+    ]
+    assert opening_balance[:7] == ["", "2026-02-01", "Opening Balance", "", "", "", ""]
+    assert decimal.Decimal(opening_balance[7]) == decimal.Decimal("258.45")
+    assert row[:5] == [str(transaction.id), "2026-02-06", "Monthly fee", "", ""]
+    assert decimal.Decimal(row[5]) == decimal.Decimal("100")
+    assert row[6] == ""
+    assert decimal.Decimal(row[7]) == decimal.Decimal("358.45")
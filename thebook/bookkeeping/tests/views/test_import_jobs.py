@@ -0,0 +1,105 @@
+import io
+
+import pytest
+from model_bakery import baker
+
+from django.contrib.auth import get_user_model
+from django.contrib.messages import get_messages
+from django.urls import reverse
+
+from thebook.bookkeeping.models import BankAccount, ImportJob, ImportJobStatus
+
+
+@pytest.fixture(autouse=True)
+def import_settings(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.IMPORT_JOB_WORKERS = 2
+
+
+@pytest.fixture
+def bank_account(db):
+    return BankAccount.objects.create(name="Bank Account 1")
+
+
+@pytest.fixture
+def user(db):
+    return baker.make(get_user_model())
+
+
+def test_import_transactions_creates_import_job(client, mocker, user, bank_account):
+    submit = mocker.patch("thebook.bookkeeping.import_jobs._get_executor")
+    client.force_login(user)
+    next_url = reverse(
+        "bookkeeping:bank-account-transactions", args=(bank_account.slug,)
+    )
+
+    response = client.post(
+        reverse(
+            "bookkeeping:bank-account-import-transactions", args=(bank_account.slug,)
+        ),
+        {
+            "csv_file": io.BytesIO(b"content"),
+            "file_type": "csv",
+            "next_url": next_url,
+        },
+    )
+
+    assert response.url == next_url
+    job = ImportJob.objects.get()
+    assert job.status == ImportJobStatus.PENDING
+    assert job.bank_account == bank_account
+    assert job.created_by == user
+    assert job.transactions_file.read() == b"content"
+
+    messages = list(get_messages(response.wsgi_request))
+    assert [str(message) for message in messages] == [
+        "File received, importing transactions."
+    ]
+
+
+def test_partial_import_job_polls_while_unfinished(client, user, bank_account):
+    job = baker.make(
+        ImportJob,
+        bank_account=bank_account,
+        status=ImportJobStatus.RUNNING,
+        processed=1500,
+    )
+    client.force_login(user)
+
+    response = client.get(reverse("bookkeeping:partial-import-job", args=(job.id,)))
+
+    content = response.content.decode()
+    assert 'hx-trigger="every 2s"' in content
+    assert "1500 rows processed" in content
+
+
+def test_partial_import_job_stops_polling_when_finished(client, user, bank_account):
+    job = baker.make(
+        ImportJob,
+        bank_account=bank_account,
+        status=ImportJobStatus.SUCCEEDED,
+        inserted=10,
+        updated=2,
+        skipped=1,
+    )
+    client.force_login(user)
+
+    response = client.get(reverse("bookkeeping:partial-import-job", args=(job.id,)))
+
+    content = response.content.decode()
+    assert "hx-trigger" not in content
+    assert "10 inserted, 2 updated, 1 skipped" in content
+
+
+def test_partial_bank_account_import_jobs_lists_recent_jobs(client, user, bank_account):
+    job = baker.make(ImportJob, bank_account=bank_account)
+    other_bank_account_job = baker.make(ImportJob)
+    client.force_login(user)
+
+    response = client.get(
+        reverse(
+            "bookkeeping:partial-bank-account-import-jobs", args=(bank_account.slug,)
+        )
+    )
+
+    assert list(response.context["import_jobs"]) == [job]
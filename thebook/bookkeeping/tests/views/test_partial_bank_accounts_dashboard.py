@@ -0,0 +1,63 @@
+import datetime
+from decimal import Decimal
+from http import HTTPStatus
+
+import pytest
+from model_bakery import baker
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from thebook.bookkeeping.models import BankAccount, Transaction
+
+
+@pytest.fixture
+def user():
+    return baker.make(get_user_model())
+
+
+@pytest.fixture
+def bank_account(db):
+    return BankAccount.objects.create(name="Bank Account 1")
+
+
+@pytest.mark.freeze_time("2024-09-15")
+def test_bank_accounts_dashboard_of_the_requested_month(db, client, user, bank_account):
+    baker.make(
+        Transaction,
+        bank_account=bank_account,
+        date=datetime.date(2024, 8, 10),
+        amount=Decimal("41.27"),
+    )
+    client.force_login(user)
+
+    response = client.get(
+        reverse("bookkeeping:partial-bank-accounts-dashboard"),
+        query_params={"month": "8", "year": "2024"},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert "Bank Account 1" in response.content.decode()
+    assert "41,27" in response.content.decode()
+
+
+@pytest.mark.freeze_time("2024-09-15")
+def test_rendered_bank_accounts_dashboard_is_cached_until_data_changes(
+    db, client, user, bank_account, django_assert_max_num_queries
+):
+    client.force_login(user)
+    dashboard_url = reverse("bookkeeping:partial-bank-accounts-dashboard")
+
+    response = client.get(dashboard_url)
+    assert "Bank Account 1" in response.content.decode()
+
+    # Session, user, bank account ids and data versions
+    with django_assert_max_num_queries(4):
+        cached_response = client.get(dashboard_url)
+    assert cached_response.content == response.content
+
+    bank_account.name = "Renamed Bank Account"
+    bank_account.save()
+
+    response = client.get(dashboard_url)
+    assert "Renamed Bank Account" in response.content.decode()
@@ -0,0 +1,123 @@
+import csv
+import datetime
+import decimal
+from http import HTTPStatus
+
+import pytest
+from model_bakery import baker
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from thebook.bookkeeping.models import BankAccount, Category, Transaction
+
+
+@pytest.fixture
+def user():
+    return baker.make(get_user_model())
+
+
+@pytest.fixture
+def transactions(db):
+    bank_account = BankAccount.objects.create(name="Test Bank Account")
+    other_bank_account = BankAccount.objects.create(name="Other Bank Account")
+    fees = Category.objects.create(name="Fees")
+
+    # fmt: off
+    return [
+        baker.make(Transaction, bank_account=bank_account, category=fees, date=datetime.date(2026, 1, 5), amount=decimal.Decimal("100")),
+        baker.make(Transaction, bank_account=other_bank_account, category=fees, date=datetime.date(2026, 2, 5), amount=decimal.Decimal("20")),
+    ]
+    # fmt: on
+
+
+def test_unauthenticated_access_redirect_to_login_page(db, client):
+    report_url = reverse("bookkeeping:report-period-matrix")
+
+    response = client.get(report_url)
+
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.url == f"{settings.LOGIN_URL}?next={report_url}"
+
+
+@pytest.mark.freeze_time("2026-02-03")
+def test_current_year_by_category_by_default(db, client, user, transactions):
+    client.force_login(user)
+
+    response = client.get(reverse("bookkeeping:report-period-matrix"))
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.context["start_date"] == datetime.date(2026, 1, 1)
+    assert response.context["end_date"] == datetime.date(2026, 12, 31)
+    assert response.context["group_by"] == "category"
+    assert len(response.context["matrix"].months) == 12
+    assert response.context["matrix"].total == decimal.Decimal("120")
+
+
+def test_filter_by_bank_account_and_period(db, client, user, transactions):
+    client.force_login(user)
+
+    response = client.get(
+        reverse("bookkeeping:report-period-matrix"),
+        query_params={
+            "start_date": "2026-01-01",
+            "end_date": "2026-02-28",
+            "bank_account": "other-bank-account",
+            "group_by": "tag",
+        },
+    )
+
+    matrix = response.context["matrix"]
+    assert response.context["group_by"] == "tag"
+    assert response.context["selected_slugs"] == ["other-bank-account"]
+    assert [(row.label, row.values) for row in matrix.rows] == [
+        (None, [decimal.Decimal("0"), decimal.Decimal("20")]),
+    ]
+
+
+def test_export_as_csv(db, client, user, transactions):
+    client.force_login(user)
+
+    response = client.get(
+        reverse("bookkeeping:report-period-matrix"),
+        query_params={
+            "start_date": "2026-01-01",
+            "end_date": "2026-02-28",
+            "format": "csv",
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response["Content-Type"] == "text/csv"
+    assert (
+        response["Content-Disposition"]
+        == 'attachment; filename="category-by-month-2026-01-01-2026-02-28.csv"'
+    )
+    rows = list(csv.reader(b"".join(response.streaming_content).decode().splitlines()))
+    assert rows[0] == ["category", "2026-01", "2026-02", "total"]
+    assert rows[1][0] == "Fees"
+    assert [decimal.Decimal(value) for value in rows[1][1:]] == [
+        decimal.Decimal("100"),
+        decimal.Decimal("20"),
+        decimal.Decimal("120"),
+    ]
+    assert rows[2][0] == "total"
+
+
+def test_export_tags_as_csv_without_totals(db, client, user, transactions):
+    transactions[0].tags.add("member")
+    client.force_login(user)
+
+    response = client.get(
+        reverse("bookkeeping:report-period-matrix"),
+        query_params={
+            "start_date": "2026-01-01",
+            "end_date": "2026-02-28",
+            "group_by": "tag",
+            "format": "csv",
+        },
+    )
+
+    rows = list(csv.reader(b"".join(response.streaming_content).decode().splitlines()))
+    assert [row[0] for row in rows] == ["tag", "member", ""]
@@ -15,6 +15,11 @@ urlpatterns = [
         views.ReportCashBookView.as_view(),
         name="report-cash-book",
     ),
+    path(
+        "reports/period_matrix",
+        views.ReportPeriodMatrixView.as_view(),
+        name="report-period-matrix",
+    ),
     path(
         "cb/<slug:bank_account_slug>/transactions",
         views.bank_account_transactions,
@@ -35,6 +40,16 @@ urlpatterns = [
         views.partial_transaction_details,
         name="partial-transaction-details",
     ),
+    path(
+        "partial/cb/<slug:bank_account_slug>/import_jobs",
+        views.partial_bank_account_import_jobs,
+        name="partial-bank-account-import-jobs",
+    ),
+    path(
+        "partial/import_job/<int:job_id>",
+        views.partial_import_job,
+        name="partial-import-job",
+    ),
     path(
         "partial/cb/dashboard",
         views.partial_bank_accounts_dashboard,
@@ -3,55 +3,96 @@ import csv
 import datetime
 
 from django.contrib import messages
-from django.db.models import Sum
-from django.http import HttpResponse, HttpResponseRedirect
+from django.http import HttpResponse, HttpResponseRedirect, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.translation import get_language
 from django.utils.translation import gettext as _
 from django.views import View
 
-from thebook.bookkeeping.importers import ImportTransactionsError, import_transactions
-from thebook.bookkeeping.models import BankAccount, Document, Transaction
+from thebook.bookkeeping.cash_book import CashBook
+from thebook.bookkeeping.data_version import get_or_compute
+from thebook.bookkeeping.import_jobs import submit_import_job
+from thebook.bookkeeping.models import (
+    BankAccount,
+    Document,
+    ImportJob,
+    Transaction,
+)
+from thebook.bookkeeping.reports import ReportGroupBy, period_matrix
+
+CSV_EXPORT_CHUNK_SIZE = 2000
+
+# Recent import jobs are shown above the transactions of the bank account
+IMPORT_JOBS_DISPLAY_LIMIT = 5
+IMPORT_JOBS_DISPLAY_PERIOD = datetime.timedelta(hours=1)
+
+# Form field with the uploaded file of each importable file type
+IMPORT_FILE_FIELDS = {
+    "ofx": "ofx_file",
+    "csv": "csv_file",
+    "csv_cora_credit_card": "csv_cora_credit_card_file",
+}
+
+
+class _Echo:
+    """File-like object that returns the written value instead of buffering it"""
+
+    def write(self, value):
+        return value
 
 
 def _csv_bank_account_transactions(context):
     bank_account = context["bank_account"]
     output_filename = f"{bank_account.slug}-transactions.csv"
-    response = HttpResponse(
-        content_type="text/csv",
-        headers={"Content-Disposition": f'attachment; filename="{output_filename}"'},
-    )
-    writer = csv.writer(response)
-    writer.writerow(
-        [
-            "id",
-            "reference",
-            "date",
-            "description",
-            "amount",
-            "notes",
-            "category",
-            "has_documents",
-            "tags",
-        ]
+
+    transactions = (
+        context["transactions"]
+        .prefetch_related(None)
+        .select_related("category")
+        .with_export_info()
     )
 
-    for transaction in context["transactions"]:
-        transaction_tags = ",".join(tag.name for tag in transaction.tags.all())
-        writer.writerow(
+    def _rows():
+        writer = csv.writer(_Echo())
+        yield writer.writerow(
             [
-                transaction.id,
-                transaction.reference,
-                transaction.date,
-                transaction.description,
-                transaction.amount,
-                transaction.notes,
-                transaction.category.name if transaction.category is not None else "",
-                transaction.has_documents,
-                transaction_tags,
+                "id",
+                "reference",
+                "date",
+                "description",
+                "amount",
+                "notes",
+                "category",
+                "has_documents",
+                "tags",
             ]
         )
+        for transaction in transactions.iterator(chunk_size=CSV_EXPORT_CHUNK_SIZE):
+            yield writer.writerow(
+                [
+                    transaction.id,
+                    transaction.reference,
+                    transaction.date,
+                    transaction.description,
+                    transaction.amount,
+                    transaction.notes,
+                    (
+                        transaction.category.name
+                        if transaction.category is not None
+                        else ""
+                    ),
+                    transaction.has_documents,
+                    transaction.tag_names,
+                ]
+            )
 
-    return response
+    return StreamingHttpResponse(
+        _rows(),
+        content_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{output_filename}"'},
+    )
 
 
 def _get_periods(year, month):
@@ -82,9 +123,11 @@ def _get_bank_account_transactions_context(bank_account, *, year=None, month=Non
     if month is not None:
         month = int(month)
 
-    transactions = bank_account.transactions.select_related(
-        "category"
-    ).prefetch_related("documents", "tags")
+    transactions = (
+        bank_account.transactions.select_related("category")
+        .prefetch_related("tags")
+        .with_document_flags()
+    )
     if year:
         transactions = transactions.filter(date__year=year)
         if month in range(1, 13):
@@ -135,30 +178,64 @@ def bank_account_import_transactions(request, bank_account_slug):
     if end_date is not None:
         end_date = datetime.datetime.strptime(end_date, "%d/%m/%Y").date()
 
-    try:
-        file_type = request.POST["file_type"]
-        transactions_file = None
-        if file_type == "ofx":
-            transactions_file = request.FILES["ofx_file"]
-        elif file_type == "csv":
-            transactions_file = request.FILES["csv_file"]
-        elif file_type == "csv_cora_credit_card":
-            transactions_file = request.FILES["csv_cora_credit_card_file"]
-
-        import_transactions(
-            transactions_file,
-            file_type,
-            bank_account,
-            request.user,
-            start_date,
-            end_date,
+    file_type = request.POST["file_type"]
+    transactions_file = request.FILES.get(IMPORT_FILE_FIELDS.get(file_type))
+    if transactions_file is None:
+        messages.add_message(
+            request,
+            messages.ERROR,
+            _("Unable to find a suitable file importer for this file."),
+        )
+        return HttpResponseRedirect(request.POST["next_url"])
+
+    job = ImportJob.objects.create(
+        bank_account=bank_account,
+        transactions_file=transactions_file,
+        file_type=file_type,
+        start_date=start_date,
+        end_date=end_date,
+        created_by=request.user,
+    )
+    job = submit_import_job(job)
+
+    if job.failed:
+        messages.add_message(request, messages.ERROR, job.error)
+    elif job.already_imported:
+        messages.add_message(
+            request, messages.INFO, _("This file was already imported.")
+        )
+    elif not job.finished:
+        messages.add_message(
+            request, messages.INFO, _("File received, importing transactions.")
         )
-    except ImportTransactionsError as err:
-        messages.add_message(request, messages.ERROR, str(err))
 
     return HttpResponseRedirect(request.POST["next_url"])
 
 
+def partial_bank_account_import_jobs(request, bank_account_slug):
+    bank_account = get_object_or_404(BankAccount, slug=bank_account_slug)
+    import_jobs = ImportJob.objects.filter(
+        bank_account=bank_account,
+        created_at__gte=timezone.now() - IMPORT_JOBS_DISPLAY_PERIOD,
+    )[:IMPORT_JOBS_DISPLAY_LIMIT]
+
+    return render(
+        request,
+        "bookkeeping/partial/import_jobs.html",
+        context={"import_jobs": import_jobs},
+    )
+
+
+def partial_import_job(request, job_id):
+    job = get_object_or_404(ImportJob, id=job_id)
+
+    return render(
+        request,
+        "bookkeeping/partial/import_job.html",
+        context={"job": job},
+    )
+
+
 def transaction_upload_document(request):
     transaction = get_object_or_404(Transaction, id=request.POST["transaction_id"])
 
@@ -193,22 +270,36 @@ def partial_bank_accounts_dashboard(request):
     previous_month_reference_date = reference_date - datetime.timedelta(days=10)
     next_month_reference_date = reference_date + datetime.timedelta(days=40)
 
-    bank_accounts_summary = BankAccount.objects.filter(active=True).summary(
-        year=year, month=month
-    )
-    return render(
-        request,
-        "bookkeeping/partial/bank_accounts_dashboard.html",
-        context={
-            "bank_accounts_summary": bank_accounts_summary,
-            "month": int(month),
-            "next_month": next_month_reference_date.month,
-            "next_year": next_month_reference_date.year,
-            "previous_month": previous_month_reference_date.month,
-            "previous_year": previous_month_reference_date.year,
-            "year": int(year),
-        },
+    bank_accounts = BankAccount.objects.filter(active=True)
+    bank_account_ids = sorted(bank_accounts.values_list("id", flat=True))
+
+    def _render():
+        return render_to_string(
+            "bookkeeping/partial/bank_accounts_dashboard.html",
+            context={
+                "bank_accounts_summary": bank_accounts.summary(year=year, month=month),
+                "month": int(month),
+                "next_month": next_month_reference_date.month,
+                "next_year": next_month_reference_date.year,
+                "previous_month": previous_month_reference_date.month,
+                "previous_year": previous_month_reference_date.year,
+                "year": int(year),
+            },
+            request=request,
+        )
+
+    # The rendered partial depends on the query string of the request
+    content = get_or_compute(
+        "bookkeeping:partial-bank-accounts-dashboard",
+        year,
+        month,
+        request.get_full_path(),
+        get_language(),
+        *bank_account_ids,
+        bank_account_ids=bank_account_ids,
+        compute=_render,
     )
+    return HttpResponse(content)
 
 
 def _get_date_range_from_request_query_strings(request):
@@ -238,9 +329,18 @@ class BankAccountView(View):
     def get(self, request, bank_account_slug):
         start_date, end_date = _get_date_range_from_request_query_strings(request)
 
-        bank_account = get_object_or_404(
-            BankAccount.objects.with_summary(start_date=start_date, end_date=end_date),
-            slug=bank_account_slug,
+        bank_account_id = get_object_or_404(
+            BankAccount.objects.values_list("id", flat=True), slug=bank_account_slug
+        )
+        bank_account = get_or_compute(
+            "bookkeeping:bank-account-summary",
+            bank_account_id,
+            start_date.isoformat(),
+            end_date.isoformat(),
+            bank_account_ids=[bank_account_id],
+            compute=lambda: BankAccount.objects.with_summary(
+                start_date=start_date, end_date=end_date
+            ).get(id=bank_account_id),
         )
 
         transactions = (
@@ -248,7 +348,7 @@ class BankAccountView(View):
                 start_date=start_date, end_date=end_date
             )
             .select_related("category")
-            .prefetch_related("documents")
+            .with_document_flags()
         )
 
         return render(
@@ -263,27 +363,146 @@ class BankAccountView(View):
         )
 
 
+def _csv_cash_book(cash_book):
+    output_filename = (
+        f"cash-book-{cash_book.start_date.isoformat()}"
+        f"-{cash_book.end_date.isoformat()}.csv"
+    )
+
+    def _rows():
+        writer = csv.writer(_Echo())
+        yield writer.writerow(
+            [
+                "id",
+                "date",
+                "description",
+                "category",
+                "bank_account",
+                "income",
+                "expense",
+                "balance",
+            ]
+        )
+        yield writer.writerow(
+            [
+                "",
+                cash_book.start_date,
+                "Opening Balance",
+                "",
+                "",
+                "",
+                "",
+                cash_book.opening_balance,
+            ]
+        )
+        for transaction in cash_book:
+            yield writer.writerow(
+                [
+                    transaction.id,
+                    transaction.date,
+                    transaction.description,
+                    transaction.category or "",
+                    transaction.bank_account or "",
+                    transaction.income if transaction.income is not None else "",
+                    transaction.expense if transaction.expense is not None else "",
+                    transaction.balance,
+                ]
+            )
+
+    return StreamingHttpResponse(
+        _rows(),
+        content_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{output_filename}"'},
+    )
+
+
 class ReportCashBookView(View):
 
     def get(self, request):
         start_date, end_date = _get_date_range_from_request_query_strings(request)
+        cash_book = CashBook(start_date, end_date)
 
-        opening_balance = Transaction.objects.filter(date__lt=start_date).aggregate(
-            Sum("amount", default=0)
-        )["amount__sum"]
-        transactions = (
-            Transaction.objects.select_related("category", "bank_account")
-            .within_period(start_date=start_date, end_date=end_date)
-            .with_info_for_cash_book(base_value=opening_balance)
-        )
+        if request.GET.get("format") == "csv":
+            return _csv_cash_book(cash_book)
+
+        page = cash_book.page(cursor=request.GET.get("after"))
 
         return render(
             request,
             "bookkeeping/reports/cash_book.html",
             context={
+                "cash_book": cash_book,
                 "end_date": end_date,
-                "opening_balance": opening_balance,
+                "opening_balance": cash_book.opening_balance,
+                "page": page,
+                "start_date": start_date,
+                "transactions": page.transactions,
+            },
+        )
+
+
+def _csv_period_matrix(matrix, start_date, end_date):
+    output_filename = f"{matrix.group_by}-by-month-{start_date.isoformat()}-{end_date.isoformat()}.csv"
+
+    def _rows():
+        writer = csv.writer(_Echo())
+        yield writer.writerow(
+            [
+                matrix.group_by,
+                *(month.strftime("%Y-%m") for month in matrix.months),
+                "total",
+            ]
+        )
+        for row in matrix.rows:
+            yield writer.writerow([row.label or "", *row.values, row.total])
+        if matrix.totals is not None:
+            yield writer.writerow(["total", *matrix.totals, matrix.total])
+
+    return StreamingHttpResponse(
+        _rows(),
+        content_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{output_filename}"'},
+    )
+
+
+class ReportPeriodMatrixView(View):
+
+    def get(self, request):
+        if request.GET.get("start_date") or request.GET.get("end_date"):
+            start_date, end_date = _get_date_range_from_request_query_strings(request)
+        else:
+            today = datetime.date.today()
+            start_date = datetime.date(today.year, 1, 1)
+            end_date = datetime.date(today.year, 12, 31)
+
+        group_by = request.GET.get("group_by")
+        if group_by not in ReportGroupBy.lookups:
+            group_by = ReportGroupBy.CATEGORY
+
+        all_bank_accounts = BankAccount.objects.order_by("name")
+        selected_slugs = request.GET.getlist("bank_account")
+        bank_accounts = None
+        if selected_slugs:
+            bank_accounts = [
+                bank_account
+                for bank_account in all_bank_accounts
+                if bank_account.slug in selected_slugs
+            ]
+
+        matrix = period_matrix(group_by, start_date, end_date, bank_accounts)
+
+        if request.GET.get("format") == "csv":
+            return _csv_period_matrix(matrix, start_date, end_date)
+
+        return render(
+            request,
+            "bookkeeping/reports/period_matrix.html",
+            context={
+                "all_bank_accounts": all_bank_accounts,
+                "end_date": end_date,
+                "group_by": group_by,
+                "matrix": matrix,
+                "selected_slugs": selected_slugs,
                 "start_date": start_date,
-                "transactions": transactions,
             },
         )
@@ -0,0 +1,24 @@
+import pytest
+
+from django.core.cache import cache
+
+from thebook.bookkeeping.reference_data import reference_data
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_reference_data():
+    reference_data.clear()
+    yield
+    reference_data.clear()
+
+
+@pytest.fixture(autouse=True)
+def raise_when_query_budget_is_exceeded(settings):
+    settings.QUERY_BUDGET_RAISE = True
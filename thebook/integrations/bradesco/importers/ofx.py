@@ -7,6 +7,7 @@ from ofxtools.Parser import OFXTree
 from django.conf import settings
 from django.db import IntegrityError
 
+from thebook.bookkeeping.import_pipeline import TransactionImportPipeline
 from thebook.bookkeeping.models import Category, Transaction
 from thebook.utils.ofxparse import OfxParser
 
@@ -24,15 +25,20 @@ DEFAULT_IGNORED_MEMOS = [
 
 
 class OFXImporter:
-    def __init__(self, transactions_file, bank_account, user):
-        self.new_transactions = []
-
+    def __init__(self, transactions_file, bank_account, user, ofx_transactions=None):
         self.transactions_file = transactions_file
         self.bank_account = bank_account
         self.user = user
 
+        if ofx_transactions is not None:
+            # Transactions of the file already parsed by OfxParser
+            self.ofx_parser = ofx_transactions
+            return
+
         try:
-            self.ofx_parser = OfxParser.parse(self.transactions_file)
+            self.ofx_parser = OfxParser.iterparse(
+                self.transactions_file
+            ).first_statement()
         except (UnicodeDecodeError, TypeError, ValueError) as exc:
             from thebook.bookkeeping.importers import InvalidOFXFile
 
@@ -49,14 +55,19 @@ class OFXImporter:
             date_rules.append(transaction_date <= end_date)
         return all(date_rules)
 
-    def run(self, start_date=None, end_date=None, ignored_memos=None):
-        logger.info("importers.ofx.run.start", start_date=start_date, end_date=end_date)
+    def _iter_ofx_transactions(self):
+        try:
+            yield from self.ofx_parser
+        except (UnicodeDecodeError, TypeError, ValueError) as exc:
+            from thebook.bookkeeping.importers import InvalidOFXFile
 
+            raise InvalidOFXFile() from exc
+
+    def iter_transactions(self, start_date=None, end_date=None, ignored_memos=None):
         if ignored_memos is None:
             ignored_memos = DEFAULT_IGNORED_MEMOS
 
-        ofx_transactions = self.ofx_parser.account.statement.transactions
-        for transaction in ofx_transactions:
+        for transaction in self._iter_ofx_transactions():
             if transaction.memo in ignored_memos:
                 logger.debug(
                     "importers.ofx.run.ignore_transaction", transaction=transaction.memo
@@ -67,28 +78,29 @@ class OFXImporter:
             if not self._within_date_range(transaction_date, start_date, end_date):
                 continue
 
-            self.new_transactions.append(
-                Transaction(
-                    reference=self._get_reference(transaction.id, transaction.checknum),
-                    date=transaction_date,
-                    description=transaction.memo,
-                    amount=transaction.amount,
-                    bank_account=self.bank_account,
-                    source="bradesco.importers.ofx",
-                    created_by=self.user,
-                )
+            yield Transaction(
+                reference=self._get_reference(transaction.id, transaction.checknum),
+                date=transaction_date,
+                description=transaction.memo,
+                amount=transaction.amount,
+                bank_account=self.bank_account,
+                source="bradesco.importers.ofx",
+                created_by=self.user,
             )
 
-        logger.info(
-            "importers.ofx.run", new_transactions_count=len(self.new_transactions)
+    def run(self, start_date=None, end_date=None, ignored_memos=None, batch_size=None):
+        logger.info("importers.ofx.run.start", start_date=start_date, end_date=end_date)
+
+        result = TransactionImportPipeline(batch_size).run(
+            self.iter_transactions(start_date, end_date, ignored_memos)
         )
 
-        transactions = Transaction.objects.bulk_create(
-            self.new_transactions,
-            update_conflicts=True,
-            update_fields=["description", "amount"],
-            unique_fields=["reference"],
+        logger.info(
+            "importers.ofx.run",
+            inserted=result.inserted,
+            updated=result.updated,
+            skipped=result.skipped,
         )
 
         logger.info("importers.ofx.run.end", start_date=start_date, end_date=end_date)
-        return transactions
+        return result
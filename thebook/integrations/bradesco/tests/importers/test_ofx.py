@@ -33,10 +33,10 @@ def test_bradesco_ofx_file_with_one_transaction(db, request, bank_account, user)
     with open(ofx_file_path, "r") as ofx_file:
         ofx_importer = OFXImporter(ofx_file, bank_account, user)
 
-        transactions = ofx_importer.run()
+        result = ofx_importer.run()
 
-        assert len(transactions) == 1
-        transaction = transactions[0]
+        assert result.inserted == 1
+        transaction = Transaction.objects.get()
         assert transaction.reference == "N10235-106"
         assert transaction.date == datetime.date(2024, 8, 2)
         assert transaction.description == "PAGTO ELETRON  COBRANCA ALUGUEL"
@@ -47,14 +47,29 @@ def test_bradesco_ofx_file_with_one_transaction(db, request, bank_account, user)
         assert transaction.category is None
 
 
+def test_bradesco_ofx_file_with_multiple_statements_imports_first_statement(
+    db, request, bank_account, user
+):
+    ofx_file_path = request.path.parent / "data" / "ofx-two-statements.ofx"
+    with open(ofx_file_path, "r") as ofx_file:
+        ofx_importer = OFXImporter(ofx_file, bank_account, user)
+
+        result = ofx_importer.run()
+
+        assert result.inserted == 1
+        transaction = Transaction.objects.get()
+        assert transaction.reference == "N10235-106"
+        assert transaction.amount == decimal.Decimal("-1798.60")
+
+
 def test_bradesco_ofx_file_with_multiple_transactions(db, request, bank_account, user):
     ofx_file_path = request.path.parent / "data" / "ofx-multiple-transactions.ofx"
     with open(ofx_file_path, "r") as ofx_file:
         ofx_importer = OFXImporter(ofx_file, bank_account, user)
 
-        transactions = ofx_importer.run()
+        result = ofx_importer.run()
 
-        assert len(transactions) == 57
+        assert result.inserted == 57
         assert Transaction.objects.count() == 57
 
 
@@ -92,9 +107,9 @@ def test_ofx_file_ignoring_transactions_by_exact_description(
     with open(ofx_file_path, "r") as ofx_file:
         ofx_importer = OFXImporter(ofx_file, bank_account, user)
 
-        transactions = ofx_importer.run(ignored_memos=ignored_memos)
+        ofx_importer.run(ignored_memos=ignored_memos)
 
-        references = sorted([transaction.reference for transaction in transactions])
+        references = sorted(Transaction.objects.values_list("reference", flat=True))
         assert references == sorted(expected_references)
 
 
@@ -136,9 +151,9 @@ def test_use_default_list_of_ignored_descriptions_if_not_provided(
     with open(ofx_file_path, "r") as ofx_file:
         ofx_importer = OFXImporter(ofx_file, bank_account, user)
 
-        transactions = ofx_importer.run()
+        ofx_importer.run()
 
-        references = sorted([transaction.reference for transaction in transactions])
+        references = sorted(Transaction.objects.values_list("reference", flat=True))
         assert references == sorted(expected_references)
 
 
@@ -150,6 +165,20 @@ def test_utf_8_transactions_content(db, request, bank_account, user):
     with open(ofx_file_path, "r") as ofx_file:
         ofx_importer = OFXImporter(ofx_file, bank_account, user)
 
-        transactions = ofx_importer.run()
+        result = ofx_importer.run()
+
+        assert result.inserted == 1
+
+
+def test_bradesco_ofx_file_inserted_in_batches(db, request, bank_account, user, mocker):
+    bulk_create = mocker.spy(Transaction.objects, "bulk_create")
+
+    ofx_file_path = request.path.parent / "data" / "ofx-multiple-transactions.ofx"
+    with open(ofx_file_path, "r") as ofx_file:
+        ofx_importer = OFXImporter(ofx_file, bank_account, user)
+
+        result = ofx_importer.run(batch_size=25)
 
-        assert len(transactions) == 1
+    assert result.inserted == 57
+    assert Transaction.objects.count() == 57
+    assert [len(call.args[0]) for call in bulk_create.call_args_list] == [25, 25, 7]
@@ -7,9 +7,9 @@ import uuid
 import structlog
 
 from django.conf import settings
-from django.contrib.auth import get_user_model
 
-from thebook.bookkeeping.models import BankAccount, Transaction
+from thebook.bookkeeping.models import Transaction
+from thebook.bookkeeping.reference_data import reference_data
 from thebook.integrations.cora.constants import CORA_CREDIT_CARD_BANK_ACCOUNT
 
 logger = structlog.get_logger(__name__)
@@ -38,10 +38,8 @@ class CoraCreditCardInvoiceImporter:
 
     def __init__(self, invoice_file):
         self.invoice_file = invoice_file
-        self.bank_account, _ = BankAccount.objects.get_or_create(
-            name=CORA_CREDIT_CARD_BANK_ACCOUNT
-        )
-        self.user = get_user_model().objects.get_or_create_automation_user()
+        self.bank_account = reference_data.bank_account(CORA_CREDIT_CARD_BANK_ACCOUNT)
+        self.user = reference_data.automation_user()
 
     def _within_range(
         self,
@@ -83,6 +81,7 @@ class CoraCreditCardInvoiceImporter:
             )
             raise InvalidCoraCreditCardInvoice
 
+        rows = []
         for transaction in reader:
             transaction_date = datetime.datetime.strptime(
                 transaction["Data"], "%d/%m/%Y"
@@ -94,20 +93,23 @@ class CoraCreditCardInvoiceImporter:
                 transaction["Valor"].replace(".", "").replace(",", ".")
             )
             description = transaction["Descrição"].strip()
-            currency = transaction["Moeda"]
-            amount_in_local_currency = transaction["Valor Moeda Local"]
+            key = (transaction_date, description, amount, self.bank_account.id)
+            rows.append((key, transaction))
 
-            if (
-                exclude_existing
-                and Transaction.objects.filter(
-                    date=transaction_date,
-                    description=description,
-                    amount=amount,
-                    bank_account=self.bank_account,
-                ).exists()
-            ):
+        existing_keys = set()
+        if exclude_existing:
+            existing_keys = Transaction.objects.existing_natural_keys(
+                key for key, _ in rows
+            )
+
+        for key, transaction in rows:
+            if key in existing_keys:
                 continue
 
+            transaction_date, description, amount, _ = key
+            currency = transaction["Moeda"]
+            amount_in_local_currency = transaction["Valor Moeda Local"]
+
             transactions.append(
                 Transaction(
                     reference=uuid.uuid4(),
@@ -2,13 +2,16 @@ import csv
 import datetime
 import decimal
 import io
+import itertools
 import uuid
 
 import structlog
 
-from django.contrib.auth import get_user_model
+from django.conf import settings
 
-from thebook.bookkeeping.models import BankAccount, Category, Transaction
+from thebook.bookkeeping.import_pipeline import TransactionImportPipeline
+from thebook.bookkeeping.models import Transaction
+from thebook.bookkeeping.reference_data import reference_data
 from thebook.integrations.cora.constants import (
     CORA_BANK_ACCOUNT,
     CORA_CREDIT_CARD_BANK_ACCOUNT,
@@ -22,25 +25,27 @@ class InvalidCoraOFXFile(Exception): ...
 
 
 class CoraOFXImporter:
-    def __init__(self, ofx_file):
-        try:
-            self.ofx_parser = OfxParser.parse(ofx_file)
-        except (UnicodeDecodeError, TypeError, ValueError) as exc:
-            logger.error(
-                "CoraOFXImporter.__init__.invalid_cora_ofx_file",
-            )
-            raise InvalidCoraOFXFile() from exc
+    def __init__(self, ofx_file, ofx_transactions=None):
+        if ofx_transactions is not None:
+            # Transactions of the file already parsed by OfxParser
+            self.ofx_parser = ofx_transactions
+        else:
+            try:
+                self.ofx_parser = OfxParser.iterparse(ofx_file).first_statement()
+            except (UnicodeDecodeError, TypeError, ValueError) as exc:
+                logger.error(
+                    "CoraOFXImporter.__init__.invalid_cora_ofx_file",
+                )
+                raise InvalidCoraOFXFile() from exc
 
-        self.cora_bank_account, _ = BankAccount.objects.get_or_create(
-            name=CORA_BANK_ACCOUNT
-        )
-        self.cora_credit_card_bank_account, _ = BankAccount.objects.get_or_create(
-            name=CORA_CREDIT_CARD_BANK_ACCOUNT
+        self.cora_bank_account = reference_data.bank_account(CORA_BANK_ACCOUNT)
+        self.cora_credit_card_bank_account = reference_data.bank_account(
+            CORA_CREDIT_CARD_BANK_ACCOUNT
         )
-        self.bank_account_transfer_category, _ = Category.objects.get_or_create(
-            name="Transferência entre contas bancárias"
+        self.bank_account_transfer_category = reference_data.category(
+            "Transferência entre contas bancárias"
         )
-        self.user = get_user_model().objects.get_or_create_automation_user()
+        self.user = reference_data.automation_user()
 
     def _within_date_range(self, transaction_date, start_date, end_date):
         date_rules = []
@@ -50,25 +55,38 @@ class CoraOFXImporter:
             date_rules.append(transaction_date <= end_date)
         return all(date_rules)
 
-    def get_transactions(
-        self, start_date=None, end_date=None, exclude_existing: bool = True
-    ):
-        logger.info(
-            "CoraOFXImporter.get_transactions.start",
-            start_date=start_date,
-            end_date=end_date,
-            exclude_existing=exclude_existing,
-        )
+    def _iter_ofx_transactions(self):
+        try:
+            yield from self.ofx_parser
+        except (UnicodeDecodeError, TypeError, ValueError) as exc:
+            logger.error(
+                "CoraOFXImporter._iter_ofx_transactions.invalid_cora_ofx_file",
+            )
+            raise InvalidCoraOFXFile() from exc
 
-        transactions = []
+    def _iter_new_ofx_transactions(self, exclude_existing):
+        """Yield OFX transactions, resolving already imported ones once per batch"""
+        for batch in itertools.batched(
+            self._iter_ofx_transactions(), settings.IMPORT_BATCH_SIZE
+        ):
+            existing_references = set()
+            if exclude_existing:
+                existing_references = Transaction.objects.existing_references(
+                    transaction.id for transaction in batch
+                )
 
-        ofx_transactions = self.ofx_parser.account.statement.transactions
-        for transaction in ofx_transactions:
-            if (
-                exclude_existing
-                and Transaction.objects.filter(reference=transaction.id).exists()
-            ):
-                continue
+            for transaction in batch:
+                if transaction.id not in existing_references:
+                    yield transaction
+
+    def iter_transactions(
+        self, start_date=None, end_date=None, exclude_existing: bool = True
+    ):
+        """
+        Yield new Transaction objects while the OFX file is parsed.
+        The OFX file can only be consumed once.
+        """
+        for transaction in self._iter_new_ofx_transactions(exclude_existing):
 
             transaction_date = transaction.date.date()
             if not self._within_date_range(transaction_date, start_date, end_date):
@@ -88,36 +106,76 @@ class CoraOFXImporter:
                 )
                 transaction_category = self.bank_account_transfer_category
 
-                transactions.append(
-                    Transaction(
-                        reference=bank_account_transfer_reference,
-                        date=transaction_date,
-                        description=transaction.memo,
-                        amount=-1 * transaction.amount,
-                        notes=f"Transferência entre contas bancárias - {transaction.id}",
-                        bank_account=self.cora_credit_card_bank_account,
-                        category=transaction_category,
-                        source="cora.importers.ofx",
-                        created_by=self.user,
-                    )
-                )
-
-            transactions.append(
-                Transaction(
-                    reference=transaction.id,
+                yield Transaction(
+                    reference=bank_account_transfer_reference,
                     date=transaction_date,
                     description=transaction.memo,
-                    notes=transaction_notes,
-                    amount=transaction.amount,
-                    bank_account=self.cora_bank_account,
+                    amount=-1 * transaction.amount,
+                    notes=f"Transferência entre contas bancárias - {transaction.id}",
+                    bank_account=self.cora_credit_card_bank_account,
                     category=transaction_category,
                     source="cora.importers.ofx",
                     created_by=self.user,
                 )
+
+            yield Transaction(
+                reference=transaction.id,
+                date=transaction_date,
+                description=transaction.memo,
+                notes=transaction_notes,
+                amount=transaction.amount,
+                bank_account=self.cora_bank_account,
+                category=transaction_category,
+                source="cora.importers.ofx",
+                created_by=self.user,
             )
 
+    def get_transactions(
+        self, start_date=None, end_date=None, exclude_existing: bool = True
+    ):
+        logger.info(
+            "CoraOFXImporter.get_transactions.start",
+            start_date=start_date,
+            end_date=end_date,
+            exclude_existing=exclude_existing,
+        )
+
+        transactions = list(
+            self.iter_transactions(start_date, end_date, exclude_existing)
+        )
+
         logger.info(
             "CoraOFXImporter.get_transactions.completed",
             num_transactions=len(transactions),
         )
         return transactions
+
+    def run(
+        self,
+        start_date=None,
+        end_date=None,
+        exclude_existing: bool = True,
+        batch_size=None,
+    ):
+        """
+        Import the transactions of the OFX file, inserting them in batches of
+        batch_size while the file is parsed. Return the ImportResult counts.
+        """
+        logger.info(
+            "CoraOFXImporter.run.start",
+            start_date=start_date,
+            end_date=end_date,
+            exclude_existing=exclude_existing,
+        )
+
+        result = TransactionImportPipeline(batch_size).run(
+            self.iter_transactions(start_date, end_date, exclude_existing)
+        )
+
+        logger.info(
+            "CoraOFXImporter.run.completed",
+            inserted=result.inserted,
+            updated=result.updated,
+            skipped=result.skipped,
+        )
+        return result
@@ -0,0 +1,228 @@
+"""Helpers to fetch only the attachments of messages from an IMAP mailbox
+
+Messages are addressed by UID and fetched in batches: a first FETCH reads the
+BODYSTRUCTURE of a batch of messages to find their attachment parts and a
+second one reads only those parts, so whole messages are never downloaded.
+"""
+
+import base64
+import itertools
+import quopri
+import re
+from dataclasses import dataclass
+
+FETCH_BATCH_SIZE = 100
+
+_TOKEN_RE = re.compile(
+    rb'\s*(?:(?P<open>\()|(?P<close>\))|"(?P<quoted>(?:[^"\\]|\\.)*)"'
+    rb"|\{(?P<literal>\d+)\}\r\n|(?P<atom>[^\s()\"{]+))",
+    re.DOTALL,
+)
+_QUOTED_ESCAPE_RE = re.compile(rb"\\(.)")
+
+
+class IMAPResponseError(Exception): ...
+
+
+@dataclass
+class Attachment:
+    uid: bytes
+    part: str
+    filename: str
+    encoding: str
+    content: bytes = b""
+
+    def decode(self):
+        """Return the content of the attachment without transfer encoding"""
+        if self.encoding == "base64":
+            return base64.b64decode(self.content)
+        if self.encoding == "quoted-printable":
+            return quopri.decodestring(self.content)
+        return self.content
+
+
+def uid_set(uids):
+    """Compress UIDs to an IMAP sequence set using ranges ('1:3,7,9:10')"""
+    numbers = sorted({int(uid) for uid in uids})
+
+    ranges = []
+    for _, group in itertools.groupby(
+        enumerate(numbers), key=lambda item: item[1] - item[0]
+    ):
+        group = [number for _, number in group]
+        if len(group) == 1:
+            ranges.append(str(group[0]))
+        else:
+            ranges.append(f"{group[0]}:{group[-1]}")
+    return ",".join(ranges)
+
+
+def parse_sexp(raw):
+    """Parse a parenthesized IMAP response into nested lists of bytes
+
+    NIL is returned as None and literals ({size}) are read as strings.
+    """
+    stack = [[]]
+    position = 0
+    while position < len(raw):
+        match = _TOKEN_RE.match(raw, position)
+        if match is None:
+            if raw[position:].strip():
+                raise IMAPResponseError(f"Unable to parse response: {raw[:100]!r}")
+            break
+        position = match.end()
+
+        if match["open"]:
+            stack.append([])
+        elif match["close"]:
+            if len(stack) == 1:
+                raise IMAPResponseError(f"Unbalanced response: {raw[:100]!r}")
+            value = stack.pop()
+            stack[-1].append(value)
+        elif match["quoted"] is not None:
+            stack[-1].append(_QUOTED_ESCAPE_RE.sub(rb"\1", match["quoted"]))
+        elif match["literal"] is not None:
+            size = int(match["literal"])
+            stack[-1].append(raw[position : position + size])
+            position += size
+        else:
+            atom = match["atom"]
+            stack[-1].append(None if atom.upper() == b"NIL" else atom)
+
+    if len(stack) != 1:
+        raise IMAPResponseError(f"Unbalanced response: {raw[:100]!r}")
+    return stack[0]
+
+
+def iter_fetch_responses(data):
+    """Yield a dict of attributes by UID for each message of a FETCH response
+
+    imaplib splits responses containing literals in (prefix, literal) tuples
+    followed by the rest of the line, so they are joined back before parsing.
+    """
+    responses, current, continues = [], None, False
+    for item in data:
+        if item is None:
+            continue
+
+        if isinstance(item, tuple):
+            prefix, literal = item
+            chunk = prefix + b"\r\n" + literal
+        else:
+            chunk = item
+
+        if continues:
+            current += chunk
+        else:
+            if current is not None:
+                responses.append(current)
+            current = chunk
+        continues = isinstance(item, tuple)
+
+    if current is not None:
+        responses.append(current)
+
+    for response in responses:
+        parsed = parse_sexp(response)
+        attributes = next((value for value in parsed if isinstance(value, list)), None)
+        if attributes is None:
+            raise IMAPResponseError(f"Unexpected FETCH response: {response[:100]!r}")
+
+        attributes = dict(zip(attributes[::2], attributes[1::2]))
+        yield attributes.get(b"UID"), attributes
+
+
+def _decode(value):
+    if value is None:
+        return ""
+    return value.decode("utf-8", errors="replace")
+
+
+def _params(values):
+    if not values:
+        return {}
+    return {
+        _decode(key).lower(): _decode(value)
+        for key, value in zip(values[::2], values[1::2])
+    }
+
+
+def iter_attachment_parts(bodystructure, prefix=""):
+    """Yield (part number, filename, encoding) of the parts with a filename"""
+    if bodystructure and isinstance(bodystructure[0], list):
+        parts = itertools.takewhile(
+            lambda value: isinstance(value, list), bodystructure
+        )
+        for number, part in enumerate(parts, start=1):
+            yield from iter_attachment_parts(part, f"{prefix}{number}.")
+        return
+
+    part = prefix.rstrip(".") or "1"
+    main_type, sub_type = (
+        _decode(bodystructure[0]).lower(),
+        _decode(bodystructure[1]).lower(),
+    )
+    encoding = _decode(bodystructure[5]).lower()
+
+    # Extension data starts after the basic fields, the number of lines of
+    # text parts and the envelope, body and lines of message/rfc822 parts
+    extension = 7
+    if main_type == "text":
+        extension += 1
+    elif (main_type, sub_type) == ("message", "rfc822"):
+        extension += 3
+
+    filename = ""
+    disposition = (
+        bodystructure[extension + 1] if len(bodystructure) > extension + 1 else None
+    )
+    if isinstance(disposition, list) and len(disposition) > 1:
+        filename = _params(disposition[1]).get("filename", "")
+    if not filename:
+        filename = _params(bodystructure[2]).get("name", "")
+
+    if filename:
+        yield part, filename, encoding
+
+
+def fetch_attachments(connection, uids, batch_size=FETCH_BATCH_SIZE):
+    """Yield the attachments of each batch of messages with the given UIDs
+
+    Each batch is a dict of lists of Attachment by message UID.
+    """
+    for batch in itertools.batched(uids, batch_size):
+        typ, data = connection.uid("FETCH", uid_set(batch), "(UID BODYSTRUCTURE)")
+        if typ != "OK":
+            raise IMAPResponseError(f"Unable to fetch BODYSTRUCTURE: {data!r}")
+
+        attachments = {}
+        for uid, attributes in iter_fetch_responses(data):
+            attachments[uid] = [
+                Attachment(uid=uid, part=part, filename=filename, encoding=encoding)
+                for part, filename, encoding in iter_attachment_parts(
+                    attributes[b"BODYSTRUCTURE"]
+                )
+            ]
+
+        # Messages with the same parts are fetched together
+        uids_by_parts = {}
+        for uid, message_attachments in attachments.items():
+            parts = tuple(attachment.part for attachment in message_attachments)
+            if parts:
+                uids_by_parts.setdefault(parts, []).append(uid)
+
+        for parts, parts_uids in uids_by_parts.items():
+            sections = " ".join(f"BODY.PEEK[{part}]" for part in parts)
+            typ, data = connection.uid(
+                "FETCH", uid_set(parts_uids), f"(UID {sections})"
+            )
+            if typ != "OK":
+                raise IMAPResponseError(f"Unable to fetch attachments: {data!r}")
+
+            for uid, attributes in iter_fetch_responses(data):
+                for attachment in attachments.get(uid, []):
+                    attachment.content = (
+                        attributes.get(f"BODY[{attachment.part}]".encode()) or b""
+                    )
+
+        yield attachments
@@ -1,6 +1,9 @@
 import email
+import hashlib
 import imaplib
 import io
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 import structlog
 from decouple import config
@@ -8,9 +11,12 @@ from decouple import config
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
 
+from thebook.bookkeeping.import_pipeline import import_file
 from thebook.bookkeeping.importers import import_transactions
-from thebook.bookkeeping.models import BankAccount, Transaction
+from thebook.bookkeeping.models import ImportedFile
+from thebook.bookkeeping.reference_data import reference_data
 from thebook.integrations.cora.constants import (
     CORA_BANK_ACCOUNT,
     CORA_CREDIT_CARD_BANK_ACCOUNT,
@@ -19,6 +25,7 @@ from thebook.integrations.cora.importers.credit_card_invoice import (
     CoraCreditCardInvoiceImporter,
 )
 from thebook.integrations.cora.importers.ofx import CoraOFXImporter
+from thebook.integrations.cora.mailbox import FETCH_BATCH_SIZE, fetch_attachments
 
 logger = structlog.get_logger(__name__)
 
@@ -54,30 +61,10 @@ def process_mailbox():
             attachment_filename = part.get_filename()
             if attachment_filename is not None:
                 attachment_content = part.get_payload(decode=True)
-                file_content = io.BytesIO(attachment_content)
-
-                if attachment_filename.endswith(".ofx"):
-                    importer = CoraOFXImporter(file_content)
-                    bank_account, _ = BankAccount.objects.get_or_create(
-                        name=CORA_BANK_ACCOUNT
-                    )
-                elif attachment_filename.endswith(".csv"):
-                    importer = CoraCreditCardInvoiceImporter(file_content)
-                    bank_account, _ = BankAccount.objects.get_or_create(
-                        name=CORA_CREDIT_CARD_BANK_ACCOUNT
-                    )
-                else:
+                if not _import_attachment(attachment_filename, attachment_content):
                     # Unable to process this attachment type
                     continue
 
-                transactions = importer.get_transactions(exclude_existing=True)
-                Transaction.objects.bulk_create(
-                    transactions,
-                    update_conflicts=True,
-                    update_fields=["description", "amount"],
-                    unique_fields=["reference"],
-                )
-
                 M.copy(msgnum, "CoraProcessed")
                 M.store(msgnum, "+FLAGS", "\\Deleted")
 
@@ -85,3 +72,161 @@ def process_mailbox():
     M.logout()
 
     logger.info("integrations.cora.services.process_mailbox.finished")
+
+
+def _import_attachment(filename, content):
+    """Import the transactions of an attachment returning False when its type is
+    not supported"""
+    file_content = io.BytesIO(content)
+
+    if filename.endswith(".ofx"):
+        bank_account = reference_data.bank_account(CORA_BANK_ACCOUNT)
+        import_file(
+            file_content,
+            "ofx",
+            bank_account,
+            lambda: CoraOFXImporter(file_content).iter_transactions(
+                exclude_existing=True
+            ),
+            skip_covered_dates=True,
+        )
+    elif filename.endswith(".csv"):
+        bank_account = reference_data.bank_account(CORA_CREDIT_CARD_BANK_ACCOUNT)
+        import_file(
+            file_content,
+            "csv_cora_credit_card",
+            bank_account,
+            lambda: CoraCreditCardInvoiceImporter(file_content).get_transactions(
+                exclude_existing=True
+            ),
+        )
+    else:
+        return False
+
+    return True
+
+
+def _try_import_attachment(attachment):
+    """Same as _import_attachment but returning None when the import fails"""
+    sha256, filename, content = attachment
+    try:
+        return _import_attachment(filename, content)
+    except Exception:
+        logger.exception(
+            "integrations.cora.services.ingest_mailbox.import_failed",
+            filename=filename,
+            sha256=sha256,
+        )
+        return None
+
+
+def _attachment_bank_account(filename):
+    """Name of the bank account the transactions of an attachment are imported to"""
+    if filename.endswith(".ofx"):
+        return CORA_BANK_ACCOUNT
+    if filename.endswith(".csv"):
+        return CORA_CREDIT_CARD_BANK_ACCOUNT
+    return None
+
+
+def _try_import_attachments(attachments):
+    """Import attachments of the same bank account one after the other, as the
+    date ranges of overlapping statements are only recorded once each import
+    finishes and both would write the transactions of their common dates"""
+    return [_try_import_attachment(attachment) for attachment in attachments]
+
+
+def _import_attachments_worker(attachments):
+    try:
+        return _try_import_attachments(attachments)
+    finally:
+        # persistent connections (CONN_MAX_AGE) of finished threads are never reused
+        connection.close()
+
+
+def ingest_mailbox(workers=1, batch_size=FETCH_BATCH_SIZE):
+    """
+    Same as process_mailbox but fetching only the attachments of the messages.
+
+    Messages are addressed by UID and their BODYSTRUCTURE and attachment parts
+    are fetched in batches (see thebook.integrations.cora.mailbox). Attachments
+    whose SHA-256 is in the ImportedFile ledger are skipped without being
+    parsed and the new ones of each batch are imported by a pool of worker
+    threads, each one importing the attachments of a single bank account.
+    Messages are moved to the processed folder once all their attachments are
+    imported.
+    """
+
+    logger.info("integrations.cora.services.ingest_mailbox.start", workers=workers)
+
+    M = imaplib.IMAP4_SSL(config("CORA_EMAIL_HOST_IMAP"))
+    M.login(config("CORA_EMAIL_HOST_USER"), config("CORA_EMAIL_HOST_PASSWORD"))
+    M.select(mailbox="INBOX")
+
+    typ, uids = M.uid("SEARCH", None, "FROM", "naoresponda@cora.com.br")
+    uids = uids[0].split()
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        for batch in fetch_attachments(M, uids, batch_size):
+            hashes_by_uid, new_attachments = {}, {}
+            for uid, attachments in batch.items():
+                hashes_by_uid[uid] = []
+                for attachment in attachments:
+                    content = attachment.decode()
+                    sha256 = hashlib.sha256(content).hexdigest()
+                    hashes_by_uid[uid].append(sha256)
+                    new_attachments[sha256] = (sha256, attachment.filename, content)
+
+            imported_hashes = set(
+                ImportedFile.objects.filter(
+                    sha256__in=new_attachments, partial=False
+                ).values_list("sha256", flat=True)
+            )
+            for sha256 in imported_hashes:
+                del new_attachments[sha256]
+
+            logger.info(
+                "integrations.cora.services.ingest_mailbox.processing_batch",
+                messages=len(batch),
+                new_attachments=len(new_attachments),
+                already_imported=len(imported_hashes),
+            )
+
+            attachments_by_bank_account = defaultdict(list)
+            for attachment in new_attachments.values():
+                bank_account = _attachment_bank_account(attachment[1])
+                attachments_by_bank_account[bank_account].append(attachment)
+            attachment_groups = list(attachments_by_bank_account.values())
+
+            if workers > 1:
+                group_results = executor.map(
+                    _import_attachments_worker, attachment_groups
+                )
+            else:
+                group_results = map(_try_import_attachments, attachment_groups)
+
+            results = {}
+            for attachments, imported in zip(attachment_groups, group_results):
+                results.update(zip((sha256 for sha256, _, _ in attachments), imported))
+
+            imported_hashes.update(
+                sha256 for sha256, imported in results.items() if imported
+            )
+
+            for uid, hashes in hashes_by_uid.items():
+                # Messages with failed imports are kept in the inbox to be
+                # retried and the ones without supported attachments are ignored
+                failed = any(
+                    sha256 not in imported_hashes and results[sha256] is None
+                    for sha256 in hashes
+                )
+                if failed or not imported_hashes.intersection(hashes):
+                    continue
+
+                M.uid("COPY", uid, "CoraProcessed")
+                M.uid("STORE", uid, "+FLAGS", "\\Deleted")
+
+    M.close()
+    M.logout()
+
+    logger.info("integrations.cora.services.ingest_mailbox.finished")
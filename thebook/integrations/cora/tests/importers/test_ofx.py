@@ -245,3 +245,30 @@ def test_ofx_file_with_credit_card_invoice_pay(
         assert transactions[1].bank_account == cora_bank_account
         assert transactions[1].created_by == user
         assert transactions[1].category == bank_account_transfer_category
+
+
+def test_run_inserts_transactions_in_batches(
+    db, request, cora_bank_account, user, mocker
+):
+    bulk_create = mocker.spy(Transaction.objects, "bulk_create")
+
+    ofx_file_path = request.path.parent / "data" / "ofx-multiple-transactions.ofx"
+    with open(ofx_file_path, "r") as ofx_file:
+        ofx_importer = CoraOFXImporter(ofx_file)
+
+        result = ofx_importer.run(batch_size=2)
+
+    assert result.inserted == 5
+    assert Transaction.objects.filter(bank_account=cora_bank_account).count() == 5
+    assert [len(call.args[0]) for call in bulk_create.call_args_list] == [2, 2, 1]
+
+
+def test_run_exclude_existing(db, request, cora_bank_account, user):
+    baker.make(Transaction, reference="16b3dab5-d1ca-41e1-87c2-a26920ae70ac")
+
+    ofx_file_path = request.path.parent / "data" / "ofx-one-transaction.ofx"
+    with open(ofx_file_path, "r") as ofx_file:
+        result = CoraOFXImporter(ofx_file).run(exclude_existing=True)
+
+    assert result.inserted == 0
+    assert Transaction.objects.count() == 1
@@ -0,0 +1,88 @@
+import base64
+
+import pytest
+
+
+def _expand_uid_set(value):
+    uids = []
+    for item in value.split(","):
+        first, _, last = item.partition(":")
+        uids.extend(range(int(first), int(last or first) + 1))
+    return [str(uid).encode() for uid in uids]
+
+
+class FakeIMAP:
+    """In-memory mailbox answering the UID commands used by ingest_mailbox"""
+
+    def __init__(self, messages):
+        # {uid: [(filename, content), ...]}
+        self.messages = messages
+        self.commands = []
+
+    def login(self, user, password): ...
+
+    def select(self, mailbox): ...
+
+    def close(self): ...
+
+    def logout(self): ...
+
+    def _bodystructure(self, attachments):
+        parts = [
+            b'("TEXT" "PLAIN" ("CHARSET" "utf-8") NIL NIL "7BIT" 12 1 NIL NIL NIL)'
+        ]
+        for filename, content in attachments:
+            filename = filename.encode()
+            parts.append(
+                b'("APPLICATION" "OCTET-STREAM" ("NAME" "%s") NIL NIL "BASE64" %d'
+                b' NIL ("ATTACHMENT" ("FILENAME" "%s")) NIL NIL)'
+                % (filename, len(content), filename)
+            )
+        return b"(" + b"".join(parts) + b' "MIXED" ("BOUNDARY" "xxx") NIL NIL NIL)'
+
+    def uid(self, command, *args):
+        self.commands.append((command, *args))
+
+        if command == "SEARCH":
+            return "OK", [b" ".join(self.messages)]
+
+        if command == "FETCH":
+            uids, spec = args
+            data = []
+            for sequence, uid in enumerate(_expand_uid_set(uids), start=1):
+                attachments = self.messages[uid]
+                if "BODYSTRUCTURE" in spec:
+                    data.append(
+                        b"%d (UID %s BODYSTRUCTURE %s)"
+                        % (sequence, uid, self._bodystructure(attachments))
+                    )
+                    continue
+
+                prefix = b"%d (UID %s" % (sequence, uid)
+                for number, (_, content) in enumerate(attachments, start=2):
+                    encoded = base64.encodebytes(content)
+                    data.append(
+                        (prefix + b" BODY[%d] {%d}" % (number, len(encoded)), encoded)
+                    )
+                    prefix = b""
+                data.append(b")")
+            return "OK", data
+
+        return "OK", [None]
+
+
+@pytest.fixture(autouse=True)
+def imap_credentials(monkeypatch):
+    monkeypatch.setenv("CORA_EMAIL_HOST_IMAP", "imap.example.com")
+    monkeypatch.setenv("CORA_EMAIL_HOST_USER", "user@example.com")
+    monkeypatch.setenv("CORA_EMAIL_HOST_PASSWORD", "password")
+
+
+@pytest.fixture
+def imap(mocker):
+    def _imap(messages):
+        fake_imap = FakeIMAP(messages)
+        mocker.patch("imaplib.IMAP4_SSL", return_value=fake_imap)
+        return fake_imap
+
+    return _imap
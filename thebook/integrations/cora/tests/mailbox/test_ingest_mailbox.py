@@ -0,0 +1,146 @@
+import hashlib
+from pathlib import Path
+
+import pytest
+from model_bakery import baker
+
+from thebook.bookkeeping.models import ImportedFile, Transaction
+from thebook.integrations.cora import services
+from thebook.integrations.cora.services import ingest_mailbox
+
+DATA_DIR = Path(__file__).parent.parent / "importers" / "data"
+
+
+@pytest.fixture
+def ofx_content():
+    return (DATA_DIR / "ofx-one-transaction.ofx").read_bytes()
+
+
+@pytest.fixture
+def csv_content():
+    return (DATA_DIR / "credit-card-invoice-one-transaction.csv").read_bytes()
+
+
+def _moved_uids(imap):
+    return [args[1] for args in imap.commands if args[0] == "COPY"]
+
+
+def test_ingest_mailbox_imports_attachments(db, imap, ofx_content, csv_content):
+    imap = imap(
+        {
+            b"10": [("extrato.ofx", ofx_content)],
+            b"11": [("fatura.csv", csv_content), ("logo.png", b"png")],
+        }
+    )
+
+    ingest_mailbox()
+
+    assert Transaction.objects.count() == 2
+    assert set(ImportedFile.objects.values_list("sha256", "importer")) == {
+        (hashlib.sha256(ofx_content).hexdigest(), "ofx"),
+        (hashlib.sha256(csv_content).hexdigest(), "csv_cora_credit_card"),
+    }
+    assert _moved_uids(imap) == [b"10", b"11"]
+
+
+def test_ingest_mailbox_fetches_messages_in_batches(db, imap, ofx_content, csv_content):
+    imap = imap(
+        {
+            b"10": [("extrato.ofx", ofx_content)],
+            b"11": [("extrato.ofx", ofx_content)],
+            b"12": [("fatura.csv", csv_content)],
+        }
+    )
+
+    ingest_mailbox(batch_size=2)
+
+    fetches = [args[1:] for args in imap.commands if args[0] == "FETCH"]
+    assert fetches == [
+        ("10:11", "(UID BODYSTRUCTURE)"),
+        ("10:11", "(UID BODY.PEEK[2])"),
+        ("12", "(UID BODYSTRUCTURE)"),
+        ("12", "(UID BODY.PEEK[2])"),
+    ]
+
+
+def test_ingest_mailbox_skips_imported_attachments(db, imap, mocker, ofx_content):
+    baker.make(ImportedFile, sha256=hashlib.sha256(ofx_content).hexdigest())
+    import_attachment = mocker.spy(services, "_import_attachment")
+    imap = imap({b"10": [("extrato.ofx", ofx_content)]})
+
+    ingest_mailbox()
+
+    import_attachment.assert_not_called()
+    assert _moved_uids(imap) == [b"10"]
+
+
+def test_ingest_mailbox_keeps_messages_with_failed_imports(
+    db, imap, mocker, ofx_content, csv_content
+):
+    mocker.patch.object(
+        services, "_import_attachment", side_effect=[True, ValueError("invalid")]
+    )
+    imap = imap(
+        {
+            b"10": [("extrato.ofx", ofx_content)],
+            b"11": [("fatura.csv", csv_content)],
+        }
+    )
+
+    ingest_mailbox()
+
+    assert _moved_uids(imap) == [b"10"]
+
+
+def test_ingest_mailbox_ignores_messages_without_supported_attachments(db, imap):
+    imap = imap({b"10": [("logo.png", b"png")]})
+
+    ingest_mailbox()
+
+    assert _moved_uids(imap) == []
+    assert ImportedFile.objects.count() == 0
+
+
+def test_ingest_mailbox_imports_attachments_concurrently(
+    db, imap, mocker, ofx_content, csv_content
+):
+    import_attachment = mocker.patch.object(
+        services, "_import_attachment", return_value=True
+    )
+    imap = imap(
+        {
+            b"10": [("extrato.ofx", ofx_content)],
+            b"11": [("fatura.csv", csv_content)],
+        }
+    )
+
+    ingest_mailbox(workers=2)
+
+    assert import_attachment.call_count == 2
+    assert _moved_uids(imap) == [b"10", b"11"]
+
+
+def test_ingest_mailbox_imports_attachments_of_a_bank_account_in_one_worker(
+    db, imap, mocker, ofx_content, csv_content
+):
+    import_attachments = mocker.patch.object(
+        services,
+        "_try_import_attachments",
+        side_effect=lambda attachments: [True] * len(attachments),
+    )
+    imap = imap(
+        {
+            b"10": [("extrato.ofx", ofx_content)],
+            b"11": [("fatura.csv", csv_content)],
+            b"12": [("extrato.ofx", ofx_content + b"\n")],
+        }
+    )
+
+    ingest_mailbox(workers=2)
+
+    filenames = [
+        [filename for _, filename, _ in call.args[0]]
+        for call in import_attachments.call_args_list
+    ]
+    assert sorted(filenames) == [["extrato.ofx", "extrato.ofx"], ["fatura.csv"]]
+    assert _moved_uids(imap) == [b"10", b"11", b"12"]
@@ -0,0 +1,110 @@
+import base64
+
+import pytest
+
+from thebook.integrations.cora.mailbox import (
+    Attachment,
+    IMAPResponseError,
+    iter_attachment_parts,
+    iter_fetch_responses,
+    parse_sexp,
+    uid_set,
+)
+
+
+@pytest.mark.parametrize(
+    "uids,expected",
+    [
+        ([b"1"], "1"),
+        ([b"1", b"2", b"3"], "1:3"),
+        ([b"9", b"1", b"2", b"3", b"7", b"10"], "1:3,7,9:10"),
+    ],
+)
+def test_uid_set(uids, expected):
+    assert uid_set(uids) == expected
+
+
+def test_parse_sexp():
+    assert parse_sexp(
+        b'1 (UID 10 FLAGS (\\Seen) X NIL Y "a \\"b\\"" Z {3}\r\nabc)'
+    ) == [
+        b"1",
+        [
+            b"UID",
+            b"10",
+            b"FLAGS",
+            [b"\\Seen"],
+            b"X",
+            None,
+            b"Y",
+            b'a "b"',
+            b"Z",
+            b"abc",
+        ],
+    ]
+
+
+def test_parse_unbalanced_sexp():
+    with pytest.raises(IMAPResponseError):
+        parse_sexp(b"1 (UID 10")
+
+
+def test_iter_fetch_responses_joins_literals():
+    data = [
+        (b"1 (UID 10 BODY[2] {3}", b"abc"),
+        (b" BODY[3] {2}", b"de"),
+        b")",
+        b"2 (UID 11 FLAGS ())",
+    ]
+
+    responses = list(iter_fetch_responses(data))
+
+    assert responses == [
+        (b"10", {b"UID": b"10", b"BODY[2]": b"abc", b"BODY[3]": b"de"}),
+        (b"11", {b"UID": b"11", b"FLAGS": []}),
+    ]
+
+
+def test_iter_attachment_parts_of_nested_multipart():
+    bodystructure = parse_sexp(
+        b'((("TEXT" "PLAIN" ("CHARSET" "utf-8") NIL NIL "7BIT" 10 1 NIL NIL NIL)'
+        b'("TEXT" "HTML" ("CHARSET" "utf-8") NIL NIL "7BIT" 20 1 NIL NIL NIL)'
+        b' "ALTERNATIVE" ("BOUNDARY" "a") NIL NIL NIL)'
+        b'("APPLICATION" "OCTET-STREAM" ("NAME" "extrato.ofx") NIL NIL "BASE64" 30'
+        b' NIL ("ATTACHMENT" ("FILENAME" "extrato.ofx")) NIL NIL)'
+        b'("TEXT" "CSV" ("NAME" "fatura.csv") NIL NIL "QUOTED-PRINTABLE" 40 2'
+        b" NIL NIL NIL NIL)"
+        b' "MIXED" ("BOUNDARY" "b") NIL NIL NIL)'
+    )[0]
+
+    assert list(iter_attachment_parts(bodystructure)) == [
+        ("2", "extrato.ofx", "base64"),
+        ("3", "fatura.csv", "quoted-printable"),
+    ]
+
+
+def test_iter_attachment_parts_of_single_part_message():
+    bodystructure = parse_sexp(
+        b'("APPLICATION" "OCTET-STREAM" NIL NIL NIL "BASE64" 30'
+        b' NIL ("ATTACHMENT" ("FILENAME" "extrato.ofx")) NIL NIL)'
+    )[0]
+
+    assert list(iter_attachment_parts(bodystructure)) == [
+        ("1", "extrato.ofx", "base64")
+    ]
+
+
+@pytest.mark.parametrize(
+    "encoding,content",
+    [
+        ("base64", base64.b64encode(b"content=1")),
+        ("quoted-printable", b"content=3D1"),
+        ("7bit", b"content=1"),
+    ],
+)
+def test_attachment_decode(encoding, content):
+    attachment = Attachment(
+        uid=b"1", part="2", filename="x.ofx", encoding=encoding, content=content
+    )
+
+    assert attachment.decode() == b"content=1"
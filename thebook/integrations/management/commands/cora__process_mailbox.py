@@ -10,11 +10,24 @@ from django.core.management.base import BaseCommand, CommandError
 
 from thebook.bookkeeping.importers import import_transactions
 from thebook.bookkeeping.models import BankAccount
-from thebook.integrations.cora.services import process_mailbox
+from thebook.integrations.cora.services import ingest_mailbox, process_mailbox
 
 
 class Command(BaseCommand):
     help = "Check inbox for Cora files and import them"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help=(
+                "Fetch only the attachments of the messages and import them "
+                "with this number of threads"
+            ),
+        )
+
     def handle(self, *args, **options):
-        process_mailbox()
+        if options["workers"]:
+            ingest_mailbox(workers=options["workers"])
+        else:
+            process_mailbox()
@@ -1,7 +1,10 @@
+import bisect
 import calendar
 import datetime
+import re
 
 from django.db import models
+from django.db.models import Exists, OuterRef
 
 
 class ReceivableFeeManager(models.Manager):
@@ -22,6 +25,92 @@ class ReceivableFeeManager(models.Manager):
             unique_fields=["membership", "start_date"],
         )
 
+    def match_with_transactions(self):
+        """Match DUE and UNPAID receivable fees with membership fee transactions
+
+        Candidate transactions are loaded a single time and indexed by amount and
+        date, so all match rules are evaluated in memory. Fees are processed in the
+        same order used by `TransactionQuerySet.find_match_for` (DUE before UNPAID,
+        oldest first), each one receiving the oldest matching transaction not
+        assigned yet. Matched fees are saved with a single `bulk_update`.
+        """
+        from thebook.bookkeeping.models import Transaction
+        from thebook.members.models import FeePaymentStatus
+
+        status_order = {FeePaymentStatus.DUE: 0, FeePaymentStatus.UNPAID: 1}
+        receivable_fees = sorted(
+            self.filter(status__in=status_order.keys())
+            .select_related("membership")
+            .prefetch_related("membership__receivablefeetransactionmatchrule_set"),
+            key=lambda fee: (status_order[fee.status], fee.start_date, fee.id),
+        )
+        if not receivable_fees:
+            return []
+
+        candidates = (
+            Transaction.objects.filter(
+                category__name="Contribuição Associativa",
+                amount__in={fee.amount for fee in receivable_fees},
+                date__gte=min(fee.start_date for fee in receivable_fees),
+            )
+            .exclude(Exists(self.model.objects.filter(transaction=OuterRef("pk"))))
+            .order_by("date", "id")
+            .only("id", "date", "description", "amount")
+        )
+        transactions_by_amount = {}
+        for transaction in candidates:
+            transactions_by_amount.setdefault(transaction.amount, []).append(
+                transaction
+            )
+        dates_by_amount = {
+            amount: [transaction.date for transaction in transactions]
+            for amount, transactions in transactions_by_amount.items()
+        }
+
+        compiled_patterns = {}
+        assigned_transactions = set()
+        matched_fees = []
+        for receivable_fee in receivable_fees:
+            transactions = transactions_by_amount.get(receivable_fee.amount)
+            if not transactions:
+                continue
+
+            start_date = max(
+                receivable_fee.start_date, receivable_fee.membership.start_date
+            )
+            first_candidate = bisect.bisect_left(
+                dates_by_amount[receivable_fee.amount], start_date
+            )
+
+            rules = (
+                receivable_fee.membership.receivablefeetransactionmatchrule_set.all()
+            )
+            for rule in rules:
+                if rule.pattern not in compiled_patterns:
+                    compiled_patterns[rule.pattern] = re.compile(
+                        rule.pattern, re.IGNORECASE
+                    )
+                pattern = compiled_patterns[rule.pattern]
+
+                matched_transaction = next(
+                    (
+                        transaction
+                        for transaction in transactions[first_candidate:]
+                        if transaction.id not in assigned_transactions
+                        and pattern.search(transaction.description)
+                    ),
+                    None,
+                )
+                if matched_transaction is not None:
+                    assigned_transactions.add(matched_transaction.id)
+                    receivable_fee.status = FeePaymentStatus.PAID
+                    receivable_fee.transaction = matched_transaction
+                    matched_fees.append(receivable_fee)
+                    break
+
+        self.bulk_update(matched_fees, ["status", "transaction"])
+        return matched_fees
+
     def _by_status(self, status):
         return self.filter(status=status)
 
@@ -0,0 +1,156 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from model_bakery import baker
+
+from thebook.bookkeeping.models import Category, Transaction
+from thebook.members.models import (
+    FeePaymentStatus,
+    Membership,
+    ReceivableFee,
+    ReceivableFeeTransactionMatchRule,
+)
+
+
+@pytest.fixture
+def membership_fee_category(db):
+    return Category.objects.create(name="Contribuição Associativa")
+
+
+@pytest.fixture
+def membership(db, mute_signals):
+    membership = baker.make(
+        Membership,
+        start_date=datetime.date(2025, 1, 1),
+        membership_fee_amount=Decimal("100.0"),
+    )
+    ReceivableFeeTransactionMatchRule.objects.filter(membership=membership).delete()
+    ReceivableFeeTransactionMatchRule.objects.create(
+        pattern=".*guybrush threepwood.*", membership=membership
+    )
+    return membership
+
+
+@pytest.fixture
+def make_fee(membership):
+    def _make_fee(start_date, status=FeePaymentStatus.UNPAID, amount="100.0"):
+        return baker.make(
+            ReceivableFee,
+            membership=membership,
+            start_date=start_date,
+            due_date=start_date + datetime.timedelta(days=9),
+            amount=Decimal(amount),
+            status=status,
+        )
+
+    return _make_fee
+
+
+@pytest.fixture
+def make_transaction(membership_fee_category):
+    def _make_transaction(date, description="Pix - Guybrush Threepwood", amount="100"):
+        return baker.make(
+            Transaction,
+            date=date,
+            amount=Decimal(amount),
+            category=membership_fee_category,
+            description=description,
+        )
+
+    return _make_transaction
+
+
+def test_no_receivable_fees_to_match(db):
+    assert ReceivableFee.objects.match_with_transactions() == []
+
+
+def test_match_receivable_fee_with_transaction(db, make_fee, make_transaction):
+    receivable_fee = make_fee(datetime.date(2025, 7, 1))
+    transaction = make_transaction(datetime.date(2025, 7, 10))
+
+    matched_fees = ReceivableFee.objects.match_with_transactions()
+
+    assert matched_fees == [receivable_fee]
+    receivable_fee.refresh_from_db()
+    assert receivable_fee.status == FeePaymentStatus.PAID
+    assert receivable_fee.transaction == transaction
+
+
+def test_never_assign_the_same_transaction_twice(db, make_fee, make_transaction):
+    receivable_fee_1 = make_fee(datetime.date(2025, 7, 1))
+    receivable_fee_2 = make_fee(datetime.date(2025, 8, 1))
+    receivable_fee_3 = make_fee(datetime.date(2025, 9, 1))
+    transaction_1 = make_transaction(datetime.date(2025, 8, 10))
+    transaction_2 = make_transaction(datetime.date(2025, 9, 10))
+
+    ReceivableFee.objects.match_with_transactions()
+
+    receivable_fee_1.refresh_from_db()
+    receivable_fee_2.refresh_from_db()
+    receivable_fee_3.refresh_from_db()
+    assert receivable_fee_1.transaction == transaction_1
+    assert receivable_fee_2.transaction == transaction_2
+    assert receivable_fee_3.transaction is None
+    assert receivable_fee_3.status == FeePaymentStatus.UNPAID
+
+
+def test_due_receivable_fees_are_matched_first(db, make_fee, make_transaction):
+    unpaid_fee = make_fee(datetime.date(2025, 7, 1), status=FeePaymentStatus.UNPAID)
+    due_fee = make_fee(datetime.date(2025, 8, 1), status=FeePaymentStatus.DUE)
+    transaction = make_transaction(datetime.date(2025, 8, 10))
+
+    ReceivableFee.objects.match_with_transactions()
+
+    unpaid_fee.refresh_from_db()
+    due_fee.refresh_from_db()
+    assert due_fee.transaction == transaction
+    assert unpaid_fee.transaction is None
+
+
+def test_ignore_transactions_before_receivable_fee_start_date(
+    db, make_fee, make_transaction
+):
+    receivable_fee = make_fee(datetime.date(2025, 7, 1))
+    make_transaction(datetime.date(2025, 6, 30))
+
+    assert ReceivableFee.objects.match_with_transactions() == []
+
+
+@pytest.mark.parametrize(
+    "description,amount",
+    [
+        ("Pix - Elaine Marley", "100"),
+        ("Pix - Guybrush Threepwood", "99"),
+    ],
+)
+def test_ignore_transactions_not_matching_rules_or_amount(
+    db, make_fee, make_transaction, description, amount
+):
+    make_fee(datetime.date(2025, 7, 1))
+    make_transaction(datetime.date(2025, 7, 10), description=description, amount=amount)
+
+    assert ReceivableFee.objects.match_with_transactions() == []
+
+
+def test_ignore_transactions_already_linked_to_receivable_fee(
+    db, make_fee, make_transaction
+):
+    transaction = make_transaction(datetime.date(2025, 7, 10))
+    make_fee(datetime.date(2025, 6, 1), status=FeePaymentStatus.PAID).paid_with(
+        transaction
+    )
+    make_fee(datetime.date(2025, 7, 1))
+
+    assert ReceivableFee.objects.match_with_transactions() == []
+
+
+def test_match_with_the_oldest_transaction(db, make_fee, make_transaction):
+    receivable_fee = make_fee(datetime.date(2025, 7, 1))
+    make_transaction(datetime.date(2025, 7, 20))
+    oldest_transaction = make_transaction(datetime.date(2025, 7, 5))
+
+    ReceivableFee.objects.match_with_transactions()
+
+    receivable_fee.refresh_from_db()
+    assert receivable_fee.transaction == oldest_transaction
@@ -23,6 +23,8 @@ from decouple import config
 from django.contrib.messages import constants as messages
 from django.urls import reverse_lazy
 
+from thebook.base.instrumentation import add_query_stats
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -74,6 +76,7 @@ structlog.configure(
     processors=[
         structlog.contextvars.merge_contextvars,
         structlog.stdlib.add_log_level,
+        add_query_stats,
         structlog.processors.format_exc_info,
         structlog.processors.TimeStamper(fmt="iso", utc=True),
         structlog.processors.JSONRenderer(serializer=orjson.dumps),
@@ -117,6 +120,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "thebook.base.middleware.QueryInstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -167,6 +171,25 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/ref/settings/#caches
+# Cached summaries and reports are keyed by data versions kept in the database,
+# so any backend works (e.g. django.core.cache.backends.filebased.FileBasedCache
+# to share cached values between processes)
+
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": config("CACHE_LOCATION", default="thebook"),
+        "OPTIONS": {
+            "MAX_ENTRIES": config("CACHE_MAX_ENTRIES", default=1000, cast=int),
+        },
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -249,6 +272,33 @@ TAGGIT_CASE_INSENSITIVE = True
 # as donations
 DONATION_THRESHOLD = Decimal("84.99")
 
+# Number of transactions inserted by each bulk_create when importing files
+IMPORT_BATCH_SIZE = config("IMPORT_BATCH_SIZE", default=1000, cast=int)
+
+# Number of threads importing uploaded files in the background, 0 imports them
+# during the request
+IMPORT_JOB_WORKERS = config("IMPORT_JOB_WORKERS", default=2, cast=int)
+
+# Import jobs running for more than this number of seconds are considered
+# interrupted (e.g. by a restart) and marked as failed by process_import_jobs
+IMPORT_JOB_TIMEOUT = config("IMPORT_JOB_TIMEOUT", default=60 * 60, cast=int)
+
+# Maximum number of SQL queries by URL name, requests executing more queries
+# log a warning (or raise QueryBudgetExceeded when QUERY_BUDGET_RAISE is set)
+QUERY_BUDGETS = {
+    "base:dashboard": 8,
+    "bookkeeping:bank-account": 8,
+    "bookkeeping:bank-account-transactions": 10,
+    "bookkeeping:partial-bank-accounts-dashboard": 6,
+    "bookkeeping:partial-transaction-details": 8,
+    "bookkeeping:report-cash-book": 8,
+    "bookkeeping:report-period-matrix": 8,
+}
+QUERY_BUDGET_DEFAULT = config(
+    "QUERY_BUDGET_DEFAULT", default=None, cast=lambda v: int(v) if v else None
+)
+QUERY_BUDGET_RAISE = config("QUERY_BUDGET_RAISE", default=False, cast=bool)
+
 REIMBURSEMENT_REQUEST_EMAILS = config(
     "REIMBURSEMENT_REQUEST_EMAILS",
     cast=lambda v: [s.strip() for s in v.split(",")],
@@ -268,6 +318,7 @@ PAYPAL_BANK_ACCOUNT = "PayPal"
 PAYPAL_API_BASE_URL = config("PAYPAL_API_BASE_URL", default="https://api-m.paypal.com")
 PAYPAL_CLIENT_ID = config("PAYPAL_CLIENT_ID", default="")
 PAYPAL_CLIENT_SECRET = config("PAYPAL_CLIENT_SECRET", default="")
+PAYPAL_API_TIMEOUT = config("PAYPAL_API_TIMEOUT", default=10, cast=float)
 
 OPENPIX_BANK_ACCOUNT = "OpenPix"
 OPENPIX_API_BASE_URL = config(
@@ -32,6 +32,7 @@ import datetime
 import decimal
 import re
 import sys
+from xml.etree import ElementTree
 
 try:
     from StringIO import StringIO
@@ -60,6 +61,14 @@ except ImportError:
 
     soup_maker = BeautifulStoneSoup
 
+# Size of the chunks read from the decoded OFX stream while preprocessing
+CHUNK_SIZE = 64 * 1024
+
+TAG_RE = re.compile(r"(?i)<(/?)([a-z0-9_\.]+)>")
+CLOSING_TAG_RE = re.compile(r"(?i)</([a-z0-9_\.]+)>")
+# Ampersands that don't start a character or entity reference
+STRAY_AMPERSAND_RE = re.compile(r"&(?!#?[a-z0-9]+;)", re.IGNORECASE)
+
 
 def try_decode(string, encoding):
     if hasattr(string, "decode"):
@@ -177,39 +186,106 @@ class OfxFile(object):
                 self.headers[header] = None
 
 
+def iter_tokens(fh, pattern, chunk_size=CHUNK_SIZE):
+    """
+    Read fh in chunks and yield (text, match) pairs, where text is the
+    data found before the match of pattern. The remaining data after the
+    last match is yielded with a None match.
+
+    Only the text after the last match of each chunk is carried over to the
+    next one, so memory is bounded by the chunk size and the longest run of
+    text between two tags.
+    """
+    pending = ""
+    while True:
+        chunk = fh.read(chunk_size)
+        buffer = pending + chunk if chunk else pending
+
+        position = 0
+        for match in pattern.finditer(buffer):
+            yield buffer[position : match.start()], match
+            position = match.end()
+        pending = buffer[position:]
+
+        if not chunk:
+            break
+
+    if pending:
+        yield pending, None
+
+
+def find_closing_tags(fh, chunk_size=CHUNK_SIZE):
+    """
+    Return the upper-cased names of all tags explicitly closed in fh
+    """
+    return {
+        match.group(1).upper()
+        for _, match in iter_tokens(fh, CLOSING_TAG_RE, chunk_size)
+        if match is not None
+    }
+
+
+def iter_normalized_sgml(fh, closing_tags, xml=False, chunk_size=CHUNK_SIZE):
+    """
+    Yield the content of the OFX SGML stream fh closing all tags that
+    don't have closing tags (the ones not found in closing_tags) and
+    leaving all other data intact.
+
+    When xml is True, the output is made suitable for XML parsers: tag names
+    are lower-cased, stray ampersands are escaped and anything before the
+    first tag (SGML headers, processing instructions) is dropped.
+    """
+    last_open_tag = None
+    seen_tag = False
+
+    for text, match in iter_tokens(fh, TAG_RE, chunk_size):
+        if text and (seen_tag or not xml):
+            if text.startswith("<") and not text.startswith("<!"):
+                # processing instructions and unknown markup end the element
+                if last_open_tag is not None:
+                    yield "</%s>" % last_open_tag
+                    last_open_tag = None
+            if xml and not text.startswith("<!"):
+                text = STRAY_AMPERSAND_RE.sub("&amp;", text)
+            yield text
+
+        if match is None:
+            continue
+
+        seen_tag = True
+        if last_open_tag is not None:
+            yield "</%s>" % last_open_tag
+            last_open_tag = None
+
+        is_closing_tag, tag_name = match.groups()
+        if xml:
+            tag_name = tag_name.lower()
+        if not is_closing_tag and tag_name.upper() not in closing_tags:
+            last_open_tag = tag_name
+
+        yield "<%s%s>" % (is_closing_tag, tag_name) if xml else match.group(0)
+
+
 class OfxPreprocessedFile(OfxFile):
-    def __init__(self, fh):
+    """
+    OFX file whose fh is the whole normalized document, as required by the
+    BeautifulSoup tree built by OfxParser.parse. OfxParser.iterparse feeds
+    the normalized stream to an XML pull parser instead, without holding the
+    document in memory.
+    """
+
+    def __init__(self, fh, xml=False):
         super(OfxPreprocessedFile, self).__init__(fh)
 
         if self.fh is None:
             return
 
-        ofx_string = self.fh.read()
-
         # find all closing tags as hints
-        closing_tags = [
-            t.upper() for t in re.findall(r"(?i)</([a-z0-9_\.]+)>", ofx_string)
-        ]
+        with save_pos(self.fh):
+            closing_tags = find_closing_tags(self.fh)
 
-        # close all tags that don't have closing tags and
-        # leave all other data intact
-        last_open_tag = None
-        tokens = re.split(r"(?i)(</?[a-z0-9_\.]+>)", ofx_string)
         new_fh = StringIO()
-        for token in tokens:
-            is_closing_tag = token.startswith("</")
-            is_processing_tag = token.startswith("<?")
-            is_cdata = token.startswith("<!")
-            is_tag = token.startswith("<") and not is_cdata
-            is_open_tag = is_tag and not is_closing_tag and not is_processing_tag
-            if is_tag:
-                if last_open_tag is not None:
-                    new_fh.write("</%s>" % last_open_tag)
-                    last_open_tag = None
-            if is_open_tag:
-                tag_name = re.findall(r"(?i)<([a-z0-9_\.]+)>", token)[0]
-                if tag_name.upper() not in closing_tags:
-                    last_open_tag = tag_name
+        for token in iter_normalized_sgml(self.fh, closing_tags, xml=xml):
             new_fh.write(token)
         new_fh.seek(0)
         self.fh = new_fh
@@ -419,6 +495,196 @@ class OfxParserException(Exception):
     pass
 
 
+class OfxIterParser(object):
+    """
+    Iterate over the transactions of an OFX file, yielding each Transaction
+    as soon as its <STMTTRN> closes.
+
+    The headers are available right away. accounts, account and the
+    statement metadata (dates, currency and balances) are filled in as
+    their tags are seen. Transactions are not kept in
+    statement.transactions, so memory does not grow with the file size.
+    """
+
+    STATEMENT_TAGS = {
+        "stmtrs": AccountType.Bank,
+        "ccstmtrs": AccountType.CreditCard,
+    }
+
+    def __init__(self, parser, file_handle):
+        self.parser = parser
+
+        ofx_file = OfxFile(file_handle)
+        self.headers = ofx_file.headers
+        self.fh = ofx_file.fh
+
+        self.accounts = []
+        self.account = None
+        self._transactions = self._iter_transactions()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._transactions)
+
+    def first_statement(self):
+        """
+        Yield the transactions of the first statement only, the same ones
+        OfxParser.parse(...).account.statement.transactions holds, and stop
+        reading the file when a second statement starts.
+        """
+        for transaction in self:
+            if len(self.accounts) > 1:
+                return
+            yield transaction
+
+    def _iter_events(self):
+        with save_pos(self.fh):
+            closing_tags = find_closing_tags(self.fh)
+
+        pull_parser = ElementTree.XMLPullParser(events=("start", "end"))
+        pending, pending_size = [], 0
+        for token in iter_normalized_sgml(self.fh, closing_tags, xml=True):
+            pending.append(token)
+            pending_size += len(token)
+            if pending_size >= CHUNK_SIZE:
+                pull_parser.feed("".join(pending))
+                pending, pending_size = [], 0
+                for event in pull_parser.read_events():
+                    yield event
+
+        pull_parser.feed("".join(pending))
+        pull_parser.close()
+        for event in pull_parser.read_events():
+            yield event
+
+    def _iter_transactions(self):
+        ancestors = []
+        statement = None
+        seen_ofx = False
+
+        try:
+            for event, elem in self._iter_events():
+                if event == "start":
+                    ancestors.append(elem)
+                    if elem.tag in self.STATEMENT_TAGS:
+                        statement = self._start_account(elem.tag)
+                    continue
+
+                ancestors.pop()
+                parent = ancestors[-1] if ancestors else None
+
+                if elem.tag == "ofx":
+                    seen_ofx = True
+                if statement is None:
+                    continue
+
+                if elem.tag == "stmttrn":
+                    # release the element as soon as it is parsed
+                    parent.remove(elem)
+                    transaction = self._parse_transaction(statement, elem)
+                    if transaction is not None:
+                        yield transaction
+                elif elem.tag in self.STATEMENT_TAGS:
+                    statement = None
+                elif elem.tag in ("bankacctfrom", "ccacctfrom"):
+                    self._parse_account(elem)
+                elif elem.tag == "curdef" and parent.tag in self.STATEMENT_TAGS:
+                    self._parse_currency(statement, elem)
+                elif elem.tag in ("dtstart", "dtend") and parent.tag == "banktranlist":
+                    self._parse_statement_date(statement, elem)
+                elif elem.tag == "ledgerbal":
+                    self.parser.parseBalance(
+                        statement,
+                        self._as_soup(elem),
+                        "ledgerbal",
+                        "balance",
+                        "balance_date",
+                        "ledger",
+                    )
+                elif elem.tag == "availbal":
+                    self.parser.parseBalance(
+                        statement,
+                        self._as_soup(elem),
+                        "availbal",
+                        "available_balance",
+                        "available_balance_date",
+                        "ledger",
+                    )
+        except ElementTree.ParseError as exc:
+            raise OfxParserException(six.u("Invalid OFX content: %s") % exc)
+
+        if not seen_ofx:
+            raise OfxParserException("The ofx file is empty!")
+
+    def _as_soup(self, elem):
+        return soup_maker(ElementTree.tostring(elem, encoding="unicode"))
+
+    def _start_account(self, tag_name):
+        account = Account()
+        account.type = self.STATEMENT_TAGS[tag_name]
+        account.statement = Statement()
+
+        self.accounts.append(account)
+        if self.account is None:
+            self.account = account
+        return account.statement
+
+    def _parse_account(self, elem):
+        account = self.accounts[-1]
+        for tag_name, attr in (
+            ("acctid", "account_id"),
+            ("bankid", "routing_number"),
+            ("branchid", "branch_id"),
+            ("accttype", "account_type"),
+        ):
+            value = elem.findtext(tag_name)
+            if value:
+                setattr(account, attr, value.strip())
+
+    def _parse_currency(self, statement, elem):
+        if not elem.text:
+            statement.warnings.append(
+                six.u("Currency definition was empty for %s")
+                % ElementTree.tostring(elem, encoding="unicode")
+            )
+            if self.parser.fail_fast:
+                raise OfxParserException("Empty currency definition")
+            return
+
+        self.accounts[-1].curdef = elem.text.strip()
+        statement.currency = elem.text.strip().lower()
+
+    def _parse_statement_date(self, statement, elem):
+        attr = "start_date" if elem.tag == "dtstart" else "end_date"
+        try:
+            value = self.parser.parseOfxDateTime((elem.text or "").strip())
+        except ValueError:
+            statement.warnings.append(
+                six.u("Statement %s was not allowed for %s")
+                % (
+                    attr.replace("_", " "),
+                    ElementTree.tostring(elem, encoding="unicode"),
+                )
+            )
+            if self.parser.fail_fast:
+                raise
+        else:
+            setattr(statement, attr, value)
+
+    def _parse_transaction(self, statement, elem):
+        transaction_ofx = self._as_soup(elem).find("stmttrn")
+        try:
+            return self.parser.parseTransaction(transaction_ofx)
+        except OfxParserException as exc:
+            statement.discarded_entries.append(
+                {"error": str(exc), "content": transaction_ofx}
+            )
+            if self.parser.fail_fast:
+                raise
+
+
 class OfxParser(object):
     @classmethod
     def parse(cls, file_handle, fail_fast=True, custom_date_format=None):
@@ -426,6 +692,10 @@ class OfxParser(object):
         parse is the main entry point for an OfxParser. It takes a file
         handle and an optional log_errors flag.
 
+        The whole document is loaded in a BeautifulSoup tree (html.parser).
+        Use iterparse to read bank and credit card transactions of large
+        files with bounded memory, through xml.etree.
+
         If fail_fast is True, the parser will fail on any errors.
         If fail_fast is False, the parser will log poor statements in the
         statement class and continue to run. Note: the library does not
@@ -532,6 +802,27 @@ class OfxParser(object):
 
         return ofx_obj
 
+    @classmethod
+    def iterparse(cls, file_handle, fail_fast=True, custom_date_format=None):
+        """
+        iterparse is the incremental counterpart of parse. It takes a
+        seek-able file handle and returns an OfxIterParser, which yields
+        bank and credit card transactions while the file is read.
+
+        Headers are parsed right away, so invalid files are still detected
+        by this call. Investment statements are not supported.
+        """
+        cls.fail_fast = fail_fast
+        cls.custom_date_format = custom_date_format
+
+        if not hasattr(file_handle, "seek"):
+            raise TypeError(
+                six.u("iterparse() accepts a seek-able file handle, not %s")
+                % type(file_handle).__name__
+            )
+
+        return OfxIterParser(cls, file_handle)
+
     @classmethod
     def parseOfxDateTime(cls, ofxDateTime):
         # dateAsString looks something like 20101106160000.00[-5:EST]
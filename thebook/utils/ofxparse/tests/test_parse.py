@@ -21,6 +21,7 @@ from thebook.utils.ofxparse.ofxparse import (
     OfxFile,
     OfxParserException,
     OfxPreprocessedFile,
+    iter_normalized_sgml,
     soup_maker,
 )
 
@@ -186,6 +187,39 @@ NEWFILEUID:NONE
         data = ofx_file.fh.read()
         self.assertEqual(data, expect)
 
+    def testPreprocessAsXml(self):
+        fh = six.BytesIO(
+            six.b(
+                """OFXHEADER:100
+DATA:OFXSGML
+VERSION:102
+SECURITY:NONE
+ENCODING:USASCII
+CHARSET:1252
+COMPRESSION:NONE
+OLDFILEUID:NONE
+NEWFILEUID:NONE
+
+<OFX><BAL><NAME>M&M &amp; Co<DTASOF>2222<MEMO></BAL></OFX>
+"""
+            )
+        )
+        expect = "<ofx><bal><name>M&amp;M &amp; Co</name><dtasof>2222</dtasof><memo></memo></bal></ofx>\n"
+        ofx_file = OfxPreprocessedFile(fh, xml=True)
+        self.assertEqual(ofx_file.fh.read(), expect)
+
+    def testNormalizedOutputDoesNotDependOnChunkSize(self):
+        with open_file("bank_medium.ofx") as f:
+            data = OfxFile(f).fh.read()
+        closing_tags = {"OFX", "STMTTRN", "STMTRS", "BANKTRANLIST"}
+
+        expect = "".join(iter_normalized_sgml(six.StringIO(data), closing_tags))
+        for chunk_size in (1, 7, 100):
+            normalized = iter_normalized_sgml(
+                six.StringIO(data), closing_tags, chunk_size=chunk_size
+            )
+            self.assertEqual("".join(normalized), expect)
+
 
 class TestParse(TestCase):
     def testEmptyFile(self):
@@ -260,6 +294,83 @@ class TestParse(TestCase):
         self.assertEqual(len(ofx.account.statement.transactions), 1)
 
 
+class TestIterParse(TestCase):
+    def testEmptyFile(self):
+        fh = six.BytesIO(six.b(""))
+        self.assertRaises(OfxParserException, list, OfxParser.iterparse(fh))
+
+    def testThatIterParseFailsIfAPathIsPassedIn(self):
+        self.assertRaises(TypeError, OfxParser.iterparse, "/foo/bar")
+
+    def testHeadersAreAvailableBeforeIterating(self):
+        with open_file("bank_medium.ofx") as f:
+            ofx = OfxParser.iterparse(f)
+            self.assertEqual(ofx.headers["VERSION"], "102")
+            self.assertIsNone(ofx.account)
+
+    def testYieldsSameTransactionsAsParse(self):
+        with open_file("bank_medium.ofx") as f:
+            expected = OfxParser.parse(f).account.statement.transactions
+        with open_file("bank_medium.ofx") as f:
+            transactions = list(OfxParser.iterparse(f))
+
+        self.assertEqual(3, len(transactions))
+        for transaction, expected_transaction in zip(transactions, expected):
+            self.assertEqual(vars(transaction), vars(expected_transaction))
+
+    def testAccountMetadata(self):
+        with open_file("bank_medium.ofx") as f:
+            ofx = OfxParser.iterparse(f)
+            first_transaction = next(ofx)
+
+            self.assertEqual("MCDONALD'S #112", first_transaction.payee)
+            self.assertEqual("12300 000012345678", ofx.account.number)
+            self.assertEqual("160000100", ofx.account.routing_number)
+            self.assertEqual("CHECKING", ofx.account.account_type)
+            self.assertEqual("CAD", ofx.account.curdef)
+            self.assertEqual(datetime(2009, 4, 1), ofx.account.statement.start_date)
+
+            # balances come after the transactions list
+            self.assertFalse(hasattr(ofx.account.statement, "balance"))
+            list(ofx)
+            self.assertEqual(Decimal("382.34"), ofx.account.statement.balance)
+            self.assertEqual(Decimal("682.34"), ofx.account.statement.available_balance)
+            self.assertEqual([], ofx.account.statement.transactions)
+
+    def testMultipleAccounts(self):
+        with open_file("multiple_accounts2.ofx") as f:
+            ofx = OfxParser.iterparse(f)
+            list(ofx)
+        self.assertEqual(["9100", "9200"], [a.number for a in ofx.accounts])
+        self.assertEqual("9100", ofx.account.number)
+
+    def testFirstStatement(self):
+        statement = """
+<STMTTRNRS><STMTRS><CURDEF>BRL
+<BANKACCTFROM><BANKID>0237<ACCTID>%s<ACCTTYPE>CHECKING</BANKACCTFROM>
+<BANKTRANLIST><STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240802<TRNAMT>-10.00
+<FITID>%s</STMTTRN></BANKTRANLIST></STMTRS></STMTTRNRS>"""
+        fh = six.BytesIO(
+            six.b(
+                "OFXHEADER:100\nDATA:OFXSGML\nVERSION:102\n\n<OFX><BANKMSGSRSV1>"
+                + statement % ("100", "A1")
+                + statement % ("200", "B1")
+                + "</BANKMSGSRSV1></OFX>"
+            )
+        )
+        ofx = OfxParser.iterparse(fh)
+        transactions = list(ofx.first_statement())
+        self.assertEqual(["A1"], [t.id for t in transactions])
+        self.assertEqual("100", ofx.account.number)
+
+    def testCDATATransactions(self):
+        with open_file("suncorp.ofx") as f:
+            transactions = list(OfxParser.iterparse(f))
+        with open_file("suncorp.ofx") as f:
+            expected = OfxParser.parse(f).account.statement.transactions
+        self.assertEqual(vars(transactions[0]), vars(expected[0]))
+
+
 class TestStringToDate(TestCase):
     """Test the string to date parser"""
 
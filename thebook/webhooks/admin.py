@@ -12,6 +12,7 @@ class OpenPixWebhookPayloadAdmin(admin.ModelAdmin):
     ]
     list_display = [
         "status",
+        "attempts",
         "created_at",
     ]
     list_filter = [
@@ -42,6 +43,7 @@ class PaypalWebhookPayloadAdmin(admin.ModelAdmin):
     ]
     list_display = [
         "status",
+        "attempts",
         "created_at",
     ]
     list_filter = [
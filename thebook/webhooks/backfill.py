@@ -0,0 +1,86 @@
+import datetime
+
+import structlog
+
+from django.conf import settings
+from django.db import transaction
+
+from thebook.bookkeeping.models import Transaction
+from thebook.webhooks.constants import BACKFILL_WINDOW_DAYS, BackfillSource
+from thebook.webhooks.models import BackfillCheckpoint
+from thebook.webhooks.openpix import services as openpix_services
+from thebook.webhooks.paypal import services as paypal_services
+
+logger = structlog.get_logger(__name__)
+
+
+def _fetch_openpix_transactions(start_date, end_date):
+    # OpenPix end date is exclusive
+    return openpix_services.fetch_transactions(
+        start_date, end_date + datetime.timedelta(days=1)
+    )
+
+
+def _fetch_paypal_transactions(start_date, end_date):
+    return paypal_services.fetch_transactions(start_date, end_date)
+
+
+FETCHERS = {
+    BackfillSource.OPENPIX: _fetch_openpix_transactions,
+    BackfillSource.PAYPAL: _fetch_paypal_transactions,
+}
+
+
+def backfill_transactions(
+    source,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    window_days=BACKFILL_WINDOW_DAYS,
+    batch_size=None,
+    restart=False,
+):
+    """Fetch and save transactions of the date range one window at a time
+
+    Transactions of each window are written with bulk_create in the same
+    database transaction that moves the checkpoint of the start date forward,
+    so running the backfill again from the same start date resumes from the
+    first window not written yet, even if end_date changed. Return the number
+    of fetched transactions.
+    """
+    fetch_transactions = FETCHERS[source]
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+
+    checkpoint, _ = BackfillCheckpoint.objects.get_or_create(
+        source=source, start_date=start_date, defaults={"end_date": end_date}
+    )
+    if restart:
+        checkpoint.last_completed_date = None
+    checkpoint.end_date = end_date
+    checkpoint.save(update_fields=["end_date", "last_completed_date", "updated_at"])
+
+    fetched = 0
+    window_start = checkpoint.resume_date
+    while window_start <= end_date:
+        window_end = min(
+            window_start + datetime.timedelta(days=window_days - 1), end_date
+        )
+        transactions = fetch_transactions(window_start, window_end)
+
+        with transaction.atomic():
+            Transaction.objects.bulk_create(
+                transactions, batch_size=batch_size, ignore_conflicts=True
+            )
+            checkpoint.last_completed_date = window_end
+            checkpoint.save(update_fields=["last_completed_date", "updated_at"])
+
+        logger.info(
+            "webhooks.backfill.backfill_transactions.window_completed",
+            source=source,
+            start_date=window_start.isoformat(),
+            end_date=window_end.isoformat(),
+            transactions=len(transactions),
+        )
+        fetched += len(transactions)
+        window_start = window_end + datetime.timedelta(days=1)
+
+    return fetched
@@ -7,6 +7,8 @@ class ProcessingStatus:
     PROCESSED = 2
     UNPARSABLE = 3
     DUPLICATED = 4
+    FAILED = 5
+    PROCESSING = 6
 
     @classproperty
     def choices(cls):
@@ -15,4 +17,34 @@ class ProcessingStatus:
             (cls.PROCESSED, _("Processed")),
             (cls.UNPARSABLE, _("Unparsable")),
             (cls.DUPLICATED, _("Duplicated")),
+            (cls.FAILED, _("Failed")),
+            (cls.PROCESSING, _("Processing")),
         )
+
+
+# Received payloads that raise errors while processed are retried with
+# exponential backoff (RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1)) until
+# MAX_PROCESSING_ATTEMPTS is reached and the payload is marked as FAILED
+MAX_PROCESSING_ATTEMPTS = 5
+RETRY_BACKOFF_SECONDS = 60
+
+# Payloads claimed by a worker stay in PROCESSING status until it finishes them.
+# If the worker dies, they are claimed again after PROCESSING_TIMEOUT_SECONDS
+PROCESSING_TIMEOUT_SECONDS = 15 * 60
+
+
+class BackfillSource:
+    OPENPIX = "openpix"
+    PAYPAL = "paypal"
+
+    @classproperty
+    def choices(cls):
+        return (
+            (cls.OPENPIX, "OpenPix"),
+            (cls.PAYPAL, "PayPal"),
+        )
+
+
+# Backfills fetch and write the requested date range in windows of
+# BACKFILL_WINDOW_DAYS days, storing a checkpoint after each one
+BACKFILL_WINDOW_DAYS = 7
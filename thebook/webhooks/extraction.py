@@ -0,0 +1,76 @@
+"""Declarative extraction of records from provider payloads
+
+A Schema maps record fields to JMESPath expressions compiled once, when the
+schema is declared, so extracting a record from a payload only evaluates the
+already parsed expressions. Payloads are decoded with orjson.
+"""
+
+import collections
+import datetime
+import decimal
+
+import jmespath
+import orjson
+
+# orjson.JSONDecodeError is a subclass of json.JSONDecodeError
+JSONDecodeError = orjson.JSONDecodeError
+
+
+class Field:
+    """JMESPath expression of a record field
+
+    convert is applied to values found in the payload, default is returned
+    when the expression doesn't match anything (None).
+    """
+
+    def __init__(self, expression, convert=None, default=None):
+        self.expression = jmespath.compile(expression)
+        self.convert = convert
+        self.default = default
+
+    def extract(self, data):
+        value = self.expression.search(data)
+        if value is None:
+            return self.default
+        if self.convert is not None:
+            return self.convert(value)
+        return value
+
+
+class Schema:
+    """Extract a namedtuple record with the given fields from payloads"""
+
+    def __init__(self, name, **fields):
+        self.fields = tuple(fields.values())
+        self.record = collections.namedtuple(name, fields)
+
+    def extract(self, data):
+        return self.record._make(field.extract(data) for field in self.fields)
+
+    def extract_many(self, items):
+        return [self.extract(item) for item in items or []]
+
+    def loads(self, payload):
+        """Decode a JSON payload (str or bytes) and extract its record
+
+        Raise JSONDecodeError when the payload is not valid JSON.
+        """
+        return self.extract(orjson.loads(payload))
+
+
+def as_decimal(value):
+    return decimal.Decimal(str(value))
+
+
+def datetime_parser(date_format):
+    def _parse(value):
+        return datetime.datetime.strptime(value, date_format)
+
+    return _parse
+
+
+def date_parser(date_format):
+    def _parse(value):
+        return datetime.datetime.strptime(value, date_format).date()
+
+    return _parse
@@ -0,0 +1,60 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from thebook.webhooks.backfill import backfill_transactions
+from thebook.webhooks.constants import BACKFILL_WINDOW_DAYS, BackfillSource
+
+
+class Command(BaseCommand):
+    help = "Fetch all OpenPix or PayPal transactions of a date range"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "source",
+            choices=[source for source, _ in BackfillSource.choices],
+        )
+        parser.add_argument(
+            "start_date",
+            type=datetime.date.fromisoformat,
+            help="First day of the date range (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            "end_date",
+            type=datetime.date.fromisoformat,
+            nargs="?",
+            help="Last day of the date range (YYYY-MM-DD), defaults to today",
+        )
+        parser.add_argument(
+            "--window-days",
+            type=int,
+            default=BACKFILL_WINDOW_DAYS,
+            help="Number of days fetched and saved at once",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Number of transactions inserted by each bulk_create",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore the checkpoint of a previous run from the same start date",
+        )
+
+    def handle(self, *args, **options):
+        """Recover transactions missed by webhooks, resuming interrupted runs"""
+        end_date = options["end_date"] or datetime.date.today()
+
+        transactions = backfill_transactions(
+            options["source"],
+            options["start_date"],
+            end_date,
+            window_days=max(options["window_days"], 1),
+            batch_size=options["batch_size"],
+            restart=options["restart"],
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Successfully fetched {transactions} transactions")
+        )
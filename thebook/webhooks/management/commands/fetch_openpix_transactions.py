@@ -2,6 +2,7 @@ import datetime
 
 from django.core.management.base import BaseCommand
 
+from thebook.bookkeeping.models import Transaction
 from thebook.webhooks.openpix.services import fetch_transactions
 
 
@@ -14,5 +15,4 @@ class Command(BaseCommand):
         start_date = end_date - datetime.timedelta(days=2)
 
         transactions = fetch_transactions(start_date, end_date)
-        for transaction in transactions:
-            transaction.save()
+        Transaction.objects.bulk_create(transactions, ignore_conflicts=True)
@@ -0,0 +1,73 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from thebook.webhooks.models import OpenPixWebhookPayload, PaypalWebhookPayload
+
+QUEUES = (OpenPixWebhookPayload, PaypalWebhookPayload)
+
+
+def drain_queues():
+    """Process ready payloads of all queues until none is left"""
+    processed = 0
+    while True:
+        claimed = [
+            payload
+            for payload in (model.objects.process_next() for model in QUEUES)
+            if payload is not None
+        ]
+        if not claimed:
+            return processed
+        processed += len(claimed)
+
+
+def _worker():
+    try:
+        return drain_queues()
+    finally:
+        # persistent connections (CONN_MAX_AGE) of finished threads are never reused
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Process webhook payloads received by OpenPix and PayPal webhooks"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of threads processing payloads concurrently",
+        )
+        parser.add_argument(
+            "--forever",
+            action="store_true",
+            help="Keep polling for new payloads instead of exiting when done",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=5,
+            help="Seconds to wait between polls when running forever",
+        )
+
+    def handle(self, *args, **options):
+        workers = max(options["workers"], 1)
+
+        while True:
+            if workers == 1:
+                processed = drain_queues()
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = [executor.submit(_worker) for _ in range(workers)]
+                    processed = sum(future.result() for future in futures)
+
+            self.stdout.write(
+                self.style.SUCCESS(f"Successfully processed {processed} payloads")
+            )
+
+            if not options["forever"]:
+                break
+            time.sleep(options["sleep"])
@@ -1,35 +1,98 @@
 import calendar
 import datetime
 
-from django.db import models
+import structlog
 
+from django.db import models, transaction
+from django.utils import timezone
 
-class OpenPixWebhookPayloadManager(models.Manager):
+logger = structlog.get_logger(__name__)
 
-    def process_received_payloads(self):
-        from thebook.webhooks.models import ProcessingStatus
 
-        for processed, payload in enumerate(
-            self.filter(status=ProcessingStatus.RECEIVED), start=1
-        ):
-            payload.process()
+class WebhookPayloadQueueManager(models.Manager):
+    """Received payloads work as a job queue processed by workers
 
-        return processed
+    Webhook views only persist payloads with RECEIVED status. Workers claim
+    them one at a time changing their status to PROCESSING with a conditional
+    UPDATE, so many workers can process the same queue without handling the
+    same payload and no row lock is held while a payload is processed.
+    """
 
+    def ready(self):
+        """Payloads waiting to be processed, including the ones claimed by
+        workers that didn't finish them in PROCESSING_TIMEOUT_SECONDS"""
+        from thebook.webhooks.constants import ProcessingStatus
 
-class PayPalWebhookPayloadManager(models.Manager):
+        return self.filter(
+            status__in=[ProcessingStatus.RECEIVED, ProcessingStatus.PROCESSING],
+            available_at__lte=timezone.now(),
+        )
 
-    def process_received_payloads(self):
-        from thebook.webhooks.models import ProcessingStatus
+    def claim_next(self):
+        """Mark the next ready payload as PROCESSING, returning it or None"""
+        from thebook.webhooks.constants import (
+            PROCESSING_TIMEOUT_SECONDS,
+            ProcessingStatus,
+        )
 
-        for processed, payload in enumerate(
-            self.filter(status=ProcessingStatus.RECEIVED), start=1
-        ):
-            payload.process()
+        while True:
+            candidate = (
+                self.ready()
+                .order_by("available_at", "id")
+                .values("id", "status", "available_at")
+                .first()
+            )
+            if candidate is None:
+                return None
+
+            # only succeeds if no other worker claimed it since it was read
+            claimed = self.filter(**candidate).update(
+                status=ProcessingStatus.PROCESSING,
+                available_at=timezone.now()
+                + datetime.timedelta(seconds=PROCESSING_TIMEOUT_SECONDS),
+            )
+            if claimed:
+                return self.get(id=candidate["id"])
+
+    def process_next(self):
+        """Claim and process the next ready payload, returning it or None"""
+        from thebook.webhooks.constants import ProcessingStatus
+
+        payload = self.claim_next()
+        if payload is None:
+            return None
+
+        try:
+            with transaction.atomic():
+                payload.process()
+        except Exception as exc:
+            logger.exception(
+                "webhooks.managers.process_next.error",
+                model=self.model.__name__,
+                id=payload.id,
+                attempts=payload.attempts + 1,
+            )
+            payload.retry_later(exc)
+        else:
+            if payload.status == ProcessingStatus.PROCESSING:
+                payload.retry_later("Payload was not processed")
+
+        return payload
+
+    def process_received_payloads(self):
+        processed = 0
+        while self.process_next() is not None:
+            processed += 1
 
         return processed
 
 
+class OpenPixWebhookPayloadManager(WebhookPayloadQueueManager): ...
+
+
+class PayPalWebhookPayloadManager(WebhookPayloadQueueManager): ...
+
+
 def fetch_transactions(start_date: datetime.date, end_date: datetime.date):
     bank_account, _ = BankAccount.objects.get_or_create(name="PayPal")
     user = get_user_model().objects.get_or_create_automation_user()
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:15
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("webhooks", "0008_paypalwebhookpayload_webhook_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="openpixwebhookpayload",
+            name="attempts",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="openpixwebhookpayload",
+            name="available_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name="openpixwebhookpayload",
+            name="last_error",
+            field=models.CharField(blank=True),
+        ),
+        migrations.AddField(
+            model_name="paypalwebhookpayload",
+            name="attempts",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="paypalwebhookpayload",
+            name="available_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name="paypalwebhookpayload",
+            name="last_error",
+            field=models.CharField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name="openpixwebhookpayload",
+            name="status",
+            field=models.IntegerField(
+                choices=[
+                    (1, "Received"),
+                    (2, "Processed"),
+                    (3, "Unparsable"),
+                    (4, "Duplicated"),
+                    (5, "Failed"),
+                ],
+                default=1,
+                verbose_name="Processing Status",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="paypalwebhookpayload",
+            name="status",
+            field=models.IntegerField(
+                choices=[
+                    (1, "Received"),
+                    (2, "Processed"),
+                    (3, "Unparsable"),
+                    (4, "Duplicated"),
+                    (5, "Failed"),
+                ],
+                default=1,
+                verbose_name="Processing Status",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="openpixwebhookpayload",
+            index=models.Index(
+                fields=["status", "available_at"], name="openpix_payload_queue_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="paypalwebhookpayload",
+            index=models.Index(
+                fields=["status", "available_at"], name="paypal_payload_queue_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("webhooks", "0010_backfillcheckpoint"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="openpixwebhookpayload",
+            name="status",
+            field=models.IntegerField(
+                choices=[
+                    (1, "Received"),
+                    (2, "Processed"),
+                    (3, "Unparsable"),
+                    (4, "Duplicated"),
+                    (5, "Failed"),
+                    (6, "Processing"),
+                ],
+                default=1,
+                verbose_name="Processing Status",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="paypalwebhookpayload",
+            name="status",
+            field=models.IntegerField(
+                choices=[
+                    (1, "Received"),
+                    (2, "Processed"),
+                    (3, "Unparsable"),
+                    (4, "Duplicated"),
+                    (5, "Failed"),
+                    (6, "Processing"),
+                ],
+                default=1,
+                verbose_name="Processing Status",
+            ),
+        ),
+    ]
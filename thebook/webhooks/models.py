@@ -1,29 +1,62 @@
 import datetime
-import json
 
-import jmespath
 import requests
 import structlog
 
 from django.conf import settings
-from django.contrib.auth import get_user_model
 from django.db import DatabaseError, models, transaction
+from django.utils import timezone
 from django.utils.functional import classproperty
 from django.utils.translation import gettext as _
 
-from thebook.bookkeeping.models import BankAccount, Category, Transaction
-from thebook.webhooks.constants import ProcessingStatus
+from thebook.bookkeeping.models import Transaction
+from thebook.bookkeeping.reference_data import reference_data
+from thebook.webhooks.constants import (
+    MAX_PROCESSING_ATTEMPTS,
+    RETRY_BACKOFF_SECONDS,
+    BackfillSource,
+    ProcessingStatus,
+)
+from thebook.webhooks.extraction import JSONDecodeError
 from thebook.webhooks.managers import (
     OpenPixWebhookPayloadManager,
     PayPalWebhookPayloadManager,
 )
+from thebook.webhooks.openpix import schemas as openpix_schemas
 from thebook.webhooks.openpix.services import calculate_openpix_fee
 from thebook.webhooks.paypal.services import process_webhook_payload
 
 logger = structlog.get_logger(__name__)
 
 
-class OpenPixWebhookPayload(models.Model):
+class QueuedWebhookPayload(models.Model):
+    """Processing state of webhook payloads handled by the queue workers"""
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.CharField(blank=True)
+
+    class Meta:
+        abstract = True
+
+    def retry_later(self, error):
+        """Schedule a new processing attempt with exponential backoff or mark the
+        payload as failed when it reaches MAX_PROCESSING_ATTEMPTS"""
+        self.attempts += 1
+        self.last_error = str(error)
+
+        if self.attempts >= MAX_PROCESSING_ATTEMPTS:
+            self.status = ProcessingStatus.FAILED
+        else:
+            self.status = ProcessingStatus.RECEIVED
+            self.available_at = timezone.now() + datetime.timedelta(
+                seconds=RETRY_BACKOFF_SECONDS * 2 ** (self.attempts - 1)
+            )
+
+        self.save(update_fields=["attempts", "last_error", "status", "available_at"])
+
+
+class OpenPixWebhookPayload(QueuedWebhookPayload):
     thebook_token = models.CharField()
     payload = models.CharField()
     status = models.IntegerField(
@@ -35,62 +68,56 @@ class OpenPixWebhookPayload(models.Model):
 
     objects = OpenPixWebhookPayloadManager()
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "available_at"], name="openpix_payload_queue_idx"
+            ),
+        ]
+
     def process(self, bank_account=None, user=None):
         if self.status == ProcessingStatus.PROCESSED:
             return
 
         if bank_account is None:
-            bank_account, _ = BankAccount.objects.get_or_create(name="OpenPix")
+            bank_account = reference_data.bank_account(settings.OPENPIX_BANK_ACCOUNT)
 
         if user is None:
-            user = get_user_model().objects.get_or_create_automation_user()
+            user = reference_data.automation_user()
 
         try:
-            payload = json.loads(self.payload)
-        except json.decoder.JSONDecodeError:
+            event = openpix_schemas.webhook_event_schema.loads(self.payload)
+        except JSONDecodeError:
             self.status = ProcessingStatus.UNPARSABLE
             self.internal_notes = "webhooks.openpix.jsondecodeerror"
             self.save()
             return
 
-        transaction_type = jmespath.search("event", payload)
+        transaction_type = event.event
         if transaction_type != "OPENPIX:TRANSACTION_RECEIVED":
             self.status = ProcessingStatus.UNPARSABLE
             self.internal_notes = "webhooks.paypal.unparsable_event"
             self.save()
             return
 
-        amount = jmespath.search("pix.charge.value || pix.value", payload) / 100
+        amount = event.value / 100
         openpix_fee = calculate_openpix_fee(amount, transaction_type)
 
         # Original in UTC time
-        paid_at = jmespath.search("pix.charge.paidAt || pix.time", payload)
-        utc_transaction_date = datetime.datetime.strptime(
-            paid_at, "%Y-%m-%dT%H:%M:%S.%fZ"
-        )
+        utc_transaction_date = openpix_schemas.parse_datetime(event.paid_at)
 
-        comment = jmespath.search("pix.charge.comment", payload) or ""
-        payer_name = (
-            jmespath.search("pix.charge.payer.name || pix.payer.name", payload) or ""
-        )
-        payer_tax_id = (
-            jmespath.search(
-                "pix.charge.payer.taxID.taxID || pix.payer.taxID.taxID", payload
-            )
-            or ""
-        )
         description = " - ".join(
-            [part for part in (comment, payer_name, payer_tax_id) if part]
+            [
+                part
+                for part in (event.comment, event.payer_name, event.payer_tax_id)
+                if part
+            ]
         )
 
-        reference = jmespath.search(
-            "pix.charge.transactionID || pix.transactionID", payload
-        )
+        reference = event.reference
 
         with transaction.atomic():
-            bank_fee_category, _ = Category.objects.get_or_create(
-                name="Tarifas Bancárias"
-            )
+            bank_fee_category = reference_data.bank_fee_category()
 
             Transaction.objects.create(
                 reference=reference,
@@ -116,7 +143,7 @@ class OpenPixWebhookPayload(models.Model):
             self.save()
 
 
-class PaypalWebhookPayload(models.Model):
+class PaypalWebhookPayload(QueuedWebhookPayload):
     paypal_transmission_time = models.CharField()
     paypal_auth_version = models.CharField()
     paypal_cert_url = models.CharField()
@@ -137,5 +164,49 @@ class PaypalWebhookPayload(models.Model):
 
     objects = PayPalWebhookPayloadManager()
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "available_at"], name="paypal_payload_queue_idx"
+            ),
+        ]
+
     def process(self):
         process_webhook_payload(self)
+
+
+class BackfillCheckpoint(models.Model):
+    """Progress of a transactions backfill, so interrupted runs can be resumed
+
+    There is one checkpoint for each source and start date. Its end_date is
+    the one of the latest run, so a later run extending the date range (the
+    command defaults to today) resumes from the last completed date.
+    """
+
+    source = models.CharField(choices=BackfillSource.choices)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    last_completed_date = models.DateField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["source", "start_date"],
+                name="unique_backfill_checkpoint",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.source} {self.start_date} - {self.end_date}"
+
+    @property
+    def resume_date(self):
+        if self.last_completed_date is None:
+            return self.start_date
+        return self.last_completed_date + datetime.timedelta(days=1)
+
+    @property
+    def is_completed(self):
+        return self.resume_date > self.end_date
@@ -0,0 +1,41 @@
+from thebook.webhooks.extraction import Field, Schema, date_parser, datetime_parser
+
+OPENPIX_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+parse_datetime = datetime_parser(OPENPIX_DATETIME_FORMAT)
+
+# https://developers.openpix.com.br/docs/webhook/
+webhook_event_schema = Schema(
+    "OpenPixWebhookEvent",
+    event=Field("event"),
+    # Value in cents
+    value=Field("pix.charge.value || pix.value"),
+    # Original in UTC time, parsed with parse_datetime only for the events
+    # that are processed
+    paid_at=Field("pix.charge.paidAt || pix.time"),
+    comment=Field("pix.charge.comment", default=""),
+    payer_name=Field("pix.charge.payer.name || pix.payer.name", default=""),
+    payer_tax_id=Field(
+        "pix.charge.payer.taxID.taxID || pix.payer.taxID.taxID", default=""
+    ),
+    reference=Field("pix.charge.transactionID || pix.transactionID"),
+)
+
+# https://developers.openpix.com.br/api#tag/transactions
+transactions_page_schema = Schema(
+    "OpenPixTransactionsPage",
+    transactions=Field("transactions", default=[]),
+)
+
+transaction_schema = Schema(
+    "OpenPixTransaction",
+    transaction_id=Field("transactionID || endToEndId"),
+    date=Field("time", convert=date_parser(OPENPIX_DATETIME_FORMAT)),
+    # Value in cents
+    value=Field("value"),
+    type=Field("type"),
+    credit_party_name=Field("creditParty.holder.name", default=""),
+    credit_party_tax_id=Field("creditParty.holder.taxID.taxID"),
+    payer_name=Field("payer.name", default=""),
+    payer_tax_id=Field("payer.taxID.taxID"),
+)
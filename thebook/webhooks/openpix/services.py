@@ -1,13 +1,17 @@
 import datetime
 import decimal
 
-import jmespath
 import requests
 
 from django.conf import settings
-from django.contrib.auth import get_user_model
 
-from thebook.bookkeeping.models import BankAccount, Category, Transaction
+from thebook.bookkeeping.importers.constants import BANK_ACCOUNT_TRANSFER
+from thebook.bookkeeping.models import Transaction
+from thebook.bookkeeping.reference_data import reference_data
+from thebook.webhooks.openpix.schemas import (
+    transaction_schema,
+    transactions_page_schema,
+)
 
 
 def calculate_openpix_fee(amount, transaction_type):
@@ -32,16 +36,10 @@ def calculate_openpix_fee(amount, transaction_type):
 def fetch_transactions(start_date: datetime.date, end_date: datetime.date):
     results = []
 
-    bank_account, _ = BankAccount.objects.get_or_create(
-        name=settings.OPENPIX_BANK_ACCOUNT
-    )
-    bank_fee_category, _ = Category.objects.get_or_create(
-        name=settings.BANK_FEE_CATEGORY_NAME
-    )
-    bank_account_transfer_category, _ = Category.objects.get_or_create(
-        name="Transferência entre contas bancárias"
-    )
-    user = get_user_model().objects.get_or_create_automation_user()
+    bank_account = reference_data.bank_account(settings.OPENPIX_BANK_ACCOUNT)
+    bank_fee_category = reference_data.bank_fee_category()
+    bank_account_transfer_category = reference_data.category(BANK_ACCOUNT_TRANSFER)
+    user = reference_data.automation_user()
 
     response = requests.get(
         f"{settings.OPENPIX_API_BASE_URL}/api/v1/transaction",
@@ -53,22 +51,22 @@ def fetch_transactions(start_date: datetime.date, end_date: datetime.date):
             "Authorization": settings.OPENPIX_APP_ID,
         },
     )
-    data = response.json()
+    page = transactions_page_schema.loads(response.content)
+
+    transactions = transaction_schema.extract_many(page.transactions)
+    existing_references = Transaction.objects.existing_references(
+        [transaction.transaction_id for transaction in transactions]
+    )
 
-    transactions = jmespath.search("transactions", data) or []
     for transaction in transactions:
-        transaction_id = jmespath.search(
-            "transactionID", transaction
-        ) or jmespath.search("endToEndId", transaction)
-        if Transaction.objects.filter(reference=transaction_id).exists():
+        transaction_id = transaction.transaction_id
+        if transaction_id in existing_references:
             continue
 
-        transaction_date = datetime.datetime.strptime(
-            jmespath.search("time", transaction), "%Y-%m-%dT%H:%M:%S.%fZ"
-        ).date()
-        transaction_amount = jmespath.search("value", transaction) / 100
+        transaction_date = transaction.date
+        transaction_amount = transaction.value / 100
 
-        transaction_type = jmespath.search("type", transaction)
+        transaction_type = transaction.type
         is_bank_account_transfer = transaction_type == "WITHDRAW"
         is_refund = transaction_type == "REFUND"
         if is_bank_account_transfer:
@@ -79,21 +77,16 @@ def fetch_transactions(start_date: datetime.date, end_date: datetime.date):
             transaction_amount = -1 * transaction_amount
         elif is_refund:
             transaction_category = None
-            credit_party_name = (
-                jmespath.search("creditParty.holder.name", transaction) or ""
-            )
-            credit_party_tax_id = jmespath.search(
-                "creditParty.holder.taxID.taxID", transaction
-            )
             transaction_description = (
-                f"Reembolso - {credit_party_name} - {credit_party_tax_id}"
+                f"Reembolso - {transaction.credit_party_name}"
+                f" - {transaction.credit_party_tax_id}"
             )
             transaction_amount = -1 * transaction_amount
         else:
             transaction_category = None
-            payer_name = jmespath.search("payer.name", transaction) or ""
-            payer_tax_id = jmespath.search("payer.taxID.taxID", transaction)
-            transaction_description = f"{payer_name} - {payer_tax_id}"
+            transaction_description = (
+                f"{transaction.payer_name} - {transaction.payer_tax_id}"
+            )
 
         results.append(
             Transaction(
@@ -0,0 +1,133 @@
+import threading
+import time
+
+import orjson
+import requests
+import structlog
+from requests.adapters import HTTPAdapter
+
+from django.conf import settings
+
+logger = structlog.get_logger(__name__)
+
+
+class PayPalClient:
+    """PayPal REST API client sharing one connection pool per process
+
+    The OAuth access token is reused until it expires (TOKEN_EXPIRATION_MARGIN
+    seconds earlier, so it is never sent after expiring) and subscriptions are
+    cached for SUBSCRIPTION_CACHE_TTL seconds, so processing a webhook only
+    hits the API when the subscription wasn't seen recently. At most
+    SUBSCRIPTION_CACHE_MAX_SIZE subscriptions are kept, dropping the oldest.
+    """
+
+    POOL_SIZE = 10
+    SUBSCRIPTION_CACHE_TTL = 60 * 60
+    SUBSCRIPTION_CACHE_MAX_SIZE = 1024
+    TOKEN_EXPIRATION_MARGIN = 60
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.session = requests.Session()
+        self.session.mount(
+            "https://",
+            HTTPAdapter(pool_connections=self.POOL_SIZE, pool_maxsize=self.POOL_SIZE),
+        )
+        self.reset()
+
+    def reset(self):
+        """Forget the cached access token and subscriptions"""
+        with self._lock:
+            self._access_token = None
+            self._access_token_expires_at = 0
+            self._subscriptions = {}
+
+    def _url(self, path):
+        return f"{settings.PAYPAL_API_BASE_URL}{path}"
+
+    def get_access_token(self):
+        with self._lock:
+            if self._access_token and time.monotonic() < self._access_token_expires_at:
+                return self._access_token
+
+            response = self.session.post(
+                self._url("/v1/oauth2/token"),
+                data={
+                    "grant_type": "client_credentials",
+                },
+                auth=(settings.PAYPAL_CLIENT_ID, settings.PAYPAL_CLIENT_SECRET),
+                timeout=settings.PAYPAL_API_TIMEOUT,
+            )
+            auth_data = orjson.loads(response.content)
+
+            self._access_token = auth_data.get("access_token") or ""
+            self._access_token_expires_at = (
+                time.monotonic()
+                + int(auth_data.get("expires_in") or 0)
+                - self.TOKEN_EXPIRATION_MARGIN
+            )
+            return self._access_token
+
+    def _invalidate_access_token(self, access_token):
+        with self._lock:
+            if self._access_token == access_token:
+                self._access_token = None
+
+    def get(self, path, **kwargs):
+        """GET an API path, renewing the access token once if it was rejected"""
+        for _ in range(2):
+            access_token = self.get_access_token()
+            response = self.session.get(
+                self._url(path),
+                headers={"Authorization": f"Bearer {access_token}"},
+                timeout=settings.PAYPAL_API_TIMEOUT,
+                **kwargs,
+            )
+            if response.status_code != 401:
+                break
+
+            logger.info("webhooks.paypal.client.get.access_token_rejected", path=path)
+            self._invalidate_access_token(access_token)
+
+        return response
+
+    def get_subscription(self, billing_agreement_id):
+        with self._lock:
+            cached = self._subscriptions.get(billing_agreement_id)
+        if cached is not None and time.monotonic() < cached[0]:
+            return cached[1]
+
+        response = self.get(f"/v1/billing/subscriptions/{billing_agreement_id}")
+        subscription = orjson.loads(response.content)
+
+        if response.ok:
+            self._cache_subscription(billing_agreement_id, subscription)
+        return subscription
+
+    def _cache_subscription(self, billing_agreement_id, subscription):
+        now = time.monotonic()
+        with self._lock:
+            # re-inserted ids move to the end, so the cache is ordered by
+            # expiration and the oldest entries are always the first ones
+            self._subscriptions.pop(billing_agreement_id, None)
+            self._subscriptions[billing_agreement_id] = (
+                now + self.SUBSCRIPTION_CACHE_TTL,
+                subscription,
+            )
+
+            while len(self._subscriptions) > 1:
+                oldest_id = next(iter(self._subscriptions))
+                expires_at, _ = self._subscriptions[oldest_id]
+                if (
+                    expires_at > now
+                    and len(self._subscriptions) <= self.SUBSCRIPTION_CACHE_MAX_SIZE
+                ):
+                    break
+                del self._subscriptions[oldest_id]
+
+    def search_transactions(self, params):
+        response = self.get("/v1/reporting/transactions", params=params)
+        return orjson.loads(response.content)
+
+
+paypal_client = PayPalClient()
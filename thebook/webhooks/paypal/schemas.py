@@ -0,0 +1,64 @@
+import decimal
+
+from thebook.webhooks.extraction import (
+    Field,
+    Schema,
+    as_decimal,
+    date_parser,
+    datetime_parser,
+)
+
+PAYPAL_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+parse_datetime = datetime_parser(PAYPAL_DATETIME_FORMAT)
+
+# https://developer.paypal.com/api/rest/webhooks/event-names/#subscriptions
+webhook_event_schema = Schema(
+    "PayPalWebhookEvent",
+    id=Field("id", default=""),
+    event_type=Field("event_type"),
+    reference=Field("resource.id"),
+    billing_agreement_id=Field("resource.billing_agreement_id", default=""),
+    # Parsed with parse_datetime only for the events that are processed
+    create_time=Field("resource.create_time"),
+    amount_currency=Field("resource.amount.currency"),
+    amount_total=Field("resource.amount.total"),
+    receivable_amount=Field("resource.receivable_amount.value"),
+    fee_currency=Field("resource.transaction_fee.currency"),
+    fee_value=Field("resource.transaction_fee.value"),
+)
+
+# https://developer.paypal.com/docs/api/subscriptions/v1/#subscriptions_get
+subscription_schema = Schema(
+    "PayPalSubscription",
+    given_name=Field("subscriber.name.given_name", default=""),
+    surname=Field("subscriber.name.surname", default=""),
+    payer_id=Field("subscriber.payer_id", default=""),
+)
+
+# https://developer.paypal.com/docs/api/transaction-search/v1/#transactions_get
+transaction_search_page_schema = Schema(
+    "PayPalTransactionSearchPage",
+    transaction_details=Field("transaction_details", default=[]),
+    total_pages=Field("total_pages", default=1),
+)
+
+transaction_detail_schema = Schema(
+    "PayPalTransactionDetail",
+    transaction_id=Field("transaction_info.transaction_id"),
+    status=Field("transaction_info.transaction_status"),
+    event_code=Field("transaction_info.transaction_event_code"),
+    paypal_reference_id=Field("transaction_info.paypal_reference_id"),
+    currency_code=Field("transaction_info.transaction_amount.currency_code"),
+    amount=Field("transaction_info.transaction_amount.value", convert=as_decimal),
+    fee_amount=Field(
+        "transaction_info.fee_amount.value",
+        convert=as_decimal,
+        default=decimal.Decimal("0"),
+    ),
+    date=Field(
+        "transaction_info.transaction_initiation_date",
+        convert=date_parser(PAYPAL_DATETIME_FORMAT),
+    ),
+    subject=Field("transaction_info.transaction_subject"),
+)
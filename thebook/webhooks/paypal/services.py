@@ -1,107 +1,138 @@
 import datetime
-import decimal
-import json
+from concurrent.futures import ThreadPoolExecutor
 
-import jmespath
-import requests
 import structlog
 
 from django.conf import settings
-from django.contrib.auth import get_user_model
 from django.db import transaction
 
-from thebook.bookkeeping.models import BankAccount, Category, Transaction
+from thebook.bookkeeping.importers.constants import BANK_ACCOUNT_TRANSFER
+from thebook.bookkeeping.models import Transaction
+from thebook.bookkeeping.reference_data import reference_data
 from thebook.webhooks.constants import ProcessingStatus
+from thebook.webhooks.extraction import JSONDecodeError
+from thebook.webhooks.paypal.client import paypal_client
+from thebook.webhooks.paypal.schemas import (
+    parse_datetime,
+    subscription_schema,
+    transaction_detail_schema,
+    transaction_search_page_schema,
+    webhook_event_schema,
+)
 
 logger = structlog.get_logger(__name__)
 
+# https://developer.paypal.com/docs/api/transaction-search/v1/#transactions_get
+TRANSACTION_SEARCH_MAX_DAYS = 31
+TRANSACTION_SEARCH_PAGE_SIZE = 500
+SUBSCRIPTION_LOOKUP_WORKERS = 8
+
 
 def _get_paypal_access_token():
-    response = requests.post(
-        f"{settings.PAYPAL_API_BASE_URL}/v1/oauth2/token",
-        data={
-            "grant_type": "client_credentials",
-        },
-        auth=(settings.PAYPAL_CLIENT_ID, settings.PAYPAL_CLIENT_SECRET),
-    )
-    auth_data = response.json()
-    return response.json().get("access_token") or ""
+    return paypal_client.get_access_token()
 
 
-def _get_subscription(billing_agreement_id, access_token=None):
-    if access_token is None:
-        access_token = _get_paypal_access_token()
-    response = requests.get(
-        f"{settings.PAYPAL_API_BASE_URL}/v1/billing/subscriptions/{billing_agreement_id}",
-        headers={"Authorization": f"Bearer {access_token}"},
-    )
-    subscription = response.json()
-    return subscription
+def _get_subscription(billing_agreement_id):
+    return paypal_client.get_subscription(billing_agreement_id)
+
+
+def _iter_date_windows(start_date: datetime.date, end_date: datetime.date):
+    """Split the date range in windows accepted by the transaction search API"""
+    window_start = start_date
+    while window_start <= end_date:
+        window_end = min(
+            window_start + datetime.timedelta(days=TRANSACTION_SEARCH_MAX_DAYS - 1),
+            end_date,
+        )
+        yield window_start, window_end
+        window_start = window_end + datetime.timedelta(days=1)
+
+
+def _iter_transaction_details(start_date: datetime.date, end_date: datetime.date):
+    """Yield transaction details of all pages of all windows of the date range"""
+    for window_start, window_end in _iter_date_windows(start_date, end_date):
+        params = {
+            "start_date": window_start.strftime("%Y-%m-%dT00:00:00-00:00"),
+            "end_date": window_end.strftime("%Y-%m-%dT23:59:59-00:00"),
+            "page_size": TRANSACTION_SEARCH_PAGE_SIZE,
+            "page": 1,
+        }
+        while True:
+            page = transaction_search_page_schema.extract(
+                paypal_client.search_transactions(params)
+            )
+            yield from transaction_detail_schema.extract_many(page.transaction_details)
+
+            if params["page"] >= page.total_pages:
+                break
+            params["page"] += 1
+
+        logger.info(
+            "webhooks.paypal.services.fetch_transactions.window_fetched",
+            start_date=window_start.isoformat(),
+            end_date=window_end.isoformat(),
+            pages=params["page"],
+        )
+
+
+def _get_subscriptions(billing_agreement_ids):
+    """Resolve distinct subscriptions concurrently returning a dict by id"""
+    billing_agreement_ids = list(dict.fromkeys(billing_agreement_ids))
+    if not billing_agreement_ids:
+        return {}
+
+    max_workers = min(SUBSCRIPTION_LOOKUP_WORKERS, len(billing_agreement_ids))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        subscriptions = executor.map(_get_subscription, billing_agreement_ids)
+        return dict(zip(billing_agreement_ids, subscriptions))
 
 
 def fetch_transactions(start_date: datetime.date, end_date: datetime.date):
     results = []
 
-    bank_account, _ = BankAccount.objects.get_or_create(
-        name=settings.PAYPAL_BANK_ACCOUNT
-    )
-    bank_fee_category, _ = Category.objects.get_or_create(
-        name=settings.BANK_FEE_CATEGORY_NAME
-    )
-    bank_account_transfer_category, _ = Category.objects.get_or_create(
-        name="Transferência entre contas bancárias"
-    )
+    bank_account = reference_data.bank_account(settings.PAYPAL_BANK_ACCOUNT)
+    bank_fee_category = reference_data.bank_fee_category()
+    bank_account_transfer_category = reference_data.category(BANK_ACCOUNT_TRANSFER)
+    user = reference_data.automation_user()
 
-    user = get_user_model().objects.get_or_create_automation_user()
-    access_token = _get_paypal_access_token()
-
-    params = {
-        "start_date": start_date.strftime("%Y-%m-%dT00:00:00-00:00"),
-        "end_date": end_date.strftime("%Y-%m-%dT23:59:59-00:00"),
-    }
-    url = f"{settings.PAYPAL_API_BASE_URL}/v1/reporting/transactions"
-    response = requests.get(
-        url,
-        headers={"Authorization": f"Bearer {access_token}"},
-        params=params,
+    transaction_details = list(_iter_transaction_details(start_date, end_date))
+    existing_references = Transaction.objects.existing_references(
+        [transaction.transaction_id for transaction in transaction_details]
     )
-    data = response.json()
 
-    for transaction in jmespath.search("transaction_details", data) or []:
-        transaction_status = jmespath.search(
-            "transaction_info.transaction_status", transaction
-        )
-        if transaction_status != "S":
+    pending_transactions = []
+    for transaction in transaction_details:
+        if transaction.status != "S":
             # https://developer.paypal.com/docs/api/transaction-search/v1/#search_get!in=query&path=transaction_status&t=request
             continue
 
-        transaction_id = jmespath.search("transaction_info.transaction_id", transaction)
-        if Transaction.objects.filter(reference=transaction_id).exists():
+        if transaction.transaction_id in existing_references:
             continue
 
-        transaction_currency_code = jmespath.search(
-            "transaction_info.transaction_amount.currency_code", transaction
-        )
-        if transaction_currency_code == "USD":
+        if transaction.currency_code == "USD":
             # TODO - Process USD transactions
             continue
-        transaction_amount = decimal.Decimal(
-            jmespath.search("transaction_info.transaction_amount.value", transaction)
-        )
 
-        raw_date = jmespath.search(
-            "transaction_info.transaction_initiation_date", transaction
-        )
-        transaction_date = datetime.datetime.strptime(
-            raw_date, "%Y-%m-%dT%H:%M:%SZ"
-        ).date()
-        transaction_fee_amount = decimal.Decimal(
-            jmespath.search("transaction_info.fee_amount.value", transaction) or "0"
-        )
+        # The same transaction may be returned by more than one window when
+        # it happens in the boundary of both
+        existing_references.add(transaction.transaction_id)
+        pending_transactions.append(transaction)
+
+    # This flow only applies to Subscription payment
+    # https://developer.paypal.com/docs/transaction-search/transaction-event-codes/
+    subscriptions = _get_subscriptions(
+        transaction.paypal_reference_id
+        for transaction in pending_transactions
+        if transaction.event_code == "T0002"
+    )
 
-        transaction_type = jmespath.search(
-            "transaction_info.transaction_event_code", transaction
-        )
+    for transaction in pending_transactions:
+        transaction_id = transaction.transaction_id
+        transaction_amount = transaction.amount
+        transaction_date = transaction.date
+        transaction_fee_amount = transaction.fee_amount
+
+        transaction_type = transaction.event_code
         is_bank_account_transfer = transaction_type in ("T0400", "T0403")
         if is_bank_account_transfer:
             transaction_category = bank_account_transfer_category
@@ -110,27 +141,13 @@ def fetch_transactions(start_date: datetime.date, end_date: datetime.date):
             )
         else:
             transaction_category = None
-            transaction_description = jmespath.search(
-                "transaction_info.transaction_subject", transaction
-            )
+            transaction_description = transaction.subject
 
         if transaction_type == "T0002":
-            # This flow only applies to Subscription payment
-            # https://developer.paypal.com/docs/transaction-search/transaction-event-codes/
-            paypal_reference_id = jmespath.search(
-                "transaction_info.paypal_reference_id", transaction
-            )
-            subscription = _get_subscription(paypal_reference_id, access_token)
-            given_name = (
-                jmespath.search("subscriber.name.given_name", subscription) or ""
-            )
-            surname = jmespath.search("subscriber.name.surname", subscription) or ""
-            full_name = " ".join([given_name, surname]).strip()
-            payer_id = jmespath.search("subscriber.payer_id", subscription) or ""
-            description_parts = (full_name, payer_id)
-            transaction_description = " - ".join(
-                [part for part in description_parts if part]
+            subscriber = subscription_schema.extract(
+                subscriptions[transaction.paypal_reference_id]
             )
+            transaction_description = _subscriber_description(subscriber)
 
         results.append(
             Transaction(
@@ -162,25 +179,25 @@ def fetch_transactions(start_date: datetime.date, end_date: datetime.date):
     return results
 
 
-def _extract_amount(payload):
-    currency = jmespath.search("resource.amount.currency", payload)
+def _subscriber_description(subscriber, *extra_parts):
+    full_name = " ".join([subscriber.given_name, subscriber.surname]).strip()
+    description_parts = (full_name, *extra_parts, subscriber.payer_id)
+    return " - ".join([part for part in description_parts if part])
 
-    if currency == "BRL":
-        amount = float(jmespath.search("resource.amount.total", payload))
-    elif currency == "USD":
-        amount = float(jmespath.search("resource.receivable_amount.value", payload))
 
-    return amount
+def _extract_amount(event):
+    if event.amount_currency == "BRL":
+        amount = float(event.amount_total)
+    elif event.amount_currency == "USD":
+        amount = float(event.receivable_amount)
 
+    return amount
 
-def _extract_transaction_fee(payload):
-    currency = jmespath.search("resource.transaction_fee.currency", payload)
 
-    if currency == "BRL":
-        transaction_fee = -1 * float(
-            jmespath.search("resource.transaction_fee.value", payload)
-        )
-    elif currency == "USD":
+def _extract_transaction_fee(event):
+    if event.fee_currency == "BRL":
+        transaction_fee = -1 * float(event.fee_value)
+    elif event.fee_currency == "USD":
         transaction_fee = None
 
     return transaction_fee
@@ -198,14 +215,12 @@ def process_webhook_payload(webhook):
         )
         return
 
-    bank_account, _ = BankAccount.objects.get_or_create(
-        name=settings.PAYPAL_BANK_ACCOUNT
-    )
-    user = get_user_model().objects.get_or_create_automation_user()
+    bank_account = reference_data.bank_account(settings.PAYPAL_BANK_ACCOUNT)
+    user = reference_data.automation_user()
 
     try:
-        payload = json.loads(webhook.payload)
-    except json.decoder.JSONDecodeError:
+        event = webhook_event_schema.loads(webhook.payload)
+    except JSONDecodeError:
         logger.warning(
             "webhooks.paypal.services.process_webhook_payload.unparsable_event",
             id=webhook.id,
@@ -217,7 +232,7 @@ def process_webhook_payload(webhook):
         webhook.save()
         return
 
-    reference = jmespath.search("resource.id", payload)
+    reference = event.reference
     if Transaction.objects.filter(reference=reference).exists():
         logger.info(
             "webhooks.paypal.services.process_webhook_payload.duplicated_transaction",
@@ -230,7 +245,7 @@ def process_webhook_payload(webhook):
         webhook.save()
         return
 
-    webhook.webhook_id = payload.get("id") or ""
+    webhook.webhook_id = event.id
     if PaypalWebhookPayload.objects.filter(webhook_id=webhook.webhook_id).exists():
         logger.warning(
             "webhooks.paypal.services.process_webhook_payload.duplicated_event",
@@ -241,8 +256,7 @@ def process_webhook_payload(webhook):
         webhook.save()
         return
 
-    event_type = payload.get("event_type")
-    if event_type != "PAYMENT.SALE.COMPLETED":
+    if event.event_type != "PAYMENT.SALE.COMPLETED":
         logger.warning(
             "webhooks.paypal.services.process_webhook_payload.unparsable_event",
             id=webhook.id,
@@ -252,9 +266,7 @@ def process_webhook_payload(webhook):
         webhook.save()
         return
 
-    billing_agreement_id = (
-        jmespath.search("resource.billing_agreement_id", payload) or ""
-    )
+    billing_agreement_id = event.billing_agreement_id
     if not billing_agreement_id:
         logger.warning(
             "webhooks.paypal.services.process_webhook_payload.missing_billing_agreement_id",
@@ -272,29 +284,21 @@ def process_webhook_payload(webhook):
         subscription=subscription,
     )
 
-    amount = _extract_amount(payload)
-    transaction_fee = _extract_transaction_fee(payload)
-
-    fee = -1 * float(jmespath.search("resource.transaction_fee.value", payload))
-
-    paid_at = jmespath.search("resource.create_time", payload)
-    utc_transaction_date = datetime.datetime.strptime(paid_at, "%Y-%m-%dT%H:%M:%SZ")
+    amount = _extract_amount(event)
+    transaction_fee = _extract_transaction_fee(event)
 
-    given_name = jmespath.search("subscriber.name.given_name", subscription) or ""
-    surname = jmespath.search("subscriber.name.surname", subscription) or ""
-    full_name = " ".join([given_name, surname]).strip()
-    payer_id = jmespath.search("subscriber.payer_id", subscription) or ""
+    fee = -1 * float(event.fee_value)
 
-    description_parts = (full_name, payer_id)
-    currency = jmespath.search("resource.amount.currency", payload)
-    if currency == "USD":
-        usd_amount = jmespath.search("resource.amount.total", payload)
-        description_parts = (full_name, f"USD {usd_amount}", payer_id)
+    utc_transaction_date = parse_datetime(event.create_time)
 
-    description = " - ".join([part for part in description_parts if part])
+    subscriber = subscription_schema.extract(subscription)
+    if event.amount_currency == "USD":
+        description = _subscriber_description(subscriber, f"USD {event.amount_total}")
+    else:
+        description = _subscriber_description(subscriber)
 
     with transaction.atomic():
-        bank_fee_category, _ = Category.objects.get_or_create(name="Tarifas Bancárias")
+        bank_fee_category = reference_data.bank_fee_category()
 
         Transaction.objects.create(
             reference=reference,
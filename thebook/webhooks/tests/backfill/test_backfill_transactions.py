@@ -0,0 +1,167 @@
+import datetime
+
+import pytest
+from model_bakery import baker
+
+from django.contrib.auth import get_user_model
+
+from thebook.bookkeeping.models import BankAccount, Transaction
+from thebook.webhooks.backfill import FETCHERS, backfill_transactions
+from thebook.webhooks.constants import BackfillSource
+from thebook.webhooks.models import BackfillCheckpoint
+
+
+@pytest.fixture
+def bank_account(db):
+    return baker.make(BankAccount)
+
+
+@pytest.fixture
+def fetcher(mocker, bank_account):
+    user = get_user_model().objects.get_or_create_automation_user()
+
+    def fetch_transactions(start_date, end_date):
+        return [
+            Transaction(
+                reference=f"ref-{date.isoformat()}",
+                date=date,
+                description="Backfilled transaction",
+                amount=10,
+                bank_account=bank_account,
+                created_by=user,
+            )
+            for date in (start_date, end_date)
+        ]
+
+    fetcher = mocker.Mock(side_effect=fetch_transactions)
+    mocker.patch.dict(FETCHERS, {BackfillSource.PAYPAL: fetcher})
+    return fetcher
+
+
+def test_backfill_fetches_date_range_in_windows(fetcher):
+    backfill_transactions(
+        BackfillSource.PAYPAL,
+        datetime.date(2026, 1, 1),
+        datetime.date(2026, 1, 10),
+        window_days=4,
+    )
+
+    assert [call.args for call in fetcher.call_args_list] == [
+        (datetime.date(2026, 1, 1), datetime.date(2026, 1, 4)),
+        (datetime.date(2026, 1, 5), datetime.date(2026, 1, 8)),
+        (datetime.date(2026, 1, 9), datetime.date(2026, 1, 10)),
+    ]
+    assert Transaction.objects.count() == 6
+
+    checkpoint = BackfillCheckpoint.objects.get()
+    assert checkpoint.last_completed_date == datetime.date(2026, 1, 10)
+    assert checkpoint.is_completed
+
+
+def test_backfill_resumes_from_checkpoint(fetcher):
+    fetcher.side_effect = [
+        fetcher.side_effect(datetime.date(2026, 1, 1), datetime.date(2026, 1, 4)),
+        ConnectionError("timeout"),
+    ]
+
+    with pytest.raises(ConnectionError):
+        backfill_transactions(
+            BackfillSource.PAYPAL,
+            datetime.date(2026, 1, 1),
+            datetime.date(2026, 1, 10),
+            window_days=4,
+        )
+
+    checkpoint = BackfillCheckpoint.objects.get()
+    assert checkpoint.last_completed_date == datetime.date(2026, 1, 4)
+    assert Transaction.objects.count() == 2
+
+    fetcher.reset_mock(side_effect=True)
+    fetcher.return_value = []
+    backfill_transactions(
+        BackfillSource.PAYPAL,
+        datetime.date(2026, 1, 1),
+        datetime.date(2026, 1, 10),
+        window_days=4,
+    )
+
+    assert [call.args for call in fetcher.call_args_list] == [
+        (datetime.date(2026, 1, 5), datetime.date(2026, 1, 8)),
+        (datetime.date(2026, 1, 9), datetime.date(2026, 1, 10)),
+    ]
+
+
+def test_backfill_with_later_end_date_resumes_from_checkpoint(fetcher):
+    baker.make(
+        BackfillCheckpoint,
+        source=BackfillSource.PAYPAL,
+        start_date=datetime.date(2026, 1, 1),
+        end_date=datetime.date(2026, 1, 10),
+        last_completed_date=datetime.date(2026, 1, 8),
+    )
+
+    backfill_transactions(
+        BackfillSource.PAYPAL,
+        datetime.date(2026, 1, 1),
+        datetime.date(2026, 1, 12),
+        window_days=7,
+    )
+
+    assert [call.args for call in fetcher.call_args_list] == [
+        (datetime.date(2026, 1, 9), datetime.date(2026, 1, 12)),
+    ]
+    checkpoint = BackfillCheckpoint.objects.get()
+    assert checkpoint.end_date == datetime.date(2026, 1, 12)
+    assert checkpoint.last_completed_date == datetime.date(2026, 1, 12)
+
+
+def test_completed_backfill_is_not_fetched_again(fetcher):
+    baker.make(
+        BackfillCheckpoint,
+        source=BackfillSource.PAYPAL,
+        start_date=datetime.date(2026, 1, 1),
+        end_date=datetime.date(2026, 1, 10),
+        last_completed_date=datetime.date(2026, 1, 10),
+    )
+
+    fetched = backfill_transactions(
+        BackfillSource.PAYPAL, datetime.date(2026, 1, 1), datetime.date(2026, 1, 10)
+    )
+
+    assert fetched == 0
+    fetcher.assert_not_called()
+
+
+def test_restart_backfill_ignores_checkpoint(fetcher):
+    baker.make(
+        BackfillCheckpoint,
+        source=BackfillSource.PAYPAL,
+        start_date=datetime.date(2026, 1, 1),
+        end_date=datetime.date(2026, 1, 10),
+        last_completed_date=datetime.date(2026, 1, 10),
+    )
+
+    backfill_transactions(
+        BackfillSource.PAYPAL,
+        datetime.date(2026, 1, 1),
+        datetime.date(2026, 1, 10),
+        restart=True,
+    )
+
+    assert fetcher.call_args_list[0].args == (
+        datetime.date(2026, 1, 1),
+        datetime.date(2026, 1, 7),
+    )
+
+
+def test_backfill_ignores_existing_transactions(fetcher, bank_account):
+    baker.make(Transaction, reference="ref-2026-01-01", bank_account=bank_account)
+
+    backfill_transactions(
+        BackfillSource.PAYPAL, datetime.date(2026, 1, 1), datetime.date(2026, 1, 2)
+    )
+
+    assert set(Transaction.objects.values_list("reference", flat=True)) == {
+        "ref-2026-01-01",
+        "ref-2026-01-02",
+    }
@@ -0,0 +1,114 @@
+import datetime
+import decimal
+import json
+
+import pytest
+
+from thebook.webhooks.extraction import (
+    Field,
+    JSONDecodeError,
+    Schema,
+    as_decimal,
+    date_parser,
+)
+from thebook.webhooks.openpix.schemas import webhook_event_schema
+from thebook.webhooks.paypal.schemas import transaction_detail_schema
+
+
+@pytest.fixture
+def schema():
+    return Schema(
+        "Payment",
+        id=Field("id || alternativeId"),
+        amount=Field("amount.value", convert=as_decimal),
+        date=Field("date", convert=date_parser("%Y-%m-%d")),
+        description=Field("description", default=""),
+    )
+
+
+def test_extract_typed_record(schema):
+    record = schema.extract(
+        {"id": "1", "amount": {"value": "10.50"}, "date": "2026-01-31"}
+    )
+
+    assert record.id == "1"
+    assert record.amount == decimal.Decimal("10.50")
+    assert record.date == datetime.date(2026, 1, 31)
+    assert record.description == ""
+
+
+def test_missing_values_are_not_converted(schema):
+    record = schema.extract({"alternativeId": "2"})
+
+    assert record == ("2", None, None, "")
+
+
+def test_extract_many(schema):
+    assert [
+        record.id for record in schema.extract_many([{"id": "1"}, {"id": "2"}])
+    ] == [
+        "1",
+        "2",
+    ]
+    assert schema.extract_many(None) == []
+
+
+def test_loads_str_and_bytes(schema):
+    payload = json.dumps({"id": "1", "description": "Payment"})
+
+    assert schema.loads(payload) == schema.loads(payload.encode())
+    assert schema.loads(payload).description == "Payment"
+
+
+def test_loads_invalid_json(schema):
+    with pytest.raises(JSONDecodeError):
+        schema.loads("invalid")
+
+    # Still caught by code handling the standard library exception
+    with pytest.raises(json.decoder.JSONDecodeError):
+        schema.loads("invalid")
+
+
+def test_openpix_webhook_event_from_charge_or_pix():
+    charge = webhook_event_schema.extract(
+        {
+            "event": "OPENPIX:TRANSACTION_RECEIVED",
+            "pix": {
+                "charge": {
+                    "value": 1000,
+                    "transactionID": "charge-id",
+                    "payer": {"name": "Payer", "taxID": {"taxID": "123"}},
+                }
+            },
+        }
+    )
+    pix = webhook_event_schema.extract(
+        {
+            "event": "OPENPIX:TRANSACTION_RECEIVED",
+            "pix": {"value": 500, "transactionID": "pix-id"},
+        }
+    )
+
+    assert (charge.value, charge.reference, charge.payer_tax_id) == (
+        1000,
+        "charge-id",
+        "123",
+    )
+    assert (pix.value, pix.reference, pix.payer_name) == (500, "pix-id", "")
+
+
+def test_paypal_transaction_detail():
+    record = transaction_detail_schema.extract(
+        {
+            "transaction_info": {
+                "transaction_id": "ABC",
+                "transaction_amount": {"currency_code": "BRL", "value": "25.00"},
+                "transaction_initiation_date": "2026-03-01T10:00:00Z",
+            }
+        }
+    )
+
+    assert record.transaction_id == "ABC"
+    assert record.amount == decimal.Decimal("25.00")
+    assert record.fee_amount == decimal.Decimal("0")
+    assert record.date == datetime.date(2026, 3, 1)
@@ -102,6 +102,24 @@ def test_when_received_store_body_and_headers(db, client):
     ).exists()
 
 
+def test_when_received_payload_is_not_processed_inline(db, client, mocker):
+    process = mocker.patch.object(OpenPixWebhookPayload, "process")
+
+    response = client.post(
+        reverse("webhooks:openpix-webhook"),
+        {"event": "OPENPIX:TRANSACTION_RECEIVED"},
+        headers={
+            "X-OpenPix-Signature": "openpix-signature-value",
+            "X-TheBook-Token": "thebook-token",
+        },
+        content_type="application/json",
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    process.assert_not_called()
+    assert OpenPixWebhookPayload.objects.get().status == ProcessingStatus.RECEIVED
+
+
 def test_if_content_not_valid_json_set_as_unparsable(db, client):
     thebook_token = "thebook-unparsable"
     webhook_payload = "unparsable content"
@@ -120,6 +138,8 @@ def test_if_content_not_valid_json_set_as_unparsable(db, client):
         thebook_token=thebook_token, payload=webhook_payload
     ).exists()
 
+    OpenPixWebhookPayload.objects.process_received_payloads()
+
     openpix_webhook_payload = OpenPixWebhookPayload.objects.get(
         thebook_token=thebook_token, payload=webhook_payload
     )
@@ -0,0 +1,157 @@
+import datetime
+import json
+
+import pytest
+from freezegun import freeze_time
+from model_bakery import baker
+
+from django.core.management import call_command
+
+from thebook.bookkeeping.models import Transaction
+from thebook.webhooks.constants import (
+    MAX_PROCESSING_ATTEMPTS,
+    PROCESSING_TIMEOUT_SECONDS,
+    RETRY_BACKOFF_SECONDS,
+)
+from thebook.webhooks.models import (
+    OpenPixWebhookPayload,
+    PaypalWebhookPayload,
+    ProcessingStatus,
+)
+
+OPENPIX_PAYLOAD = {
+    "event": "OPENPIX:TRANSACTION_RECEIVED",
+    "pix": {
+        "value": 8500,
+        "time": "2026-02-08T15:00:13.000Z",
+        "transactionID": "01KGNW1EDAG37C10WDY1759ZED",
+    },
+}
+
+
+def test_process_next_processes_oldest_ready_payload(db):
+    first_payload = baker.make(
+        OpenPixWebhookPayload, payload=json.dumps(OPENPIX_PAYLOAD)
+    )
+    baker.make(OpenPixWebhookPayload, payload="unparsable")
+
+    processed_payload = OpenPixWebhookPayload.objects.process_next()
+
+    assert processed_payload == first_payload
+    first_payload.refresh_from_db()
+    assert first_payload.status == ProcessingStatus.PROCESSED
+    assert Transaction.objects.filter(reference="01KGNW1EDAG37C10WDY1759ZED").exists()
+
+
+def test_process_next_without_ready_payloads(db):
+    baker.make(OpenPixWebhookPayload, status=ProcessingStatus.PROCESSED)
+    baker.make(
+        OpenPixWebhookPayload,
+        available_at=datetime.datetime(2100, 1, 1, tzinfo=datetime.timezone.utc),
+    )
+
+    assert OpenPixWebhookPayload.objects.process_next() is None
+
+
+@freeze_time("2026-02-10 12:00:00")
+def test_claim_next_marks_payload_as_processing(db):
+    payload = baker.make(PaypalWebhookPayload)
+
+    claimed_payload = PaypalWebhookPayload.objects.claim_next()
+
+    assert claimed_payload == payload
+    assert claimed_payload.status == ProcessingStatus.PROCESSING
+    assert claimed_payload.available_at == datetime.datetime(
+        2026, 2, 10, 12, 0, tzinfo=datetime.timezone.utc
+    ) + datetime.timedelta(seconds=PROCESSING_TIMEOUT_SECONDS)
+    assert PaypalWebhookPayload.objects.claim_next() is None
+
+
+def test_claim_next_reclaims_payloads_of_dead_workers(db):
+    with freeze_time("2026-02-10 12:00:00"):
+        payload = baker.make(PaypalWebhookPayload)
+        PaypalWebhookPayload.objects.claim_next()
+
+    with freeze_time("2026-02-10 12:00:00") as frozen_time:
+        frozen_time.tick(datetime.timedelta(seconds=PROCESSING_TIMEOUT_SECONDS))
+
+        assert PaypalWebhookPayload.objects.claim_next() == payload
+
+
+def test_payload_not_processed_is_retried(db, mocker):
+    mocker.patch.object(PaypalWebhookPayload, "process")
+    payload = baker.make(PaypalWebhookPayload)
+
+    PaypalWebhookPayload.objects.process_next()
+
+    payload.refresh_from_db()
+    assert payload.status == ProcessingStatus.RECEIVED
+    assert payload.attempts == 1
+    assert payload.last_error == "Payload was not processed"
+
+
+@freeze_time("2026-02-10 12:00:00")
+def test_failed_processing_is_retried_with_backoff(db, mocker):
+    mocker.patch.object(
+        PaypalWebhookPayload, "process", side_effect=ConnectionError("PayPal is down")
+    )
+    payload = baker.make(PaypalWebhookPayload)
+
+    PaypalWebhookPayload.objects.process_next()
+
+    payload.refresh_from_db()
+    assert payload.status == ProcessingStatus.RECEIVED
+    assert payload.attempts == 1
+    assert payload.last_error == "PayPal is down"
+    assert payload.available_at == datetime.datetime(
+        2026, 2, 10, 12, 0, tzinfo=datetime.timezone.utc
+    ) + datetime.timedelta(seconds=RETRY_BACKOFF_SECONDS)
+    assert PaypalWebhookPayload.objects.process_next() is None
+
+
+def test_payload_fails_after_max_attempts(db, mocker):
+    mocker.patch.object(
+        PaypalWebhookPayload, "process", side_effect=ConnectionError("PayPal is down")
+    )
+    payload = baker.make(PaypalWebhookPayload, attempts=MAX_PROCESSING_ATTEMPTS - 1)
+
+    PaypalWebhookPayload.objects.process_next()
+
+    payload.refresh_from_db()
+    assert payload.status == ProcessingStatus.FAILED
+    assert payload.attempts == MAX_PROCESSING_ATTEMPTS
+
+
+def test_failed_processing_rolls_back_its_changes(db, mocker):
+    def process(payload):
+        Transaction.objects.create(
+            reference="partial",
+            date=datetime.date(2026, 2, 10),
+            amount=1,
+            bank_account=baker.make("bookkeeping.BankAccount"),
+            created_by=baker.make("users.User"),
+        )
+        raise ValueError("Invalid payload")
+
+    mocker.patch.object(OpenPixWebhookPayload, "process", process)
+    baker.make(OpenPixWebhookPayload)
+
+    OpenPixWebhookPayload.objects.process_next()
+
+    assert not Transaction.objects.filter(reference="partial").exists()
+
+
+def test_process_webhook_payloads_command(db, mocker):
+    baker.make(OpenPixWebhookPayload, payload=json.dumps(OPENPIX_PAYLOAD))
+    baker.make(OpenPixWebhookPayload, payload="unparsable")
+    paypal_process = mocker.patch.object(PaypalWebhookPayload, "process")
+    baker.make(PaypalWebhookPayload, status=ProcessingStatus.DUPLICATED)
+
+    call_command("process_webhook_payloads")
+
+    assert not OpenPixWebhookPayload.objects.ready().exists()
+    assert set(OpenPixWebhookPayload.objects.values_list("status", flat=True)) == {
+        ProcessingStatus.PROCESSED,
+        ProcessingStatus.UNPARSABLE,
+    }
+    paypal_process.assert_not_called()
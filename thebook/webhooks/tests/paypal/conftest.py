@@ -0,0 +1,10 @@
+import pytest
+
+from thebook.webhooks.paypal.client import paypal_client
+
+
+@pytest.fixture(autouse=True)
+def reset_paypal_client():
+    paypal_client.reset()
+    yield
+    paypal_client.reset()
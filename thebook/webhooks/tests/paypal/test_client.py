@@ -0,0 +1,165 @@
+import orjson
+import pytest
+import responses
+from freezegun import freeze_time
+
+from django.conf import settings
+
+from thebook.webhooks.paypal.client import PayPalClient
+
+OAUTH_URL = f"{settings.PAYPAL_API_BASE_URL}/v1/oauth2/token"
+SUBSCRIPTION_URL = (
+    f"{settings.PAYPAL_API_BASE_URL}/v1/billing/subscriptions/I-AAAAAAAAAAAA"
+)
+
+
+@pytest.fixture
+def client():
+    return PayPalClient()
+
+
+@responses.activate
+def test_access_token_is_reused_until_it_expires(client):
+    responses.add(
+        responses.POST,
+        OAUTH_URL,
+        json={"access_token": "token-1", "expires_in": 3600},
+    )
+
+    with freeze_time("2026-02-10 12:00:00") as frozen_time:
+        assert client.get_access_token() == "token-1"
+        assert client.get_access_token() == "token-1"
+        assert len(responses.calls) == 1
+
+        frozen_time.tick(3600 - PayPalClient.TOKEN_EXPIRATION_MARGIN)
+        client.get_access_token()
+        assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_access_token_without_expiration_is_not_reused(client):
+    responses.add(responses.POST, OAUTH_URL, json={"access_token": "token-1"})
+
+    client.get_access_token()
+    client.get_access_token()
+
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_subscriptions_are_cached(client):
+    responses.add(
+        responses.POST,
+        OAUTH_URL,
+        json={"access_token": "token-1", "expires_in": 32400},
+    )
+    responses.add(responses.GET, SUBSCRIPTION_URL, json={"id": "I-AAAAAAAAAAAA"})
+
+    with freeze_time("2026-02-10 12:00:00") as frozen_time:
+        for _ in range(3):
+            assert client.get_subscription("I-AAAAAAAAAAAA") == {"id": "I-AAAAAAAAAAAA"}
+        assert [call.request.method for call in responses.calls] == ["POST", "GET"]
+
+        frozen_time.tick(PayPalClient.SUBSCRIPTION_CACHE_TTL)
+        client.get_subscription("I-AAAAAAAAAAAA")
+        assert [call.request.method for call in responses.calls] == [
+            "POST",
+            "GET",
+            "GET",
+        ]
+
+
+@responses.activate
+def test_expired_subscriptions_are_evicted_when_caching(client):
+    responses.add(
+        responses.POST,
+        OAUTH_URL,
+        json={"access_token": "token-1", "expires_in": 32400},
+    )
+    responses.add(
+        responses.GET,
+        f"{settings.PAYPAL_API_BASE_URL}/v1/billing/subscriptions/I-BBBBBBBBBBBB",
+        json={"id": "I-BBBBBBBBBBBB"},
+    )
+    responses.add(responses.GET, SUBSCRIPTION_URL, json={"id": "I-AAAAAAAAAAAA"})
+
+    with freeze_time("2026-02-10 12:00:00") as frozen_time:
+        client.get_subscription("I-BBBBBBBBBBBB")
+
+        frozen_time.tick(PayPalClient.SUBSCRIPTION_CACHE_TTL)
+        client.get_subscription("I-AAAAAAAAAAAA")
+
+    assert list(client._subscriptions) == ["I-AAAAAAAAAAAA"]
+
+
+@responses.activate
+def test_subscription_cache_drops_the_oldest_entries_when_full(client, mocker):
+    mocker.patch.object(PayPalClient, "SUBSCRIPTION_CACHE_MAX_SIZE", 2)
+    responses.add(
+        responses.POST,
+        OAUTH_URL,
+        json={"access_token": "token-1", "expires_in": 3600},
+    )
+    for billing_agreement_id in ("I-1", "I-2", "I-3"):
+        responses.add(
+            responses.GET,
+            f"{settings.PAYPAL_API_BASE_URL}/v1/billing/subscriptions/{billing_agreement_id}",
+            json={"id": billing_agreement_id},
+        )
+
+    client.get_subscription("I-1")
+    client.get_subscription("I-2")
+    client.get_subscription("I-3")
+
+    assert list(client._subscriptions) == ["I-2", "I-3"]
+
+
+@responses.activate
+def test_failed_subscription_lookups_are_not_cached(client):
+    responses.add(
+        responses.POST,
+        OAUTH_URL,
+        json={"access_token": "token-1", "expires_in": 3600},
+    )
+    responses.add(responses.GET, SUBSCRIPTION_URL, status=404, json={})
+
+    client.get_subscription("I-AAAAAAAAAAAA")
+    client.get_subscription("I-AAAAAAAAAAAA")
+
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+def test_rejected_access_token_is_renewed(client):
+    responses.add(
+        responses.POST,
+        OAUTH_URL,
+        json={"access_token": "token-1", "expires_in": 3600},
+    )
+    responses.add(
+        responses.POST,
+        OAUTH_URL,
+        json={"access_token": "token-2", "expires_in": 3600},
+    )
+    responses.add(responses.GET, SUBSCRIPTION_URL, status=401, json={})
+    responses.add(responses.GET, SUBSCRIPTION_URL, json={"id": "I-AAAAAAAAAAAA"})
+
+    subscription = client.get_subscription("I-AAAAAAAAAAAA")
+
+    assert subscription == {"id": "I-AAAAAAAAAAAA"}
+    assert responses.calls[3].request.headers["Authorization"] == "Bearer token-2"
+
+
+def test_requests_have_timeout(client, mocker, settings):
+    settings.PAYPAL_API_TIMEOUT = 3
+    response = mocker.Mock(
+        status_code=200,
+        content=orjson.dumps({"access_token": "token-1", "expires_in": 3600}),
+    )
+    post = mocker.patch.object(client.session, "post", return_value=response)
+    get = mocker.patch.object(client.session, "get", return_value=response)
+
+    client.search_transactions({})
+
+    assert post.call_args.kwargs["timeout"] == 3
+    assert get.call_args.kwargs["timeout"] == 3
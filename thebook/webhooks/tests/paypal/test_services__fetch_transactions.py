@@ -1,10 +1,13 @@
+import copy
 import datetime
+import json
 from decimal import Decimal
 from pathlib import Path
 
 import pytest
 import responses
 from model_bakery import baker
+from responses import matchers
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -395,3 +398,124 @@ def test_fetch_usd_transaction(
     )
 
     assert len(transactions) == 0
+
+
+@responses.activate
+def test_fetch_transactions_walks_all_pages(
+    db,
+    paypal_bank_account,
+    user,
+    bank_fee_category,
+    bank_account_transfer_category,
+    paypal__oauth2_token,
+    reporting_transactions__one_common_transaction,
+    reporting_transactions__one_bank_account_transfer_transaction,
+):
+    url = f"{settings.PAYPAL_API_BASE_URL}/v1/reporting/transactions"
+    responses.add(
+        responses.POST,
+        f"{settings.PAYPAL_API_BASE_URL}/v1/oauth2/token",
+        json=paypal__oauth2_token,
+    )
+    first_page = json.loads(reporting_transactions__one_common_transaction)
+    first_page["total_pages"] = 2
+    responses.add(
+        responses.GET,
+        url,
+        json=first_page,
+        match=[matchers.query_param_matcher({"page": "1"}, strict_match=False)],
+    )
+    responses.add(
+        responses.GET,
+        url,
+        body=reporting_transactions__one_bank_account_transfer_transaction,
+        content_type="application/json",
+        match=[matchers.query_param_matcher({"page": "2"}, strict_match=False)],
+    )
+
+    transactions = fetch_transactions(
+        start_date=datetime.date(2026, 2, 1), end_date=datetime.date(2026, 3, 10)
+    )
+
+    assert [transaction.reference for transaction in transactions] == [
+        "3DJ715755L433650N",
+        "3DJ715755L433650N-T",
+        "70Y35009P3781470Y",
+    ]
+
+
+@responses.activate
+def test_fetch_transactions_splits_date_range_in_windows(
+    db,
+    paypal_bank_account,
+    user,
+    bank_fee_category,
+    paypal__oauth2_token,
+):
+    url = f"{settings.PAYPAL_API_BASE_URL}/v1/reporting/transactions"
+    responses.add(
+        responses.POST,
+        f"{settings.PAYPAL_API_BASE_URL}/v1/oauth2/token",
+        json=paypal__oauth2_token,
+    )
+    responses.add(
+        responses.GET, url, json={"transaction_details": [], "total_pages": 0}
+    )
+
+    fetch_transactions(
+        start_date=datetime.date(2026, 1, 1), end_date=datetime.date(2026, 3, 15)
+    )
+
+    windows = [
+        (call.request.params["start_date"], call.request.params["end_date"])
+        for call in responses.calls
+        if call.request.method == "GET"
+    ]
+    assert windows == [
+        ("2026-01-01T00:00:00-00:00", "2026-01-31T23:59:59-00:00"),
+        ("2026-02-01T00:00:00-00:00", "2026-03-03T23:59:59-00:00"),
+        ("2026-03-04T00:00:00-00:00", "2026-03-15T23:59:59-00:00"),
+    ]
+
+
+@responses.activate
+def test_fetch_transactions_looks_up_each_subscription_once(
+    db,
+    paypal_bank_account,
+    user,
+    bank_fee_category,
+    paypal__oauth2_token,
+    reporting_transactions__one_transaction,
+    paypal__brl_payload__subscription,
+):
+    responses.add(
+        responses.POST,
+        f"{settings.PAYPAL_API_BASE_URL}/v1/oauth2/token",
+        json=paypal__oauth2_token,
+    )
+    payload = json.loads(reporting_transactions__one_transaction)
+    transaction_detail = payload["transaction_details"][0]
+    second_transaction_detail = copy.deepcopy(transaction_detail)
+    second_transaction_detail["transaction_info"][
+        "transaction_id"
+    ] = "6EM753922G985452E"
+    payload["transaction_details"].append(second_transaction_detail)
+    responses.add(
+        responses.GET,
+        f"{settings.PAYPAL_API_BASE_URL}/v1/reporting/transactions",
+        json=payload,
+    )
+    subscription = responses.add(
+        responses.GET,
+        f"{settings.PAYPAL_API_BASE_URL}/v1/billing/subscriptions/I-BBBBBBBBBBBB",
+        body=paypal__brl_payload__subscription,
+        content_type="application/json",
+    )
+
+    transactions = fetch_transactions(
+        start_date=datetime.date(2026, 2, 1), end_date=datetime.date(2026, 2, 2)
+    )
+
+    assert len(transactions) == 4
+    assert transactions[2].description == "Bruce Wayne - L4AVQLJR8GMZY"
+    assert subscription.call_count == 1
@@ -38,13 +38,12 @@ class OpenPixWebhook(View):
             thebook_token=request.headers["X-TheBook-Token"],
             payload=request.body.decode("utf-8"),
         )
+        # Payload is processed by the process_webhook_payloads workers
         logger.info(
             "openpix.webhook.openpix_webhook_payload.created",
             id_=openpix_webhook_payload.id,
         )
 
-        openpix_webhook_payload.process()
-
         return HttpResponse(status=HTTPStatus.OK)
 
 
@@ -86,11 +85,10 @@ class PaypalWebhook(View):
             "payload": request.body.decode("utf-8"),
         }
         paypal_webhook_payload = PaypalWebhookPayload.objects.create(**webhook_data)
+        # Payload is processed by the process_webhook_payloads workers
         logger.info(
             "paypal.webhook.paypal_webhook_payload.created",
             id_=paypal_webhook_payload.id,
         )
 
-        paypal_webhook_payload.process()
-
         return HttpResponse(status=HTTPStatus.OK)